@@ -1,17 +1,73 @@
-import os
 import json
+import os
 import re
-from flask import Flask, render_template, request, Response, jsonify
-import google.generativeai as genai
+from flask import Flask, render_template, request, Response, jsonify, session
+from flask.json.provider import DefaultJSONProvider, JSONProvider
 from datetime import datetime
 import time
+import threading
+import secrets
+import base64
+import hmac
+from functools import wraps
 from dotenv import load_dotenv
 
-# 환경 변수 로드
-load_dotenv()
+from utils import serialization
+from utils.admission import AdmissionController, plan_capacity
+from utils.content_recommender import get_content_recommender
+from utils.content_search import build_search_url, get_catalog_search
+from utils.exporter import stream_user_export
+from utils.generation_control import AdaptiveGenerationController
+from utils.memory_accounting import memory_registry, parse_limits
+from utils.memory_manager import MemoryManager
+from utils.response_text import extract_response_keywords, extract_youtube_search, is_sentence_end
+from utils.metrics import metrics
+from utils.model_router import ModelRouter, close_stream, parse_model_costs, parse_model_tiers
+from utils.profiling import (
+    PROFILE_HEADER,
+    memory_tracker,
+    request_profiles,
+    sampling_profiler,
+    verify_profile_request,
+)
+from utils.scheduler import create_maintenance_scheduler
+from utils.write_behind import WriteBehindQueue
+from utils.security import get_security_manager
+from utils.tenant_quota import (
+    TenantScheduler,
+    create_quota_store,
+    estimate_tokens,
+    parse_facility_keys,
+    parse_tenant_policies,
+)
+from utils.text_processing import configure_fuzzy_matching, extract_emotions, is_content_request
+from utils.traffic_capture import FakeStreamingModel, TrafficRecorder
+
+
+class FastJSONProvider(JSONProvider):
+    """jsonify 응답을 공통 직렬화 계층(orjson 우선)으로 처리하는 JSON 프로바이더
+
+    sort_keys와 2칸 indent는 공통 계층에서 처리하고, 그 밖의 json.dumps/json.loads 인자가 있으면
+    인자가 무시되지 않도록 표준 json 모듈로 처리합니다.
+    """
+
+    def dumps(self, obj, **kwargs):
+        sort_keys = kwargs.pop('sort_keys', False)
+        indent = kwargs.pop('indent', None)
+        if not kwargs and indent in (None, 2):
+            return serialization.dumps(obj, pretty=indent is not None, sort_keys=sort_keys)
+        kwargs.setdefault('ensure_ascii', False)
+        kwargs.setdefault('default', DefaultJSONProvider.default)
+        return json.dumps(obj, sort_keys=sort_keys, indent=indent, **kwargs)
+
+    def loads(self, s, **kwargs):
+        if kwargs:
+            return json.loads(s, **kwargs)
+        return serialization.loads(s)
+
 
 app = Flask(__name__)
-app.secret_key = os.getenv('FLASK_SECRET_KEY', 'your-secret-key-change-this')
+app.json = FastJSONProvider(app)
 
 # CSP 헤더 설정을 위한 데코레이터
 @app.after_request
@@ -27,14 +83,6 @@ def add_security_headers(response):
     )
     return response
 
-# Google Gemini API 설정
-API_KEY = os.getenv('GEMINI_API_KEY', 'your-gemini-api-key-here')
-if API_KEY == 'your-gemini-api-key-here':
-    print("⚠️  경고: GEMINI_API_KEY가 설정되지 않았습니다. .env 파일을 확인하세요.")
-    print("   .env.example 파일을 참고하여 .env 파일을 생성하고 API 키를 설정하세요.")
-
-genai.configure(api_key=API_KEY)
-
 # 회상치료 AI 아바타 시스템 프롬프트 - 이모티콘 금지만 추가
 SYSTEM_PROMPT = """당신은 고령자, 특히 치매 예방과 정서 케어를 위한 회상치료 AI 아바타입니다.
 
@@ -76,172 +124,679 @@ SYSTEM_PROMPT = """당신은 고령자, 특히 치매 예방과 정서 케어를
 
 항상 존댓말을 사용하고, 따뜻하고 친근한 톤으로 대화하세요. 어르신의 감정과 기억을 소중히 여기며, 절대 서두르지 말고 천천히 대화를 이어가세요. 다시 한번 강조하지만 이모티콘은 절대 사용하지 마세요."""
 
-# 설정값들
-CONFIG = {
-    'MAX_HISTORY': int(os.getenv('MAX_CONVERSATION_HISTORY', 4)),
-    'RESPONSE_MAX_SENTENCES': int(os.getenv('RESPONSE_MAX_SENTENCES', 3)),
-    'STREAMING_DELAY': float(os.getenv('STREAMING_DELAY', 0.1)),
-    'AVATAR_IDLE_VIDEO': os.getenv('AVATAR_IDLE_VIDEO', 'avatar_idle.mp4'),
-    'AVATAR_SPEAKING_VIDEO': os.getenv('AVATAR_SPEAKING_VIDEO', 'avatar_speaking.mp4')
-}
-
-# Gemini 모델 초기화
-try:
-    model = genai.GenerativeModel('gemini-1.5-flash')
-    print("✅ Google Gemini 모델이 성공적으로 초기화되었습니다.")
-except Exception as e:
-    print(f"❌ Gemini 모델 초기화 실패: {e}")
-    model = None
+
+def load_config():
+    """환경 변수에서 설정값들을 읽습니다 (create_app()에서 .env를 읽은 뒤 호출)"""
+    return {
+        'MAX_HISTORY': int(os.getenv('MAX_CONVERSATION_HISTORY', 4)),
+        'MAX_OUTPUT_TOKENS': int(os.getenv('GEMINI_MAX_TOKENS', 500)),
+        'TEMPERATURE': float(os.getenv('GEMINI_TEMPERATURE', 0.7)),
+        'TOP_P': float(os.getenv('GEMINI_TOP_P', 0.8)),
+        'TOP_K': int(os.getenv('GEMINI_TOP_K', 40)),
+        'RESPONSE_MAX_SENTENCES': int(os.getenv('RESPONSE_MAX_SENTENCES', 3)),
+        'STREAMING_DELAY': float(os.getenv('STREAMING_DELAY', 0.1)),
+        'AVATAR_IDLE_VIDEO': os.getenv('AVATAR_IDLE_VIDEO', 'avatar_idle.mp4'),
+        'AVATAR_SPEAKING_VIDEO': os.getenv('AVATAR_SPEAKING_VIDEO', 'avatar_speaking.mp4'),
+        'MEMORY_DIR': os.getenv('MEMORY_DIR', 'memory_data'),
+        'SUMMARY_INTERVAL_TURNS': int(os.getenv('SUMMARY_INTERVAL_TURNS', 10)),
+        'SUMMARY_KEEP_RECENT': int(
+            os.getenv('SUMMARY_KEEP_RECENT', os.getenv('MAX_CONVERSATION_HISTORY', 4))
+        ),
+        'LLM_SUMMARY_ENABLED': os.getenv('LLM_SUMMARY_ENABLED', 'False').lower() == 'true',
+        'SCHEDULER_ENABLED': os.getenv('SCHEDULER_ENABLED', 'True').lower() == 'true',
+        'MEMORY_RETENTION_DAYS': int(os.getenv('MEMORY_RETENTION_DAYS', 365)),
+        'CLEANUP_INTERVAL_DAYS': int(os.getenv('CLEANUP_INTERVAL_DAYS', 30)),
+        'LOG_RETENTION_DAYS': int(os.getenv('LOG_RETENTION_DAYS', 30)),
+        'AUTO_BACKUP': os.getenv('AUTO_BACKUP', 'True').lower() == 'true',
+        'BACKUP_DIR': os.getenv('BACKUP_DIR', 'backups'),
+        'BACKUP_INTERVAL_HOURS': float(os.getenv('BACKUP_INTERVAL_HOURS', 24)),
+        'BACKUP_KEEP': int(os.getenv('BACKUP_KEEP', 7)),
+        'CLEANUP_BATCH_SIZE': int(os.getenv('CLEANUP_BATCH_SIZE', 100)),
+        'SCHEDULER_LOCK_FILE': os.getenv('SCHEDULER_LOCK_FILE', 'scheduler.lock'),
+        'SCHEDULER_STATE_FILE': os.getenv('SCHEDULER_STATE_FILE', 'scheduler_state.json'),
+        'SCHEDULER_TICK_SECONDS': float(os.getenv('SCHEDULER_TICK_SECONDS', 60)),
+        'WRITE_BEHIND_QUEUE_SIZE': int(os.getenv('WRITE_BEHIND_QUEUE_SIZE', 1000)),
+        'WRITE_BEHIND_FLUSH_INTERVAL': float(os.getenv('WRITE_BEHIND_FLUSH_INTERVAL', 0.2)),
+        'WRITE_BEHIND_RECOVERY_FILE': os.getenv(
+            'WRITE_BEHIND_RECOVERY_FILE', 'write_behind_recovery.ndjson'
+        ),
+        'WRITE_BEHIND_MAX_ATTEMPTS': int(os.getenv('WRITE_BEHIND_MAX_ATTEMPTS', 5)),
+        'MEMORY_FSYNC_POLICY': os.getenv('MEMORY_FSYNC_POLICY', 'never'),
+        'MEMORY_FSYNC_INTERVAL': float(os.getenv('MEMORY_FSYNC_INTERVAL', 1.0)),
+        'ARCHIVE_AFTER_DAYS': int(os.getenv('ARCHIVE_AFTER_DAYS', 30)),
+        'ARCHIVE_COMPRESSION': os.getenv('ARCHIVE_COMPRESSION') or None,
+        'MAX_MEMORY_SIZE_MB': float(os.getenv('MAX_MEMORY_SIZE_MB', 100)),
+        'SEMANTIC_INDEX_DIM': int(os.getenv('SEMANTIC_INDEX_DIM', 512)),
+        'RELATED_MEMORY_TURNS': int(os.getenv('RELATED_MEMORY_TURNS', 2)),
+        'FUZZY_MATCH_DISTANCE': int(os.getenv('FUZZY_MATCH_DISTANCE', 1)),
+        'FUZZY_MIN_TERM_LENGTH': int(os.getenv('FUZZY_MIN_TERM_LENGTH', 6)),
+        'REPORTS_DIR': os.getenv('REPORTS_DIR', 'reports'),
+        'MODEL_BACKEND': os.getenv('MODEL_BACKEND', 'gemini'),
+        'GEMINI_MODEL': os.getenv('GEMINI_MODEL', 'gemini-1.5-flash'),
+        'MODEL_TIERS': os.getenv('MODEL_TIERS', ''),
+        'MODEL_COSTS': os.getenv('MODEL_COSTS', ''),
+        'ROUTE_LONG_PROMPT_TOKENS': int(os.getenv('ROUTE_LONG_PROMPT_TOKENS', 1500)),
+        'ROUTE_LATENCY_BUDGET': float(os.getenv('ROUTE_LATENCY_BUDGET', 3.0)),
+        'MODEL_FAILURE_THRESHOLD': int(os.getenv('MODEL_FAILURE_THRESHOLD', 3)),
+        'MODEL_COOLDOWN_SECONDS': float(os.getenv('MODEL_COOLDOWN_SECONDS', 30)),
+        'FAKE_MODEL_CAPTURE': os.getenv('FAKE_MODEL_CAPTURE', ''),
+        'FAKE_MODEL_TIME_SCALE': float(os.getenv('FAKE_MODEL_TIME_SCALE', 1.0)),
+        'FAKE_MODEL_FAILURE_RATES': os.getenv('FAKE_MODEL_FAILURE_RATES', ''),
+        'TRAFFIC_CAPTURE_FILE': os.getenv('TRAFFIC_CAPTURE_FILE', ''),
+        'TRAFFIC_CAPTURE_SAMPLE_RATE': float(os.getenv('TRAFFIC_CAPTURE_SAMPLE_RATE', 1.0)),
+        'ADMIN_TOKEN': os.getenv('ADMIN_TOKEN', ''),
+        'PROFILE_SIGNING_KEY': os.getenv('PROFILE_SIGNING_KEY') or os.getenv('ADMIN_TOKEN', ''),
+        'MEMORY_ACCOUNTING_INTERVAL': float(os.getenv('MEMORY_ACCOUNTING_INTERVAL', 60)),
+        'MEMORY_SOFT_LIMIT_ENTRIES': os.getenv(
+            'MEMORY_SOFT_LIMIT_ENTRIES', 'rate_limit_cache=50000,blocked_ips=100000'
+        ),
+        'MEMORY_SOFT_LIMIT_MB': os.getenv('MEMORY_SOFT_LIMIT_MB', ''),
+        'ADMISSION_ENABLED': os.getenv('ADMISSION_ENABLED', 'True').lower() == 'true',
+        'ADMISSION_WORKER_THREADS': int(os.getenv('ADMISSION_WORKER_THREADS', 16)),
+        'ADMISSION_RESERVED_THREADS': int(os.getenv('ADMISSION_RESERVED_THREADS', 2)),
+        'ADMISSION_MAX_STREAMS': int(os.getenv('ADMISSION_MAX_STREAMS', 0)),
+        'ADMISSION_QUEUE_SIZE': int(os.getenv('ADMISSION_QUEUE_SIZE', 4)),
+        'ADMISSION_QUEUE_TIMEOUT': float(os.getenv('ADMISSION_QUEUE_TIMEOUT', 2.0)),
+        'ADMISSION_MIN_RETRY_AFTER': int(os.getenv('ADMISSION_MIN_RETRY_AFTER', 2)),
+        'TENANT_QUOTAS': os.getenv('TENANT_QUOTAS', 'default=1:0'),
+        'FACILITY_API_KEYS': os.getenv('FACILITY_API_KEYS', ''),
+        'UPSTREAM_TPM_LIMIT': int(os.getenv('UPSTREAM_TPM_LIMIT', 0)),
+        'UPSTREAM_MAX_INFLIGHT': int(os.getenv('UPSTREAM_MAX_INFLIGHT', 0)),
+        'TENANT_QUEUE_TIMEOUT': float(os.getenv('TENANT_QUEUE_TIMEOUT', 5.0)),
+        'QUOTA_REDIS_URL': os.getenv('QUOTA_REDIS_URL', ''),
+        'QUOTA_STATE_FILE': os.getenv('QUOTA_STATE_FILE', ''),
+        'TOKEN_CHARS_PER_TOKEN': float(os.getenv('TOKEN_CHARS_PER_TOKEN', 2.0)),
+        'ADAPTIVE_GENERATION_ENABLED': os.getenv('ADAPTIVE_GENERATION_ENABLED', 'True').lower()
+        == 'true',
+        'ADAPTIVE_PERCENTILE': float(os.getenv('ADAPTIVE_PERCENTILE', 0.9)),
+        'ADAPTIVE_HEADROOM': float(os.getenv('ADAPTIVE_HEADROOM', 1.2)),
+        'ADAPTIVE_MIN_OUTPUT_TOKENS': int(os.getenv('ADAPTIVE_MIN_OUTPUT_TOKENS', 64)),
+        'ADAPTIVE_LATENCY_TARGET': float(os.getenv('ADAPTIVE_LATENCY_TARGET', 2.0)),
+        'ADAPTIVE_CONTROL_RATE': float(os.getenv('ADAPTIVE_CONTROL_RATE', 0.05)),
+    }
+
+
+# 설정값들 (create_app()에서 채움)
+CONFIG = {}
+
+# 서비스 객체 (import 시점이 아니라 create_app()에서 만들고 시작함)
+genai = None
+model = None
+traffic_recorder = None
+memory_manager = None
+write_behind = None
+scheduler = None
+security_manager = None
+catalog_search = None
+chat_admission = None
+tenant_scheduler = None
+facility_keys = {}  # 시설 API 키 -> 시설 (FACILITY_API_KEYS)
+generation_controller = None
+_init_lock = threading.Lock()
+_initialized = False
 
 # 대화 기록을 저장할 리스트
 conversation_history = []
 
-def extract_youtube_search(text):
-    """응답에서 유튜브 검색어를 추출하는 함수"""
-    patterns = [
-        r"유튜브에서\s*['\"]([^'\"]+)['\"].*?검색",
-        r"유튜브에서\s*['\"]([^'\"]+)['\"]",
-        r"'([^']+)'\s*(?:을|를)?\s*검색",
-        r"검색어:\s*['\"]([^'\"]+)['\"]"
-    ]
-    
-    for pattern in patterns:
-        matches = re.findall(pattern, text)
-        if matches:
-            return matches[0].strip()
-    return None
-
-def extract_memory_keywords(text):
-    """대화에서 추억 관련 키워드를 추출하는 함수"""
-    memory_keywords = {
-        '음악': ['노래', '음악', '가요', '곡', '멜로디', '가사'],
-        '장소': ['고향', '집', '마을', '학교', '시장', '교회'],
-        '음식': ['음식', '요리', '반찬', '간식', '떡', '김치'],
-        '가족': ['어머니', '아버지', '자식', '형제', '가족', '부모'],
-        '시대': ['어릴때', '젊을때', '옛날', '그때', '시절']
-    }
-    
-    found_keywords = {}
-    for category, keywords in memory_keywords.items():
-        for keyword in keywords:
-            if keyword in text:
-                if category not in found_keywords:
-                    found_keywords[category] = []
-                found_keywords[category].append(keyword)
+
+def create_model():
+    """모델 계층별 백엔드를 만들어 라우터로 묶습니다 (MODEL_BACKEND=fake면 기록된 토큰 타이밍을 재현하는 가짜 모델)
+
+    MODEL_TIERS가 비어 있으면 GEMINI_MODEL 하나만 씁니다.
+    google.generativeai는 불러오는 데 시간이 오래 걸리므로 Gemini 백엔드를 쓸 때만 여기서 불러옵니다.
+    """
+    global genai
+    try:
+        tiers = parse_model_tiers(CONFIG['MODEL_TIERS']) or [CONFIG['GEMINI_MODEL']]
+        if CONFIG['MODEL_BACKEND'] == 'fake':
+            failure_rates = parse_limits(CONFIG['FAKE_MODEL_FAILURE_RATES'])
+            backends = {
+                name: FakeStreamingModel.from_capture(
+                    CONFIG['FAKE_MODEL_CAPTURE'] or None,
+                    CONFIG['FAKE_MODEL_TIME_SCALE'],
+                    failure_rates.get(name, 0.0),
+                )
+                for name in tiers
+            }
+            print(
+                f"🧪 가짜 모델 백엔드를 사용합니다 (응답 모양 {len(backends[tiers[0]].records)}개, "
+                f"계층 {', '.join(tiers)})."
+            )
+        else:
+            import google.generativeai
+
+            genai = google.generativeai
+            api_key = os.getenv('GEMINI_API_KEY', 'your-gemini-api-key-here')
+            if api_key == 'your-gemini-api-key-here':
+                print("⚠️  경고: GEMINI_API_KEY가 설정되지 않았습니다. .env 파일을 확인하세요.")
+                print("   .env.example 파일을 참고하여 .env 파일을 생성하고 API 키를 설정하세요.")
+            genai.configure(api_key=api_key)
+            backends = {name: genai.GenerativeModel(name) for name in tiers}
+            print(f"✅ Google Gemini 모델이 성공적으로 초기화되었습니다 ({', '.join(tiers)}).")
+        return ModelRouter(
+            backends,
+            costs=parse_model_costs(CONFIG['MODEL_COSTS']),
+            long_prompt_tokens=CONFIG['ROUTE_LONG_PROMPT_TOKENS'],
+            latency_budget=CONFIG['ROUTE_LATENCY_BUDGET'],
+            failure_threshold=CONFIG['MODEL_FAILURE_THRESHOLD'],
+            cooldown=CONFIG['MODEL_COOLDOWN_SECONDS'],
+        )
+    except Exception as e:
+        print(f"❌ Gemini 모델 초기화 실패: {e}")
+        return None
+
+
+def generation_config(**kwargs):
+    """모델 생성 설정 (가짜 모델 백엔드는 google.generativeai 없이 사전으로 받음)"""
+    if genai is None:
+        return kwargs
+    return genai.types.GenerationConfig(**kwargs)
+
+
+def trim_conversation_history(max_entries):
+    """대화 기록을 최근 max_entries개만 남기고 지운 개수를 반환합니다"""
+    removed = max(len(conversation_history) - max_entries, 0)
+    if removed:
+        del conversation_history[:removed]
+    return removed
+
+
+def register_memory_structures():
+    """프로세스 메모리에 오래 남는 자료구조를 크기 집계에 등록합니다 (메트릭과 /admin/memory, 소프트 한도)"""
+    memory_registry.register(
+        'conversation_history',
+        lambda: conversation_history,
+        trim_conversation_history,
+        description='전역 대화 기록',
+    )
+    memory_registry.register(
+        'rate_limit_cache',
+        lambda: security_manager.rate_limit_cache,
+        security_manager.prune_rate_limit_cache,
+        description='IP별 요청 시각 기록',
+    )
+    memory_registry.register(
+        'blocked_ips', lambda: security_manager.blocked_ips, description='차단 IP 목록'
+    )
+    memory_registry.register(
+        'user_thread_locks',
+        usage=lambda sample: memory_manager.locks.memory_usage(sample),
+        description='사용자별 스레드 잠금 (보유 중일 수 있어 경고만 함)',
+    )
+    memory_registry.register(
+        'write_behind_pending',
+        usage=lambda sample: write_behind.memory_usage(sample),
+        description='저장 대기 중인 대화',
+    )
+    if memory_manager.semantic_index:
+        memory_registry.register(
+            'semantic_index_cache',
+            usage=lambda sample: memory_manager.semantic_index.memory_usage(sample),
+            description='사용자별 유사도 검색 벡터 캐시',
+        )
+    memory_registry.register(
+        'catalog_search_cache',
+        usage=lambda sample: catalog_search.memory_usage(sample),
+        description='카탈로그 검색 결과 캐시',
+    )
+    memory_registry.register(
+        'content_catalog',
+        lambda: get_content_recommender().content_database,
+        description='추천 콘텐츠 카탈로그',
+    )
+    memory_registry.register(
+        'request_profiles',
+        usage=lambda sample: request_profiles.memory_usage(sample),
+        description='요청별 cProfile 결과',
+    )
+    memory_registry.set_limits(
+        parse_limits(CONFIG['MEMORY_SOFT_LIMIT_ENTRIES']),
+        parse_limits(CONFIG['MEMORY_SOFT_LIMIT_MB'], 1024 * 1024),
+    )
+
+
+def create_app():
+    """설정을 읽고 서비스 객체를 만들어 시작한 뒤 Flask 앱을 반환합니다 (여러 번 호출해도 한 번만 초기화)
+
+    모듈을 불러오기만 해서는 모델 연결, 저장소 디렉토리 생성, 백그라운드 스레드 시작이 일어나지 않습니다.
+    gunicorn은 'app:create_app()'으로, 개발 서버는 python app.py로 실행하면 이 함수가 호출됩니다.
+    """
+    global model, traffic_recorder, memory_manager, write_behind, scheduler, security_manager
+    global catalog_search
+    global chat_admission, tenant_scheduler, facility_keys, generation_controller, _initialized
+    with _init_lock:
+        if _initialized:
+            return app
+
+        load_dotenv()
+        CONFIG.update(load_config())
+        app.secret_key = os.getenv('FLASK_SECRET_KEY', 'your-secret-key-change-this')
+
+        # 음성 인식 오류를 고려한 키워드 근사 매칭 설정
+        configure_fuzzy_matching(CONFIG['FUZZY_MATCH_DISTANCE'], CONFIG['FUZZY_MIN_TERM_LENGTH'])
+        model = create_model()
+        security_manager = get_security_manager()
+        catalog_search = get_catalog_search()
+
+        # /chat 동시 스트림 제한 (나머지 워커 스레드는 /health와 정적 경로용으로 남겨 둠)
+        if CONFIG['ADMISSION_ENABLED']:
+            chat_admission = AdmissionController(
+                'chat',
+                plan_capacity(
+                    CONFIG['ADMISSION_WORKER_THREADS'],
+                    CONFIG['ADMISSION_RESERVED_THREADS'],
+                    CONFIG['ADMISSION_QUEUE_SIZE'],
+                    CONFIG['ADMISSION_MAX_STREAMS'],
+                ),
+                max_queue=CONFIG['ADMISSION_QUEUE_SIZE'],
+                queue_timeout=CONFIG['ADMISSION_QUEUE_TIMEOUT'],
+                min_retry_after=CONFIG['ADMISSION_MIN_RETRY_AFTER'],
+            )
+
+        # 시설별 분당 토큰 예산과 공정 대기열 (사용량은 Redis 또는 로컬 잠금 파일로 워커끼리 공유)
+        tenant_scheduler = TenantScheduler(
+            create_quota_store(CONFIG['QUOTA_REDIS_URL'], CONFIG['QUOTA_STATE_FILE']),
+            parse_tenant_policies(CONFIG['TENANT_QUOTAS']),
+            global_tpm=CONFIG['UPSTREAM_TPM_LIMIT'],
+            max_inflight=CONFIG['UPSTREAM_MAX_INFLIGHT'],
+            queue_timeout=CONFIG['TENANT_QUEUE_TIMEOUT'],
+            chars_per_token=CONFIG['TOKEN_CHARS_PER_TOKEN'],
+        )
+        facility_keys = parse_facility_keys(CONFIG['FACILITY_API_KEYS'])
+
+        # 문장당 토큰 분포와 지연/할당량 압력으로 max_output_tokens 조절 (끄면 모든 요청을 고정 설정으로 보냄)
+        generation_controller = AdaptiveGenerationController(
+            max_output_tokens=CONFIG['MAX_OUTPUT_TOKENS'],
+            max_sentences=CONFIG['RESPONSE_MAX_SENTENCES'],
+            sampling={
+                'temperature': CONFIG['TEMPERATURE'],
+                'top_p': CONFIG['TOP_P'],
+                'top_k': CONFIG['TOP_K'],
+            },
+            percentile=CONFIG['ADAPTIVE_PERCENTILE'],
+            headroom=CONFIG['ADAPTIVE_HEADROOM'],
+            min_output_tokens=CONFIG['ADAPTIVE_MIN_OUTPUT_TOKENS'],
+            latency_target=CONFIG['ADAPTIVE_LATENCY_TARGET'],
+            control_rate=CONFIG['ADAPTIVE_CONTROL_RATE']
+            if CONFIG['ADAPTIVE_GENERATION_ENABLED']
+            else 1.0,
+        )
+
+        # /chat 트래픽 기록 (용량 계획용, 원문 없이 길이와 타이밍만 기록)
+        if CONFIG['TRAFFIC_CAPTURE_FILE']:
+            traffic_recorder = TrafficRecorder(
+                CONFIG['TRAFFIC_CAPTURE_FILE'],
+                sample_rate=CONFIG['TRAFFIC_CAPTURE_SAMPLE_RATE'],
+                salt=os.getenv('TRAFFIC_CAPTURE_SALT') or app.secret_key,
+            )
+
+        # 사용자별 장기 기억 저장소 (누적 요약 + 최근 대화)
+        memory_manager = MemoryManager(
+            CONFIG['MEMORY_DIR'],
+            summary_interval=CONFIG['SUMMARY_INTERVAL_TURNS'],
+            summary_keep_recent=CONFIG['SUMMARY_KEEP_RECENT'],
+            archive_compression=CONFIG['ARCHIVE_COMPRESSION'],
+            semantic_index_dim=CONFIG['SEMANTIC_INDEX_DIM'],
+        )
+        memory_manager.on_summary_compacted = on_summary_compacted
+
+        # 완료된 대화를 사용자별로 모아 백그라운드에서 저장 (응답은 디스크 쓰기를 기다리지 않음)
+        write_behind = WriteBehindQueue(
+            memory_manager,
+            max_queue_size=CONFIG['WRITE_BEHIND_QUEUE_SIZE'],
+            flush_interval=CONFIG['WRITE_BEHIND_FLUSH_INTERVAL'],
+            fsync_policy=CONFIG['MEMORY_FSYNC_POLICY'],
+            fsync_interval=CONFIG['MEMORY_FSYNC_INTERVAL'],
+            recovery_path=CONFIG['WRITE_BEHIND_RECOVERY_FILE'] or None,
+            max_attempts=CONFIG['WRITE_BEHIND_MAX_ATTEMPTS'],
+        )
+        write_behind.start()
+
+        # 유지보수 작업 스케줄러 (여러 워커 중 리더 잠금을 얻은 하나만 실행)
+        scheduler = create_maintenance_scheduler(
+            memory_manager,
+            security_manager,
+            retention_days=CONFIG['MEMORY_RETENTION_DAYS'],
+            cleanup_interval_days=CONFIG['CLEANUP_INTERVAL_DAYS'],
+            log_retention_days=CONFIG['LOG_RETENTION_DAYS'],
+            archive_after_days=CONFIG['ARCHIVE_AFTER_DAYS'],
+            max_memory_size_mb=CONFIG['MAX_MEMORY_SIZE_MB'],
+            auto_backup=CONFIG['AUTO_BACKUP'],
+            backup_dir=CONFIG['BACKUP_DIR'],
+            backup_interval_hours=CONFIG['BACKUP_INTERVAL_HOURS'],
+            backup_keep=CONFIG['BACKUP_KEEP'],
+            batch_size=CONFIG['CLEANUP_BATCH_SIZE'],
+            lock_path=CONFIG['SCHEDULER_LOCK_FILE'],
+            state_path=CONFIG['SCHEDULER_STATE_FILE'],
+            tick_seconds=CONFIG['SCHEDULER_TICK_SECONDS'],
+        )
+        if CONFIG['SCHEDULER_ENABLED']:
+            scheduler.start()
+
+        register_memory_structures()
+        memory_registry.start(CONFIG['MEMORY_ACCOUNTING_INTERVAL'])
+        _initialized = True
+    return app
+
+
+@app.before_request
+def ensure_initialized():
+    """create_app() 없이 app:app으로 띄운 경우 첫 요청에서 초기화합니다"""
+    if not _initialized:
+        create_app()
+
+
+def is_admin_request():
+    """요청에 ADMIN_TOKEN과 같은 토큰(X-Admin-Token 또는 Bearer)이 있는지 확인합니다 (설정이 없으면 False)"""
+    token = CONFIG['ADMIN_TOKEN']
+    if not token:
+        return False
+    supplied = request.headers.get('X-Admin-Token', '')
+    authorization = request.headers.get('Authorization', '')
+    if not supplied and authorization.startswith('Bearer '):
+        supplied = authorization[len('Bearer ') :].strip()
+    return hmac.compare_digest(supplied.encode('utf-8'), token.encode('utf-8'))
+
+
+def admin_required(view):
+    """ADMIN_TOKEN과 같은 토큰(X-Admin-Token 또는 Bearer)이 있는 요청만 허용합니다
+
+    ADMIN_TOKEN이 설정되지 않으면 관리자 기능 전체가 비활성화되어 404를 반환합니다.
+    """
+
+    @wraps(view)
+    def wrapped(*args, **kwargs):
+        if not CONFIG['ADMIN_TOKEN']:
+            return jsonify({'error': '관리자 기능이 비활성화되어 있습니다.'}), 404
+        if not is_admin_request():
+            security_manager.log_security_event(
+                'admin_auth_failed', {'path': request.path}, request.remote_addr, priority=True
+            )
+            return jsonify({'error': '권한이 없습니다.'}), 403
+        return view(*args, **kwargs)
+
+    return wrapped
+
+
+# 배치 분석 작업 상태 (한 번에 하나의 작업만 실행)
+analytics_lock = threading.Lock()
+analytics_job = {'analyzer': None, 'result': None, 'error': None}
+
+
+def compress_summary(user_id, summary, compacted_turns):
+    """압축된 대화와 기존 요약문을 LLM으로 짧은 요약문으로 정리합니다"""
+    try:
+        summary_prompt = (
+            "다음은 어르신과 나눈 이전 대화입니다. 앞으로의 대화에 참고할 수 있도록 "
+            "어르신의 추억, 좋아하시는 것, 감정을 3문장 이내로 요약해 주세요.\n\n"
+        )
+        if summary.get('text'):
+            summary_prompt += f"[기존 요약]\n{summary['text']}\n\n"
+        for turn in compacted_turns:
+            summary_prompt += f"사용자: {turn.get('user', '')}\n아바타: {turn.get('assistant', '')}\n"
+
+        response = model.generate_content(
+            summary_prompt,
+            generation_config=generation_config(max_output_tokens=200, temperature=0.3),
+            route=model.route(kind='summary'),
+        )
+        if response.text:
+            memory_manager.update_summary_text(
+                user_id, response.text.strip(), summary['through_id']
+            )
+    except Exception as e:
+        print(f"요약 압축 오류: {e}")
+
+
+def on_summary_compacted(user_id, summary, compacted_turns):
+    """요약 압축 후 LLM 요약을 백그라운드에서 실행합니다"""
+    if CONFIG['LLM_SUMMARY_ENABLED'] and model:
+        threading.Thread(
+            target=compress_summary,
+            args=(user_id, dict(summary), list(compacted_turns)),
+            daemon=True,
+        ).start()
+
+
+def resolve_user_id(data):
+    """세션에서 사용자 ID를 결정합니다
+
+    요청의 user_id는 관리자 토큰으로 인증한 직원 요청일 때만 따릅니다 (다른 어르신의 요약과 대화를
+    프롬프트로 끌어오거나 그 기록에 대화를 덧붙이지 못하게 함).
+    """
+    identifier = str(data.get('user_id') or '').strip()
+    if identifier and is_admin_request():
+        return memory_manager.generate_user_id(identifier)
     
-    return found_keywords
+    if 'user_id' not in session:
+        session['user_id'] = memory_manager.generate_user_id(secrets.token_hex(16))
+    return session['user_id']
+
+
+def resolve_tenant():
+    """요청의 시설(테넌트)을 서버 쪽 상태로 결정합니다
+
+    시설 태블릿에 발급한 API 키(X-Facility-Key)가 FACILITY_API_KEYS에 있으면 그 시설로 정하고 세션에 기억하며,
+    키가 없으면 세션에 기억한 시설을, 둘 다 없으면 기본 시설을 씁니다. 요청 본문이나 헤더의 시설 이름은
+    따르지 않습니다 (예산을 다 쓴 시설이 다른 시설의 분당 토큰을 쓰고 그 시설로 청구되지 않게 함).
+    """
+    supplied = request.headers.get('X-Facility-Key', '')
+    if supplied:
+        for key, facility in facility_keys.items():
+            if hmac.compare_digest(supplied.encode('utf-8'), key.encode('utf-8')):
+                session['facility_id'] = facility
+                break
+    return tenant_scheduler.resolve_tenant(session.get('facility_id'))
+
 
-def generate_streaming_response(prompt):
-    """스트리밍 응답을 생성하는 함수 - 원래 버전 복원"""
+def response_token_usage(response, full_context, full_response):
+    """모델이 알려준 실제 토큰 수 (usage_metadata가 없으면 글자 수로 추정)"""
+    usage = getattr(response, 'usage_metadata', None)
+    prompt_tokens = getattr(usage, 'prompt_token_count', 0) or estimate_tokens(
+        full_context, CONFIG['TOKEN_CHARS_PER_TOKEN']
+    )
+    output_tokens = getattr(usage, 'candidates_token_count', 0) or estimate_tokens(
+        full_response, CONFIG['TOKEN_CHARS_PER_TOKEN']
+    )
+    return prompt_tokens, output_tokens
+
+
+def generate_streaming_response(prompt, user_id, since_id=0, lease=None, plan=None):
+    """스트리밍 응답을 생성하는 함수 - 원래 버전 복원
+
+    lease가 있으면 응답이 끝난 뒤 시설 토큰 예약을 실제 사용량으로 정산합니다.
+    plan은 generation_controller.plan()의 생성 설정이며, 문장 한도에 닿으면 업스트림 스트림을 바로 끊습니다.
+    모델은 프롬프트 길이와 콘텐츠 요청 여부로 고른 계층부터 시도합니다.
+    """
     if not model:
-        yield json.dumps({
-            'type': 'error',
-            'message': 'AI 모델이 초기화되지 않았습니다. API 키를 확인해주세요.'
-        }, ensure_ascii=False) + '\n'
+        if lease:
+            lease.settle(0, 0)
+        yield serialization.dumps(
+            {'type': 'error', 'message': 'AI 모델이 초기화되지 않았습니다. API 키를 확인해주세요.'}
+        ) + '\n'
         return
     
+    capture = None
     try:
-        # 대화 히스토리 포함한 전체 컨텍스트 구성
+        # 누적 요약 + 질의와 관련된 지난 대화 + 최근 대화로 전체 컨텍스트 구성 (대화가 쌓여도 길이 일정)
         full_context = SYSTEM_PROMPT + "\n\n"
         
-        # 최근 대화만 포함 (메모리 효율성)
-        recent_history = conversation_history[-CONFIG['MAX_HISTORY']:]
-        for msg in recent_history:
-            full_context += f"사용자: {msg['user']}\n아바타: {msg['assistant']}\n\n"
+        memory_context = memory_manager.get_prompt_context(
+            user_id,
+            CONFIG['MAX_HISTORY'],
+            since_id,
+            write_behind.get_pending(user_id),
+            query=prompt,
+            related_turns=CONFIG['RELATED_MEMORY_TURNS'],
+        )
+        if memory_context:
+            full_context += memory_context + "\n"
         
         full_context += f"사용자: {prompt}\n아바타: "
-        
-        # Gemini API 호출
+
+        capture = (
+            traffic_recorder.start(user_id, prompt, len(full_context)) if traffic_recorder else None
+        )
+        plan = plan or generation_controller.plan()
+
+        # Gemini API 호출 (첫 조각 전에 실패하면 다른 계층 모델로 넘어감)
+        route = model.route(
+            estimate_tokens(full_context, CONFIG['TOKEN_CHARS_PER_TOKEN']),
+            is_content_request(prompt),
+        )
+        model_started = time.perf_counter()
         response = model.generate_content(
             full_context, 
             stream=True,
-            generation_config=genai.types.GenerationConfig(
-                max_output_tokens=500,
-                temperature=0.7,
-                top_p=0.8,
-                top_k=40
-            )
+            generation_config=generation_config(**plan['generation']),
+            route=route,
         )
         
         full_response = ""
         sentence_buffer = ""
         sentence_count = 0
+        first_sentence_seconds = None
+        first_chunk = True
+        cancelled = False
         
         for chunk in response:
+            if first_chunk:
+                first_chunk = False
+                generation_controller.observe_first_chunk(time.perf_counter() - model_started)
+            if capture:
+                capture.chunk(chunk.text or '')
             if chunk.text:
                 full_response += chunk.text
                 sentence_buffer += chunk.text
                 
                 # 문장 완성 체크 (. ! ? 로 끝나는 경우)
-                if re.search(r'[.!?]\s*$', sentence_buffer.strip()):
+                if is_sentence_end(sentence_buffer):
                     sentence_count += 1
                     
-                    # 최대 문장 수 제한
-                    if sentence_count > CONFIG['RESPONSE_MAX_SENTENCES']:
-                        break
-                    
                     # 유튜브 검색어 추출
                     youtube_search = extract_youtube_search(sentence_buffer)
                     
                     # 추억 키워드 추출
-                    memory_keywords = extract_memory_keywords(sentence_buffer)
-                    
-                    yield json.dumps({
-                        'type': 'sentence',
-                        'content': sentence_buffer.strip(),
-                        'youtube_search': youtube_search,
-                        'memory_keywords': memory_keywords,
-                        'timestamp': datetime.now().isoformat()
-                    }, ensure_ascii=False) + '\n'
+                    memory_keywords = extract_response_keywords(sentence_buffer)
+
+                    yield serialization.dumps(
+                        {
+                            'type': 'sentence',
+                            'content': sentence_buffer.strip(),
+                            'youtube_search': youtube_search,
+                            'memory_keywords': memory_keywords,
+                            'timestamp': datetime.now(),
+                        }
+                    ) + '\n'
+                    if first_sentence_seconds is None:
+                        first_sentence_seconds = time.perf_counter() - model_started
                     
                     sentence_buffer = ""
+
+                    # 최대 문장 수에 닿으면 나머지를 기다리지 않고 업스트림 생성을 끊음
+                    if sentence_count >= plan['max_sentences']:
+                        cancelled = True
+                        close_stream(response)
+                        if capture:
+                            capture.finish('cut')
+                            capture = None
+                        break
+
                     time.sleep(CONFIG['STREAMING_DELAY'])  # 자연스러운 텀
-        
+
+        prompt_tokens, output_tokens = response_token_usage(response, full_context, full_response)
+        model.record_usage(
+            response, prompt_tokens, output_tokens, time.perf_counter() - model_started
+        )
+        if lease:
+            lease.settle(prompt_tokens, output_tokens)
+        generation_controller.record(
+            plan,
+            sentence_count + (1 if sentence_buffer.strip() else 0),
+            output_tokens,
+            first_sentence_seconds,
+            time.perf_counter() - model_started,
+            cancelled,
+        )
+
         # 마지막 남은 텍스트 처리
         if sentence_buffer.strip():
             youtube_search = extract_youtube_search(sentence_buffer)
-            memory_keywords = extract_memory_keywords(sentence_buffer)
-            
-            yield json.dumps({
-                'type': 'sentence',
-                'content': sentence_buffer.strip(),
-                'youtube_search': youtube_search,
-                'memory_keywords': memory_keywords,
-                'timestamp': datetime.now().isoformat()
-            }, ensure_ascii=False) + '\n'
-        
+            memory_keywords = extract_response_keywords(sentence_buffer)
+
+            yield serialization.dumps(
+                {
+                    'type': 'sentence',
+                    'content': sentence_buffer.strip(),
+                    'youtube_search': youtube_search,
+                    'memory_keywords': memory_keywords,
+                    'timestamp': datetime.now(),
+                }
+            ) + '\n'
+
         # 대화 기록 저장
-        conversation_history.append({
-            'user': prompt,
-            'assistant': full_response.strip(),
-            'timestamp': datetime.now().isoformat(),
-            'memory_keywords': extract_memory_keywords(prompt + ' ' + full_response)
-        })
-        
+        memory_keywords = extract_response_keywords(prompt + ' ' + full_response)
+        conversation_history.append(
+            {
+                'user': prompt,
+                'assistant': full_response.strip(),
+                'timestamp': datetime.now().isoformat(),
+                'memory_keywords': memory_keywords,
+            }
+        )
+        saved = write_behind.submit(
+            user_id,
+            {
+                'user': prompt,
+                'assistant': full_response.strip(),
+                'timestamp': datetime.now().isoformat(),
+                'memory_keywords': memory_keywords,
+                'emotions': extract_emotions(prompt),
+            },
+        )
+
         # 히스토리 크기 관리
         if len(conversation_history) > CONFIG['MAX_HISTORY'] * 2:
             conversation_history[:] = conversation_history[-CONFIG['MAX_HISTORY']:]
         
-        # 완료 신호
-        yield json.dumps({
-            'type': 'complete',
-            'full_response': full_response.strip(),
-            'conversation_count': len(conversation_history)
-        }, ensure_ascii=False) + '\n'
-        
+        if capture:
+            capture.finish('ok')
+            capture = None
+
+        # 완료 신호 (saved가 False면 이번 대화가 기억에 저장되지 않았다는 뜻)
+        yield serialization.dumps(
+            {
+                'type': 'complete',
+                'full_response': full_response.strip(),
+                'conversation_count': len(conversation_history),
+                'saved': saved,
+            }
+        ) + '\n'
+
     except Exception as e:
+        if capture:
+            capture.finish('error')
         error_message = f'죄송합니다. 잠시 문제가 생겼네요. 다시 말씀해 주시겠어요? (오류: {str(e)})'
-        yield json.dumps({
-            'type': 'error',
-            'message': error_message
-        }, ensure_ascii=False) + '\n'
+        yield serialization.dumps({'type': 'error', 'message': error_message}) + '\n'
+
 
 @app.route('/')
 def index():
     return render_template('index.html', config=CONFIG)
 
+
+def overloaded_response(retry_after, status=503, message='지금 대화 요청이 많습니다. 잠시 후 다시 말씀해 주세요.'):
+    """한도를 넘은 요청에 상태 코드(503 또는 429)와 Retry-After를 바로 반환합니다"""
+    response = jsonify({'error': message, 'retry_after': retry_after})
+    response.status_code = status
+    response.headers['Retry-After'] = str(retry_after)
+    return response
+
+
 @app.route('/chat', methods=['POST'])
 def chat():
+    ticket = None
+    lease = None
     try:
         data = request.get_json()
         user_message = data.get('message', '').strip()
@@ -252,15 +807,71 @@ def chat():
         if len(user_message) > 500:
             return jsonify({'error': '메시지가 너무 깁니다. 500자 이내로 입력해 주세요.'}), 400
         
+        # 동시 스트림 한도를 넘으면 짧게 기다렸다가 그래도 자리가 없으면 바로 거절
+        if chat_admission:
+            ticket = chat_admission.try_acquire()
+            if ticket is None:
+                return overloaded_response(chat_admission.retry_after())
+
+        # 시설별 토큰 예산 확인과 공정 대기 (프롬프트는 맥락이 붙기 전이라 추정값으로 예약하고 응답 후 정산)
+        tenant = resolve_tenant()
+        # 할당량이 찰수록 출력 한도를 줄여 예약하고 요청함
+        plan = generation_controller.plan(tenant_scheduler.pressure(tenant))
+        lease, outcome = tenant_scheduler.acquire(
+            tenant,
+            tenant_scheduler.estimate_prompt_tokens(SYSTEM_PROMPT + user_message),
+            plan['generation']['max_output_tokens'],
+        )
+        if lease is None:
+            if ticket:
+                ticket.release()
+            if outcome == 'over_budget':
+                return overloaded_response(
+                    tenant_scheduler.retry_after(),
+                    429,
+                    '이 시설의 분당 대화 사용량을 모두 썼습니다. 잠시 후 다시 말씀해 주세요.',
+                )
+            return overloaded_response(chat_admission.retry_after() if chat_admission else 1)
+
+        user_id = resolve_user_id(data)
+        since_id = session.get('context_since_id', 0)
+        # 서명된 헤더가 있는 요청만 cProfile로 측정 (헤더가 없으면 추가 비용 없음)
+        profile_header = request.headers.get(PROFILE_HEADER)
+        request_path = request.path
+        profile_request = bool(profile_header) and verify_profile_request(
+            CONFIG['PROFILE_SIGNING_KEY'], profile_header, request_path
+        )
+
         def generate():
-            yield "data: "
-            for chunk in generate_streaming_response(user_message):
-                yield f"data: {chunk}\n"
-            yield "data: [DONE]\n\n"
+            # 스트리밍은 응답을 보내는 스레드에서 진행되므로 생성기 안에서 프로파일링을 켬
+            profiler = request_profiles.start() if profile_request else None
+            started = time.perf_counter()
+            try:
+                yield "data: "
+                for chunk in generate_streaming_response(
+                    user_message, user_id, since_id, lease, plan
+                ):
+                    yield f"data: {chunk}\n"
+                yield "data: [DONE]\n\n"
+            finally:
+                lease.release()
+                if ticket:
+                    ticket.release()
+                if profiler:
+                    request_profiles.finish(profiler, request_path, time.perf_counter() - started)
         
-        return Response(generate(), mimetype='text/event-stream')
+        response = Response(generate(), mimetype='text/event-stream')
+        # 스트림을 시작하기 전에 연결이 끊겨도 자리를 반납하도록 응답 종료 시에도 반납
+        response.call_on_close(lease.release)
+        if ticket:
+            response.call_on_close(ticket.release)
+        return response
         
     except Exception as e:
+        if lease:
+            lease.release()
+        if ticket:
+            ticket.release()
         return jsonify({'error': f'서버 오류가 발생했습니다: {str(e)}'}), 500
 
 @app.route('/youtube_search')
@@ -275,20 +886,32 @@ def youtube_search():
     if not safe_query:
         return jsonify({'error': '유효한 검색어가 아닙니다.'}), 400
     
-    # YouTube 검색 URL 생성
-    youtube_url = f"https://www.youtube.com/results?search_query={safe_query.replace(' ', '+')}"
-    
-    return jsonify({
-        'search_url': youtube_url,
-        'query': safe_query,
-        'timestamp': datetime.now().isoformat()
-    })
+    # 카탈로그에서 가장 가까운 항목을 찾고, 있으면 그 항목의 정식 검색어로 검색
+    limit = min(max(request.args.get('limit', 3, type=int), 1), 10)
+    matches = catalog_search.search(safe_query, limit)
+    resolved_query = matches[0]['youtube_query'] if matches else safe_query
+
+    return jsonify(
+        {
+            'search_url': build_search_url(resolved_query),
+            'query': safe_query,
+            'resolved_query': resolved_query,
+            'matches': matches,
+            'timestamp': datetime.now().isoformat(),
+        }
+    )
+
 
 @app.route('/clear_history', methods=['POST'])
 def clear_history():
     """대화 기록 초기화"""
     global conversation_history
     conversation_history = []
+
+    # 최근 대화 원문은 프롬프트에서 제외하고, 누적 요약(장기 기억)만 유지
+    if 'user_id' in session:
+        conversations = memory_manager.load_user_data(session['user_id']).get('conversations', [])
+        session['context_since_id'] = conversations[-1].get('id', 0) if conversations else 0
     return jsonify({
         'message': '대화 기록이 초기화되었습니다.',
         'timestamp': datetime.now().isoformat()
@@ -321,15 +944,300 @@ def conversation_stats():
         'last_conversation': conversation_history[-1]['timestamp'] if conversation_history else None
     })
 
+
+def run_analytics_job(analyzer, days):
+    """백그라운드 스레드에서 배치 분석을 실행합니다"""
+    try:
+        analytics_job['result'] = analyzer.run(days)
+    except Exception as e:
+        analytics_job['error'] = str(e)
+        analyzer.progress['status'] = 'failed'
+
+
+@app.route('/analytics/batch', methods=['POST'])
+@admin_required
+def start_batch_analysis():
+    """전체 사용자 대화 배치 분석을 시작합니다 (workers는 1에서 CPU 수까지, format은 csv 또는 parquet)"""
+    data = request.get_json(silent=True) or {}
+    output_format = data.get('format', 'csv')
+    if output_format not in ('csv', 'parquet'):
+        return jsonify({'error': f'지원하지 않는 출력 형식입니다: {output_format}'}), 400
+    try:
+        days = int(data.get('days', 7)) or None
+        workers = (
+            min(max(int(data['workers']), 1), os.cpu_count() or 1) if data.get('workers') else None
+        )
+        from utils.analytics import BatchAnalyzer  # scipy/numpy를 불러오므로 분석을 요청할 때만 불러옴
+
+        analyzer = BatchAnalyzer(
+            CONFIG['MEMORY_DIR'], CONFIG['REPORTS_DIR'], workers, output_format
+        )
+    except (TypeError, ValueError) as e:
+        return jsonify({'error': f'잘못된 분석 요청입니다: {str(e)}'}), 400
+
+    with analytics_lock:
+        current = analytics_job['analyzer']
+        if current and analytics_job['result'] is None and analytics_job['error'] is None:
+            return (
+                jsonify({'error': '이미 실행 중인 분석 작업이 있습니다.', 'progress': current.get_progress()}),
+                409,
+            )
+
+        analytics_job.update({'analyzer': analyzer, 'result': None, 'error': None})
+        threading.Thread(target=run_analytics_job, args=(analyzer, days), daemon=True).start()
+
+    return jsonify({'message': '배치 분석을 시작했습니다.', 'progress': analyzer.get_progress()}), 202
+
+
+@app.route('/analytics/batch')
+@admin_required
+def batch_analysis_status():
+    """배치 분석 진행 상황과 결과를 반환합니다"""
+    analyzer = analytics_job['analyzer']
+    if analyzer is None:
+        return jsonify({'progress': None, 'result': None})
+
+    return jsonify(
+        {
+            'progress': analyzer.get_progress(),
+            'result': analytics_job['result'],
+            'error': analytics_job['error'],
+        }
+    )
+
+
+def encode_history_cursor(conversation_id):
+    """대화 기록 페이지 커서를 만듭니다 (대화 ID는 시간 순서로 증가하므로 ID만 담음)"""
+    raw = str(conversation_id).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_history_cursor(cursor):
+    """커서에서 대화 ID를 꺼냅니다 (이전 형식인 "타임스탬프|ID"도 허용, 잘못된 커서면 ValueError)"""
+    if not cursor:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode('utf-8')
+        return int(raw.rsplit('|', 1)[-1])
+    except Exception:
+        raise ValueError('잘못된 커서입니다.')
+
+
+@app.route('/history')
+@admin_required
+def history():
+    """요양 직원용: 어르신의 대화 기록을 최신순으로 한 페이지씩 반환합니다 (user_id 필수, cursor로 다음 페이지 요청)"""
+    if not request.args.get('user_id', '').strip():
+        return jsonify({'error': 'user_id를 지정해 주세요.'}), 400
+    user_id = resolve_user_id(request.args)
+    try:
+        limit = min(max(int(request.args.get('limit', 20)), 1), 100)
+        before_id = decode_history_cursor(request.args.get('cursor'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    page = memory_manager.get_conversation_page(
+        user_id,
+        before_id,
+        limit,
+        category=request.args.get('category') or None,
+        emotion=request.args.get('emotion') or None,
+    )
+    next_cursor = None
+    if page['has_more']:
+        next_cursor = encode_history_cursor(page['next_before_id'])
+
+    return jsonify(
+        {'conversations': page['items'], 'next_cursor': next_cursor, 'has_more': page['has_more']}
+    )
+
+
+@app.route('/export')
+@admin_required
+def export_user():
+    """사용자 데이터를 NDJSON으로 스트리밍합니다 (user_id 필수, gzip=1이면 gzip 압축)
+
+    전체 사용자 감사용 내보내기는 python -m utils.exporter 명령으로만 실행합니다.
+    """
+    if not request.args.get('user_id', '').strip():
+        return jsonify({'error': 'user_id를 지정해 주세요.'}), 400
+    user_id = resolve_user_id(request.args)
+    compress = request.args.get('gzip', '').lower() in ('1', 'true')
+
+    filename = f"user_{user_id}.ndjson" + ('.gz' if compress else '')
+    mimetype = 'application/gzip' if compress else 'application/x-ndjson'
+    return Response(
+        stream_user_export(memory_manager, user_id, compress),
+        mimetype=mimetype,
+        headers={'Content-Disposition': f'attachment; filename="{filename}"'},
+    )
+
+
+@app.route('/metrics')
+def metrics_endpoint():
+    """Prometheus 메트릭을 반환합니다"""
+    return Response(metrics.render_prometheus(), mimetype='text/plain; version=0.0.4')
+
+
+@app.route('/scheduler/status')
+@admin_required
+def scheduler_status():
+    """유지보수 작업 스케줄러 상태를 반환합니다"""
+    return jsonify(scheduler.get_status())
+
+
+@app.route('/admin/profile/cpu', methods=['GET', 'POST', 'DELETE'])
+@admin_required
+def cpu_profile():
+    """표본 추출 프로파일러 상태 확인(GET), 시작(POST: seconds, interval_ms), 중지(DELETE)"""
+    if request.method == 'POST':
+        data = request.get_json(silent=True) or {}
+        try:
+            seconds = float(data.get('seconds', 30))
+            interval = float(data.get('interval_ms', 10)) / 1000
+        except (TypeError, ValueError):
+            return jsonify({'error': 'seconds와 interval_ms는 숫자여야 합니다.'}), 400
+        if not sampling_profiler.start(seconds, interval):
+            return jsonify({'error': '이미 실행 중입니다.', 'status': sampling_profiler.get_status()}), 409
+        return jsonify(sampling_profiler.get_status()), 202
+    if request.method == 'DELETE':
+        sampling_profiler.stop()
+    return jsonify(sampling_profiler.get_status())
+
+
+@app.route('/admin/profile/cpu/collapsed')
+@admin_required
+def cpu_profile_collapsed():
+    """마지막 표본 추출 결과를 collapsed stack 파일로 내려받습니다 (flamegraph.pl, speedscope)"""
+    filename = f"cpu_{os.getpid()}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.collapsed"
+    return Response(
+        sampling_profiler.collapsed(),
+        mimetype='text/plain',
+        headers={'Content-Disposition': f'attachment; filename="{filename}"'},
+    )
+
+
+@app.route('/admin/profile/requests')
+@admin_required
+def request_profile_list():
+    """서명 헤더로 측정한 최근 요청 프로파일 목록"""
+    return jsonify({'profiles': request_profiles.list_entries(), 'header': PROFILE_HEADER})
+
+
+@app.route('/admin/profile/requests/<int:profile_id>')
+@admin_required
+def request_profile_detail(profile_id):
+    """요청 프로파일을 pstats 표(기본) 또는 .prof 파일(format=prof)로 반환합니다"""
+    if request.args.get('format') == 'prof':
+        content = request_profiles.dump(profile_id)
+        if content is None:
+            return jsonify({'error': '프로파일을 찾을 수 없습니다.'}), 404
+        return Response(
+            content,
+            mimetype='application/octet-stream',
+            headers={'Content-Disposition': f'attachment; filename="request_{profile_id}.prof"'},
+        )
+
+    sort = request.args.get('sort', 'cumulative')
+    if sort not in ('cumulative', 'tottime', 'calls'):
+        return jsonify({'error': 'sort는 cumulative, tottime, calls 중 하나여야 합니다.'}), 400
+    report = request_profiles.report(
+        profile_id, sort, min(request.args.get('limit', 40, type=int), 200)
+    )
+    if report is None:
+        return jsonify({'error': '프로파일을 찾을 수 없습니다.'}), 404
+    return Response(report, mimetype='text/plain')
+
+
+@app.route('/admin/profile/memory', methods=['GET', 'POST', 'DELETE'])
+@admin_required
+def memory_profile():
+    """tracemalloc 추적 상태 확인(GET), 시작(POST: frames), 중지(DELETE)"""
+    if request.method == 'POST':
+        data = request.get_json(silent=True) or {}
+        try:
+            frames = int(data.get('frames', 1) or 1)
+        except (TypeError, ValueError):
+            return jsonify({'error': 'frames는 정수여야 합니다.'}), 400
+        if not memory_tracker.start(frames):
+            return jsonify({'error': '이미 추적 중입니다.', 'status': memory_tracker.get_status()}), 409
+    elif request.method == 'DELETE':
+        memory_tracker.stop()
+    return jsonify(memory_tracker.get_status())
+
+
+@app.route('/admin/profile/memory/snapshot', methods=['POST'])
+@admin_required
+def memory_profile_snapshot():
+    """스냅샷을 찍고 이전 스냅샷 대비 늘어난 할당 위치를 반환합니다"""
+    data = request.get_json(silent=True) or {}
+    group_by = data.get('group_by', 'lineno')
+    if group_by not in ('lineno', 'filename', 'traceback'):
+        return jsonify({'error': 'group_by는 lineno, filename, traceback 중 하나여야 합니다.'}), 400
+    try:
+        result = memory_tracker.snapshot(min(int(data.get('limit', 25)), 200), group_by)
+    except RuntimeError as e:
+        return jsonify({'error': str(e)}), 409
+    result['module_state'] = {
+        item['name']: item.get('entries') for item in memory_registry.collect(enforce=False)
+    }
+    return jsonify(result)
+
+
+@app.route('/admin/memory', methods=['GET', 'POST'])
+@admin_required
+def memory_accounting():
+    """자료구조별 항목 수와 대략적인 크기, 프로세스 RSS를 반환합니다 (POST는 소프트 한도를 바로 적용)"""
+    if request.method == 'POST':
+        memory_registry.collect()
+    return jsonify(memory_registry.get_report())
+
+
+@app.route('/admin/tenants')
+@admin_required
+def tenant_usage():
+    """시설별 일간 토큰 사용량(청구용, day=YYYY-MM-DD, 기본 오늘)과 현재 분당 사용량, 대기열 상태"""
+    day = request.args.get('day')
+    if day and not re.fullmatch(r'\d{4}-\d{2}-\d{2}', day):
+        return jsonify({'error': 'day는 YYYY-MM-DD 형식이어야 합니다.'}), 400
+    return jsonify(
+        {
+            'day': day or datetime.now().strftime('%Y-%m-%d'),
+            'usage': tenant_scheduler.get_usage(day),
+            'status': tenant_scheduler.get_status(),
+        }
+    )
+
+
+@app.route('/admin/generation')
+@admin_required
+def generation_status():
+    """문장당 토큰 분포, 지연 압력, 고정/적응 설정별 평균 지연과 그 차이"""
+    return jsonify(generation_controller.get_status())
+
+
+@app.route('/admin/models')
+@admin_required
+def model_status():
+    """모델 계층, 모델별 상태(정상/차단/회복 확인 중), 첫 조각 지연, 토큰과 추정 비용"""
+    if not model:
+        return jsonify({'error': 'AI 모델이 초기화되지 않았습니다.'}), 503
+    return jsonify(model.get_status())
+
+
 @app.route('/health')
 def health_check():
     """서버 상태 확인"""
-    return jsonify({
-        'status': 'healthy',
-        'model_ready': model is not None,
-        'conversation_count': len(conversation_history),
-        'timestamp': datetime.now().isoformat()
-    })
+    return jsonify(
+        {
+            'status': 'healthy',
+            'model_ready': model is not None,
+            'chat_admission': chat_admission.get_status() if chat_admission else None,
+            'conversation_count': len(conversation_history),
+            'timestamp': datetime.now().isoformat(),
+        }
+    )
+
 
 @app.errorhandler(404)
 def not_found(error):
@@ -340,6 +1248,7 @@ def internal_error(error):
     return jsonify({'error': '서버 내부 오류가 발생했습니다.'}), 500
 
 if __name__ == '__main__':
+    create_app()
     print("🚀 회상치료 AI 아바타 서버를 시작합니다...")
     print(f"📊 설정: 최대 히스토리 {CONFIG['MAX_HISTORY']}개, 최대 문장 {CONFIG['RESPONSE_MAX_SENTENCES']}개")
     
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+자모 근사 매칭 벤치마크
+
+사전 크기를 늘려 가며 삭제 인덱스 조회 1회의 지연 시간을 측정하고,
+모든 키워드와 편집 거리를 계산하는 단순 비교 방식과 함께 출력합니다.
+실제 키워드 사전으로 문장 하나에서 키워드를 찾는 시간도 측정합니다.
+
+사용법:
+    python benchmarks/bench_fuzzy_match.py [--sizes 100,1000,10000,50000] [--distance 1]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.fuzzy_match import JamoFuzzyIndex, decompose_jamo, edit_distance  # noqa: E402
+from utils.text_processing import (  # noqa: E402
+    extract_memory_keywords,
+    extract_youtube_search_terms,
+)
+
+SAMPLE_TEXT = '어릴 때 고향에 봄 노래를 들으면서 숨박꼭질 하고 어머니가 끓여주신 된장지개를 먹었어요'
+
+
+def make_words(count, rng):
+    """2~5글자 한글 낱말을 무작위로 생성합니다"""
+    words = set()
+    while len(words) < count:
+        length = rng.randint(2, 5)
+        words.add(''.join(chr(0xAC00 + rng.randrange(11172)) for _ in range(length)))
+    return sorted(words)
+
+
+def make_typo(word, rng):
+    """음절 하나의 종성을 바꾸어 자모 하나가 다른 낱말을 만듭니다"""
+    index = rng.randrange(len(word))
+    code = ord(word[index]) - 0xAC00
+    final = code % 28
+    new_final = (final + rng.randint(1, 27)) % 28
+    return word[:index] + chr(0xAC00 + code - final + new_final) + word[index + 1 :]
+
+
+def per_call_us(func, items):
+    """items 각각에 대해 func를 실행하고 1회당 시간(마이크로초)을 반환합니다"""
+    start = time.perf_counter()
+    for item in items:
+        func(item)
+    return (time.perf_counter() - start) / len(items) * 1e6
+
+
+def bench_lookup(size, distance, queries, rng):
+    """사전 크기별 조회 지연 시간과 인덱스 생성 시간을 측정합니다"""
+    words = make_words(size, rng)
+    started = time.perf_counter()
+    index = JamoFuzzyIndex(max_distance=distance, min_term_length=0)
+    index.add_many((word, None) for word in words)
+    build_seconds = time.perf_counter() - started
+
+    samples = [make_typo(rng.choice(words), rng) for _ in range(queries)]
+    hits = sum(1 for query in samples if index.lookup(query))
+    lookup_us = per_call_us(index.lookup, samples)
+
+    # 단순 비교는 사전이 커지면 오래 걸리므로 질의 수를 줄여 측정
+    jamo_words = [decompose_jamo(word) for word in words]
+    linear_samples = [
+        decompose_jamo(query) for query in samples[: max(1, min(queries, 200000 // size))]
+    ]
+    linear_us = per_call_us(
+        lambda query: [
+            word for word in jamo_words if edit_distance(query, word, distance) <= distance
+        ],
+        linear_samples,
+    )
+
+    return {
+        'size': size,
+        'build_seconds': build_seconds,
+        'lookup_us': lookup_us,
+        'linear_us': linear_us,
+        'hit_rate': hits / len(samples),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='자모 근사 매칭 벤치마크')
+    parser.add_argument('--sizes', default='100,1000,10000,50000', help='사전 크기 목록 (쉼표 구분)')
+    parser.add_argument('--distance', type=int, default=1, help='허용 자모 편집 거리')
+    parser.add_argument('--queries', type=int, default=2000, help='크기별 조회 횟수')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    print(f"=== 자모 근사 매칭 벤치마크 (편집 거리 {args.distance}) ===")
+    print(f"{'사전 크기':>10} {'인덱스 생성':>12} {'조회 1회':>12} {'단순 비교':>12} {'적중률':>8}")
+    for size in (int(value) for value in args.sizes.split(',')):
+        result = bench_lookup(size, args.distance, args.queries, rng)
+        print(
+            f"{result['size']:>10,} {result['build_seconds']:>10.2f}s "
+            f"{result['lookup_us']:>10.1f}µs {result['linear_us']:>10.1f}µs "
+            f"{result['hit_rate']:>8.0%}"
+        )
+
+    extract_memory_keywords(SAMPLE_TEXT, fuzzy=True)  # 인덱스 생성 제외
+    extract_youtube_search_terms(SAMPLE_TEXT, fuzzy=True)
+    print(f"\n[문장 키워드 추출] {SAMPLE_TEXT}")
+    fuzzy_us = per_call_us(
+        lambda text: extract_memory_keywords(text, fuzzy=True), [SAMPLE_TEXT] * 500
+    )
+    exact_us = per_call_us(extract_memory_keywords, [SAMPLE_TEXT] * 500)
+    print(f"  메모리 키워드: {fuzzy_us:.1f}µs (정확히 일치만: {exact_us:.1f}µs)")
+    fuzzy_us = per_call_us(
+        lambda text: extract_youtube_search_terms(text, fuzzy=True), [SAMPLE_TEXT] * 500
+    )
+    exact_us = per_call_us(extract_youtube_search_terms, [SAMPLE_TEXT] * 500)
+    print(f"  유튜브 검색어: {fuzzy_us:.1f}µs (정확히 일치만: {exact_us:.1f}µs)")
+
+
+if __name__ == "__main__":
+    main()
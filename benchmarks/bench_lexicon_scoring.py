@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+대량 키워드/감정 점수 계산 벤치마크
+
+문장마다 extract_memory_keywords/extract_emotions를 부르는 방식과
+LexiconScorer로 한 번에 행렬을 만들어 주제/세부 주제/감정별 문장 수를 구하는 방식의
+처리량(문장/초)을 배치 크기별로 비교합니다.
+
+사용법:
+    python benchmarks/bench_lexicon_scoring.py [--sizes 1000,10000,100000] [--fuzzy]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+from collections import Counter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils import lexicon_scoring  # noqa: E402
+from utils.text_processing import extract_emotions, extract_memory_keywords  # noqa: E402
+
+SENTENCES = [
+    '어릴 때 고향에서 어머니와 함께 시장에 가서 떡을 사 먹던 기억이 나요.',
+    '정말 따뜻한 추억이네요. 그때 어떤 떡을 제일 좋아하셨나요?',
+    '추석에 가족들이 모여 송편을 빚었어요. 그리운 시절이에요.',
+    '군대에서 친구들과 축구를 했던 게 생각나네요.',
+    '오늘은 날씨가 참 좋네요. 산책이라도 다녀오셨어요?',
+    '고향의 봄 노래를 들으면 마음이 편안해져요.',
+]
+
+
+def make_texts(count, rng):
+    """대화 한 턴(사용자 + 아바타) 길이의 문장을 생성합니다"""
+    return [f"{rng.choice(SENTENCES)} {rng.choice(SENTENCES)}" for _ in range(count)]
+
+
+def count_single(texts, fuzzy):
+    """문장마다 낱말 단위 함수를 불러 문장 수를 집계합니다"""
+    counts = Counter()
+    for text in texts:
+        for category, subcategories in extract_memory_keywords(text, fuzzy).items():
+            counts[category] += 1
+            for subcategory in subcategories:
+                counts[f"{category}_{subcategory}"] += 1
+        for emotion in extract_emotions(text):
+            counts[emotion] += 1
+    return counts
+
+
+def count_batch(texts, fuzzy):
+    """행렬 연산으로 같은 집계를 구합니다"""
+    scores = lexicon_scoring.lexicon_scorer.score(texts, fuzzy)
+    counts = Counter()
+    for key, value in zip(scores.categories, (scores.category_counts() > 0).sum(axis=0)):
+        counts[key] += int(value)
+    for (category, subcategory), value in zip(
+        scores.subcategories, (scores.subcategory_counts() > 0).sum(axis=0)
+    ):
+        counts[f"{category}_{subcategory}"] += int(value)
+    for key, value in zip(scores.emotion_types, (scores.emotion_counts() > 0).sum(axis=0)):
+        counts[key] += int(value)
+    return +counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description='대량 키워드/감정 점수 계산 벤치마크')
+    parser.add_argument('--sizes', default='1000,10000,100000', help='배치 크기 목록 (쉼표 구분)')
+    parser.add_argument('--fuzzy', action='store_true', help='자모 근사 매칭 포함 (문장마다 조회하므로 느림)')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    if not lexicon_scoring.is_available():
+        print("numpy 패키지가 필요합니다.")
+        return
+
+    fuzzy = args.fuzzy
+    rng = random.Random(args.seed)
+    backend = 'scipy.sparse' if lexicon_scoring.sparse is not None else 'numpy'
+    print(f"=== 대량 키워드 점수 벤치마크 (행렬: {backend}, 근사 매칭: {'사용' if fuzzy else '안 함'}) ===")
+    print(f"{'배치 크기':>10} {'문장별 호출':>14} {'행렬 계산':>14} {'배속':>8} {'결과 일치':>8}")
+    for size in (int(value) for value in args.sizes.split(',')):
+        texts = make_texts(size, rng)
+
+        started = time.perf_counter()
+        expected = count_single(texts, fuzzy)
+        single_seconds = time.perf_counter() - started
+
+        started = time.perf_counter()
+        actual = count_batch(texts, fuzzy)
+        batch_seconds = time.perf_counter() - started
+
+        print(
+            f"{size:>10,} {size / single_seconds:>10,.0f}/s {size / batch_seconds:>10,.0f}/s "
+            f"{single_seconds / batch_seconds:>7.1f}x {'예' if expected == actual else '아니오':>8}"
+        )
+
+
+if __name__ == "__main__":
+    main()
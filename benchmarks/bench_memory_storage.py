@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+"""
+메모리 저장소 규모 벤치마크
+
+합성 저장소(memory_dataset.py로 생성)에 대해 MemoryManager의 주요 연산을 사용자 표본별로 호출하고
+지연 시간 백분위수, 디스크 사용량, 단계별 최대 RSS를 출력합니다.
+--manager로 같은 공개 메서드를 가진 다른 저장소 구현을 지정해 같은 조건으로 비교할 수 있습니다.
+
+save_conversation과 cleanup_old_data는 데이터를 바꾸므로 벤치마크 전용 저장소에서만 실행하세요.
+cleanup_old_data는 전체 저장소를 대상으로 하므로 마지막에 한 번만 실행합니다.
+
+사용법:
+    python benchmarks/bench_memory_storage.py --data /tmp/memory_bench [--sample 200]
+    python benchmarks/bench_memory_storage.py --users 50 --days 180      # 임시 저장소를 만들어 측정
+    python benchmarks/bench_memory_storage.py --data /tmp/memory_bench \
+        --ops get_recent_conversations,get_memory_statistics
+"""
+
+import argparse
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from memory_dataset import (  # noqa: E402
+    DEFAULT_MANAGER,
+    ConversationFactory,
+    directory_bytes,
+    generate,
+    load_manager_factory,
+)
+from utils.text_processing import MEMORY_KEYWORDS  # noqa: E402
+
+try:
+    import resource
+except ImportError:  # pragma: no cover - Windows
+    resource = None
+
+OPERATIONS = [
+    'save_conversation',
+    'get_recent_conversations',
+    'analyze_user_preferences',
+    'find_similar_conversations',
+    'get_memory_statistics',
+    'cleanup_old_data',
+]
+
+
+def peak_rss_mb():
+    """프로세스 최대 RSS(MB)를 반환합니다 (resource 모듈이 없으면 None)"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux는 KB, macOS는 바이트 단위
+    return round(peak / 1024 / (1024 if sys.platform == 'darwin' else 1), 1)
+
+
+def percentiles(samples):
+    """지연 시간 목록(초)의 백분위수를 밀리초로 반환합니다"""
+    ordered = sorted(samples)
+    if not ordered:
+        return {}
+
+    def rank(p):
+        return ordered[min(len(ordered) - 1, max(0, int(round(p / 100 * len(ordered))) - 1))] * 1000
+
+    return {
+        'count': len(ordered),
+        'mean_ms': round(sum(ordered) / len(ordered) * 1000, 3),
+        'p50_ms': round(rank(50), 3),
+        'p95_ms': round(rank(95), 3),
+        'p99_ms': round(rank(99), 3),
+        'max_ms': round(ordered[-1] * 1000, 3),
+    }
+
+
+def list_user_ids(manager):
+    """매니페스트(없으면 사용자 파일)에서 사용자 ID 목록을 가져옵니다"""
+    if hasattr(manager, 'manifest'):
+        return sorted(user_id for user_id, _ in manager.manifest.iter_entries())
+    from utils.memory_manager import iter_user_files
+
+    return sorted(user_id for user_id, _ in iter_user_files(manager.memory_dir))
+
+
+def build_calls(manager, user_ids, rng, repeat, cleanup_days):
+    """연산 이름 -> 인자 없이 호출할 함수 목록"""
+    factory = ConversationFactory(rng)
+    keywords = [
+        term
+        for subcategories in MEMORY_KEYWORDS.values()
+        for terms in subcategories.values()
+        for term in terms
+    ]
+
+    return {
+        'save_conversation': [
+            lambda u=user_id: manager.save_conversation(u, factory.turn(datetime.now()))
+            for user_id in user_ids
+        ],
+        'get_recent_conversations': [
+            lambda u=user_id: manager.get_recent_conversations(u, 10) for user_id in user_ids
+        ],
+        'analyze_user_preferences': [
+            lambda u=user_id: manager.analyze_user_preferences(u) for user_id in user_ids
+        ],
+        'find_similar_conversations': [
+            lambda u=user_id, k=rng.sample(keywords, 2): manager.find_similar_conversations(u, k, 3)
+            for user_id in user_ids
+        ],
+        'get_memory_statistics': [manager.get_memory_statistics] * repeat,
+        'cleanup_old_data': [lambda: manager.cleanup_old_data(cleanup_days)],
+    }
+
+
+def run(manager, operations, sample, repeat, cleanup_days, seed):
+    """연산별로 측정한 결과 사전을 반환합니다"""
+    rng = random.Random(seed)
+    user_ids = list_user_ids(manager)
+    sampled = rng.sample(user_ids, min(sample, len(user_ids)))
+    calls = build_calls(manager, sampled, rng, repeat, cleanup_days)
+
+    results = {}
+    for name in operations:
+        samples = []
+        for call in calls[name]:
+            started = time.perf_counter()
+            call()
+            samples.append(time.perf_counter() - started)
+        results[name] = dict(percentiles(samples), peak_rss_mb=peak_rss_mb())
+    return {'users': len(user_ids), 'sampled_users': len(sampled), 'operations': results}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='메모리 저장소 규모 벤치마크')
+    parser.add_argument('--data', help='측정할 memory_data 디렉토리 (없으면 임시 저장소 생성)')
+    parser.add_argument('--users', type=int, default=50, help='임시 저장소의 입소자 수')
+    parser.add_argument('--days', type=int, default=180, help='임시 저장소의 대화 기간(일)')
+    parser.add_argument('--manager', default=DEFAULT_MANAGER, help='저장소 관리자 생성 함수 (모듈:이름)')
+    parser.add_argument(
+        '--workers', type=int, default=os.cpu_count() or 1, help='임시 저장소 생성 작업 프로세스 수'
+    )
+    parser.add_argument('--ops', default=','.join(OPERATIONS), help='측정할 연산 (쉼표 구분, 적은 순서대로 실행)')
+    parser.add_argument('--sample', type=int, default=100, help='사용자별 연산을 실행할 사용자 표본 수')
+    parser.add_argument('--repeat', type=int, default=20, help='전체 통계 연산의 반복 횟수')
+    parser.add_argument('--cleanup-days', type=int, default=365, help='cleanup_old_data의 보존 기간(일)')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', help='결과를 저장할 JSON 경로')
+    args = parser.parse_args()
+
+    operations = [name for name in args.ops.split(',') if name]
+    unknown = [name for name in operations if name not in OPERATIONS]
+    if unknown:
+        print(f"알 수 없는 연산: {', '.join(unknown)} (가능: {', '.join(OPERATIONS)})")
+        return 2
+
+    factory = load_manager_factory(args.manager)
+    temp_dir = None
+    data_dir = args.data
+    if not data_dir:
+        temp_dir = tempfile.mkdtemp(prefix='memory_bench_')
+        data_dir = temp_dir
+        print(f"임시 저장소 생성: {args.users:,}명 x {args.days:,}일")
+        generate(
+            factory(data_dir),
+            args.users,
+            args.days,
+            seed=args.seed,
+            progress=False,
+            workers=args.workers,
+            manager_spec=args.manager,
+        )
+
+    try:
+        rss_before = peak_rss_mb()
+        disk_before = directory_bytes(data_dir)
+        manager = factory(data_dir)
+        report = run(manager, operations, args.sample, args.repeat, args.cleanup_days, args.seed)
+        report.update(
+            {
+                'manager': args.manager,
+                'disk_bytes_before': disk_before,
+                'disk_bytes_after': directory_bytes(data_dir),
+                'peak_rss_mb_at_start': rss_before,
+            }
+        )
+    finally:
+        if temp_dir:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+
+    print(
+        f"=== 메모리 저장소 벤치마크 ({args.manager}, 사용자 {report['users']:,}명 중 "
+        f"{report['sampled_users']:,}명 표본) ==="
+    )
+    print(
+        f"{'연산':<28} {'횟수':>6} {'평균':>9} {'p50':>9} {'p95':>9} {'p99':>9} {'최대':>9} {'최대 RSS':>10}"
+    )
+    for name, result in report['operations'].items():
+        rss = f"{result['peak_rss_mb']:.1f}MB" if result['peak_rss_mb'] is not None else '-'
+        print(
+            f"{name:<28} {result['count']:>6} {result['mean_ms']:>7.2f}ms "
+            f"{result['p50_ms']:>7.2f}ms {result['p95_ms']:>7.2f}ms {result['p99_ms']:>7.2f}ms "
+            f"{result['max_ms']:>7.2f}ms {rss:>10}"
+        )
+    print("디스크 사용량 (측정 전 -> 후):")
+    for name in sorted(set(report['disk_bytes_before']) | set(report['disk_bytes_after'])):
+        before = report['disk_bytes_before'].get(name, 0)
+        after = report['disk_bytes_after'].get(name, 0)
+        print(f"  {name:<10} {before / 1024 / 1024:>10.2f} MB -> {after / 1024 / 1024:>10.2f} MB")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+직렬화 벤치마크
+
+기존 방식(json.dumps + isoformat, indent=2 저장)과 공통 직렬화 계층을 비교하여
+응답 프레임 1건, 메모리 파일 저장 1회당 절약되는 바이트와 CPU 시간을 출력합니다.
+
+사용법:
+    python benchmarks/bench_serialization.py [--turns 500] [--repeat 2000]
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils import serialization  # noqa: E402
+
+
+def make_frame(timestamp):
+    """스트리밍 문장 프레임 예시를 생성합니다"""
+    return {
+        'type': 'sentence',
+        'content': '그 시절 고향 마을 풍경이 떠오르시나요. 유튜브에서 \'고향의 봄 노래\'를 검색해보세요.',
+        'youtube_search': '고향의 봄 노래',
+        'memory_keywords': {'장소': {'고향': ['고향', '마을']}, '활동': {'음악': ['노래']}},
+        'timestamp': timestamp,
+    }
+
+
+def make_user_data(turns):
+    """대화 기록이 쌓인 사용자 데이터 예시를 생성합니다"""
+    now = datetime.now().isoformat()
+    conversations = []
+    for i in range(turns):
+        conversations.append(
+            {
+                'user': '어릴 때 어머니와 함께 시장에 가서 떡을 사 먹던 기억이 나요.',
+                'assistant': '정말 따뜻한 추억이네요. 그때 어떤 떡을 제일 좋아하셨나요?',
+                'metadata': {'keywords': ['어머니', '시장', '떡'], 'emotions': ['그리운']},
+                'timestamp': now,
+                'id': i + 1,
+            }
+        )
+    return {
+        'conversations': conversations,
+        'profile': {
+            'preferences': {},
+            'memory_themes': {},
+            'favorite_content': [],
+            'emotional_state': 'neutral',
+        },
+        'statistics': {'total_conversations': turns},
+        'created_at': now,
+        'last_updated': now,
+    }
+
+
+def cpu_time(func, repeat):
+    """함수를 반복 실행하고 1회당 CPU 시간(마이크로초)을 반환합니다"""
+    start = time.process_time()
+    for _ in range(repeat):
+        func()
+    return (time.process_time() - start) / repeat * 1e6
+
+
+def bench_frames(repeat):
+    """SSE 프레임 직렬화를 비교합니다"""
+    legacy_payload = json.dumps(make_frame(datetime.now().isoformat()), ensure_ascii=False) + '\n'
+    new_payload = serialization.dumps(make_frame(datetime.now())) + '\n'
+
+    legacy_us = cpu_time(
+        lambda: json.dumps(make_frame(datetime.now().isoformat()), ensure_ascii=False) + '\n',
+        repeat,
+    )
+    new_us = cpu_time(lambda: serialization.dumps(make_frame(datetime.now())) + '\n', repeat)
+
+    return {
+        'legacy_bytes': len(legacy_payload.encode('utf-8')),
+        'new_bytes': len(new_payload.encode('utf-8')),
+        'legacy_us': legacy_us,
+        'new_us': new_us,
+    }
+
+
+def bench_saves(turns, repeat):
+    """메모리 파일 저장을 비교합니다"""
+    user_data = make_user_data(turns)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        legacy_path = os.path.join(tmp_dir, 'legacy.json')
+        new_path = os.path.join(tmp_dir, 'new.json')
+
+        def legacy_save():
+            with open(legacy_path, 'w', encoding='utf-8') as f:
+                json.dump(user_data, f, ensure_ascii=False, indent=2)
+
+        def new_save():
+            serialization.write_json_file(new_path, user_data, pretty=False)
+
+        legacy_us = cpu_time(legacy_save, repeat)
+        new_us = cpu_time(new_save, repeat)
+
+        return {
+            'legacy_bytes': os.path.getsize(legacy_path),
+            'new_bytes': os.path.getsize(new_path),
+            'legacy_us': legacy_us,
+            'new_us': new_us,
+        }
+
+
+def print_result(title, result):
+    """비교 결과를 출력합니다"""
+    saved_bytes = result['legacy_bytes'] - result['new_bytes']
+    saved_us = result['legacy_us'] - result['new_us']
+    print(f"[{title}]")
+    print(f"  기존: {result['legacy_bytes']:>10,} bytes  {result['legacy_us']:>10.1f} µs CPU")
+    print(f"  신규: {result['new_bytes']:>10,} bytes  {result['new_us']:>10.1f} µs CPU")
+    print(
+        f"  절약: {saved_bytes:>10,} bytes  {saved_us:>10.1f} µs CPU "
+        f"({saved_bytes / max(result['legacy_bytes'], 1):.0%} / "
+        f"{saved_us / max(result['legacy_us'], 1e-9):.0%})"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description='직렬화 벤치마크')
+    parser.add_argument('--turns', type=int, default=500, help='저장 벤치마크의 대화 수')
+    parser.add_argument('--repeat', type=int, default=2000, help='프레임 직렬화 반복 횟수')
+    parser.add_argument('--save-repeat', type=int, default=50, help='파일 저장 반복 횟수')
+    args = parser.parse_args()
+
+    print(f"=== 직렬화 벤치마크 (백엔드: {serialization.backend_name()}) ===")
+    print_result('SSE 문장 프레임 1건', bench_frames(args.repeat))
+    print_result(f'메모리 파일 저장 1회 ({args.turns}턴)', bench_saves(args.turns, args.save_repeat))
+
+
+if __name__ == "__main__":
+    main()
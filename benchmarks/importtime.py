@@ -0,0 +1,283 @@
+#!/usr/bin/env python3
+"""
+모듈 import 시간(콜드 스타트) 벤치마크
+
+워커 프로세스를 새로 띄울 때 드는 시간 중 모듈 import 비용을 `python -X importtime`으로 측정합니다.
+대상마다 새 인터프리터를 repeat번 띄워 가장 짧은 누적 import 시간을 쓰며, 기계마다 속도가 다르므로
+고정된 표준 라이브러리 묶음의 import 시간(calibration) 대비 배율을 기준선(JSON)에 저장해 비교합니다.
+
+시간과 별개로 다음 두 가지는 기계와 관계없이 항상 검사합니다.
+- 무거운 모듈 금지: 대상별로 import만으로 불러오면 안 되는 모듈(numpy, scipy, google.generativeai 등)
+- import 부수 효과: 빈 작업 디렉토리에서 import했을 때 파일이나 디렉토리(memory_data 등)가 생기면 실패
+
+설치되지 않은 의존성 때문에 import할 수 없는 대상(예: Flask가 없는 환경의 app)은 건너뜁니다.
+
+사용법:
+    python benchmarks/importtime.py                    # 측정 결과와 느린 모듈 출력
+    python benchmarks/importtime.py --save-baseline    # 기준선 갱신
+    python benchmarks/importtime.py --compare [--threshold 1.3] [--only app]
+"""
+
+import argparse
+import json
+import os
+import platform
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BASELINE_FILE = os.path.join(ROOT, 'benchmarks', 'baselines', 'importtime.json')
+BASELINE_VERSION = 1
+
+# 측정 대상과 import만으로 불러오면 안 되는 모듈 (처음 사용할 때 불러와야 하는 무거운 의존성)
+TARGETS = {
+    'utils': ('utils.memory_manager', 'utils.analytics', 'numpy', 'scipy'),
+    'utils.text_processing': ('numpy', 'scipy'),
+    'utils.memory_manager': ('numpy', 'scipy'),
+    'utils.security': ('numpy', 'scipy'),
+    'config.settings': ('utils',),
+    'app': ('google.generativeai', 'utils.analytics', 'numpy', 'scipy'),
+}
+
+# 기계 속도 보정용 기준 작업 (버전이 같으면 내용이 바뀌지 않는 표준 라이브러리 모듈)
+CALIBRATION_MODULES = 'json, decimal, email.parser, http.client, argparse'
+
+_IMPORTTIME_LINE = re.compile(r'^import time:\s+(\d+)\s*\|\s*(\d+)\s*\|(\s*)(\S+)')
+
+
+def run_import(statement, workdir):
+    """새 인터프리터에서 statement를 실행하고 (모듈별 측정값, 불러온 모듈 목록, 오류)를 반환합니다"""
+    code = f"{statement}\nimport json, sys\nprint(json.dumps(sorted(sys.modules)))"
+    env = dict(os.environ, PYTHONPATH=ROOT + os.pathsep + os.environ.get('PYTHONPATH', ''))
+    process = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', code],
+        cwd=workdir,
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+    timings = []
+    errors = []
+    for line in process.stderr.splitlines():
+        match = _IMPORTTIME_LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            timings.append(
+                {
+                    'module': name,
+                    'self_us': int(self_us),
+                    'cumulative_us': int(cumulative_us),
+                    'depth': len(indent) // 2,
+                }
+            )
+        elif not line.startswith('import time:'):
+            errors.append(line)
+    if process.returncode != 0:
+        return timings, [], (errors[-1] if errors else f'종료 코드 {process.returncode}')
+    return timings, json.loads(process.stdout.strip().splitlines()[-1]), None
+
+
+def top_level_total(timings, modules):
+    """지정한 최상위 모듈들의 누적 import 시간 합계(µs)"""
+    names = {name.strip() for name in modules.split(',')}
+    return sum(
+        timing['cumulative_us']
+        for timing in timings
+        if timing['module'] in names and timing['depth'] == 0
+    )
+
+
+def measure_target(target, forbidden, repeat):
+    """대상 하나를 repeat번 측정하고 결과 사전을 반환합니다"""
+    best_us = None
+    best_timings = []
+    loaded = []
+    side_effects = []
+    for _ in range(repeat):
+        workdir = tempfile.mkdtemp(prefix='importtime-')
+        try:
+            timings, loaded, error = run_import(f'import {target}', workdir)
+            side_effects = sorted(os.listdir(workdir))
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
+        if error:
+            return {'status': 'unavailable', 'error': error}
+        total = top_level_total(timings, target)
+        if best_us is None or total < best_us:
+            best_us, best_timings = total, timings
+
+    slowest = sorted(
+        (timing for timing in best_timings if timing['module'] != target),
+        key=lambda timing: timing['self_us'],
+        reverse=True,
+    )[:8]
+    return {
+        'status': 'ok',
+        'import_us': best_us,
+        'modules_loaded': len(loaded),
+        'forbidden_loaded': [name for name in forbidden if name in loaded],
+        'side_effects': side_effects,
+        'slowest_self': [
+            {'module': timing['module'], 'self_us': timing['self_us']} for timing in slowest
+        ],
+    }
+
+
+def run_benchmarks(only, repeat):
+    """기준 작업과 대상들을 측정해 결과 사전을 반환합니다"""
+    calibration_us = None
+    for _ in range(repeat):
+        workdir = tempfile.mkdtemp(prefix='importtime-')
+        try:
+            timings, _, error = run_import(f'import {CALIBRATION_MODULES}', workdir)
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
+        if error:
+            raise RuntimeError(f"기준 작업 실패: {error}")
+        total = top_level_total(timings, CALIBRATION_MODULES)
+        calibration_us = total if calibration_us is None else min(calibration_us, total)
+
+    results = {}
+    for target, forbidden in TARGETS.items():
+        if only and not any(part in target for part in only):
+            continue
+        result = measure_target(target, forbidden, repeat)
+        if result['status'] == 'ok':
+            result['relative'] = round(result['import_us'] / calibration_us, 4)
+        results[target] = result
+    return {
+        'version': BASELINE_VERSION,
+        'created_at': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'calibration_us': calibration_us,
+        'benchmarks': results,
+    }
+
+
+def check_hygiene(current):
+    """금지 모듈과 import 부수 효과를 검사하고 문제 목록을 반환합니다"""
+    problems = []
+    for target, result in current['benchmarks'].items():
+        if result['status'] != 'ok':
+            continue
+        if result['forbidden_loaded']:
+            problems.append(f"{target}: import만으로 {', '.join(result['forbidden_loaded'])}를 불러옵니다")
+        if result['side_effects']:
+            problems.append(
+                f"{target}: import만으로 작업 디렉토리에 {', '.join(result['side_effects'])}가 생깁니다"
+            )
+    return problems
+
+
+def print_results(current, verbose=False):
+    print(f"{'대상':<24} {'import 시간':>12} {'기준 작업 대비':>12} {'모듈 수':>8}")
+    for target, result in current['benchmarks'].items():
+        if result['status'] != 'ok':
+            print(f"{target:<24} {'건너뜀':>12}  ({result['error']})")
+            continue
+        print(
+            f"{target:<24} {result['import_us'] / 1000:>10.1f}ms {result['relative']:>11.2f}x "
+            f"{result['modules_loaded']:>8}"
+        )
+        if verbose:
+            for timing in result['slowest_self'][:5]:
+                print(f"    {timing['module']:<40} {timing['self_us'] / 1000:>7.1f}ms")
+
+
+def compare(current, baseline, threshold):
+    """기준선 대비 배율을 출력하고 회귀한 대상 이름 목록을 반환합니다"""
+    regressions = []
+    print(f"{'대상':<24} {'import 시간':>12} {'기준선 대비':>10}  판정")
+    for target, result in current['benchmarks'].items():
+        if result['status'] != 'ok':
+            print(f"{target:<24} {'-':>12} {'-':>10}  건너뜀 ({result['error']})")
+            continue
+        base = baseline.get('benchmarks', {}).get(target)
+        if not base or base.get('status') != 'ok':
+            print(f"{target:<24} {result['import_us'] / 1000:>10.1f}ms {'-':>10}  새 항목")
+            continue
+        ratio = result['relative'] / base['relative']
+        if ratio > threshold:
+            verdict = f"회귀 (> {threshold:.2f}x)"
+            regressions.append(target)
+        elif ratio < 1 / threshold:
+            verdict = "개선"
+        else:
+            verdict = "통과"
+        print(f"{target:<24} {result['import_us'] / 1000:>10.1f}ms {ratio:>9.2f}x  {verdict}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='모듈 import 시간(콜드 스타트) 벤치마크')
+    parser.add_argument('--baseline', default=BASELINE_FILE, help='기준선 JSON 경로')
+    parser.add_argument('--save-baseline', action='store_true', help='측정 결과로 기준선을 덮어씀')
+    parser.add_argument('--compare', action='store_true', help='기준선과 비교하고 회귀가 있으면 실패')
+    parser.add_argument(
+        '--threshold',
+        type=float,
+        default=float(os.getenv('BENCH_THRESHOLD', '1.3')),
+        help='회귀로 판정할 기준선 대비 배율 (기본 1.3)',
+    )
+    parser.add_argument('--only', default='', help='이름에 포함된 대상만 측정 (쉼표 구분)')
+    parser.add_argument('--repeat', type=int, default=7, help='대상별 측정 횟수 (가장 짧은 값 사용)')
+    parser.add_argument('--verbose', action='store_true', help='대상별로 자체 import 시간이 긴 모듈 출력')
+    parser.add_argument('--output', help='측정 결과를 저장할 JSON 경로')
+    args = parser.parse_args()
+
+    only = [part for part in args.only.split(',') if part]
+    print(f"=== import 시간 벤치마크 (Python {platform.python_version()}, {args.repeat}회 중 최솟값) ===")
+    current = run_benchmarks(only, args.repeat)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(current, f, ensure_ascii=False, indent=2)
+
+    problems = check_hygiene(current)
+    for problem in problems:
+        print(f"❌ {problem}")
+
+    if args.save_baseline:
+        if only and os.path.exists(args.baseline):
+            # 일부만 측정했으면 나머지 대상의 기준선은 유지
+            with open(args.baseline, 'r', encoding='utf-8') as f:
+                previous = json.load(f)
+            previous['benchmarks'].update(current['benchmarks'])
+            current = dict(current, benchmarks=previous['benchmarks'])
+        os.makedirs(os.path.dirname(args.baseline), exist_ok=True)
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(current, f, ensure_ascii=False, indent=2)
+            f.write('\n')
+        print_results(current, args.verbose)
+        print(f"기준선을 저장했습니다: {os.path.relpath(args.baseline, ROOT)}")
+        return 1 if problems else 0
+
+    if not args.compare:
+        print_results(current, args.verbose)
+        return 1 if problems else 0
+
+    if not os.path.exists(args.baseline):
+        print(f"기준선이 없습니다: {args.baseline} (--save-baseline으로 먼저 만드세요)")
+        return 2
+    with open(args.baseline, 'r', encoding='utf-8') as f:
+        baseline = json.load(f)
+    if baseline.get('version') != BASELINE_VERSION:
+        print(f"기준선 형식이 다릅니다 (v{baseline.get('version')}). --save-baseline으로 다시 만드세요.")
+        return 2
+
+    regressions = compare(current, baseline, args.threshold)
+    if regressions or problems:
+        if regressions:
+            print(f"\nimport 시간 회귀 {len(regressions)}건: {', '.join(regressions)}")
+        return 1
+    print("\n모든 대상이 기준선 범위 안에 있습니다.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,264 @@
+#!/usr/bin/env python3
+"""
+합성 메모리 저장소 생성기
+
+입소자 수 x 기간 규모의 memory_data 트리를 만들어 저장소 벤치마크(bench_memory_storage.py)에 씁니다.
+대화는 MemoryManager의 공개 메서드(save_conversations, archive_user_data)로 저장하므로
+샤드 배치, 누적 요약, 압축 보관 세그먼트, 매니페스트가 운영 환경과 같은 모양으로 만들어집니다.
+
+- 사용자별 대화량은 로그 정규 분포 (말수가 많은 분과 적은 분의 차이)
+- 대화 시각은 시설 활동 시간(오전/오후 프로그램, 저녁) 위주
+- 화제는 MEMORY_KEYWORDS에서 지프 분포로 골라 일부 주제가 자주 나오도록 함
+- 저장 형식은 app.py와 같음 (user, assistant, timestamp, memory_keywords, emotions)
+
+사용법:
+    python benchmarks/memory_dataset.py --out /tmp/memory_bench --users 5000 --days 1095 \
+        [--workers 8]
+    python benchmarks/memory_dataset.py --out /tmp/memory_small --users 50 --days 90 --hot-days 14
+"""
+
+import argparse
+import importlib
+import math
+import multiprocessing
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.response_text import extract_response_keywords  # noqa: E402
+from utils.text_processing import EMOTION_KEYWORDS, MEMORY_KEYWORDS, extract_emotions  # noqa: E402
+
+DEFAULT_MANAGER = 'utils.memory_manager:MemoryManager'
+
+# 시설 일과 기준 시간대별 가중치 (0~23시)
+HOUR_WEIGHTS = [0, 0, 0, 0, 0, 0, 1, 2, 3, 8, 10, 9, 3, 4, 9, 10, 8, 4, 3, 5, 6, 3, 1, 0]
+
+USER_TEMPLATES = [
+    "{term} 생각이 나네. {emotion} 기억이야.",
+    "옛날에 {term} 하던 때가 있었지.",
+    "{term} 이야기를 하니까 {term2} 생각도 나요.",
+    "젊을 때는 {term}에서 {term2} 자주 했어.",
+    "요즘 {term} 때문에 마음이 {emotion} 느낌이야.",
+    "{term}? 그거 참 오랜만에 듣는 말이네.",
+    "우리 {term2}하고 {term} 얘기를 자주 했었는데.",
+    "오늘은 그냥 {emotion} 하루였어요.",
+]
+
+ASSISTANT_TEMPLATES = [
+    "{term} 이야기를 들으니 저도 마음이 {emotion} 느낌이에요. 그때 어떤 일이 제일 기억에 남으세요?",
+    "정말 소중한 추억이네요. {term2}와 관련해서 더 들려주실 수 있나요?",
+    "그 시절 {term}은 어떤 모습이었는지 궁금해요.",
+    "{emotion} 마음이 느껴져요. 유튜브에서 '{term} 옛날 영상'을 검색해보시면 좋을 것 같아요.",
+    "말씀해 주셔서 고마워요. 오늘은 {term} 이야기를 조금 더 나눠볼까요?",
+]
+
+
+def _zipf_weights(count, exponent=1.1):
+    return [1.0 / (rank**exponent) for rank in range(1, count + 1)]
+
+
+class ConversationFactory:
+    """합성 대화 턴을 만드는 생성기"""
+
+    def __init__(self, rng: random.Random):
+        self.rng = rng
+        self.terms = [
+            term
+            for subcategories in MEMORY_KEYWORDS.values()
+            for terms in subcategories.values()
+            for term in terms
+        ]
+        rng.shuffle(self.terms)
+        self.term_weights = _zipf_weights(len(self.terms))
+        self.emotions = [term for terms in EMOTION_KEYWORDS.values() for term in terms]
+
+    def user_profile(self):
+        """사용자별 하루 평균 대화 수와 대화하는 날의 비율"""
+        return {
+            'turns_per_day': min(20.0, self.rng.lognormvariate(math.log(2.5), 0.7)),
+            'active_ratio': self.rng.uniform(0.3, 0.9),
+        }
+
+    def _fill(self, template):
+        term, term2 = self.rng.choices(self.terms, self.term_weights, k=2)
+        return template.format(term=term, term2=term2, emotion=self.rng.choice(self.emotions))
+
+    def turn(self, timestamp: datetime):
+        """app.py가 저장하는 형식의 대화 한 턴을 만듭니다"""
+        user = self._fill(self.rng.choice(USER_TEMPLATES))
+        assistant = self._fill(self.rng.choice(ASSISTANT_TEMPLATES))
+        return {
+            'user': user,
+            'assistant': assistant,
+            'timestamp': timestamp.isoformat(),
+            'memory_keywords': extract_response_keywords(user + ' ' + assistant),
+            'emotions': extract_emotions(user),
+        }
+
+    def day_turns(self, day: datetime, profile):
+        """하루 동안의 대화를 시각순으로 만듭니다 (쉬는 날이면 빈 목록)"""
+        if self.rng.random() > profile['active_ratio']:
+            return []
+        count = max(1, int(self.rng.expovariate(1.0 / profile['turns_per_day'])))
+        times = sorted(
+            day.replace(hour=hour, minute=self.rng.randrange(60), second=self.rng.randrange(60))
+            for hour in self.rng.choices(range(24), HOUR_WEIGHTS, k=count)
+        )
+        return [self.turn(timestamp) for timestamp in times]
+
+
+def load_manager_factory(spec: str):
+    """'모듈:호출 가능 객체' 문자열로 저장소 관리자 생성 함수를 불러옵니다
+
+    생성 함수는 memory_dir 하나를 받아 MemoryManager와 같은 공개 메서드를 가진 객체를 반환해야 합니다.
+    """
+    module_name, _, attribute = spec.partition(':')
+    factory = getattr(importlib.import_module(module_name), attribute or 'MemoryManager')
+    return factory
+
+
+def generate_user(
+    manager, index: int, days: int, hot_days: int, seed: int, end_date: datetime
+) -> int:
+    """입소자 한 명의 대화를 저장하고 저장한 턴 수를 반환합니다
+
+    한 달치씩 모아 저장하고, hot_days보다 오래된 대화는 스케줄러처럼 압축 보관합니다.
+    사용자마다 난수 시드를 따로 쓰므로 작업 프로세스 수와 관계없이 같은 데이터가 만들어집니다.
+    """
+    factory = ConversationFactory(random.Random(f"{seed}-{index}"))
+    user_id = manager.generate_user_id(f"resident-{seed}-{index}")
+    start_date = end_date - timedelta(days=days)
+    archive_cutoff = end_date - timedelta(days=hot_days)
+    keep_recent = getattr(manager, 'summary_keep_recent', 0)
+    can_archive = hasattr(manager, 'archive_user_data')
+
+    profile = factory.user_profile()
+    total_turns = 0
+    pending = []
+    for offset in range(days):
+        day = start_date + timedelta(days=offset)
+        pending.extend(factory.day_turns(day, profile))
+        if pending and (offset % 30 == 29 or offset == days - 1):
+            manager.save_conversations(user_id, pending)
+            total_turns += len(pending)
+            pending = []
+            if can_archive and day < archive_cutoff:
+                manager.archive_user_data(user_id, archive_cutoff, keep_recent)
+    if can_archive:
+        manager.archive_user_data(user_id, archive_cutoff, keep_recent)
+    return total_turns
+
+
+def _generate_chunk(job) -> int:
+    """작업 프로세스에서 사용자 번호 묶음을 생성합니다"""
+    manager_spec, memory_dir, indices, days, hot_days, seed, end_date = job
+    manager = load_manager_factory(manager_spec)(memory_dir)
+    return sum(generate_user(manager, index, days, hot_days, seed, end_date) for index in indices)
+
+
+def generate(
+    manager,
+    users: int,
+    days: int,
+    hot_days: int = 30,
+    seed: int = 42,
+    end_date: datetime = None,
+    progress: bool = True,
+    workers: int = 1,
+    manager_spec: str = DEFAULT_MANAGER,
+):
+    """입소자 users명의 days일치 대화를 저장하고 생성 통계를 반환합니다
+
+    workers가 2 이상이면 사용자를 나누어 여러 프로세스에서 저장합니다.
+    각 프로세스는 manager_spec과 manager.memory_dir로 자기 관리자를 만들며,
+    사용자별 잠금과 매니페스트 잠금이 프로세스 간에도 동작하므로 같은 디렉토리에 함께 쓸 수 있습니다.
+    """
+    end_date = (end_date or datetime.now()).replace(hour=0, minute=0, second=0, microsecond=0)
+    started = time.perf_counter()
+    total_turns = 0
+    step = max(1, users // 20)
+    chunks = [range(start, min(start + step, users)) for start in range(0, users, step)]
+
+    def report(done):
+        if progress:
+            elapsed = time.perf_counter() - started
+            print(f"  {done:,}/{users:,}명 ({total_turns:,}턴, {elapsed:.1f}초)")
+
+    if workers > 1:
+        jobs = [
+            (manager_spec, manager.memory_dir, chunk, days, hot_days, seed, end_date)
+            for chunk in chunks
+        ]
+        with multiprocessing.Pool(workers) as pool:
+            for done, turns in enumerate(pool.imap(_generate_chunk, jobs), 1):
+                total_turns += turns
+                report(min(done * step, users))
+    else:
+        for chunk in chunks:
+            total_turns += sum(
+                generate_user(manager, index, days, hot_days, seed, end_date) for index in chunk
+            )
+            report(chunk.stop)
+
+    return {
+        'users': users,
+        'days': days,
+        'turns': total_turns,
+        'seconds': round(time.perf_counter() - started, 2),
+    }
+
+
+def directory_bytes(path: str):
+    """디렉토리 아래 파일 크기를 최상위 하위 디렉토리별로 합산합니다"""
+    usage = {}
+    for root, _, files in os.walk(path):
+        relative = os.path.relpath(root, path)
+        top = relative.split(os.sep)[0] if relative != '.' else '.'
+        for name in files:
+            try:
+                usage[top] = usage.get(top, 0) + os.path.getsize(os.path.join(root, name))
+            except OSError:
+                continue
+    usage['total'] = sum(usage.values())
+    return usage
+
+
+def main():
+    parser = argparse.ArgumentParser(description='합성 메모리 저장소 생성기')
+    parser.add_argument('--out', required=True, help='생성할 memory_data 디렉토리')
+    parser.add_argument('--users', type=int, default=200, help='입소자 수')
+    parser.add_argument('--days', type=int, default=365, help='대화 기간(일)')
+    parser.add_argument('--hot-days', type=int, default=30, help='사용자 파일에 남길 최근 기간(일), 이전은 압축 보관')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--manager', default=DEFAULT_MANAGER, help='저장소 관리자 생성 함수 (모듈:이름)')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='생성 작업 프로세스 수')
+    args = parser.parse_args()
+
+    if os.path.exists(args.out) and os.listdir(args.out):
+        print(f"{args.out}가 비어 있지 않습니다. 새 디렉토리를 지정하세요.")
+        return 1
+
+    manager = load_manager_factory(args.manager)(args.out)
+    print(f"=== 합성 저장소 생성: {args.users:,}명 x {args.days:,}일 -> {args.out} ===")
+    result = generate(
+        manager,
+        args.users,
+        args.days,
+        args.hot_days,
+        args.seed,
+        workers=args.workers,
+        manager_spec=args.manager,
+    )
+    usage = directory_bytes(args.out)
+    print(f"대화 {result['turns']:,}턴, {result['seconds']}초")
+    for name, size in sorted(usage.items()):
+        print(f"  {name:<10} {size / 1024 / 1024:>10.2f} MB")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
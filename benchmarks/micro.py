@@ -0,0 +1,277 @@
+#!/usr/bin/env python3
+"""
+요청 경로 함수 마이크로 벤치마크
+
+대화 한 턴마다 불리는 텍스트 처리/보안/추천 함수와 app.py의 응답 문장 처리 함수를
+한국어 대화 말뭉치(benchmarks/data/korean_turns.txt)로 측정하고 JSON 기준선과 비교합니다.
+기계마다 절대 속도가 다르므로 고정된 기준 작업(calibration) 대비 배율을 기준선에 저장하고,
+배율이 기준선보다 threshold배 넘게 커진 함수가 있으면 0이 아닌 값으로 종료합니다.
+같은 기계에서 함께 잰 두 항목의 비율 상한(RATIO_LIMITS)도 검사합니다 (예: 기본 키워드 추출이 정확히 일치 경로인지).
+
+사용법:
+    python benchmarks/micro.py                    # 측정 결과만 출력
+    python benchmarks/micro.py --save-baseline    # 기준선 갱신
+    python benchmarks/micro.py --compare [--threshold 1.3] [--only security]
+"""
+
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from utils.content_recommender import content_recommender  # noqa: E402
+from utils.response_text import (  # noqa: E402
+    extract_response_keywords,
+    extract_youtube_search,
+    is_sentence_end,
+)
+from utils.security import security_manager  # noqa: E402
+from utils.text_processing import (  # noqa: E402
+    extract_emotions,
+    extract_memory_keywords,
+    extract_youtube_search_terms,
+)
+
+CORPUS_FILE = os.path.join(ROOT, 'benchmarks', 'data', 'korean_turns.txt')
+BASELINE_FILE = os.path.join(ROOT, 'benchmarks', 'baselines', 'micro.json')
+BASELINE_VERSION = 1
+
+# (분자 항목, 분모 항목) -> 허용하는 최대 호출당 시간 비율
+RATIO_LIMITS = {
+    # 기본값은 정확히 일치만 찾아야 함 (근사 매칭이 기본으로 켜지면 수십 배가 됨)
+    ('text.extract_memory_keywords', 'text.extract_memory_keywords_exact'): 1.5,
+    # 근사 매칭은 자모 인덱스 조회 비용만큼 느리되 정확히 일치의 60배를 넘지 않아야 함
+    ('text.extract_memory_keywords_fuzzy', 'text.extract_memory_keywords_exact'): 60.0,
+}
+
+
+def load_corpus(path=CORPUS_FILE):
+    """주석과 빈 줄을 뺀 발화 목록을 읽습니다"""
+    with open(path, 'r', encoding='utf-8') as f:
+        return [line.strip() for line in f if line.strip() and not line.startswith('#')]
+
+
+def make_cases(corpus):
+    """벤치마크 이름 -> 말뭉치 전체를 한 번 처리하는 함수"""
+    # 스트리밍 중 문장 버퍼는 응답 조각이 붙으며 자라므로 앞부분 조각도 함께 검사
+    buffers = [text[:length] for text in corpus for length in (len(text) // 2, len(text))]
+    turns = [f"{user} {avatar}" for user, avatar in zip(corpus[::2], corpus[1::2])]
+
+    def each(func, texts):
+        def run():
+            for text in texts:
+                func(text)
+
+        return run
+
+    return {
+        'text.extract_memory_keywords': each(extract_memory_keywords, corpus),
+        'text.extract_memory_keywords_exact': each(
+            lambda text: extract_memory_keywords(text, fuzzy=False), corpus
+        ),
+        'text.extract_memory_keywords_fuzzy': each(
+            lambda text: extract_memory_keywords(text, fuzzy=True), corpus
+        ),
+        'text.extract_emotions': each(extract_emotions, corpus),
+        'text.extract_youtube_search_terms': each(extract_youtube_search_terms, corpus),
+        'text.extract_youtube_search_terms_fuzzy': each(
+            lambda text: extract_youtube_search_terms(text, fuzzy=True), corpus
+        ),
+        'security.validate_input': each(security_manager.validate_input, corpus),
+        'security.sanitize_input': each(security_manager.sanitize_input, corpus),
+        'recommender.recommend_content': each(content_recommender.recommend_content, corpus),
+        'app.is_sentence_end': each(is_sentence_end, buffers),
+        'app.extract_youtube_search': each(extract_youtube_search, corpus),
+        'app.extract_response_keywords': each(extract_response_keywords, turns),
+    }, {
+        'app.is_sentence_end': len(buffers),
+        'app.extract_response_keywords': len(turns),
+    }
+
+
+def calibration(corpus):
+    """기계 속도를 재는 고정 기준 작업 (문자열 분할과 사전 집계)"""
+
+    def run():
+        counts = {}
+        for text in corpus:
+            for word in text.split():
+                counts[word] = counts.get(word, 0) + 1
+        sorted(counts.items())
+
+    return run
+
+
+def calibrate_loops(func, min_time):
+    """한 번 실행 시간이 min_time 이상이 되는 반복 횟수를 구합니다"""
+    func()  # 지연 초기화(근사 매칭 인덱스 등)를 측정에서 제외
+    loops = 1
+    while True:
+        started = time.perf_counter()
+        for _ in range(loops):
+            func()
+        elapsed = time.perf_counter() - started
+        if elapsed >= min_time:
+            return loops
+        loops *= 2 if elapsed <= 0 else max(2, min(10, int(min_time / elapsed) + 1))
+
+
+def run_benchmarks(corpus, only=None, min_time=0.05, repeat=7):
+    """기준 작업과 각 함수를 측정해 결과 사전을 반환합니다
+
+    CPU 클럭 변화 같은 잡음이 모든 항목에 고르게 섞이도록 한 라운드에 모든 항목을 한 번씩 재고,
+    repeat 라운드 중 항목별로 가장 짧은 값을 씁니다.
+    """
+    cases, call_counts = make_cases(corpus)
+    cases = {
+        name: func for name, func in cases.items() if not only or any(part in name for part in only)
+    }
+    cases = dict({'_calibration': calibration(corpus)}, **cases)
+    loops = {name: calibrate_loops(func, min_time) for name, func in cases.items()}
+
+    best = {name: float('inf') for name in cases}
+    for _ in range(repeat):
+        for name, func in cases.items():
+            started = time.perf_counter()
+            for _ in range(loops[name]):
+                func()
+            best[name] = min(best[name], (time.perf_counter() - started) / loops[name])
+
+    calibration_seconds = best.pop('_calibration')
+    results = {}
+    for name, seconds in best.items():
+        calls = call_counts.get(name, len(corpus))
+        results[name] = {
+            'ns_per_call': round(seconds / calls * 1e9, 1),
+            'relative': round(seconds / calibration_seconds, 4),
+        }
+    return {
+        'version': BASELINE_VERSION,
+        'created_at': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'corpus_lines': len(corpus),
+        'calibration_ns': round(calibration_seconds * 1e9, 1),
+        'benchmarks': results,
+    }
+
+
+def compare(current, baseline, threshold):
+    """기준선 대비 배율을 출력하고 회귀한 함수 이름 목록을 반환합니다"""
+    regressions = []
+    print(f"{'함수':<36} {'호출당':>12} {'기준선 대비':>10}  판정")
+    for name, result in current['benchmarks'].items():
+        base = baseline.get('benchmarks', {}).get(name)
+        if not base:
+            print(f"{name:<36} {result['ns_per_call'] / 1000:>9.2f}µs {'-':>10}  새 항목")
+            continue
+        ratio = result['relative'] / base['relative']
+        if ratio > threshold:
+            verdict = f"회귀 (> {threshold:.2f}x)"
+            regressions.append(name)
+        elif ratio < 1 / threshold:
+            verdict = "개선"
+        else:
+            verdict = "통과"
+        print(f"{name:<36} {result['ns_per_call'] / 1000:>9.2f}µs {ratio:>9.2f}x  {verdict}")
+    return regressions
+
+
+def check_ratios(current):
+    """RATIO_LIMITS를 넘은 항목 쌍을 출력하고 그 이름 목록을 반환합니다 (측정하지 않은 쌍은 건너뜀)"""
+    failures = []
+    benchmarks = current['benchmarks']
+    for (numerator, denominator), limit in RATIO_LIMITS.items():
+        if numerator not in benchmarks or denominator not in benchmarks:
+            continue
+        ratio = benchmarks[numerator]['ns_per_call'] / benchmarks[denominator]['ns_per_call']
+        verdict = "통과" if ratio <= limit else f"초과 (> {limit:g}x)"
+        print(f"{numerator} / {denominator}: {ratio:.1f}x  {verdict}")
+        if ratio > limit:
+            failures.append(f"{numerator}/{denominator}")
+    return failures
+
+
+def print_results(current):
+    print(f"{'함수':<36} {'호출당':>12} {'기준 작업 대비':>12}")
+    for name, result in current['benchmarks'].items():
+        print(f"{name:<36} {result['ns_per_call'] / 1000:>9.2f}µs {result['relative']:>11.3f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='요청 경로 함수 마이크로 벤치마크')
+    parser.add_argument('--baseline', default=BASELINE_FILE, help='기준선 JSON 경로')
+    parser.add_argument('--save-baseline', action='store_true', help='측정 결과로 기준선을 덮어씀')
+    parser.add_argument('--compare', action='store_true', help='기준선과 비교하고 회귀가 있으면 실패')
+    parser.add_argument(
+        '--threshold',
+        type=float,
+        default=float(os.getenv('BENCH_THRESHOLD', '1.3')),
+        help='회귀로 판정할 기준선 대비 배율 (기본 1.3)',
+    )
+    parser.add_argument('--only', default='', help='이름에 포함된 벤치마크만 실행 (쉼표 구분)')
+    parser.add_argument('--min-time', type=float, default=0.05, help='측정 1회의 최소 시간(초)')
+    parser.add_argument('--repeat', type=int, default=7, help='측정 라운드 수 (항목별 가장 짧은 값 사용)')
+    parser.add_argument('--output', help='측정 결과를 저장할 JSON 경로')
+    args = parser.parse_args()
+
+    corpus = load_corpus()
+    only = [part for part in args.only.split(',') if part]
+    print(f"=== 마이크로 벤치마크 (말뭉치 {len(corpus)}문장, Python {platform.python_version()}) ===")
+    current = run_benchmarks(corpus, only, args.min_time, args.repeat)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(current, f, ensure_ascii=False, indent=2)
+
+    if args.save_baseline:
+        # 비율 검사를 통과하지 못한 측정(예: 회귀가 들어간 상태)은 기준선으로 저장하지 않음
+        failures = check_ratios(current)
+        if failures:
+            print(f"\n비율 검사 실패로 기준선을 저장하지 않습니다: {', '.join(failures)}")
+            return 1
+        if only:
+            # 일부만 측정했으면 나머지 함수의 기준선은 유지
+            with open(args.baseline, 'r', encoding='utf-8') as f:
+                previous = json.load(f)
+            previous['benchmarks'].update(current['benchmarks'])
+            current = dict(current, benchmarks=previous['benchmarks'])
+        os.makedirs(os.path.dirname(args.baseline), exist_ok=True)
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(current, f, ensure_ascii=False, indent=2)
+            f.write('\n')
+        print_results(current)
+        print(f"기준선을 저장했습니다: {os.path.relpath(args.baseline, ROOT)}")
+        return 0
+
+    if not args.compare:
+        print_results(current)
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"기준선이 없습니다: {args.baseline} (--save-baseline으로 먼저 만드세요)")
+        return 2
+    with open(args.baseline, 'r', encoding='utf-8') as f:
+        baseline = json.load(f)
+    if baseline.get('version') != BASELINE_VERSION:
+        print(f"기준선 형식이 다릅니다 (v{baseline.get('version')}). --save-baseline으로 다시 만드세요.")
+        return 2
+
+    regressions = compare(current, baseline, args.threshold)
+    print()
+    regressions += check_ratios(current)
+    if regressions:
+        print(f"\n성능 회귀 {len(regressions)}건: {', '.join(regressions)}")
+        return 1
+    print("\n모든 함수가 기준선 범위 안에 있습니다.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
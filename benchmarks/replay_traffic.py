@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+"""
+/chat 기록 트래픽 재현기
+
+TRAFFIC_CAPTURE_FILE로 기록한 /chat 트래픽을 기록된 도착 간격 그대로(1배속) 또는 N배속으로
+서버에 다시 보내고, 배속별 첫 문장까지의 시간(TTFS)과 전체 응답 시간 백분위수, 오류율, 처리량을 출력합니다.
+배속을 올려 가며 p95 응답 시간이 1배속의 --saturation-factor배를 넘거나 오류율이 1%를 넘는
+첫 배속을 포화 지점으로 표시합니다.
+
+서버는 실제 Gemini 대신 기록된 토큰 타이밍을 재현하는 가짜 모델로 띄웁니다:
+    MODEL_BACKEND=fake FAKE_MODEL_CAPTURE=chat_capture.ndjson python app.py
+
+재현 요청의 메시지는 기록된 길이만큼의 채움 문자열이며 앞에 "[#기록 번호]"를 붙여
+가짜 모델이 같은 기록의 응답 모양을 쓰도록 합니다. 사용자 ID는 기록의 익명 ID를 그대로 써서
+사용자별 기억 파일의 크기 변화도 재현합니다.
+
+사용법:
+    python benchmarks/replay_traffic.py chat_capture.ndjson --summary
+    python benchmarks/replay_traffic.py chat_capture.ndjson \
+        --url http://localhost:5000 --speeds 1,2,4,8
+    python benchmarks/replay_traffic.py chat_capture.ndjson \
+        --speeds 20 --limit 500 --output replay.json
+"""
+
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.traffic_capture import filler_text, load_capture  # noqa: E402
+
+
+def percentile(ordered, p):
+    if not ordered:
+        return None
+    return ordered[min(len(ordered) - 1, max(0, int(round(p / 100 * len(ordered))) - 1))]
+
+
+def summarize_latencies(values):
+    """초 단위 목록의 백분위수를 밀리초로 반환합니다"""
+    ordered = sorted(values)
+    if not ordered:
+        return {}
+    return {f'p{p}_ms': round(percentile(ordered, p) * 1000, 1) for p in (50, 95, 99)}
+
+
+def describe_capture(records):
+    """기록된 트래픽의 모양(시간대별 요청 수, 길이, 업스트림 타이밍)을 출력합니다"""
+    hours = Counter(datetime.fromtimestamp(record['t']).hour for record in records)
+    messages = sorted(record.get('m', 0) for record in records)
+    first_chunk = sorted(record['g'][0] for record in records)
+    upstream = sorted(sum(record['g']) for record in records)
+    gaps = sorted(b['t'] - a['t'] for a, b in zip(records, records[1:]))
+    span = records[-1]['t'] - records[0]['t'] if len(records) > 1 else 0
+    statuses = Counter(record.get('s', 'ok') for record in records)
+
+    print(f"기록 {len(records):,}건, {span / 3600:.1f}시간, 사용자 {len({r.get('u') for r in records}):,}명")
+    print(f"결과: {dict(statuses)}")
+    print(f"메시지 글자 수 p50/p95: {percentile(messages, 50)}/{percentile(messages, 95)}")
+    print(
+        f"첫 조각(ms) p50/p95: {percentile(first_chunk, 50)}/{percentile(first_chunk, 95)}, "
+        f"업스트림 전체(ms) p50/p95: {percentile(upstream, 50)}/{percentile(upstream, 95)}"
+    )
+    if gaps:
+        print(f"도착 간격(초) p50/p95: {percentile(gaps, 50):.2f}/{percentile(gaps, 95):.2f}")
+    print("시간대별 요청 수:")
+    peak = max(hours.values())
+    for hour in range(24):
+        count = hours.get(hour, 0)
+        print(f"  {hour:02d}시 {count:>7,} {'#' * int(40 * count / peak)}")
+
+
+def send_chat(url, index, record, timeout):
+    """재현 요청 하나를 보내고 (첫 문장까지 시간, 전체 시간, 결과)를 반환합니다"""
+    message = f"[#{index}] " + filler_text(max(record.get('m', 10) - 6, 1))
+    body = json.dumps(
+        {'message': message[:500], 'user_id': f"replay-{record.get('u', index)}"}
+    ).encode('utf-8')
+    request = urllib.request.Request(
+        f"{url.rstrip('/')}/chat", data=body, headers={'Content-Type': 'application/json'}
+    )
+    started = time.perf_counter()
+    first_sentence = None
+    outcome = 'ok'
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            for raw in response:
+                line = raw.decode('utf-8', 'replace')
+                start = line.find('{')
+                if start < 0:
+                    continue
+                try:
+                    event = json.loads(line[start:])
+                except ValueError:
+                    continue
+                if event.get('type') == 'sentence' and first_sentence is None:
+                    first_sentence = time.perf_counter() - started
+                elif event.get('type') == 'error':
+                    outcome = 'stream_error'
+    except urllib.error.HTTPError as e:
+        outcome = f'http_{e.code}'
+    except Exception:
+        outcome = 'connection_error'
+    return first_sentence, time.perf_counter() - started, outcome
+
+
+def replay(records, url, speed, concurrency, timeout):
+    """기록을 speed배속으로 재현하고 결과 사전을 반환합니다"""
+    base = records[0]['t']
+    results = []
+    lock = threading.Lock()
+    max_lag = 0.0
+
+    def run(index, record):
+        result = send_chat(url, index, record, timeout)
+        with lock:
+            results.append(result)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for index, record in enumerate(records):
+            due = (record['t'] - base) / speed
+            wait = due - (time.perf_counter() - started)
+            if wait > 0:
+                time.sleep(wait)
+            else:
+                max_lag = max(max_lag, -wait)
+            pool.submit(run, index, record)
+    elapsed = time.perf_counter() - started
+
+    outcomes = Counter(outcome for _, _, outcome in results)
+    ok = [result for result in results if result[2] == 'ok']
+    offered_span = (records[-1]['t'] - base) / speed
+    return {
+        'speed': speed,
+        'requests': len(results),
+        'offered_rps': round(len(records) / offered_span, 2) if offered_span > 0 else None,
+        'achieved_rps': round(len(results) / elapsed, 2) if elapsed > 0 else None,
+        'error_rate': round(1 - len(ok) / max(len(results), 1), 4),
+        'outcomes': dict(outcomes),
+        'first_sentence': summarize_latencies([first for first, _, _ in ok if first is not None]),
+        'total': summarize_latencies([total for _, total, _ in ok]),
+        'max_dispatch_lag_ms': round(max_lag * 1000, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='/chat 기록 트래픽 재현기')
+    parser.add_argument('capture', help='TRAFFIC_CAPTURE_FILE로 기록한 파일')
+    parser.add_argument('--url', default='http://localhost:5000', help='재현 대상 서버 주소')
+    parser.add_argument('--speeds', default='1', help='재현 배속 목록 (쉼표 구분, 차례로 실행)')
+    parser.add_argument('--limit', type=int, default=0, help='앞에서부터 재현할 기록 수 (0이면 전체)')
+    parser.add_argument('--start-hour', type=int, help='이 시각(0~23)부터의 기록만 재현')
+    parser.add_argument('--concurrency', type=int, default=256, help='동시에 열어 둘 최대 요청 수')
+    parser.add_argument('--timeout', type=float, default=60.0, help='요청 하나의 제한 시간(초)')
+    parser.add_argument(
+        '--saturation-factor', type=float, default=2.0, help='1배속 대비 p95 응답 시간이 이 배수를 넘으면 포화로 판정'
+    )
+    parser.add_argument('--summary', action='store_true', help='재현하지 않고 기록 모양만 출력')
+    parser.add_argument('--output', help='결과를 저장할 JSON 경로')
+    args = parser.parse_args()
+
+    records = load_capture(args.capture)
+    if args.start_hour is not None:
+        records = [
+            record
+            for record in records
+            if datetime.fromtimestamp(record['t']).hour >= args.start_hour
+        ]
+    if args.limit:
+        records = records[: args.limit]
+    if not records:
+        print("재현할 기록이 없습니다.")
+        return 1
+
+    if args.summary:
+        describe_capture(records)
+        return 0
+
+    speeds = [float(value) for value in args.speeds.split(',') if value]
+    print(f"=== /chat 트래픽 재현: 기록 {len(records):,}건 -> {args.url} ===")
+    print(
+        f"{'배속':>6} {'요청':>7} {'제공 rps':>9} {'처리 rps':>9} {'오류율':>7} "
+        f"{'TTFS p50':>9} {'p95':>8} {'전체 p50':>9} {'p95':>8} {'p99':>8}  판정"
+    )
+    reports = []
+    baseline_p95 = None
+    saturation = None
+    for speed in speeds:
+        report = replay(records, args.url, speed, args.concurrency, args.timeout)
+        reports.append(report)
+        first, total = report['first_sentence'], report['total']
+        p95 = total.get('p95_ms')
+        if baseline_p95 is None:
+            baseline_p95 = p95
+        saturated = report['error_rate'] > 0.01 or (
+            p95 is not None and baseline_p95 and p95 > baseline_p95 * args.saturation_factor
+        )
+        if saturated and saturation is None:
+            saturation = speed
+        print(
+            f"{speed:>5g}x {report['requests']:>7,} {report['offered_rps'] or 0:>9.2f} "
+            f"{report['achieved_rps'] or 0:>9.2f} {report['error_rate']:>6.1%} "
+            f"{first.get('p50_ms', 0):>9.0f} {first.get('p95_ms', 0):>8.0f} "
+            f"{total.get('p50_ms', 0):>9.0f} {total.get('p95_ms', 0):>8.0f} "
+            f"{total.get('p99_ms', 0):>8.0f}  "
+            f"{'포화' if saturated else '정상'}"
+        )
+        if report['max_dispatch_lag_ms'] > 100:
+            print(f"       (재현기 지연 최대 {report['max_dispatch_lag_ms']:.0f}ms: --concurrency를 늘리세요)")
+
+    if saturation is not None:
+        print(f"\n포화 지점: {saturation:g}배속")
+    else:
+        print("\n측정한 배속 안에서 포화되지 않았습니다.")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(
+                {
+                    'capture': args.capture,
+                    'url': args.url,
+                    'saturation_speed': saturation,
+                    'runs': reports,
+                },
+                f,
+                ensure_ascii=False,
+                indent=2,
+            )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -6,93 +6,220 @@
 
 import os
 from typing import Dict, Any, Optional
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from dotenv import load_dotenv
 
-# 환경 변수 로드
-load_dotenv()
+
+# 설정값은 클래스 정의 시점이 아니라 인스턴스를 만들 때 환경 변수에서 읽음
+# (.env는 get_config()가 처음 호출될 때 읽으며, reload_config() 후의 값도 반영됨)
+def env_str(name: str, default: str = ''):
+    return field(default_factory=lambda: os.getenv(name, default))
+
+
+def env_int(name: str, default: int):
+    return field(default_factory=lambda: int(os.getenv(name, str(default))))
+
+
+def env_float(name: str, default: float):
+    return field(default_factory=lambda: float(os.getenv(name, str(default))))
+
+
+def env_bool(name: str, default: bool = False):
+    return field(default_factory=lambda: os.getenv(name, str(default)).lower() == 'true')
+
 
 @dataclass
 class APIConfig:
     """API 관련 설정"""
-    gemini_api_key: str = os.getenv('GEMINI_API_KEY', 'your-gemini-api-key-here')
-    gemini_model: str = os.getenv('GEMINI_MODEL', 'gemini-1.5-flash')
-    max_tokens: int = int(os.getenv('GEMINI_MAX_TOKENS', '500'))
-    temperature: float = float(os.getenv('GEMINI_TEMPERATURE', '0.7'))
-    top_p: float = float(os.getenv('GEMINI_TOP_P', '0.8'))
-    top_k: int = int(os.getenv('GEMINI_TOP_K', '40'))
+
+    gemini_api_key: str = env_str('GEMINI_API_KEY', 'your-gemini-api-key-here')
+    gemini_model: str = env_str('GEMINI_MODEL', 'gemini-1.5-flash')
+    max_tokens: int = env_int('GEMINI_MAX_TOKENS', 500)
+    temperature: float = env_float('GEMINI_TEMPERATURE', 0.7)
+    top_p: float = env_float('GEMINI_TOP_P', 0.8)
+    top_k: int = env_int('GEMINI_TOP_K', 40)
+    model_backend: str = env_str('MODEL_BACKEND', 'gemini')  # gemini, fake (기록된 타이밍 재현)
+    fake_model_capture: str = env_str('FAKE_MODEL_CAPTURE', '')
+    fake_model_time_scale: float = env_float('FAKE_MODEL_TIME_SCALE', 1.0)
 
 @dataclass
 class AppConfig:
     """애플리케이션 설정"""
-    secret_key: str = os.getenv('FLASK_SECRET_KEY', 'change-this-secret-key')
-    debug: bool = os.getenv('FLASK_DEBUG', 'False').lower() == 'true'
-    host: str = os.getenv('FLASK_HOST', '0.0.0.0')
-    port: int = int(os.getenv('FLASK_PORT', '5000'))
-    threaded: bool = os.getenv('FLASK_THREADED', 'True').lower() == 'true'
+
+    secret_key: str = env_str('FLASK_SECRET_KEY', 'change-this-secret-key')
+    debug: bool = env_bool('FLASK_DEBUG', False)
+    host: str = env_str('FLASK_HOST', '0.0.0.0')
+    port: int = env_int('FLASK_PORT', 5000)
+    threaded: bool = env_bool('FLASK_THREADED', True)
 
 @dataclass
 class ConversationConfig:
     """대화 관련 설정"""
-    max_history: int = int(os.getenv('MAX_CONVERSATION_HISTORY', '10'))
-    max_response_sentences: int = int(os.getenv('RESPONSE_MAX_SENTENCES', '3'))
-    streaming_delay: float = float(os.getenv('STREAMING_DELAY', '0.1'))
-    max_input_length: int = int(os.getenv('MAX_INPUT_LENGTH', '500'))
-    context_window: int = int(os.getenv('CONTEXT_WINDOW', '5'))
+
+    max_history: int = env_int('MAX_CONVERSATION_HISTORY', 10)
+    max_response_sentences: int = env_int('RESPONSE_MAX_SENTENCES', 3)
+    streaming_delay: float = env_float('STREAMING_DELAY', 0.1)
+    max_input_length: int = env_int('MAX_INPUT_LENGTH', 500)
+    context_window: int = env_int('CONTEXT_WINDOW', 5)
+    fuzzy_match_distance: int = env_int('FUZZY_MATCH_DISTANCE', 1)  # 자모 편집 거리, 0이면 정확히 일치만
+    fuzzy_min_term_length: int = env_int('FUZZY_MIN_TERM_LENGTH', 6)  # 근사 매칭할 최소 자모 수
 
 @dataclass
 class TTSConfig:
     """TTS 관련 설정"""
-    default_rate: float = float(os.getenv('DEFAULT_VOICE_RATE', '0.8'))
-    default_pitch: float = float(os.getenv('DEFAULT_VOICE_PITCH', '1.0'))
-    default_volume: float = float(os.getenv('DEFAULT_VOICE_VOLUME', '0.8'))
-    default_lang: str = os.getenv('DEFAULT_VOICE_LANG', 'ko-KR')
-    max_queue_size: int = int(os.getenv('TTS_MAX_QUEUE_SIZE', '10'))
+
+    default_rate: float = env_float('DEFAULT_VOICE_RATE', 0.8)
+    default_pitch: float = env_float('DEFAULT_VOICE_PITCH', 1.0)
+    default_volume: float = env_float('DEFAULT_VOICE_VOLUME', 0.8)
+    default_lang: str = env_str('DEFAULT_VOICE_LANG', 'ko-KR')
+    max_queue_size: int = env_int('TTS_MAX_QUEUE_SIZE', 10)
 
 @dataclass
 class AvatarConfig:
     """아바타 관련 설정"""
-    idle_video: str = os.getenv('AVATAR_IDLE_VIDEO', 'avatar_idle.mp4')
-    speaking_video: str = os.getenv('AVATAR_SPEAKING_VIDEO', 'avatar_speaking.mp4')
-    video_format: str = os.getenv('AVATAR_VIDEO_FORMAT', 'mp4')
-    fallback_enabled: bool = os.getenv('AVATAR_FALLBACK_ENABLED', 'True').lower() == 'true'
+
+    idle_video: str = env_str('AVATAR_IDLE_VIDEO', 'avatar_idle.mp4')
+    speaking_video: str = env_str('AVATAR_SPEAKING_VIDEO', 'avatar_speaking.mp4')
+    video_format: str = env_str('AVATAR_VIDEO_FORMAT', 'mp4')
+    fallback_enabled: bool = env_bool('AVATAR_FALLBACK_ENABLED', True)
 
 @dataclass
 class SecurityConfig:
     """보안 관련 설정"""
-    rate_limit_requests: int = int(os.getenv('RATE_LIMIT_REQUESTS', '30'))
-    rate_limit_window: int = int(os.getenv('RATE_LIMIT_WINDOW', '60'))
-    csrf_enabled: bool = os.getenv('CSRF_ENABLED', 'True').lower() == 'true'
-    csrf_secret: str = os.getenv('CSRF_SECRET', 'change-this-csrf-secret')
-    blocked_keywords: list = os.getenv('BLOCKED_KEYWORDS', '').split(',')
-    max_failed_attempts: int = int(os.getenv('MAX_FAILED_ATTEMPTS', '5'))
+
+    rate_limit_requests: int = env_int('RATE_LIMIT_REQUESTS', 30)
+    rate_limit_window: int = env_int('RATE_LIMIT_WINDOW', 60)
+    csrf_enabled: bool = env_bool('CSRF_ENABLED', True)
+    csrf_secret: str = env_str('CSRF_SECRET', 'change-this-csrf-secret')
+    blocked_keywords: list = field(
+        default_factory=lambda: os.getenv('BLOCKED_KEYWORDS', '').split(',')
+    )
+    max_failed_attempts: int = env_int('MAX_FAILED_ATTEMPTS', 5)
+    admin_token: str = env_str('ADMIN_TOKEN', '')  # 비우면 /admin 엔드포인트 비활성화
+    profile_signing_key: str = env_str('PROFILE_SIGNING_KEY', '')  # 비우면 ADMIN_TOKEN 사용
 
 @dataclass
 class MemoryConfig:
     """메모리 관리 설정"""
-    memory_dir: str = os.getenv('MEMORY_DIR', 'memory_data')
-    max_memory_size_mb: int = int(os.getenv('MAX_MEMORY_SIZE_MB', '100'))
-    cleanup_interval_days: int = int(os.getenv('CLEANUP_INTERVAL_DAYS', '30'))
-    auto_backup: bool = os.getenv('AUTO_BACKUP', 'True').lower() == 'true'
-    backup_dir: str = os.getenv('BACKUP_DIR', 'backups')
+
+    memory_dir: str = env_str('MEMORY_DIR', 'memory_data')
+    max_memory_size_mb: int = env_int('MAX_MEMORY_SIZE_MB', 100)
+    cleanup_interval_days: int = env_int('CLEANUP_INTERVAL_DAYS', 30)
+    auto_backup: bool = env_bool('AUTO_BACKUP', True)
+    backup_dir: str = env_str('BACKUP_DIR', 'backups')
+    retention_days: int = env_int('MEMORY_RETENTION_DAYS', 365)
+    backup_interval_hours: float = env_float('BACKUP_INTERVAL_HOURS', 24)
+    backup_keep: int = env_int('BACKUP_KEEP', 7)
+    pretty_json: bool = env_bool('MEMORY_PRETTY_JSON', False)
+    summary_interval_turns: int = env_int('SUMMARY_INTERVAL_TURNS', 10)
+    summary_keep_recent: int = env_int('SUMMARY_KEEP_RECENT', 4)
+    llm_summary_enabled: bool = env_bool('LLM_SUMMARY_ENABLED', False)
+    write_behind_queue_size: int = env_int('WRITE_BEHIND_QUEUE_SIZE', 1000)
+    write_behind_flush_interval: float = env_float('WRITE_BEHIND_FLUSH_INTERVAL', 0.2)
+    # 저장 실패 시 다시 시도하는 횟수와, 그래도 실패한 대화를 남겨 다음 시작 때 다시 저장하는 파일
+    write_behind_max_attempts: int = env_int('WRITE_BEHIND_MAX_ATTEMPTS', 5)
+    write_behind_recovery_file: str = env_str(
+        'WRITE_BEHIND_RECOVERY_FILE', 'write_behind_recovery.ndjson'
+    )
+    fsync_policy: str = env_str('MEMORY_FSYNC_POLICY', 'never')  # never, commit, periodic
+    fsync_interval: float = env_float('MEMORY_FSYNC_INTERVAL', 1.0)  # periodic 정책의 fsync 간격(초)
+    archive_after_days: int = env_int('ARCHIVE_AFTER_DAYS', 30)  # 0이면 보관하지 않음
+    archive_compression: str = env_str('ARCHIVE_COMPRESSION', '')  # zstd, gzip (비우면 자동 선택)
+    semantic_index_dim: int = env_int('SEMANTIC_INDEX_DIM', 512)  # 0이면 키워드 검색
+    related_memory_turns: int = env_int('RELATED_MEMORY_TURNS', 2)
+    # 프로세스 내 자료구조 크기 집계 주기(초, 0이면 끔)와 소프트 한도 ("이름=값,이름=값")
+    accounting_interval: float = env_float('MEMORY_ACCOUNTING_INTERVAL', 60)
+    soft_limit_entries: str = env_str(
+        'MEMORY_SOFT_LIMIT_ENTRIES', 'rate_limit_cache=50000,blocked_ips=100000'
+    )
+    soft_limit_mb: str = env_str('MEMORY_SOFT_LIMIT_MB', '')
+
 
 @dataclass
 class LoggingConfig:
     """로깅 설정"""
-    log_level: str = os.getenv('LOG_LEVEL', 'INFO')
-    log_file: str = os.getenv('LOG_FILE', 'app.log')
-    security_log_file: str = os.getenv('SECURITY_LOG_FILE', 'security.log')
-    max_log_size_mb: int = int(os.getenv('MAX_LOG_SIZE_MB', '10'))
-    backup_count: int = int(os.getenv('LOG_BACKUP_COUNT', '5'))
-    log_format: str = os.getenv('LOG_FORMAT', '%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+    log_level: str = env_str('LOG_LEVEL', 'INFO')
+    log_file: str = env_str('LOG_FILE', 'app.log')
+    security_log_file: str = env_str('SECURITY_LOG_FILE', 'security.log')
+    max_log_size_mb: int = env_int('MAX_LOG_SIZE_MB', 10)
+    backup_count: int = env_int('LOG_BACKUP_COUNT', 5)
+    log_retention_days: int = env_int('LOG_RETENTION_DAYS', 30)
+    log_format: str = env_str('LOG_FORMAT', '%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    traffic_capture_file: str = env_str('TRAFFIC_CAPTURE_FILE', '')  # 비우면 기록하지 않음
+    traffic_capture_sample_rate: float = env_float('TRAFFIC_CAPTURE_SAMPLE_RATE', 1.0)
+
+
+@dataclass
+class SchedulerConfig:
+    """백그라운드 작업 스케줄러 설정"""
+
+    enabled: bool = env_bool('SCHEDULER_ENABLED', True)
+    tick_seconds: float = env_float('SCHEDULER_TICK_SECONDS', 60)
+    lock_file: str = env_str('SCHEDULER_LOCK_FILE', 'scheduler.lock')
+    state_file: str = env_str('SCHEDULER_STATE_FILE', 'scheduler_state.json')
+    cleanup_batch_size: int = env_int('CLEANUP_BATCH_SIZE', 100)
+
+
+@dataclass
+class AdmissionConfig:
+    """/chat 수용 제어 설정"""
+
+    enabled: bool = env_bool('ADMISSION_ENABLED', True)
+    worker_threads: int = env_int('ADMISSION_WORKER_THREADS', 16)  # gunicorn --threads 값과 맞춤
+    reserved_threads: int = env_int('ADMISSION_RESERVED_THREADS', 2)  # /health와 정적 경로용
+    max_streams: int = env_int('ADMISSION_MAX_STREAMS', 0)  # 0이면 자동 계산
+    queue_size: int = env_int('ADMISSION_QUEUE_SIZE', 4)
+    queue_timeout: float = env_float('ADMISSION_QUEUE_TIMEOUT', 2.0)
+    min_retry_after: int = env_int('ADMISSION_MIN_RETRY_AFTER', 2)
+
+
+@dataclass
+class TenantQuotaConfig:
+    """시설별 모델 호출 예산 설정"""
+
+    quotas: str = env_str('TENANT_QUOTAS', 'default=1:0')  # 시설=가중치:분당토큰
+    facility_api_keys: str = env_str('FACILITY_API_KEYS', '')  # API키=시설 (X-Facility-Key로 시설 결정)
+    upstream_tpm_limit: int = env_int('UPSTREAM_TPM_LIMIT', 0)  # 0이면 제한 없음
+    upstream_max_inflight: int = env_int('UPSTREAM_MAX_INFLIGHT', 0)  # 0이면 제한 없음
+    queue_timeout: float = env_float('TENANT_QUEUE_TIMEOUT', 5.0)
+    redis_url: str = env_str('QUOTA_REDIS_URL', '')  # 비우면 로컬 저장소
+    state_file: str = env_str('QUOTA_STATE_FILE', '')  # 비우면 프로세스 안에서만 집계
+    chars_per_token: float = env_float('TOKEN_CHARS_PER_TOKEN', 2.0)
+
+
+@dataclass
+class AdaptiveGenerationConfig:
+    """생성 한도 적응 조절 설정"""
+
+    enabled: bool = env_bool('ADAPTIVE_GENERATION_ENABLED', True)
+    percentile: float = env_float('ADAPTIVE_PERCENTILE', 0.9)  # 문장당 토큰 분위수
+    headroom: float = env_float('ADAPTIVE_HEADROOM', 1.2)
+    min_output_tokens: int = env_int('ADAPTIVE_MIN_OUTPUT_TOKENS', 64)
+    latency_target: float = env_float('ADAPTIVE_LATENCY_TARGET', 2.0)  # 첫 조각 지연 목표(초)
+    control_rate: float = env_float('ADAPTIVE_CONTROL_RATE', 0.05)  # 고정 설정으로 보낼 비교군 비율
+
+
+@dataclass
+class ModelRoutingConfig:
+    """모델 계층 라우팅과 폴백 설정"""
+
+    tiers: str = env_str('MODEL_TIERS', '')  # 가벼운 모델부터 쉼표로 나열 (비우면 GEMINI_MODEL 하나)
+    costs: str = env_str('MODEL_COSTS', '')  # 모델=입력단가:출력단가 (100만 토큰당 USD)
+    long_prompt_tokens: int = env_int('ROUTE_LONG_PROMPT_TOKENS', 1500)
+    latency_budget: float = env_float('ROUTE_LATENCY_BUDGET', 3.0)  # 첫 조각 지연 예산(초)
+    failure_threshold: int = env_int('MODEL_FAILURE_THRESHOLD', 3)
+    cooldown_seconds: float = env_float('MODEL_COOLDOWN_SECONDS', 30)
+    fake_failure_rates: str = env_str('FAKE_MODEL_FAILURE_RATES', '')  # 가짜 모델 실패율 (모델=비율)
 
 @dataclass
 class ContentConfig:
     """콘텐츠 관련 설정"""
-    youtube_api_key: str = os.getenv('YOUTUBE_API_KEY', '')
-    content_cache_ttl: int = int(os.getenv('CONTENT_CACHE_TTL', '3600'))
-    max_recommendations: int = int(os.getenv('MAX_RECOMMENDATIONS', '5'))
-    enable_content_filtering: bool = os.getenv('ENABLE_CONTENT_FILTERING', 'True').lower() == 'true'
+
+    youtube_api_key: str = env_str('YOUTUBE_API_KEY', '')
+    content_cache_ttl: int = env_int('CONTENT_CACHE_TTL', 3600)
+    max_recommendations: int = env_int('MAX_RECOMMENDATIONS', 5)
+    enable_content_filtering: bool = env_bool('ENABLE_CONTENT_FILTERING', True)
 
 class Config:
     """전체 설정 클래스"""
@@ -106,6 +233,11 @@ class Config:
         self.security = SecurityConfig()
         self.memory = MemoryConfig()
         self.logging = LoggingConfig()
+        self.scheduler = SchedulerConfig()
+        self.admission = AdmissionConfig()
+        self.tenant_quota = TenantQuotaConfig()
+        self.adaptive_generation = AdaptiveGenerationConfig()
+        self.model_routing = ModelRoutingConfig()
         self.content = ContentConfig()
         
         # 설정 검증
@@ -244,19 +376,32 @@ class Config:
         
         return "\n".join(config_info)
 
-# 전역 설정 인스턴스
-config = Config()
+
+# 전역 설정 인스턴스 (처음 사용할 때 .env를 읽고 생성)
+_config: Optional[Config] = None
+
+
+def __getattr__(name: str):
+    if name == 'config':
+        return get_config()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
 # 편의 함수들
 def get_config() -> Config:
     """전역 설정 인스턴스를 반환합니다"""
-    return config
+    global _config
+    if _config is None:
+        load_dotenv()
+        _config = Config()
+    return _config
 
 def reload_config():
     """설정을 다시 로드합니다"""
-    global config
+    global _config
     load_dotenv(override=True)
-    config = Config()
+    _config = Config()
+
 
 def get_system_prompt() -> str:
     """회상치료 AI 시스템 프롬프트를 반환합니다"""
@@ -287,6 +432,7 @@ def get_system_prompt() -> str:
 
 # 예시 사용법
 if __name__ == "__main__":
+    config = get_config()
     print("=== 설정 정보 ===")
     print(config)
     print("\n=== 설정 검증 ===")
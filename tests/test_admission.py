@@ -0,0 +1,113 @@
+"""
+요청 수용 제어 테스트 (FIFO 자리 넘김, 대기 기한 초과 거절)
+"""
+
+import threading
+import time
+
+import pytest
+
+from utils.admission import AdmissionController, plan_capacity
+
+pytestmark = pytest.mark.unit
+
+
+def wait_for(predicate, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        if time.monotonic() > deadline:
+            raise AssertionError('조건을 기다리다 시간이 지났습니다')
+        time.sleep(0.001)
+
+
+def start_waiter(controller, name, order, timeout=2.0):
+    """대기열에 들어갈 때까지 기다린 뒤 스레드를 반환합니다 (자리를 얻으면 order에 이름을 남기고 바로 반납)"""
+    depth = controller.get_status()['queue_depth']
+
+    def run():
+        ticket = controller.try_acquire(timeout)
+        if ticket is not None:
+            order.append(name)
+            ticket.release()
+
+    thread = threading.Thread(target=run)
+    thread.start()
+    wait_for(lambda: controller.get_status()['queue_depth'] == depth + 1)
+    return thread
+
+
+def test_plan_capacity_keeps_reserved_threads():
+    assert plan_capacity(16, 2, 4) == 10
+    assert plan_capacity(16, 2, 4, max_active=20) == 10
+    assert plan_capacity(4, 2, 4) == 1
+
+
+def test_queue_full_is_shed_immediately():
+    controller = AdmissionController('test', max_active=1, max_queue=0)
+    ticket = controller.try_acquire()
+
+    assert ticket is not None
+    assert controller.try_acquire() is None
+    assert controller.get_status()['shed'] == {'queue_full': 1, 'timeout': 0}
+    ticket.release()
+
+
+def test_released_slot_is_handed_to_waiters_in_arrival_order():
+    controller = AdmissionController('test', max_active=1, max_queue=3)
+    holder = controller.try_acquire()
+    order = []
+    threads = [start_waiter(controller, name, order) for name in ('first', 'second', 'third')]
+
+    holder.release()
+    for thread in threads:
+        thread.join()
+
+    assert order == ['first', 'second', 'third']
+    status = controller.get_status()
+    assert (status['active'], status['queue_depth'], status['admitted']) == (0, 0, 4)
+
+
+def test_new_request_does_not_jump_the_queue():
+    controller = AdmissionController('test', max_active=1, max_queue=2)
+    holder = controller.try_acquire()
+    order = []
+    thread = start_waiter(controller, 'waiting', order)
+
+    holder.release()
+    # 반납된 자리는 대기 중인 요청에게 넘어가므로 active는 그대로
+    late = controller.try_acquire(timeout=1.0)
+    order.append('late')
+    thread.join()
+
+    assert order == ['waiting', 'late']
+    late.release()
+    assert controller.get_status()['active'] == 0
+
+
+def test_waiter_is_shed_after_timeout():
+    controller = AdmissionController('test', max_active=1, max_queue=1, queue_timeout=0.05)
+    holder = controller.try_acquire()
+
+    started = time.monotonic()
+    assert controller.try_acquire() is None
+    assert time.monotonic() - started >= 0.05
+
+    status = controller.get_status()
+    assert status['shed'] == {'queue_full': 0, 'timeout': 1}
+    assert status['queue_depth'] == 0
+
+    # 기한이 지나 떠난 요청에게 자리를 넘기지 않고 반납됨
+    holder.release()
+    assert controller.get_status()['active'] == 0
+    assert controller.try_acquire(timeout=0) is not None
+
+
+def test_release_is_idempotent():
+    controller = AdmissionController('test', max_active=2)
+    ticket = controller.try_acquire()
+    controller.try_acquire()
+
+    ticket.release()
+    ticket.release()
+
+    assert controller.get_status()['active'] == 1
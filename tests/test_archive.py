@@ -0,0 +1,134 @@
+"""
+대화 보관 세그먼트 테스트 (여러 세그먼트로 보관, 사용자 파일과 세그먼트에 걸친 기록 페이지, 세그먼트 삭제)
+"""
+
+import os
+import sys
+from contextlib import contextmanager
+from datetime import datetime
+
+import pytest
+
+from utils.archive import INDEX_SUFFIX, ConversationArchive
+from utils.memory_manager import MemoryManager
+
+pytestmark = pytest.mark.unit
+
+USER_ID = 'user_a'
+TOTAL_TURNS = 100
+
+
+@pytest.fixture
+def memory_manager(tmp_path):
+    manager = MemoryManager(str(tmp_path / 'memory'), summary_interval=1000)
+    # 작은 세그먼트와 프레임으로 나누어 경계를 여러 번 지나도록 함
+    manager.archive = ConversationArchive(
+        os.path.join(manager.memory_dir, 'archive'),
+        compression='gzip',
+        max_segment_turns=30,
+        frame_turns=8,
+    )
+    turns = [
+        {
+            'user_message': f'질문 {index}',
+            'ai_response': f'답변 {index}',
+            'timestamp': f'2024-01-{index % 28 + 1:02d}T10:00:00',
+        }
+        for index in range(1, TOTAL_TURNS + 1)
+    ]
+    assert manager.save_conversations(USER_ID, turns)
+    return manager
+
+
+def archive_files(manager):
+    directory = manager.archive.user_dir(USER_ID)
+    return sorted(os.listdir(directory)) if os.path.isdir(directory) else []
+
+
+def test_archive_splits_into_segments_with_indexes(memory_manager):
+    assert memory_manager.archive_user_data(USER_ID, None, keep_recent=25) == 75
+
+    segments = memory_manager.archive.list_segments(USER_ID)
+    assert [(segment['first_id'], segment['last_id']) for segment in segments] == [
+        (1, 30),
+        (31, 60),
+        (61, 75),
+    ]
+    assert all(os.path.exists(segment['path'] + INDEX_SUFFIX) for segment in segments)
+    assert [conv['id'] for conv in memory_manager.iter_all_conversations(USER_ID)] == list(
+        range(1, TOTAL_TURNS + 1)
+    )
+
+
+@pytest.mark.parametrize('limit', [1, 7, 25, 30])
+def test_paging_crosses_hot_file_and_segments(memory_manager, limit):
+    memory_manager.archive_user_data(USER_ID, None, keep_recent=25)
+
+    seen = []
+    before_id = None
+    while True:
+        page = memory_manager.get_conversation_page(USER_ID, before_id=before_id, limit=limit)
+        seen.extend(conv['id'] for conv in page['items'])
+        if not page['has_more']:
+            break
+        before_id = page['next_before_id']
+
+    assert seen == list(range(TOTAL_TURNS, 0, -1))
+
+
+def test_page_starting_inside_segments(memory_manager):
+    memory_manager.archive_user_data(USER_ID, None, keep_recent=25)
+
+    page = memory_manager.get_conversation_page(USER_ID, before_id=62, limit=5)
+
+    assert [conv['id'] for conv in page['items']] == [61, 60, 59, 58, 57]
+    assert page['next_before_id'] == 57
+
+
+@pytest.fixture
+def lock_tracker(memory_manager, monkeypatch):
+    """사용자 잠금을 잡은 동안에만 세그먼트를 지우는지 확인합니다"""
+    held = set()
+    removed = []
+    hold = memory_manager.locks.hold
+
+    @contextmanager
+    def tracking_hold(user_id):
+        with hold(user_id):
+            held.add(user_id)
+            try:
+                yield
+            finally:
+                held.discard(user_id)
+
+    def tracking_remove(path):
+        assert USER_ID in held, '사용자 잠금 없이 세그먼트를 삭제했습니다'
+        removed.append(os.path.basename(path))
+        original_remove(path)
+
+    # utils 패키지가 같은 이름의 속성을 내보내므로 모듈은 sys.modules에서 가져옴
+    archive_module = sys.modules['utils.archive']
+    original_remove = archive_module.remove_segment
+    monkeypatch.setattr(memory_manager.locks, 'hold', tracking_hold)
+    monkeypatch.setattr(archive_module, 'remove_segment', tracking_remove)
+    monkeypatch.setattr(sys.modules['utils.memory_manager'], 'remove_segment', tracking_remove)
+    return removed
+
+
+def test_cleanup_removes_segments_and_indexes(memory_manager, lock_tracker):
+    memory_manager.archive_user_data(USER_ID, None, keep_recent=25)
+
+    memory_manager.cleanup_user_data(USER_ID, datetime(2025, 1, 1))
+
+    assert len(lock_tracker) == 3
+    assert archive_files(memory_manager) == []  # 세그먼트와 .idx 색인 모두 삭제
+    assert memory_manager.archive.list_segments(USER_ID) == []
+
+
+def test_quota_removes_segments_and_indexes(memory_manager, lock_tracker):
+    memory_manager.archive_user_data(USER_ID, None, keep_recent=25)
+
+    result = memory_manager.enforce_quota(max_bytes=0, keep_recent=25)
+
+    assert result['deleted_segments'] == len(lock_tracker) == 3
+    assert archive_files(memory_manager) == []  # 세그먼트와 .idx 색인 모두 삭제
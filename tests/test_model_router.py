@@ -0,0 +1,192 @@
+"""
+모델 라우터 테스트 (계층 선택, 폴백 순서, 차단기, 첫 조각 이후 폴백 금지, 비용 집계)
+"""
+
+from types import SimpleNamespace
+
+import pytest
+
+from utils.model_router import ModelRouter
+
+pytestmark = pytest.mark.unit
+
+
+class ScriptedModel:
+    """정해진 조각을 내보내거나 실패하는 가짜 백엔드 (호출 횟수를 셈)"""
+
+    def __init__(
+        self,
+        chunks=('안녕하세요. ', '반가워요.'),
+        fail=False,
+        fail_after=None,
+        prompt_tokens=0,
+        output_tokens=0,
+    ):
+        self.chunks = list(chunks)
+        self.fail = fail
+        self.fail_after = fail_after  # 이 개수의 조각을 보낸 뒤 예외
+        self.usage_metadata = SimpleNamespace(
+            prompt_token_count=prompt_tokens, candidates_token_count=output_tokens
+        )
+        self.calls = 0
+
+    def _stream(self):
+        for index, text in enumerate(self.chunks):
+            if self.fail_after is not None and index >= self.fail_after:
+                raise RuntimeError('stream broken')
+            yield SimpleNamespace(text=text)
+
+    def generate_content(self, contents, stream=False, generation_config=None):
+        self.calls += 1
+        if self.fail:
+            raise RuntimeError('model down')
+        if stream:
+            return self._stream()
+        return SimpleNamespace(text=''.join(self.chunks), usage_metadata=self.usage_metadata)
+
+
+def make_router(*names, **kwargs):
+    backends = {name: ScriptedModel() for name in names or ('lite', 'flash', 'pro')}
+    return ModelRouter(backends, **kwargs), backends
+
+
+def test_route_picks_tier_by_request_features():
+    router, _ = make_router(long_prompt_tokens=1000)
+
+    assert router.route(100) == {'name': 'chat', 'models': ['lite', 'flash', 'pro']}
+    assert router.route(100, content_request=True) == {
+        'name': 'content',
+        'models': ['flash', 'pro', 'lite'],
+    }
+    assert router.route(2000) == {'name': 'long', 'models': ['flash', 'pro', 'lite']}
+    assert router.route(2000, content_request=True) == {
+        'name': 'content_long',
+        'models': ['pro', 'flash', 'lite'],
+    }
+    assert router.route(2000, content_request=True, kind='summary')['models'] == [
+        'lite',
+        'flash',
+        'pro',
+    ]
+
+
+def test_route_clamps_to_last_tier():
+    router, _ = make_router('lite', 'flash', long_prompt_tokens=1000)
+
+    assert router.route(2000, content_request=True)['models'] == ['flash', 'lite']
+
+
+def test_route_downgrades_when_preferred_tier_is_slow_or_open():
+    router, _ = make_router(latency_budget=3.0, failure_threshold=1)
+    router.health['flash'].latency = 5.0
+    assert router.route(100, content_request=True)['models'] == ['lite', 'flash', 'pro']
+
+    router.health['flash'].latency = 0.5
+    assert router.route(100, content_request=True)['models'][0] == 'flash'
+    router.health['flash'].failure('boom')
+    assert router.route(100, content_request=True)['models'][0] == 'lite'
+
+
+def test_failover_goes_up_then_down_the_tiers():
+    router, backends = make_router()
+    backends['flash'].fail = True
+    backends['pro'].fail = True
+
+    stream = router.generate_content(
+        'hi', stream=True, route=router.route(100, content_request=True)
+    )
+
+    assert stream.model_name == 'lite'
+    assert [backends[name].calls for name in ('flash', 'pro', 'lite')] == [1, 1, 1]
+    assert ''.join(chunk.text for chunk in stream) == '안녕하세요. 반가워요.'
+
+
+def test_all_models_failing_raises():
+    router, backends = make_router()
+    for backend in backends.values():
+        backend.fail = True
+
+    with pytest.raises(RuntimeError, match='lite: model down'):
+        router.generate_content('hi', stream=True)
+
+
+def test_breaker_opens_after_threshold_and_skips_model():
+    router, backends = make_router(failure_threshold=2, cooldown=30.0)
+    backends['lite'].fail = True
+
+    for _ in range(2):
+        assert router.generate_content('hi', stream=True).model_name == 'flash'
+    assert router.health['lite'].state == 'open'
+
+    assert router.generate_content('hi', stream=True).model_name == 'flash'
+    assert backends['lite'].calls == 2
+
+
+def test_half_open_allows_a_single_probe():
+    router, backends = make_router(failure_threshold=1, cooldown=30.0)
+    health = router.health['lite']
+    health.failure('boom')
+    health.opened_at -= 30.0  # cooldown 경과
+
+    assert health.state == 'half_open'
+    assert health.allow() is True
+    assert health.allow() is False  # 확인 요청이 끝나기 전에는 다른 요청을 보내지 않음
+
+    health.failure('still down')
+    assert health.state == 'open'
+
+    health.opened_at -= 30.0
+    assert router.generate_content('hi', stream=True).model_name == 'lite'
+    assert health.state == 'healthy'
+    assert backends['lite'].calls == 1
+
+
+def test_probe_slot_is_not_taken_when_an_earlier_model_answers():
+    router, backends = make_router(failure_threshold=1, cooldown=30.0)
+    health = router.health['lite']
+    health.failure('boom')
+    health.opened_at -= 30.0
+
+    # content 경로는 flash부터 시도하므로 lite는 시도하지 않았고, 확인 자리도 그대로 남아야 함
+    assert (
+        router.generate_content('hi', stream=True, route=router.route(100, True)).model_name
+        == 'flash'
+    )
+    assert backends['lite'].calls == 0
+    assert health.allow() is True
+
+
+def test_no_failover_after_first_chunk():
+    router, backends = make_router()
+    backends['lite'].fail_after = 1
+
+    stream = router.generate_content('hi', stream=True)
+    chunks = iter(stream)
+    assert next(chunks).text == '안녕하세요. '
+    with pytest.raises(RuntimeError, match='stream broken'):
+        next(chunks)
+
+    assert stream.model_name == 'lite'
+    assert backends['flash'].calls == 0
+    status = router.get_status()['models']['lite']
+    assert (status['requests'], status['failures']) == (1, 1)
+
+
+def test_cost_accounting_for_stream_and_non_stream_calls():
+    router, backends = make_router(costs={'lite': (1.0, 4.0), 'flash': (2.0, 8.0)})
+
+    stream = router.generate_content('hi', stream=True)
+    assert router.record_usage(stream, 1000, 500, 0.1) == pytest.approx(0.003)
+
+    backends['lite'].fail = True
+    backends['flash'].usage_metadata = SimpleNamespace(
+        prompt_token_count=2000, candidates_token_count=1000
+    )
+    response = router.generate_content('hi')
+    assert response.text
+
+    models = router.get_status()['models']
+    assert (models['lite']['prompt_tokens'], models['lite']['output_tokens']) == (1000, 500)
+    assert models['lite']['cost_usd'] == pytest.approx(0.003)
+    assert models['flash']['cost_usd'] == pytest.approx(0.012)
+    assert models['pro']['cost_usd'] == 0
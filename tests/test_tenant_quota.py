@@ -0,0 +1,160 @@
+"""
+시설별 공정 스케줄링 테스트 (가중치 공정 대기열 순서, 대기 기한 초과, 분당 예산)
+"""
+
+import threading
+import time
+
+import pytest
+
+from utils.tenant_quota import (
+    LocalQuotaStore,
+    TenantScheduler,
+    parse_facility_keys,
+    parse_tenant_policies,
+)
+
+pytestmark = pytest.mark.unit
+
+
+def wait_for(predicate, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        if time.monotonic() > deadline:
+            raise AssertionError('조건을 기다리다 시간이 지났습니다')
+        time.sleep(0.001)
+
+
+def make_scheduler(policies, **kwargs):
+    kwargs.setdefault('max_inflight', 1)
+    kwargs.setdefault('queue_timeout', 2.0)
+    return TenantScheduler(LocalQuotaStore(), parse_tenant_policies(policies), **kwargs)
+
+
+def enqueue(scheduler, tenant, cost, order):
+    """요청이 대기열에 들어갈 때까지 기다린 뒤 스레드를 반환합니다 (자리를 얻은 순서를 order에 남김)"""
+    depth = len(scheduler.get_status()['queued'])
+
+    def run():
+        lease, outcome = scheduler.acquire(tenant, cost, 0)
+        order.append(tenant if lease else outcome)
+        if lease:
+            lease.release()
+
+    thread = threading.Thread(target=run)
+    thread.start()
+    wait_for(lambda: len(scheduler.get_status()['queued']) == depth + 1)
+    return thread
+
+
+def drain(scheduler, holder, requests):
+    order = []
+    threads = [enqueue(scheduler, tenant, cost, order) for tenant, cost in requests]
+    holder.release()
+    for thread in threads:
+        thread.join()
+    return order
+
+
+def test_parse_policies_and_facility_keys():
+    assert parse_tenant_policies('sunshine=2:20000,maple=1') == {
+        'sunshine': {'weight': 2.0, 'tpm': 20000},
+        'maple': {'weight': 1.0, 'tpm': 0},
+    }
+    assert parse_facility_keys('k1=sunshine, k2=maple,bad') == {'k1': 'sunshine', 'k2': 'maple'}
+
+
+def test_later_tenant_interleaves_with_backlogged_tenant():
+    scheduler = make_scheduler('a=1,b=1')
+    holder, _ = scheduler.acquire('a', 100, 0)
+
+    order = drain(scheduler, holder, [('a', 100), ('a', 100), ('a', 100), ('b', 100), ('b', 100)])
+
+    # a는 자리를 차지한 요청만큼 이미 앞서 있으므로 늦게 온 b가 번갈아 끼어듦
+    assert order == ['b', 'a', 'b', 'a', 'a']
+
+
+def test_weight_scales_share_of_turns():
+    scheduler = make_scheduler('heavy=3,light=1')
+    holder, _ = scheduler.acquire('light', 1, 0)
+
+    order = drain(scheduler, holder, [('light', 100)] * 3 + [('heavy', 100)] * 3)
+
+    assert order == ['heavy', 'heavy', 'heavy', 'light', 'light', 'light']
+
+
+def test_unknown_tenant_is_scheduled_as_default():
+    scheduler = make_scheduler('a=1')
+
+    lease, outcome = scheduler.acquire('not-configured', 10, 10)
+
+    assert outcome == 'admitted'
+    assert lease.tenant == 'default'
+    lease.release()
+
+
+def test_over_budget_is_rejected_without_queueing():
+    scheduler = make_scheduler('small=1:100')
+
+    first, _ = scheduler.acquire('small', 60, 0)
+    lease, outcome = scheduler.acquire('small', 60, 0)
+
+    assert (lease, outcome) == (None, 'over_budget')
+    assert scheduler.get_status()['queued'] == []
+    first.release()
+
+
+def test_timed_out_request_does_not_push_back_its_tenant():
+    scheduler = make_scheduler('a=1,b=1')
+    holder, _ = scheduler.acquire('a', 10, 0)
+
+    lease, outcome = scheduler.acquire('b', 1000, 0, timeout=0.05)
+    assert (lease, outcome) == (None, 'timeout')
+    assert scheduler.get_status()['queued'] == []
+
+    # 포기한 b 요청의 비용이 남아 있으면 b가 a 뒤로 밀림
+    order = drain(scheduler, holder, [('a', 100), ('b', 100)])
+    assert order == ['b', 'a']
+
+
+def test_concurrent_workers_do_not_overshoot_budget(tmp_path):
+    # 같은 상태 파일을 쓰는 두 워커에서 동시에 요청해도 예산 안의 요청만 통과
+    path = str(tmp_path / 'quota_state.json')
+    schedulers = [
+        TenantScheduler(
+            LocalQuotaStore(path), parse_tenant_policies('small=1:100'), queue_timeout=2.0
+        )
+        for _ in range(2)
+    ]
+    barrier = threading.Barrier(10)
+    outcomes = []
+
+    def run(scheduler):
+        barrier.wait()
+        lease, outcome = scheduler.acquire('small', 30, 0)
+        outcomes.append(outcome)
+        if lease:
+            lease.release()
+
+    threads = [threading.Thread(target=run, args=(schedulers[i % 2],)) for i in range(10)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert outcomes.count('admitted') == 3
+    assert outcomes.count('over_budget') == 7
+
+
+def test_timed_out_request_returns_its_reservation():
+    scheduler = make_scheduler('a=1:1000,b=1')
+    holder, _ = scheduler.acquire('b', 10, 0)
+
+    lease, outcome = scheduler.acquire('a', 600, 0, timeout=0.05)
+    assert (lease, outcome) == (None, 'timeout')
+    holder.release()
+
+    # 포기한 요청의 예약이 남아 있으면 예산을 넘었다고 거절됨
+    lease, outcome = scheduler.acquire('a', 600, 0)
+    assert outcome == 'admitted'
+    lease.release()
@@ -0,0 +1,167 @@
+"""
+지연 쓰기 큐 테스트 (그룹 커밋 순서, 종료 시 저장, 대기열 넘침, 복구 파일 재생)
+"""
+
+import os
+import threading
+import time
+
+import pytest
+
+from utils.memory_manager import MemoryManager
+from utils.write_behind import WriteBehindQueue
+
+pytestmark = pytest.mark.unit
+
+
+def wait_for(predicate, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        if time.monotonic() > deadline:
+            raise AssertionError('조건을 기다리다 시간이 지났습니다')
+        time.sleep(0.001)
+
+
+class FakeMemoryManager:
+    """저장 호출을 기록하고, 필요하면 실패하거나 멈춰 있는 메모리 관리자"""
+
+    def __init__(self):
+        self.calls = []  # (user_id, [메시지], 호출 스레드 이름)
+        self.fail = False
+        self.gate = threading.Event()
+        self.gate.set()
+
+    def save_conversations(self, user_id, conversations, fsync=False):
+        self.gate.wait(5)
+        if self.fail:
+            return False
+        self.calls.append(
+            (
+                user_id,
+                [conv['user_message'] for conv in conversations],
+                threading.current_thread().name,
+            )
+        )
+        return True
+
+    def saved(self, user_id):
+        return [
+            message for uid, messages, _ in self.calls if uid == user_id for message in messages
+        ]
+
+
+def turn(message):
+    return {'user_message': message, 'ai_response': f'{message} 응답'}
+
+
+def test_turns_for_one_user_are_committed_together_in_order(tmp_path):
+    memory_manager = MemoryManager(str(tmp_path / 'memory'))
+    writer = WriteBehindQueue(memory_manager, flush_interval=0.05)
+    for index in range(5):
+        writer.submit('user_a', turn(f'질문 {index}'))
+    writer.submit('user_b', turn('다른 사용자'))
+
+    assert writer.flush()
+    writer.close()
+
+    conversations = memory_manager.load_user_data('user_a')['conversations']
+    assert [conv['user_message'] for conv in conversations] == [f'질문 {i}' for i in range(5)]
+    assert [conv['id'] for conv in conversations] == [1, 2, 3, 4, 5]
+    assert len(memory_manager.load_user_data('user_b')['conversations']) == 1
+
+
+def test_close_flushes_pending_turns():
+    memory_manager = FakeMemoryManager()
+    writer = WriteBehindQueue(memory_manager, flush_interval=30.0)
+    writer.submit('user_a', turn('첫 번째'))
+    writer.submit('user_a', turn('두 번째'))
+
+    writer.close()
+
+    assert memory_manager.saved('user_a') == ['첫 번째', '두 번째']
+    assert writer.pending_count() == 0
+
+
+def test_full_queue_hands_turns_to_writer_in_order():
+    memory_manager = FakeMemoryManager()
+    memory_manager.gate.clear()  # 기록 스레드가 첫 저장에서 멈춰 있도록 함
+    writer = WriteBehindQueue(
+        memory_manager, max_queue_size=1, flush_interval=0.01, max_overflow=10
+    )
+
+    writer.submit('user_a', turn('1'))
+    wait_for(lambda: writer.get_stats()['queue_depth'] == 0)  # 기록 스레드가 꺼내 감
+    assert writer.submit('user_a', turn('2'))  # 큐에 들어감
+    assert writer.submit('user_a', turn('3'))  # 큐가 가득 차 넘침 목록으로
+    assert writer.submit('user_a', turn('4'))  # 넘침 목록 뒤에 붙음
+    assert writer.get_stats()['overflow_depth'] == 2
+    assert [conv['user_message'] for conv in writer.get_pending('user_a')] == ['1', '2', '3', '4']
+
+    memory_manager.gate.set()
+    assert writer.flush()
+    writer.close()
+
+    assert memory_manager.saved('user_a') == ['1', '2', '3', '4']
+    # 요청 스레드에서는 저장하지 않음
+    assert {thread for _, _, thread in memory_manager.calls} == {'write-behind'}
+
+
+def test_full_overflow_drops_turn():
+    memory_manager = FakeMemoryManager()
+    memory_manager.gate.clear()
+    writer = WriteBehindQueue(memory_manager, max_queue_size=1, flush_interval=0.01)
+
+    writer.submit('user_a', turn('1'))
+    wait_for(lambda: writer.get_stats()['queue_depth'] == 0)
+    assert writer.submit('user_a', turn('2'))
+    assert writer.submit('user_a', turn('3'))
+    assert not writer.submit('user_a', turn('4'))
+    assert writer.pending_count() == 3
+
+    memory_manager.gate.set()
+    writer.close()
+    assert memory_manager.saved('user_a') == ['1', '2', '3']
+
+
+def test_failed_save_is_spilled_and_replayed(tmp_path):
+    recovery_path = str(tmp_path / 'write_behind_recovery.jsonl')
+    memory_manager = FakeMemoryManager()
+    memory_manager.fail = True
+    writer = WriteBehindQueue(
+        memory_manager,
+        flush_interval=0.01,
+        recovery_path=recovery_path,
+        max_attempts=2,
+        retry_base=0.01,
+    )
+    writer.submit('user_a', turn('첫 번째'))
+    writer.submit('user_a', turn('두 번째'))
+
+    assert writer.flush()  # 복구 파일에 남긴 뒤 대기 목록에서 지움
+    writer.close()
+    assert memory_manager.calls == []
+    assert os.path.exists(recovery_path)
+
+    memory_manager.fail = False
+    replay = WriteBehindQueue(memory_manager, recovery_path=recovery_path)
+    assert replay.recover() == 2
+    assert memory_manager.saved('user_a') == ['첫 번째', '두 번째']
+    assert not os.path.exists(recovery_path)
+
+
+def test_save_succeeds_when_post_write_steps_fail(tmp_path):
+    """파일을 쓴 뒤 매니페스트/콜백이 실패해도 True를 돌려줘 같은 대화가 다시 추가되지 않아야 함"""
+    memory_manager = MemoryManager(
+        str(tmp_path / 'memory'), summary_interval=1, summary_keep_recent=0
+    )
+
+    def fail(*args, **kwargs):
+        raise RuntimeError('후처리 실패')
+
+    memory_manager.manifest.update = fail
+    memory_manager.on_summary_compacted = fail
+
+    assert memory_manager.save_conversations('user_a', [turn('첫 번째')])
+    user_data = memory_manager.load_user_data('user_a')
+    assert len(user_data['conversations']) == 1
+    assert user_data['summary']['through_id'] == 1  # 요약 압축(콜백 호출)까지 진행됨
@@ -7,12 +7,230 @@
 - 메모리 관리 (memory_manager.py)
 - 콘텐츠 추천 (content_recommender.py)
 - 보안 기능 (security.py)
+- JSON 직렬화 (serialization.py)
+- 배치 분석 (analytics.py)
+- 메트릭 수집 (metrics.py)
+- 유지보수 작업 스케줄러 (scheduler.py)
+- 비동기 이벤트 로거 (event_logger.py)
+- 지연 쓰기 저장 (write_behind.py)
+- 대화 압축 보관 (archive.py)
+- 저장소 샤드 배치와 매니페스트 (manifest.py)
+- 사용자 데이터 스트리밍 내보내기 (exporter.py)
+- 대화 유사도 검색 인덱스 (semantic_index.py)
+- 한글 자모 근사 키워드 매칭 (fuzzy_match.py)
+- 콘텐츠 카탈로그 검색 (content_search.py)
+- 대량 키워드/감정 점수 계산 (lexicon_scoring.py)
+- 응답 문장 처리 (response_text.py)
+- /chat 트래픽 기록과 재현 (traffic_capture.py)
+- 운영 중 프로파일링 (profiling.py)
+- 프로세스 내 상태 메모리 집계 (memory_accounting.py)
+- 지연 생성 전역 인스턴스 (lazy.py)
+- /chat 수용 제어와 부하 차단 (admission.py)
+- 시설별 공정 스케줄링과 토큰 예산 (tenant_quota.py)
+- 응답 생성 파라미터 적응 조절 (generation_control.py)
+- 모델 라우팅과 폴백 계층 (model_router.py)
 """
 
-from .text_processing import *
-from .memory_manager import *
-from .content_recommender import *
-from .security import *
+from .lazy import lazy_package_attributes
+
+# 하위 모듈별 공개 이름 (import utils는 아무 하위 모듈도 불러오지 않고, 이름에 처음 접근할 때 해당 모듈만 불러옴)
+_EXPORTS = {
+    'text_processing': (
+        'MEMORY_KEYWORDS',
+        'EMOTION_KEYWORDS',
+        'YOUTUBE_SEARCH_MAPPING',
+        'FUZZY_MATCH_CONFIG',
+        'configure_fuzzy_matching',
+        'find_fuzzy_keywords',
+        'extract_memory_keywords',
+        'extract_emotions',
+        'extract_youtube_search_terms',
+        'CONTENT_REQUEST_PATTERN',
+        'is_content_request',
+        'clean_text',
+        'is_appropriate_content',
+        'suggest_follow_up_questions',
+        'format_response_with_emotions',
+        'create_conversation_summary',
+        'generate_personalized_greeting',
+    ),
+    'memory_manager': (
+        'USERS_DIR',
+        'iter_user_files',
+        'classify_time_of_day',
+        'UserLockRegistry',
+        'MemoryManager',
+        'memory_manager',
+        'get_memory_manager',
+        'save_conversation',
+        'get_user_context',
+        'analyze_preferences',
+    ),
+    'content_recommender': (
+        'ContentRecommender',
+        'content_recommender',
+        'get_content_recommender',
+        'recommend_for_user',
+        'get_popular_music',
+        'get_conversation_topics',
+    ),
+    'security': (
+        'SecurityManager',
+        'security_manager',
+        'get_security_manager',
+        'sanitize_user_input',
+        'validate_user_input',
+        'check_rate_limit',
+        'validate_youtube_url',
+        'get_security_headers',
+    ),
+    'serialization': (
+        'PRETTY_JSON_DEFAULT',
+        'backend_name',
+        'dumps_bytes',
+        'dumps',
+        'loads',
+        'write_json_file',
+        'read_json_file',
+    ),
+    'analytics': (
+        'DIMENSIONS',
+        'USER_FIELDS',
+        'FACILITY_FIELDS',
+        'TEXT_BATCH_SIZE',
+        'analyze_user_file',
+        'BatchAnalyzer',
+        'run_batch_analysis',
+    ),
+    'metrics': ('LabelKey', 'MetricsRegistry', 'metrics'),
+    'scheduler': ('LeaderLock', 'ScheduledJob', 'JobScheduler', 'create_maintenance_scheduler'),
+    'event_logger': ('AsyncEventLogger',),
+    'write_behind': ('FSYNC_POLICIES', 'WriteBehindQueue'),
+    'archive': (
+        'default_compression',
+        'parse_segment_name',
+        'iter_segment_turns',
+        'ConversationArchive',
+    ),
+    'manifest': (
+        'MANIFEST_NAME',
+        'user_shard',
+        'is_shard_name',
+        'iter_shard_dirs',
+        'ManifestIndex',
+    ),
+    'exporter': (
+        'EXPORT_FORMAT_VERSION',
+        'iter_user_export',
+        'iter_ndjson',
+        'iter_gzip',
+        'stream_user_export',
+        'export_all_users',
+    ),
+    'semantic_index': ('normalize_text', 'HashedNgramVectorizer', 'SemanticIndex'),
+    'fuzzy_match': (
+        'CHOSEONG',
+        'JUNGSEONG',
+        'JONGSEONG',
+        'decompose_jamo',
+        'normalize_term',
+        'edit_distance',
+        'FuzzyMatch',
+        'JamoFuzzyIndex',
+    ),
+    'content_search': (
+        'YOUTUBE_RESULTS_URL',
+        'SEARCHABLE_TYPES',
+        'FIELD_WEIGHTS',
+        'normalize_query',
+        'build_search_url',
+        'text_ngrams',
+        'CatalogSearchIndex',
+        'catalog_search',
+        'get_catalog_search',
+        'search_catalog',
+    ),
+    'lexicon_scoring': (
+        'is_available',
+        'LexiconScores',
+        'LexiconScorer',
+        'lexicon_scorer',
+        'get_lexicon_scorer',
+        'batch_extract_memory_keywords',
+        'batch_extract_emotions',
+    ),
+    'response_text': (
+        'YOUTUBE_SEARCH_PATTERNS',
+        'RESPONSE_MEMORY_KEYWORDS',
+        'is_sentence_end',
+        'extract_youtube_search',
+        'extract_response_keywords',
+    ),
+    'traffic_capture': (
+        'CAPTURE_VERSION',
+        'REPLAY_MARKER',
+        'DEFAULT_RECORD',
+        'FAKE_CHARS_PER_TOKEN',
+        'anonymize_user',
+        'filler_text',
+        'CaptureSession',
+        'TrafficRecorder',
+        'load_capture',
+        'FakeChunk',
+        'FakeStreamingModel',
+    ),
+    'profiling': (
+        'PROFILE_HEADER',
+        'sign_profile_request',
+        'verify_profile_request',
+        'SamplingProfiler',
+        'RequestProfileStore',
+        'MemoryTracker',
+        'sampling_profiler',
+        'request_profiles',
+        'memory_tracker',
+    ),
+    'memory_accounting': (
+        'approximate_size',
+        'parse_limits',
+        'process_rss_bytes',
+        'peak_rss_bytes',
+        'MemoryRegistry',
+        'memory_registry',
+    ),
+    'lazy': ('LazyInstance', 'lazy_module_attributes', 'lazy_package_attributes'),
+    'admission': ('plan_capacity', 'AdmissionTicket', 'AdmissionController'),
+    'tenant_quota': (
+        'ALL_TENANTS',
+        'estimate_tokens',
+        'parse_tenant_policies',
+        'parse_facility_keys',
+        'LocalQuotaStore',
+        'RedisQuotaStore',
+        'create_quota_store',
+        'QuotaLease',
+        'TenantScheduler',
+    ),
+    'generation_control': ('VARIANTS', 'quantile', 'AdaptiveGenerationController'),
+    'model_router': (
+        'parse_model_tiers',
+        'parse_model_costs',
+        'close_stream',
+        'ModelHealth',
+        'RoutedStream',
+        'ModelRouter',
+    ),
+}
+
+__all__ = [name for names in _EXPORTS.values() for name in names]
+__getattr__ = lazy_package_attributes(
+    __name__, {name: module for module, names in _EXPORTS.items() for name in names}
+)
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
+
 
 __version__ = "1.0.0"
 __author__ = "AI Avatar Team"
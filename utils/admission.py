@@ -0,0 +1,208 @@
+"""
+요청 수용 제어(admission control)와 부하 차단
+
+Gemini 응답이 느려지면 /chat 스트림이 워커 스레드를 오래 붙잡아 /health와 정적 파일까지 응답하지 못하게 됩니다.
+동시에 진행할 수 있는 스트림 수를 워커 스레드 수보다 작게 제한해 나머지 스레드를 /health와 정적 경로용으로 남겨 두고,
+한도를 넘은 요청은 짧은 대기열에서 정해진 시간만 기다리게 한 뒤 그래도 자리가 없으면 바로 거절(503 + Retry-After)합니다.
+
+대기열은 도착 순서대로 자리를 넘겨받으며, 대기 중인 요청도 스레드를 하나씩 차지하므로
+스트림 한도 + 대기열 크기가 워커 스레드 수 - 예약 스레드 수를 넘지 않게 설정해야 합니다 (plan_capacity 참고).
+"""
+
+import math
+import threading
+import time
+from collections import deque
+from typing import Dict, Optional
+
+from .metrics import metrics
+
+
+def plan_capacity(
+    worker_threads: int, reserved_threads: int, max_queue: int, max_active: int = 0
+) -> int:
+    """예약 스레드와 대기열을 뺀 나머지로 동시 스트림 한도를 정합니다
+
+    max_active를 직접 지정했더라도 예약 스레드를 침범하면 줄여서 반환합니다 (최소 1).
+    """
+    available = max(worker_threads - reserved_threads - max_queue, 1)
+    if max_active <= 0:
+        return available
+    if max_active > available:
+        print(
+            f"⚠️  동시 스트림 한도 {max_active}개가 예약 스레드를 침범해 {available}개로 줄였습니다 "
+            f"(워커 스레드 {worker_threads}, 예약 {reserved_threads}, 대기열 {max_queue})"
+        )
+    return min(max_active, available)
+
+
+class AdmissionTicket:
+    """수용된 요청이 차지한 자리 (release()를 여러 번 호출해도 한 번만 반납)"""
+
+    def __init__(self, controller: 'AdmissionController', waited: float):
+        self.controller = controller
+        self.waited = waited
+        self.started = time.monotonic()
+        self.released = False
+
+    def release(self) -> None:
+        self.controller._release(self)
+
+
+class _Waiter:
+    """대기열 항목 (자리를 넘겨받으면 granted가 True가 됨)"""
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.granted = False
+
+
+class AdmissionController:
+    """동시 실행 수 제한, 기한이 있는 FIFO 대기열, 초과 요청 즉시 거절"""
+
+    def __init__(
+        self,
+        name: str,
+        max_active: int,
+        max_queue: int = 0,
+        queue_timeout: float = 1.0,
+        min_retry_after: int = 1,
+        max_retry_after: int = 60,
+    ):
+        self.name = name
+        self.max_active = max(int(max_active), 1)
+        self.max_queue = max(int(max_queue), 0)
+        self.queue_timeout = queue_timeout
+        self.min_retry_after = min_retry_after
+        self.max_retry_after = max_retry_after
+        self._lock = threading.Lock()
+        self._waiters = deque()
+        self._active = 0
+        self._admitted = 0
+        self._shed = {'queue_full': 0, 'timeout': 0}
+        self._avg_hold = 0.0  # 자리를 차지한 시간의 지수 이동 평균 (Retry-After 추정용)
+
+    def _update_gauges(self) -> None:
+        labels = {'pool': self.name}
+        metrics.set_gauge(
+            'avatar_admission_active', self._active, labels=labels, help_text='수용되어 진행 중인 요청 수'
+        )
+        metrics.set_gauge(
+            'avatar_admission_queue_depth',
+            len(self._waiters),
+            labels=labels,
+            help_text='자리를 기다리는 요청 수',
+        )
+
+    def _shed_request(self, reason: str) -> None:
+        self._shed[reason] += 1
+        metrics.inc(
+            'avatar_admission_shed_total',
+            labels={'pool': self.name, 'reason': reason},
+            help_text='수용하지 못하고 거절한 요청 수 (대기열 가득 참, 대기 기한 초과)',
+        )
+
+    def _admit(self, waited: float) -> AdmissionTicket:
+        self._admitted += 1
+        metrics.inc(
+            'avatar_admission_admitted_total',
+            labels={'pool': self.name, 'queued': str(waited > 0).lower()},
+            help_text='수용한 요청 수 (대기열을 거쳤는지 여부)',
+        )
+        metrics.observe(
+            'avatar_admission_wait_seconds',
+            waited,
+            labels={'pool': self.name},
+            help_text='자리를 얻기까지 기다린 시간',
+        )
+        return AdmissionTicket(self, waited)
+
+    def try_acquire(self, timeout: Optional[float] = None) -> Optional[AdmissionTicket]:
+        """자리를 얻으면 AdmissionTicket을, 대기열이 가득 찼거나 기한 안에 자리가 나지 않으면 None을 반환합니다"""
+        timeout = self.queue_timeout if timeout is None else timeout
+        with self._lock:
+            # 먼저 온 대기 요청이 있으면 새 요청도 줄을 서야 함
+            if self._active < self.max_active and not self._waiters:
+                self._active += 1
+                self._update_gauges()
+                return self._admit(0.0)
+            if len(self._waiters) >= self.max_queue or timeout <= 0:
+                self._shed_request('queue_full')
+                return None
+            waiter = _Waiter()
+            self._waiters.append(waiter)
+            self._update_gauges()
+
+        started = time.monotonic()
+        waiter.event.wait(timeout)
+        with self._lock:
+            if waiter.granted:
+                return self._admit(time.monotonic() - started)
+            self._waiters.remove(waiter)
+            self._shed_request('timeout')
+            self._update_gauges()
+            return None
+
+    def _release(self, ticket: AdmissionTicket) -> None:
+        with self._lock:
+            if ticket.released:
+                return
+            ticket.released = True
+            held = time.monotonic() - ticket.started
+            self._avg_hold = held if not self._avg_hold else self._avg_hold * 0.9 + held * 0.1
+            if self._waiters:
+                # 자리를 반납하지 않고 가장 오래 기다린 요청에게 바로 넘김
+                waiter = self._waiters.popleft()
+                waiter.granted = True
+                waiter.event.set()
+            else:
+                self._active -= 1
+            self._update_gauges()
+
+    def retry_after(self) -> int:
+        """거절 응답의 Retry-After(초): 대기 중인 요청이 모두 자리를 얻는 데 걸릴 예상 시간"""
+        with self._lock:
+            estimate = self._avg_hold * (len(self._waiters) + 1) / self.max_active
+        return int(min(max(math.ceil(estimate), self.min_retry_after), self.max_retry_after))
+
+    def get_status(self) -> Dict:
+        with self._lock:
+            return {
+                'pool': self.name,
+                'active': self._active,
+                'max_active': self.max_active,
+                'queue_depth': len(self._waiters),
+                'max_queue': self.max_queue,
+                'queue_timeout': self.queue_timeout,
+                'admitted': self._admitted,
+                'shed': dict(self._shed),
+                'avg_hold_seconds': round(self._avg_hold, 3),
+            }
+
+
+# 예시 사용법
+if __name__ == "__main__":
+    print("=== 수용 제어 테스트 ===")
+    controller = AdmissionController('chat', plan_capacity(8, 2, 2), max_queue=2, queue_timeout=0.6)
+    results = []
+
+    def stream(index):
+        ticket = controller.try_acquire()
+        if ticket is None:
+            results.append((index, '거절', controller.retry_after()))
+            return
+        try:
+            time.sleep(0.5)
+            results.append((index, '완료', round(ticket.waited, 2)))
+        finally:
+            ticket.release()
+
+    threads = [threading.Thread(target=stream, args=(i,)) for i in range(10)]
+    for thread in threads:
+        thread.start()
+        time.sleep(0.01)
+    for thread in threads:
+        thread.join()
+    for index, outcome, value in sorted(results):
+        print(f"요청 {index}: {outcome} ({value})")
+    print(controller.get_status())
@@ -0,0 +1,422 @@
+"""
+배치 분석 유틸리티
+
+MemoryManager 저장소의 모든 사용자 대화를 여러 프로세스로 나누어 분석하고,
+사용자별/시설 전체 집계(주제, 감정, 시간대)를 열 기반 파일(CSV 또는 Parquet)로 출력합니다.
+
+사용자 파일은 하나씩 워커 프로세스에서 읽고 집계 결과만 돌려받으므로,
+동시에 메모리에 올라가는 대화 기록은 실행 중인 작업 수만큼으로 제한됩니다.
+"""
+
+import csv
+import os
+import threading
+import time
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional
+
+from .archive import ConversationArchive, iter_segment_turns
+from .lexicon_scoring import get_lexicon_scorer
+from .memory_manager import classify_time_of_day, iter_user_files
+from .serialization import read_json_file
+from .text_processing import extract_emotions, extract_memory_keywords
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:  # pragma: no cover - 선택적 의존성
+    pyarrow = None
+
+# 집계 차원
+DIMENSIONS = ['topic', 'subtopic', 'emotion', 'time_of_day']
+
+USER_FIELDS = ['user_id', 'dimension', 'key', 'count']
+FACILITY_FIELDS = ['dimension', 'key', 'count', 'users']
+
+# 키워드/감정을 행렬로 한 번에 계산할 대화 묶음 크기
+TEXT_BATCH_SIZE = 2000
+
+
+def _iter_user_turns(user_id: str, file_path: str, archive_dir: Optional[str], since_dt):
+    """보관 세그먼트(필요한 경우)와 사용자 파일의 대화를 차례로 반환합니다"""
+    if archive_dir:
+        archive = ConversationArchive(archive_dir)
+        for segment in archive.list_segments(user_id):
+            # 세그먼트 이름의 마지막 대화 날짜로 기간 밖의 세그먼트는 열지 않음
+            if since_dt and segment['last_date'] + timedelta(days=1) <= since_dt:
+                continue
+            yield from iter_segment_turns(segment['path'])
+    yield from read_json_file(file_path).get('conversations', [])
+
+
+def _count_text_dimensions(texts: List[str], counts: Dict[str, Counter]) -> None:
+    """대화 묶음의 주제/세부 주제/감정별 대화 수를 집계합니다
+
+    NumPy가 있으면 묶음 전체를 키워드 행렬 하나로 만들어 열 합계로 세고,
+    없으면 대화마다 키워드/감정 추출 함수를 부릅니다 (결과는 같음).
+    대화 수에 비례해 문장마다 조회하는 자모 근사 매칭은 쓰지 않고 정확히 일치하는 키워드만 셉니다.
+    """
+    lexicon_scorer = get_lexicon_scorer()
+    if lexicon_scorer is not None:
+        scores = lexicon_scorer.score(texts, fuzzy=False)
+        dimension_columns = (
+            ('topic', scores.categories, scores.category_counts()),
+            (
+                'subtopic',
+                [f"{category}_{subcategory}" for category, subcategory in scores.subcategories],
+                scores.subcategory_counts(),
+            ),
+            ('emotion', scores.emotion_types, scores.emotion_counts()),
+        )
+        for dimension, keys, matrix in dimension_columns:
+            for key, count in zip(keys, (matrix > 0).sum(axis=0).tolist()):
+                if count:
+                    counts[dimension][key] += count
+        return
+
+    for text in texts:
+        for category, subcategories in extract_memory_keywords(text, fuzzy=False).items():
+            counts['topic'][category] += 1
+            for subcategory in subcategories.keys():
+                counts['subtopic'][f"{category}_{subcategory}"] += 1
+
+        for emotion in extract_emotions(text):
+            counts['emotion'][emotion] += 1
+
+
+def analyze_user_file(
+    user_id: str, file_path: str, since: Optional[str] = None, archive_dir: Optional[str] = None
+) -> Dict:
+    """사용자 파일 하나를 분석하여 차원별 집계를 반환합니다 (워커 프로세스에서 실행)
+
+    archive_dir을 지정하면 압축 보관된 대화도 함께 집계합니다.
+    """
+    since_dt = datetime.fromisoformat(since) if since else None
+    counts = {dimension: Counter() for dimension in DIMENSIONS}
+    turns = 0
+    last_active = None
+    texts = []
+
+    for conv in _iter_user_turns(user_id, file_path, archive_dir, since_dt):
+        timestamp = conv.get('timestamp', '')
+        dt = None
+        if timestamp:
+            try:
+                dt = datetime.fromisoformat(timestamp.replace('Z', '+00:00')).replace(tzinfo=None)
+            except ValueError:
+                dt = None
+
+        if since_dt and (dt is None or dt < since_dt):
+            continue
+
+        turns += 1
+        texts.append(conv.get('user', '') + ' ' + conv.get('assistant', ''))
+        if len(texts) >= TEXT_BATCH_SIZE:
+            _count_text_dimensions(texts, counts)
+            texts = []
+
+        if dt is not None:
+            counts['time_of_day'][classify_time_of_day(dt.hour)] += 1
+            if last_active is None or timestamp > last_active:
+                last_active = timestamp
+
+    if texts:
+        _count_text_dimensions(texts, counts)
+
+    return {
+        'user_id': user_id,
+        'turns': turns,
+        'last_active': last_active,
+        'counts': {dimension: dict(counter) for dimension, counter in counts.items()},
+    }
+
+
+class _CsvRowWriter:
+    """행 단위로 CSV 파일에 기록하는 작성기"""
+
+    def __init__(self, path: str, fields: List[str]):
+        self.path = path
+        self._file = open(path, 'w', encoding='utf-8', newline='')
+        self._writer = csv.DictWriter(self._file, fieldnames=fields)
+        self._writer.writeheader()
+
+    def write_rows(self, rows: List[Dict]) -> None:
+        self._writer.writerows(rows)
+
+    def close(self) -> None:
+        self._file.close()
+
+
+class _ParquetRowWriter:
+    """행을 일정 개수씩 모아 Parquet 행 그룹으로 기록하는 작성기"""
+
+    def __init__(self, path: str, fields: List[str], batch_size: int = 10000):
+        self.path = path
+        self.fields = fields
+        self.batch_size = batch_size
+        self._buffer = []
+        self._writer = None
+
+    def write_rows(self, rows: List[Dict]) -> None:
+        self._buffer.extend(rows)
+        if len(self._buffer) >= self.batch_size:
+            self._flush()
+
+    def _flush(self) -> None:
+        if not self._buffer:
+            return
+        table = pyarrow.Table.from_pylist(self._buffer)
+        if self._writer is None:
+            self._writer = pyarrow.parquet.ParquetWriter(self.path, table.schema)
+        self._writer.write_table(table)
+        self._buffer = []
+
+    def close(self) -> None:
+        self._flush()
+        if self._writer is not None:
+            self._writer.close()
+
+
+class BatchAnalyzer:
+    """전체 사용자 대화를 병렬로 분석하는 배치 분석기"""
+
+    def __init__(
+        self,
+        memory_dir: str = "memory_data",
+        output_dir: str = "reports",
+        workers: Optional[int] = None,
+        output_format: str = 'csv',
+        progress_callback: Optional[Callable[[Dict], None]] = None,
+    ):
+        if output_format not in ('csv', 'parquet'):
+            raise ValueError(f"지원하지 않는 출력 형식입니다: {output_format}")
+        if output_format == 'parquet' and pyarrow is None:
+            raise ValueError("Parquet 출력에는 pyarrow 패키지가 필요합니다.")
+
+        self.memory_dir = memory_dir
+        self.output_dir = output_dir
+        # 프로세스 수는 1개에서 CPU 수까지로 제한
+        self.workers = min(max(workers or os.cpu_count() or 1, 1), os.cpu_count() or 1)
+        self.output_format = output_format
+        self.progress_callback = progress_callback
+        self._lock = threading.Lock()
+        self.progress = {
+            'status': 'idle',
+            'processed': 0,
+            'total': 0,
+            'errors': 0,
+            'started_at': None,
+            'finished_at': None,
+        }
+
+    def _open_writer(self, name: str, fields: List[str]):
+        """출력 형식에 맞는 작성기를 생성합니다"""
+        path = os.path.join(self.output_dir, f"{name}.{self.output_format}")
+        if self.output_format == 'parquet':
+            return _ParquetRowWriter(path, fields)
+        return _CsvRowWriter(path, fields)
+
+    def _update_progress(self, **changes) -> None:
+        """진행 상황을 갱신하고 콜백에 알립니다"""
+        with self._lock:
+            self.progress.update(changes)
+            snapshot = dict(self.progress)
+        if self.progress_callback:
+            self.progress_callback(snapshot)
+
+    def get_progress(self) -> Dict:
+        """현재 진행 상황을 반환합니다"""
+        with self._lock:
+            return dict(self.progress)
+
+    def run(self, days: Optional[int] = 7) -> Dict:
+        """배치 분석을 실행하고 시설 전체 요약을 반환합니다
+
+        days가 None이면 전체 기간을, 아니면 최근 days일의 대화만 집계합니다.
+        """
+        os.makedirs(self.output_dir, exist_ok=True)
+        since = (datetime.now() - timedelta(days=days)).isoformat() if days else None
+        total = sum(1 for _ in iter_user_files(self.memory_dir))
+        started = time.time()
+        self._update_progress(
+            status='running',
+            processed=0,
+            total=total,
+            errors=0,
+            started_at=datetime.now().isoformat(),
+            finished_at=None,
+        )
+
+        stamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        user_writer = self._open_writer(f"user_aggregates_{stamp}", USER_FIELDS)
+
+        facility_counts = {dimension: Counter() for dimension in DIMENSIONS}
+        facility_users = {dimension: Counter() for dimension in DIMENSIONS}
+        active_users = 0
+        total_turns = 0
+        processed = 0
+        errors = 0
+
+        archive_dir = os.path.join(self.memory_dir, 'archive')
+
+        # 제출된 작업 수를 제한하여 결과 대기열이 무한히 커지지 않도록 함
+        max_in_flight = self.workers * 4
+        user_files = iter_user_files(self.memory_dir)
+
+        try:
+            with ProcessPoolExecutor(max_workers=self.workers) as executor:
+                pending = set()
+                exhausted = False
+
+                while pending or not exhausted:
+                    while not exhausted and len(pending) < max_in_flight:
+                        try:
+                            user_id, file_path = next(user_files)
+                        except StopIteration:
+                            exhausted = True
+                            break
+                        pending.add(
+                            executor.submit(
+                                analyze_user_file, user_id, file_path, since, archive_dir
+                            )
+                        )
+
+                    if not pending:
+                        break
+
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        processed += 1
+                        try:
+                            result = future.result()
+                        except Exception as e:
+                            errors += 1
+                            print(f"배치 분석 오류: {e}")
+                            continue
+
+                        if result['turns'] == 0:
+                            continue
+
+                        active_users += 1
+                        total_turns += result['turns']
+                        rows = [
+                            {
+                                'user_id': result['user_id'],
+                                'dimension': 'turns',
+                                'key': 'total',
+                                'count': result['turns'],
+                            }
+                        ]
+                        for dimension, counts in result['counts'].items():
+                            for key, count in counts.items():
+                                rows.append(
+                                    {
+                                        'user_id': result['user_id'],
+                                        'dimension': dimension,
+                                        'key': key,
+                                        'count': count,
+                                    }
+                                )
+                                facility_counts[dimension][key] += count
+                                facility_users[dimension][key] += 1
+                        user_writer.write_rows(rows)
+
+                    self._update_progress(processed=processed, errors=errors)
+        finally:
+            user_writer.close()
+
+        facility_writer = self._open_writer(f"facility_aggregates_{stamp}", FACILITY_FIELDS)
+        try:
+            facility_writer.write_rows(
+                [
+                    {
+                        'dimension': 'turns',
+                        'key': 'total',
+                        'count': total_turns,
+                        'users': active_users,
+                    }
+                ]
+            )
+            for dimension in DIMENSIONS:
+                facility_writer.write_rows(
+                    [
+                        {
+                            'dimension': dimension,
+                            'key': key,
+                            'count': count,
+                            'users': facility_users[dimension][key],
+                        }
+                        for key, count in facility_counts[dimension].most_common()
+                    ]
+                )
+        finally:
+            facility_writer.close()
+
+        summary = {
+            'period_days': days,
+            'total_users': total,
+            'active_users': active_users,
+            'total_turns': total_turns,
+            'errors': errors,
+            'facility': {
+                dimension: dict(facility_counts[dimension].most_common())
+                for dimension in DIMENSIONS
+            },
+            'outputs': {
+                'user_aggregates': user_writer.path,
+                'facility_aggregates': facility_writer.path,
+            },
+            'duration_seconds': round(time.time() - started, 3),
+        }
+        self._update_progress(status='completed', finished_at=datetime.now().isoformat())
+        return summary
+
+
+def run_batch_analysis(
+    memory_dir: str = "memory_data",
+    output_dir: str = "reports",
+    days: Optional[int] = 7,
+    workers: Optional[int] = None,
+    output_format: str = 'csv',
+) -> Dict:
+    """배치 분석 실행 편의 함수"""
+    analyzer = BatchAnalyzer(memory_dir, output_dir, workers, output_format)
+    return analyzer.run(days)
+
+
+# 명령줄 실행
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='전체 사용자 대화 배치 분석')
+    parser.add_argument('--memory-dir', default=os.getenv('MEMORY_DIR', 'memory_data'))
+    parser.add_argument('--output-dir', default='reports')
+    parser.add_argument('--days', type=int, default=7, help='최근 N일 (0이면 전체 기간)')
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--format', choices=['csv', 'parquet'], default='csv')
+    args = parser.parse_args()
+
+    def print_progress(progress: Dict) -> None:
+        print(
+            f"\r진행: {progress['processed']}/{progress['total']} (오류 {progress['errors']})",
+            end='',
+            flush=True,
+        )
+
+    analyzer = BatchAnalyzer(
+        args.memory_dir,
+        args.output_dir,
+        args.workers,
+        args.format,
+        progress_callback=print_progress,
+    )
+    result = analyzer.run(args.days or None)
+    print()
+    print(
+        f"활성 사용자: {result['active_users']}/{result['total_users']}, "
+        f"대화 수: {result['total_turns']}, 소요 시간: {result['duration_seconds']}초"
+    )
+    print(f"사용자별 집계: {result['outputs']['user_aggregates']}")
+    print(f"시설 전체 집계: {result['outputs']['facility_aggregates']}")
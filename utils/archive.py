@@ -0,0 +1,303 @@
+"""
+대화 보관(콜드 아카이브) 유틸리티
+
+오래된 대화를 사용자 파일에서 꺼내 압축된 보관 세그먼트(JSON Lines)로 옮깁니다.
+세그먼트는 한 번 기록하면 변경하지 않으며, 읽을 때는 한 줄씩 스트리밍으로 압축을 풉니다.
+세그먼트는 대화 frame_turns개마다 따로 압축한 프레임을 이어 붙인 파일이고(전체를 순서대로 읽으면 하나의 스트림),
+프레임별 ID 범위와 위치를 <세그먼트>.idx에 기록해 최신 대화부터 필요한 프레임만 풀 수 있습니다.
+zstandard 패키지가 설치되어 있으면 zstd로, 없으면 gzip으로 압축합니다.
+"""
+
+import gzip
+import io
+import os
+import re
+from contextlib import ExitStack
+from datetime import datetime, timedelta
+from typing import Dict, Iterator, List, Optional
+
+from .manifest import is_shard_name, iter_shard_dirs, user_shard
+from .serialization import dumps_bytes, loads
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - 선택적 의존성
+    zstandard = None
+
+# 세그먼트 파일 이름: seg_<첫 ID>-<마지막 ID>_<마지막 대화 날짜>.jsonl.<확장자>
+_SEGMENT_PATTERN = re.compile(r'^seg_(\d+)-(\d+)_(\d{8})\.jsonl\.(zst|gz)$')
+_EXTENSIONS = {'zstd': 'zst', 'gzip': 'gz'}
+INDEX_SUFFIX = '.idx'
+
+
+def default_compression() -> str:
+    """사용 가능한 압축 방식 중 기본값을 반환합니다"""
+    return 'zstd' if zstandard else 'gzip'
+
+
+def parse_segment_name(name: str) -> Optional[Dict]:
+    """세그먼트 파일 이름에서 ID 범위와 마지막 대화 날짜를 읽어옵니다"""
+    match = _SEGMENT_PATTERN.match(name)
+    if not match:
+        return None
+    return {
+        'first_id': int(match.group(1)),
+        'last_id': int(match.group(2)),
+        'last_date': datetime.strptime(match.group(3), '%Y%m%d'),
+        'compression': 'zstd' if match.group(4) == 'zst' else 'gzip',
+    }
+
+
+def iter_segment_turns(path: str) -> Iterator[Dict]:
+    """세그먼트의 대화를 한 줄씩 압축 해제하며 반환합니다
+
+    목록을 읽은 뒤 용량 정리로 삭제된 세그먼트는 빈 세그먼트로 봅니다 (이미 연 파일은 삭제되어도 끝까지 읽힘).
+    """
+    if path.endswith('.zst') and zstandard is None:
+        raise RuntimeError(f"zstd 세그먼트를 읽으려면 zstandard 패키지가 필요합니다: {path}")
+    with ExitStack() as stack:
+        try:
+            raw = stack.enter_context(open(path, 'rb'))
+        except FileNotFoundError:
+            return
+        if path.endswith('.zst'):
+            reader = stack.enter_context(
+                zstandard.ZstdDecompressor().stream_reader(raw, read_across_frames=True)
+            )
+            f = stack.enter_context(io.TextIOWrapper(reader, encoding='utf-8'))
+        else:
+            f = stack.enter_context(gzip.open(raw, 'rt', encoding='utf-8'))
+        for line in f:
+            if line.strip():
+                yield loads(line)
+
+
+def read_segment_index(path: str) -> Optional[List[List[int]]]:
+    """세그먼트의 프레임 색인([첫 ID, 마지막 ID, 위치, 길이] 목록)을 읽습니다 (색인 없는 이전 형식이면 None)"""
+    try:
+        with open(path + INDEX_SUFFIX, 'rb') as f:
+            return loads(f.read())['frames']
+    except (FileNotFoundError, ValueError, KeyError):
+        return None
+
+
+def iter_segment_turns_reversed(path: str, before_id: Optional[int] = None) -> Iterator[Dict]:
+    """세그먼트의 대화 중 before_id보다 오래된 것을 최신순으로 반환합니다
+
+    프레임 색인이 있으면 before_id 아래의 프레임만 뒤에서부터 하나씩 풀고,
+    색인이 없는 이전 형식 세그먼트는 전체를 풉니다 (max_segment_turns개가 상한).
+    """
+
+    def below(turn: Dict) -> bool:
+        return before_id is None or turn.get('id', 0) < before_id
+
+    frames = read_segment_index(path)
+    if frames is None:
+        for turn in reversed(list(iter_segment_turns(path))):
+            if below(turn):
+                yield turn
+        return
+
+    if path.endswith('.zst') and zstandard is None:
+        raise RuntimeError(f"zstd 세그먼트를 읽으려면 zstandard 패키지가 필요합니다: {path}")
+    try:
+        raw = open(path, 'rb')
+    except FileNotFoundError:
+        return
+    with raw:
+        for first_id, _, offset, length in reversed(frames):
+            if before_id is not None and first_id >= before_id:
+                continue
+            raw.seek(offset)
+            data = raw.read(length)
+            if path.endswith('.zst'):
+                payload = zstandard.ZstdDecompressor().decompress(data)
+            else:
+                payload = gzip.decompress(data)
+            for line in reversed(payload.splitlines()):
+                if line.strip():
+                    turn = loads(line)
+                    if below(turn):
+                        yield turn
+
+
+def remove_segment(path: str) -> None:
+    """세그먼트와 프레임 색인을 삭제합니다 (세그먼트가 이미 없으면 FileNotFoundError)"""
+    os.remove(path)
+    try:
+        os.remove(path + INDEX_SUFFIX)
+    except FileNotFoundError:
+        pass
+
+
+class ConversationArchive:
+    """사용자별 압축 보관 세그먼트를 관리하는 클래스"""
+
+    def __init__(
+        self,
+        archive_dir: str,
+        compression: Optional[str] = None,
+        level: Optional[int] = None,
+        max_segment_turns: int = 500,
+        frame_turns: int = 64,
+    ):
+        compression = compression or default_compression()
+        if compression not in _EXTENSIONS:
+            raise ValueError(f"지원하지 않는 압축 방식입니다: {compression}")
+        if compression == 'zstd' and zstandard is None:
+            print("⚠️  zstandard 패키지가 없어 gzip으로 보관합니다.")
+            compression = 'gzip'
+
+        self.archive_dir = archive_dir
+        self.compression = compression
+        self.level = level if level is not None else (10 if compression == 'zstd' else 6)
+        # 세그먼트 하나에 넣을 최대 대화 수 (세그먼트 하나를 읽는 비용의 상한)
+        self.max_segment_turns = max_segment_turns
+        # 프레임 하나에 넣을 대화 수 (기록 페이지 하나를 읽을 때 푸는 단위)
+        self.frame_turns = max(frame_turns, 1)
+
+    def user_dir(self, user_id: str) -> str:
+        """사용자 세그먼트 디렉토리 (archive/ab/cd/<user_id>)"""
+        return os.path.join(self.archive_dir, *user_shard(user_id), user_id)
+
+    def legacy_user_dir(self, user_id: str) -> str:
+        """샤드 배치 이전의 세그먼트 디렉토리 (archive/<user_id>)"""
+        return os.path.join(self.archive_dir, user_id)
+
+    def list_segments(self, user_id: str) -> List[Dict]:
+        """사용자의 세그먼트 목록을 ID 순으로 반환합니다 (파일을 열지 않음)"""
+        segments = []
+        for directory in (self.user_dir(user_id), self.legacy_user_dir(user_id)):
+            if not os.path.isdir(directory):
+                continue
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    info = parse_segment_name(entry.name)
+                    if info and entry.is_file():
+                        info['path'] = entry.path
+                        info['bytes'] = entry.stat().st_size
+                        segments.append(info)
+        segments.sort(key=lambda info: info['first_id'])
+        return segments
+
+    def iter_legacy_user_ids(self) -> Iterator[str]:
+        """샤드 배치 이전 위치에 세그먼트가 남아 있는 사용자 ID를 반환합니다"""
+        if not os.path.isdir(self.archive_dir):
+            return
+        with os.scandir(self.archive_dir) as entries:
+            for entry in entries:
+                if entry.is_dir() and not is_shard_name(entry.name):
+                    yield entry.name
+
+    def iter_user_ids(self) -> Iterator[str]:
+        """보관 세그먼트가 있는 사용자 ID를 반환합니다"""
+        for shard_dir in iter_shard_dirs(self.archive_dir):
+            with os.scandir(shard_dir) as entries:
+                for entry in entries:
+                    if entry.is_dir():
+                        yield entry.name
+        yield from self.iter_legacy_user_ids()
+
+    def write_segment(self, user_id: str, turns: List[Dict]) -> Optional[Dict]:
+        """대화 묶음을 새 세그먼트로 기록합니다
+
+        파일 이름이 ID 범위로 정해지므로, 기록 후 사용자 파일 갱신 전에 중단되어
+        같은 대화를 다시 보관하더라도 같은 세그먼트를 덮어쓸 뿐 중복되지 않습니다.
+        색인은 세그먼트 다음에 기록하므로, 그 사이 중단되면 색인 없는 세그먼트(전체를 풀어 읽음)로 남습니다.
+        """
+        if not turns:
+            return None
+
+        directory = self.user_dir(user_id)
+        os.makedirs(directory, exist_ok=True)
+
+        last_date = turns[-1].get('timestamp', '')[:10].replace('-', '') or datetime.now().strftime(
+            '%Y%m%d'
+        )
+        name = (
+            f"seg_{turns[0].get('id', 0):08d}-{turns[-1].get('id', 0):08d}_{last_date}"
+            f".jsonl.{_EXTENSIONS[self.compression]}"
+        )
+        path = os.path.join(directory, name)
+
+        chunks = []
+        frames = []
+        offset = 0
+        raw_bytes = 0
+        for start in range(0, len(turns), self.frame_turns):
+            block = turns[start : start + self.frame_turns]
+            payload = b''.join(dumps_bytes(turn) + b'\n' for turn in block)
+            if self.compression == 'zstd':
+                chunk = zstandard.ZstdCompressor(level=self.level).compress(payload)
+            else:
+                chunk = gzip.compress(payload, compresslevel=self.level)
+            frames.append([block[0].get('id', 0), block[-1].get('id', 0), offset, len(chunk)])
+            chunks.append(chunk)
+            offset += len(chunk)
+            raw_bytes += len(payload)
+
+        for target, data in (
+            (path, b''.join(chunks)),
+            (path + INDEX_SUFFIX, dumps_bytes({'frames': frames})),
+        ):
+            tmp_path = f"{target}.tmp.{os.getpid()}"
+            with open(tmp_path, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, target)
+
+        info = parse_segment_name(name)
+        info.update({'path': path, 'bytes': offset, 'raw_bytes': raw_bytes, 'turns': len(turns)})
+        return info
+
+    def write_segments(self, user_id: str, turns: List[Dict]) -> List[Dict]:
+        """대화를 max_segment_turns개씩 나누어 세그먼트로 기록합니다"""
+        return [
+            self.write_segment(user_id, turns[start : start + self.max_segment_turns])
+            for start in range(0, len(turns), self.max_segment_turns)
+        ]
+
+    def iter_turns(self, user_id: str) -> Iterator[Dict]:
+        """사용자의 보관된 대화를 오래된 순서로 스트리밍합니다"""
+        for segment in self.list_segments(user_id):
+            yield from iter_segment_turns(segment['path'])
+
+    def delete_segments_before(self, user_id: str, cutoff_date: datetime) -> int:
+        """마지막 대화가 cutoff_date 이전인 세그먼트를 삭제하고 삭제한 개수를 반환합니다"""
+        deleted = 0
+        for segment in self.list_segments(user_id):
+            if segment['last_date'] + timedelta(days=1) <= cutoff_date:
+                remove_segment(segment['path'])
+                deleted += 1
+        if deleted:
+            for directory in (self.user_dir(user_id), self.legacy_user_dir(user_id)):
+                if os.path.isdir(directory) and not os.listdir(directory):
+                    os.rmdir(directory)
+        return deleted
+
+    def get_user_bytes(self, user_id: str) -> int:
+        """사용자 세그먼트의 전체 크기를 반환합니다"""
+        return sum(segment['bytes'] for segment in self.list_segments(user_id))
+
+
+# 예시 사용법
+if __name__ == "__main__":
+    import tempfile
+
+    print("=== 대화 보관 테스트 ===")
+    archive = ConversationArchive(tempfile.mkdtemp())
+    sample_turns = [
+        {
+            'id': i,
+            'timestamp': f"2024-01-{i % 28 + 1:02d}T10:00:00",
+            'user': '어릴 때 고향에서 모내기를 했어요',
+            'assistant': '그때 이야기를 더 들려주세요 😊',
+        }
+        for i in range(1, 201)
+    ]
+    segment_info = archive.write_segment('test_user', sample_turns)
+    print(f"압축 방식: {archive.compression}")
+    print(
+        f"원본 {segment_info['raw_bytes']} bytes -> 압축 {segment_info['bytes']} bytes "
+        f"({segment_info['raw_bytes'] / segment_info['bytes']:.1f}배)"
+    )
+    print(f"복원한 대화 수: {sum(1 for _ in archive.iter_turns('test_user'))}")
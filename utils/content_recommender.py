@@ -8,6 +8,7 @@ import json
 import random
 from typing import Dict, List, Optional, Tuple
 from datetime import datetime
+from .lazy import LazyInstance, lazy_module_attributes
 from .text_processing import extract_memory_keywords, extract_emotions
 
 class ContentRecommender:
@@ -154,8 +155,8 @@ class ContentRecommender:
     
     def recommend_content(self, user_input: str, user_history: Dict = None, content_type: str = 'all') -> List[Dict]:
         """사용자 입력을 바탕으로 콘텐츠를 추천합니다"""
-        # 키워드와 감정 추출
-        keywords = extract_memory_keywords(user_input)
+        # 키워드와 감정 추출 (음성 인식 입력이므로 띄어쓰기나 자모 차이도 허용)
+        keywords = extract_memory_keywords(user_input, fuzzy=True)
         emotions = extract_emotions(user_input)
         
         recommendations = []
@@ -418,21 +419,30 @@ class ContentRecommender:
         
         return False
 
-# 전역 추천 시스템 인스턴스
-content_recommender = ContentRecommender()
+
+# 전역 추천 시스템 인스턴스 (처음 사용할 때 카탈로그 구성)
+_content_recommender = LazyInstance(ContentRecommender)
+__getattr__ = lazy_module_attributes(__name__, content_recommender=_content_recommender)
+
+
+def get_content_recommender() -> ContentRecommender:
+    """전역 추천 시스템을 반환합니다 (처음 호출할 때 생성)"""
+    return _content_recommender.get()
 
 # 편의 함수들
 def recommend_for_user(user_input: str, user_history: Dict = None, content_type: str = 'all') -> List[Dict]:
     """사용자 추천 편의 함수"""
-    return content_recommender.recommend_content(user_input, user_history, content_type)
+    return get_content_recommender().recommend_content(user_input, user_history, content_type)
+
 
 def get_popular_music(count: int = 3) -> List[Dict]:
     """인기 음악 조회 편의 함수"""
-    return content_recommender.get_popular_content('music', count)
+    return get_content_recommender().get_popular_content('music', count)
 
 def get_conversation_topics(count: int = 3) -> List[Dict]:
     """대화 주제 조회 편의 함수"""
-    return content_recommender.get_popular_content('topics', count)
+    return get_content_recommender().get_popular_content('topics', count)
+
 
 # 예시 사용법
 if __name__ == "__main__":
@@ -0,0 +1,265 @@
+"""
+콘텐츠 카탈로그 검색
+
+추천 카탈로그(ContentRecommender)의 제목/가수/검색어와 YOUTUBE_SEARCH_MAPPING을
+문자 n-gram 역색인으로 미리 만들어 두고, 자유 입력 검색어를 가장 가까운 카탈로그 항목으로 찾습니다.
+검색어의 n-gram이 들어 있는 항목만 점수를 계산하므로 조회 비용은 카탈로그 전체 크기가 아니라
+겹치는 항목 수에 비례하며, 정규화한 검색어별 결과는 LRU 캐시에 보관합니다.
+"""
+
+import math
+import re
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Set, Tuple
+from urllib.parse import quote_plus
+
+from .content_recommender import get_content_recommender
+from .lazy import LazyInstance, lazy_module_attributes
+from .memory_accounting import approximate_size
+from .metrics import metrics
+from .text_processing import YOUTUBE_SEARCH_MAPPING
+
+YOUTUBE_RESULTS_URL = 'https://www.youtube.com/results?search_query='
+
+# 검색할 카탈로그 종류와 검색 필드 가중치
+SEARCHABLE_TYPES = ('music', 'videos')
+FIELD_WEIGHTS = {'title': 1.0, 'artist': 0.8, 'youtube_query': 0.6, 'alias': 0.6}
+
+_NON_WORD = re.compile(r'[^\w\s]')
+_WHITESPACE = re.compile(r'\s+')
+
+
+def normalize_query(text: str) -> str:
+    """문장부호를 없애고 공백을 하나로 줄인 소문자 검색어를 반환합니다"""
+    return _WHITESPACE.sub(' ', _NON_WORD.sub(' ', text.lower())).strip()
+
+
+def build_search_url(query: str) -> str:
+    """유튜브 검색 결과 URL을 만듭니다"""
+    return YOUTUBE_RESULTS_URL + quote_plus(query)
+
+
+def text_ngrams(text: str) -> Set[str]:
+    """낱말별 문자 3-gram과 2-gram 집합을 반환합니다
+
+    한글 제목은 대부분 2~4글자라 3-gram만으로는 겹치는 조각이 거의 없으므로 2-gram도 함께 씁니다.
+    띄어쓰기가 달라도 찾도록 공백을 없앤 전체 문자열의 n-gram도 포함합니다.
+    """
+    normalized = normalize_query(text)
+    grams = set()
+    for token in normalized.split(' ') + [normalized.replace(' ', '')]:
+        if not token:
+            continue
+        padded = f"^{token}$"
+        for n in (2, 3):
+            for start in range(len(padded) - n + 1):
+                grams.add(padded[start : start + n])
+    return grams
+
+
+class CatalogSearchIndex:
+    """카탈로그 항목의 n-gram 역색인과 검색 결과 캐시"""
+
+    def __init__(
+        self,
+        recommender=None,
+        mapping: Optional[Dict] = None,
+        cache_size: int = 512,
+        min_score: float = 0.3,
+        max_posting_ratio: float = 0.05,
+    ):
+        self.recommender = recommender or get_content_recommender()
+        self.mapping = YOUTUBE_SEARCH_MAPPING if mapping is None else mapping
+        self.cache_size = cache_size
+        self.min_score = min_score
+        # 항목의 이 비율보다 많이 나오는 흔한 n-gram("노래" 등)은 점수 계산에서 뺌 (조회 비용 상한)
+        self.max_posting_ratio = max_posting_ratio
+        self._entries = []  # 검색 결과로 돌려줄 항목 메타데이터
+        self._postings = {}  # n-gram -> {항목 번호: 필드 가중치}
+        self._idf = {}
+        self._signature = None
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _catalog_signature(self):
+        """카탈로그가 바뀌었는지 확인하기 위한 종류별 항목 수"""
+        database = self.recommender.content_database
+        return tuple(len(database.get(content_type, {})) for content_type in SEARCHABLE_TYPES)
+
+    def rebuild(self) -> int:
+        """카탈로그와 매핑으로 색인을 다시 만들고 항목 수를 반환합니다"""
+        entries = []
+        by_key = {}
+        database = self.recommender.content_database
+        for content_type in SEARCHABLE_TYPES:
+            for content_id, info in database.get(content_type, {}).items():
+                if not info.get('youtube_query'):
+                    continue
+                entry = {
+                    'type': 'music' if content_type == 'music' else 'video',
+                    'id': content_id,
+                    'title': info.get('title', content_id),
+                    'artist': info.get('artist'),
+                    'year': info.get('year'),
+                    'description': info.get('description'),
+                    'youtube_query': info['youtube_query'],
+                    'popularity': info.get('popularity', 50),
+                    '_fields': {
+                        'title': [info.get('title', content_id), content_id],
+                        'artist': [info.get('artist') or ''],
+                        'youtube_query': [info['youtube_query']],
+                        'alias': [],
+                    },
+                }
+                entries.append(entry)
+                for key in (content_id, entry['title'], info['youtube_query']):
+                    by_key[key.replace(' ', '')] = entry
+
+        # 매핑 키나 검색어가 카탈로그 항목과 같으면 별칭으로 붙이고, 아니면 매핑만의 항목으로 추가
+        for mapping_type, items in self.mapping.items():
+            for key, search_term in items.items():
+                entry = by_key.get(key.replace(' ', '')) or by_key.get(search_term.replace(' ', ''))
+                if entry:
+                    entry['_fields']['alias'].extend([key, search_term])
+                    continue
+                entries.append(
+                    {
+                        'type': 'music' if mapping_type == '음악' else 'video',
+                        'id': key,
+                        'title': key,
+                        'artist': None,
+                        'year': None,
+                        'description': None,
+                        'youtube_query': search_term,
+                        'popularity': 50,
+                        '_fields': {'title': [key], 'youtube_query': [search_term]},
+                    }
+                )
+
+        postings = {}
+        for entry_id, entry in enumerate(entries):
+            for field, texts in entry.pop('_fields').items():
+                weight = FIELD_WEIGHTS[field]
+                for text in texts:
+                    for gram in text_ngrams(text):
+                        entry_weights = postings.setdefault(gram, {})
+                        if entry_weights.get(entry_id, 0.0) < weight:
+                            entry_weights[entry_id] = weight
+
+        count = len(entries)
+        idf = {
+            gram: math.log(1.0 + count / len(entry_weights))
+            for gram, entry_weights in postings.items()
+        }
+        with self._lock:
+            self._entries = entries
+            self._postings = postings
+            self._idf = idf
+            self._signature = self._catalog_signature()
+            self._cache.clear()
+        return count
+
+    def search(self, query: str, limit: int = 3) -> List[Dict]:
+        """검색어와 가장 가까운 카탈로그 항목을 점수순으로 반환합니다
+
+        점수는 검색어 n-gram의 IDF 가중 합 중 항목과 겹치는 비율(0~1)이며 min_score 미만은 제외합니다.
+        """
+        normalized = normalize_query(query)
+        if not normalized:
+            return []
+        if self._signature != self._catalog_signature():
+            self.rebuild()
+
+        cache_key = (normalized, limit)
+        with self._lock:
+            cached = self._cache.get(cache_key)
+            if cached is not None:
+                self._cache.move_to_end(cache_key)
+        metrics.inc(
+            'avatar_catalog_search_total',
+            labels={'cache': 'hit' if cached is not None else 'miss'},
+            help_text='카탈로그 검색 횟수 (캐시 적중 여부별)',
+        )
+        if cached is not None:
+            return [dict(result) for result in cached]
+
+        max_postings = max(100, int(len(self._entries) * self.max_posting_ratio))
+        total = 0.0
+        scores = {}
+        for gram in text_ngrams(normalized):
+            entry_weights = self._postings.get(gram)
+            if not entry_weights:
+                total += math.log(1.0 + len(self._entries))
+                continue
+            if len(entry_weights) > max_postings:
+                continue
+            idf = self._idf[gram]
+            total += idf
+            for entry_id, weight in entry_weights.items():
+                scores[entry_id] = scores.get(entry_id, 0.0) + idf * weight
+
+        ranked = sorted(
+            (
+                (score / total, entry_id)
+                for entry_id, score in scores.items()
+                if total and score / total >= self.min_score
+            ),
+            key=lambda item: (-item[0], -self._entries[item[1]]['popularity']),
+        )
+        results = []
+        for score, entry_id in ranked[:limit]:
+            entry = self._entries[entry_id]
+            results.append(
+                dict(
+                    entry,
+                    score=round(score, 3),
+                    search_url=build_search_url(entry['youtube_query']),
+                )
+            )
+
+        with self._lock:
+            self._cache[cache_key] = results
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return [dict(result) for result in results]
+
+    def get_stats(self) -> Dict:
+        """색인 크기와 캐시 상태를 반환합니다"""
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'ngrams': len(self._postings),
+                'cached_queries': len(self._cache),
+                'cache_size': self.cache_size,
+            }
+
+    def memory_usage(self, sample: int = 64) -> Tuple[int, int]:
+        """캐시한 검색어 수와 결과 캐시의 대략적인 바이트 크기를 반환합니다 (메모리 집계용)"""
+        with self._lock:
+            return len(self._cache), approximate_size(self._cache, sample)
+
+
+# 전역 카탈로그 검색 인스턴스 (처음 사용할 때 생성)
+_catalog_search = LazyInstance(CatalogSearchIndex)
+__getattr__ = lazy_module_attributes(__name__, catalog_search=_catalog_search)
+
+
+def get_catalog_search() -> CatalogSearchIndex:
+    """전역 카탈로그 검색 인스턴스를 반환합니다 (처음 호출할 때 생성)"""
+    return _catalog_search.get()
+
+
+# 편의 함수
+def search_catalog(query: str, limit: int = 3) -> List[Dict]:
+    """카탈로그 검색 편의 함수"""
+    return get_catalog_search().search(query, limit)
+
+
+# 예시 사용법
+if __name__ == "__main__":
+    print("=== 카탈로그 검색 테스트 ===")
+    for sample in ['고향에 봄', '이미자 노래', '봉선화', '옛날 시골 풍경', '목포의 눈물 틀어줘', '날씨 알려줘']:
+        matches = search_catalog(sample)
+        print(f"{sample} -> {[(match['title'], match['score']) for match in matches]}")
+    print(get_catalog_search().get_stats())
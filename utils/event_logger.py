@@ -0,0 +1,223 @@
+"""
+비동기 이벤트 로거
+
+보안 이벤트를 요청 스레드에서 직접 파일에 쓰지 않고 큐에 넣은 뒤,
+백그라운드 스레드가 모아서 한 번에 기록합니다. 로그는 JSON Lines 형식이며
+크기 기준으로 파일을 교체(rotation)하고, 과부하 시에는 표본 추출 또는 폐기하면서 그 수를 집계합니다.
+여러 워커 프로세스가 같은 파일에 쓰므로 교체와 추가 쓰기는 path.lock 파일 잠금으로 한 번에 한 프로세스만 합니다.
+"""
+
+import atexit
+import os
+import queue
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict
+
+from .metrics import metrics
+from .serialization import dumps
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows 등 fcntl이 없는 환경
+    fcntl = None
+
+
+class AsyncEventLogger:
+    """큐 기반의 버퍼링 이벤트 로거"""
+
+    def __init__(
+        self,
+        path: str = "security.log",
+        max_bytes: int = 10 * 1024 * 1024,
+        backup_count: int = 5,
+        queue_size: int = 10000,
+        batch_size: int = 256,
+        flush_interval: float = 0.5,
+        high_watermark: float = 0.8,
+        sample_every: int = 10,
+        name: str = 'security',
+    ):
+        self.path = path
+        self.name = name  # 메트릭 이름 접두어 (avatar_<name>_log_...)
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.sample_every = max(sample_every, 1)
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._high_watermark = int(queue_size * high_watermark)
+        self._sample_counter = 0
+        self._lock = threading.Lock()
+        self._file_guard = threading.Lock()
+        self._thread = None
+        self._stop_event = threading.Event()
+        self._atexit_registered = False
+        self.counters = {'enqueued': 0, 'written': 0, 'dropped': 0, 'sampled_out': 0, 'errors': 0}
+
+    def _count(self, outcome: str, value: int = 1) -> None:
+        with self._lock:
+            self.counters[outcome] += value
+        metrics.inc(
+            f'avatar_{self.name}_log_events_total',
+            value,
+            labels={'outcome': outcome},
+            help_text=f'{self.name} 로그 이벤트 처리 결과별 개수',
+        )
+
+    def _ensure_started(self) -> None:
+        """첫 이벤트가 들어올 때 기록 스레드를 시작합니다"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stop_event.clear()
+            self._thread = threading.Thread(target=self._run, name='event-logger', daemon=True)
+            self._thread.start()
+            if not self._atexit_registered:
+                atexit.register(self.close)
+                self._atexit_registered = True
+
+    def log(self, event: Dict, priority: bool = False) -> bool:
+        """이벤트를 큐에 넣습니다 (대기하지 않음)
+
+        큐가 high_watermark 이상 차 있으면 priority가 아닌 이벤트는 sample_every개 중 하나만 남기고,
+        큐가 가득 차면 폐기합니다. 기록 대기열에 들어갔는지 여부를 반환합니다.
+        """
+        self._ensure_started()
+
+        if not priority and self._queue.qsize() >= self._high_watermark:
+            with self._lock:
+                self._sample_counter += 1
+                keep = self._sample_counter % self.sample_every == 0
+            if not keep:
+                self._count('sampled_out')
+                return False
+
+        record = {'timestamp': datetime.now().isoformat(), **event}
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            self._count('dropped')
+            return False
+
+        self._count('enqueued')
+        return True
+
+    def _run(self) -> None:
+        """큐에서 이벤트를 모아 일괄 기록하는 루프"""
+        while not self._stop_event.is_set() or not self._queue.empty():
+            try:
+                first = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                continue
+
+            batch = [first]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            self._write_batch(batch)
+            metrics.set_gauge(
+                f'avatar_{self.name}_log_queue_depth',
+                self._queue.qsize(),
+                help_text=f'기록 대기 중인 {self.name} 로그 이벤트 수',
+            )
+
+    def _write_batch(self, batch) -> None:
+        """이벤트 묶음을 JSON Lines로 기록합니다
+
+        매 묶음마다 파일을 다시 열기 때문에, 외부에서 로그 파일을 교체하거나 정리해도 안전합니다.
+        """
+        payload = ''.join(dumps(record) + '\n' for record in batch)
+        try:
+            with self.file_lock():
+                self._rotate_if_needed(len(payload.encode('utf-8')))
+                with open(self.path, 'a', encoding='utf-8') as f:
+                    f.write(payload)
+            self._count('written', len(batch))
+        except Exception as e:
+            self._count('errors', len(batch))
+            print(f"{self.name} 로그 기록 실패: {e}")
+
+    @contextmanager
+    def file_lock(self):
+        """로그 파일 교체와 추가 쓰기, 외부 정리(다시 쓰기)를 직렬화하는 잠금
+
+        프로세스 안에서는 threading.Lock으로, 같은 파일을 쓰는 워커 프로세스끼리는 path.lock의 fcntl 잠금으로
+        직렬화하므로 한 워커가 파일을 교체하는 동안 다른 워커가 옛 파일에 덧붙이지 않습니다.
+        파일을 다시 써서 바꾸는 쪽(예: SecurityManager.cleanup_old_logs)이 이 잠금을 잡으면
+        그동안 기록 스레드는 기다렸다가 바뀐 파일에 이어서 씁니다.
+        """
+        with self._file_guard:
+            if fcntl is None:
+                yield
+                return
+            with open(f"{self.path}.lock", 'a+') as lock_file:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+    def _rotate_if_needed(self, incoming_bytes: int) -> None:
+        """로그 파일이 max_bytes를 넘으면 path.1, path.2 ... 순으로 교체합니다"""
+        if self.max_bytes <= 0 or not os.path.exists(self.path):
+            return
+        if os.path.getsize(self.path) + incoming_bytes <= self.max_bytes:
+            return
+
+        if self.backup_count <= 0:
+            os.remove(self.path)
+            return
+
+        for index in range(self.backup_count - 1, 0, -1):
+            source = f"{self.path}.{index}"
+            if os.path.exists(source):
+                os.replace(source, f"{self.path}.{index + 1}")
+        os.replace(self.path, f"{self.path}.1")
+
+    def flush(self, timeout: float = 5.0) -> None:
+        """대기 중인 이벤트가 기록될 때까지 기다립니다"""
+        deadline = time.monotonic() + timeout
+        while not self._queue.empty() and time.monotonic() < deadline:
+            self._stop_event.wait(0.01)
+
+    def close(self, timeout: float = 5.0) -> None:
+        """남은 이벤트를 모두 기록하고 스레드를 종료합니다"""
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def get_stats(self) -> Dict:
+        """처리 통계를 반환합니다"""
+        with self._lock:
+            stats = dict(self.counters)
+        stats['queue_depth'] = self._queue.qsize()
+        return stats
+
+
+# 예시 사용법
+if __name__ == "__main__":
+    import tempfile
+
+    print("=== 비동기 이벤트 로거 테스트 ===")
+    log_path = os.path.join(tempfile.mkdtemp(), 'security.log')
+    event_logger = AsyncEventLogger(log_path, max_bytes=64 * 1024, backup_count=2, queue_size=1000)
+
+    started = time.perf_counter()
+    for i in range(5000):
+        event_logger.log(
+            {'event_type': 'suspicious_input', 'client_ip': '10.0.0.1', 'details': {'index': i}}
+        )
+    elapsed = time.perf_counter() - started
+    event_logger.close()
+
+    print(f"호출 5000회 소요 시간: {elapsed * 1000:.1f}ms")
+    print(f"통계: {event_logger.get_stats()}")
+    print(f"로그 파일: {sorted(os.listdir(os.path.dirname(log_path)))}")
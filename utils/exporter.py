@@ -0,0 +1,186 @@
+"""
+사용자 데이터 스트리밍 내보내기
+
+사용자 데이터를 한 번에 dict로 만들지 않고, 프로필 머리말 한 줄 뒤에 대화를 한 줄씩
+NDJSON(JSON Lines)으로 내보냅니다. 보관 세그먼트는 스트리밍으로 압축을 풀어 읽으므로,
+메모리 사용량은 전체 대화 수가 아니라 사용자 파일(최근 대화)의 크기에만 비례합니다.
+"""
+
+import os
+import zlib
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, Iterable, Iterator
+
+from .memory_manager import classify_time_of_day
+from .serialization import dumps_bytes, read_json_file, write_json_file
+
+EXPORT_FORMAT_VERSION = 1
+
+
+def iter_user_export(memory_manager, user_id: str) -> Iterator[Dict]:
+    """내보낼 레코드(머리말, 대화, 꼬리말)를 차례로 반환합니다
+
+    꼬리말에는 대화를 읽으면서 함께 집계한 주제/시간대 빈도가 들어갑니다.
+    """
+    user_data = memory_manager.load_user_data(user_id)
+    summary = user_data.get('summary', {})
+    yield {
+        'type': 'header',
+        'format_version': EXPORT_FORMAT_VERSION,
+        'user_id': user_id,
+        'profile': user_data.get('profile', {}),
+        'statistics': user_data.get('statistics', {}),
+        'summary': {
+            'text': summary.get('text', ''),
+            'topics': summary.get('topics', {}),
+            'emotions': summary.get('emotions', {}),
+            'summarized_turns': summary.get('summarized_turns', 0),
+        },
+        'created_at': user_data.get('created_at'),
+        'export_date': datetime.now().isoformat(),
+    }
+
+    turns = 0
+    topic_frequency = defaultdict(int)
+    time_preferences = defaultdict(int)
+
+    # 보관된 대화 먼저 (오래된 순서), 이어서 사용자 파일의 최근 대화
+    for source in (memory_manager.archive.iter_turns(user_id), user_data.get('conversations', [])):
+        for conv in source:
+            turns += 1
+            for category, subcategories in conv.get('memory_keywords', {}).items():
+                topic_frequency[category] += 1
+                if isinstance(subcategories, dict):
+                    for subcategory in subcategories.keys():
+                        topic_frequency[f"{category}_{subcategory}"] += 1
+
+            timestamp = conv.get('timestamp', '')
+            if timestamp:
+                try:
+                    hour = datetime.fromisoformat(timestamp.replace('Z', '+00:00')).hour
+                    time_preferences[classify_time_of_day(hour)] += 1
+                except ValueError:
+                    pass
+
+            yield {'type': 'conversation', **conv}
+
+    yield {
+        'type': 'footer',
+        'total_conversations': turns,
+        'favorite_topics': dict(topic_frequency),
+        'time_preferences': dict(time_preferences),
+    }
+
+
+def iter_ndjson(records: Iterable[Dict], buffer_size: int = 64 * 1024) -> Iterator[bytes]:
+    """레코드를 NDJSON 바이트로 변환합니다
+
+    줄을 buffer_size 바이트까지 모아서 내보내 응답 조각 수를 줄입니다 (0이면 한 줄씩).
+    """
+    buffer = []
+    buffered = 0
+    for record in records:
+        line = dumps_bytes(record) + b'\n'
+        buffer.append(line)
+        buffered += len(line)
+        if buffered >= buffer_size:
+            yield b''.join(buffer)
+            buffer = []
+            buffered = 0
+    if buffer:
+        yield b''.join(buffer)
+
+
+def iter_gzip(chunks: Iterable[bytes], level: int = 6) -> Iterator[bytes]:
+    """바이트 조각을 gzip 스트림으로 압축하며 반환합니다"""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)  # wbits=31: gzip 머리말/꼬리말 포함
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
+def stream_user_export(memory_manager, user_id: str, compress: bool = False) -> Iterator[bytes]:
+    """사용자 데이터를 NDJSON(선택적으로 gzip) 바이트 스트림으로 반환합니다"""
+    chunks = iter_ndjson(iter_user_export(memory_manager, user_id))
+    return iter_gzip(chunks) if compress else chunks
+
+
+def export_all_users(
+    memory_manager, output_dir: str, compress: bool = True, resume: bool = True
+) -> Dict:
+    """모든 사용자를 사용자별 NDJSON 파일로 내보냅니다 (감사용)
+
+    사용자 ID 순서로 처리하고 끝난 사용자를 상태 파일에 기록하므로,
+    중단된 뒤 다시 실행하면 마지막으로 완료한 사용자 다음부터 이어서 내보냅니다.
+    파일은 임시 이름으로 쓴 뒤 바꾸므로 중단되어도 반쯤 쓴 파일이 남지 않습니다.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    state_path = os.path.join(output_dir, 'export_state.json')
+    state = read_json_file(state_path) if resume and os.path.exists(state_path) else {}
+    if state.get('completed'):
+        state = {}
+    last_user_id = state.get('last_user_id')
+
+    user_ids = sorted(user_id for user_id, _ in memory_manager.manifest.iter_entries())
+    extension = 'ndjson.gz' if compress else 'ndjson'
+    exported = 0
+    skipped = 0
+
+    for user_id in user_ids:
+        if last_user_id is not None and user_id <= last_user_id:
+            skipped += 1
+            continue
+
+        path = os.path.join(output_dir, f"user_{user_id}.{extension}")
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'wb') as f:
+            for chunk in stream_user_export(memory_manager, user_id, compress):
+                f.write(chunk)
+        os.replace(tmp_path, path)
+
+        exported += 1
+        state = {
+            'last_user_id': user_id,
+            'exported': state.get('exported', 0) + 1,
+            'updated_at': datetime.now().isoformat(),
+        }
+        write_json_file(state_path, state)
+
+    state['completed'] = True
+    write_json_file(state_path, state)
+    return {
+        'exported': exported,
+        'skipped': skipped,
+        'total_users': len(user_ids),
+        'output_dir': output_dir,
+    }
+
+
+# 명령줄 실행
+if __name__ == "__main__":
+    import argparse
+    import sys
+
+    from .memory_manager import MemoryManager
+
+    parser = argparse.ArgumentParser(description='사용자 데이터 NDJSON 내보내기')
+    parser.add_argument('--memory-dir', default=os.getenv('MEMORY_DIR', 'memory_data'))
+    parser.add_argument('--user-id', help='내보낼 사용자 ID (지정하지 않으면 표준 출력 대신 전체 내보내기)')
+    parser.add_argument('--output-dir', default='exports', help='전체 내보내기 출력 디렉토리')
+    parser.add_argument('--gzip', action='store_true', help='gzip으로 압축')
+    parser.add_argument('--restart', action='store_true', help='이전 진행 상태를 무시하고 처음부터 내보내기')
+    args = parser.parse_args()
+
+    manager = MemoryManager(args.memory_dir)
+    if args.user_id:
+        for export_chunk in stream_user_export(manager, args.user_id, args.gzip):
+            sys.stdout.buffer.write(export_chunk)
+    else:
+        result = export_all_users(manager, args.output_dir, args.gzip, resume=not args.restart)
+        print(
+            f"내보낸 사용자: {result['exported']}명, 이전 실행에서 완료: {result['skipped']}명 "
+            f"(전체 {result['total_users']}명) -> {result['output_dir']}"
+        )
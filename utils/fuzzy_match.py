@@ -0,0 +1,271 @@
+"""
+한글 자모 단위 근사 키워드 매칭
+
+음성 인식 입력의 띄어쓰기 차이("고향의봄" / "고향에 봄")나 빠진 자모를 찾기 위해
+한글 음절을 초성/중성/종성 자모로 분해한 뒤 편집 거리로 비교합니다.
+SymSpell 방식의 삭제 인덱스(각 키워드에서 자모를 최대 max_distance개 지운 문자열 -> 키워드)를
+한 번 만들어 두므로, 조회 비용은 사전 크기가 아니라 질의 길이에만 비례합니다.
+"""
+
+import re
+from typing import Iterable, List, NamedTuple, Optional, Set, Tuple
+
+# 유니코드 한글 음절 분해용 자모 표 (호환용 자모)
+CHOSEONG = 'ㄱㄲㄴㄷㄸㄹㅁㅂㅃㅅㅆㅇㅈㅉㅊㅋㅌㅍㅎ'
+JUNGSEONG = 'ㅏㅐㅑㅒㅓㅔㅕㅖㅗㅘㅙㅚㅛㅜㅝㅞㅟㅠㅡㅢㅣ'
+JONGSEONG = (
+    '',
+    'ㄱ',
+    'ㄲ',
+    'ㄳ',
+    'ㄴ',
+    'ㄵ',
+    'ㄶ',
+    'ㄷ',
+    'ㄹ',
+    'ㄺ',
+    'ㄻ',
+    'ㄼ',
+    'ㄽ',
+    'ㄾ',
+    'ㄿ',
+    'ㅀ',
+    'ㅁ',
+    'ㅂ',
+    'ㅄ',
+    'ㅅ',
+    'ㅆ',
+    'ㅇ',
+    'ㅈ',
+    'ㅊ',
+    'ㅋ',
+    'ㅌ',
+    'ㅍ',
+    'ㅎ',
+)
+_HANGUL_BASE = 0xAC00
+_HANGUL_LAST = 0xD7A3
+
+_NON_WORD = re.compile(r'[^\w]')
+
+
+def decompose_jamo(text: str) -> str:
+    """한글 음절을 자모로 분해합니다 (한글이 아닌 문자는 그대로 둠)"""
+    jamo = []
+    for ch in text:
+        code = ord(ch)
+        if _HANGUL_BASE <= code <= _HANGUL_LAST:
+            offset = code - _HANGUL_BASE
+            jamo.append(CHOSEONG[offset // 588])
+            jamo.append(JUNGSEONG[(offset % 588) // 28])
+            jamo.append(JONGSEONG[offset % 28])
+        else:
+            jamo.append(ch)
+    return ''.join(jamo)
+
+
+def normalize_term(text: str) -> str:
+    """띄어쓰기와 문장부호를 없앤 소문자 문자열을 반환합니다"""
+    return _NON_WORD.sub('', text.lower())
+
+
+def edit_distance(a: str, b: str, max_distance: int) -> int:
+    """두 문자열의 편집 거리(인접 교환 포함)를 반환합니다
+
+    max_distance를 넘으면 계산을 멈추고 max_distance + 1을 반환합니다.
+    공통 앞뒤 부분을 잘라낸 뒤 대각선에서 max_distance 이내의 칸만 계산합니다.
+    """
+    if abs(len(a) - len(b)) > max_distance:
+        return max_distance + 1
+    if a == b:
+        return 0
+
+    # 공통 접두/접미 제거 (오타는 보통 한 곳에만 있음)
+    prefix = 0
+    limit = min(len(a), len(b))
+    while prefix < limit and a[prefix] == b[prefix]:
+        prefix += 1
+    suffix = 0
+    while suffix < limit - prefix and a[-1 - suffix] == b[-1 - suffix]:
+        suffix += 1
+    a = a[prefix : len(a) - suffix]
+    b = b[prefix : len(b) - suffix]
+    if not a or not b:
+        distance = len(a) + len(b)
+        return distance if distance <= max_distance else max_distance + 1
+
+    over = max_distance + 1
+    previous_previous = None
+    previous = [j if j <= max_distance else over for j in range(len(b) + 1)]
+    for i in range(1, len(a) + 1):
+        current = [over] * (len(b) + 1)
+        if i <= max_distance:
+            current[0] = i
+        row_min = over
+        for j in range(max(1, i - max_distance), min(len(b), i + max_distance) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            value = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if (
+                previous_previous is not None
+                and j > 1
+                and a[i - 1] == b[j - 2]
+                and a[i - 2] == b[j - 1]
+            ):
+                value = min(value, previous_previous[j - 2] + 1)
+            current[j] = value
+            if value < row_min:
+                row_min = value
+        if row_min > max_distance:
+            return over
+        previous_previous, previous = previous, current
+    return min(previous[-1], over)
+
+
+def _deletes(word: str, distance: int) -> Set[str]:
+    """word에서 문자를 최대 distance개 지운 문자열 집합을 반환합니다 (원문 포함)"""
+    variants = {word}
+    frontier = [word]
+    for _ in range(distance):
+        next_frontier = []
+        for current in frontier:
+            for index in range(len(current)):
+                variant = current[:index] + current[index + 1 :]
+                if variant not in variants:
+                    variants.add(variant)
+                    next_frontier.append(variant)
+        frontier = next_frontier
+    return variants
+
+
+class FuzzyMatch(NamedTuple):
+    """근사 매칭 결과"""
+
+    term: str  # 사전에 등록된 원래 키워드
+    value: object  # 키워드와 함께 등록한 값
+    distance: int  # 자모 편집 거리
+
+
+class JamoFuzzyIndex:
+    """자모 삭제 인덱스를 이용한 근사 키워드 사전
+
+    자모 수가 min_term_length보다 짧은 키워드는 정확히 일치할 때만 찾습니다.
+    짧은 낱말은 자모 하나만 달라도 다른 흔한 낱말이 되므로("추석" / "추억") 오탐을 막기 위함입니다.
+    """
+
+    def __init__(self, max_distance: int = 1, min_term_length: int = 6):
+        self.max_distance = max_distance
+        self.min_term_length = min_term_length
+        self._terms = []  # [(원래 키워드, 자모 문자열, 허용 거리, 값)]
+        self._exact = {}  # 자모 문자열 -> 키워드 번호 목록
+        self._deletes = {}  # 삭제 변형 -> 키워드 번호 목록
+        self._syllable_lengths = set()  # 등록된 키워드의 글자 수 (본문 탐색 창 크기)
+        self._jamo_lengths = set()  # 등록된 키워드의 자모 수 (조회할 필요 없는 창 거르기)
+        # 글자 수별 (위치, 글자) 집합: 자모 편집 하나는 이웃한 두 글자까지만 바꾸므로
+        # 글자 수가 허용 거리의 두 배보다 긴 키워드는 같은 위치에 같은 글자가 하나 이상 남음
+        self._anchors = {}
+        self._unanchored_lengths = set()
+
+    def __len__(self) -> int:
+        return len(self._terms)
+
+    def add(self, term: str, value: object = None, max_distance: Optional[int] = None) -> None:
+        """키워드를 등록합니다 (max_distance로 키워드별 허용 거리를 지정할 수 있음)"""
+        normalized = normalize_term(term)
+        if not normalized:
+            return
+        jamo = decompose_jamo(normalized)
+        if max_distance is None:
+            max_distance = self.max_distance if len(jamo) >= self.min_term_length else 0
+
+        term_id = len(self._terms)
+        self._terms.append((term, jamo, max_distance, value))
+        self._exact.setdefault(jamo, []).append(term_id)
+        self._syllable_lengths.add(len(normalized))
+        self._jamo_lengths.add(len(jamo))
+        if len(normalized) > 2 * max_distance:
+            self._anchors.setdefault(len(normalized), set()).update(enumerate(normalized))
+        else:
+            self._unanchored_lengths.add(len(normalized))
+        for variant in _deletes(jamo, max_distance):
+            if variant != jamo:
+                self._deletes.setdefault(variant, []).append(term_id)
+
+    def add_many(self, items: Iterable[Tuple[str, object]]) -> None:
+        """(키워드, 값) 목록을 한 번에 등록합니다"""
+        for term, value in items:
+            self.add(term, value)
+
+    def lookup(self, query: str, max_distance: Optional[int] = None) -> List[FuzzyMatch]:
+        """질의와 편집 거리 안에 있는 키워드를 거리순으로 반환합니다"""
+        jamo = decompose_jamo(normalize_term(query))
+        return self._lookup_jamo(jamo, self.max_distance if max_distance is None else max_distance)
+
+    def _lookup_jamo(self, jamo: str, max_distance: int) -> List[FuzzyMatch]:
+        if not jamo:
+            return []
+        candidates = set(self._exact.get(jamo, ()))
+        if max_distance > 0:
+            # 질의의 삭제 변형이 키워드 원문이나 키워드의 삭제 변형과 같으면 후보
+            for variant in _deletes(jamo, max_distance):
+                candidates.update(self._exact.get(variant, ()))
+                candidates.update(self._deletes.get(variant, ()))
+
+        matches = []
+        for term_id in candidates:
+            term, term_jamo, term_distance, value = self._terms[term_id]
+            allowed = min(max_distance, term_distance)
+            distance = edit_distance(jamo, term_jamo, allowed)
+            if distance <= allowed:
+                matches.append(FuzzyMatch(term, value, distance))
+        matches.sort(key=lambda match: (match.distance, match.term))
+        return matches
+
+    def find_in_text(self, text: str, max_distance: Optional[int] = None) -> List[FuzzyMatch]:
+        """본문에서 등록된 키워드와 비슷한 부분을 찾아 키워드별로 가장 가까운 결과를 반환합니다
+
+        띄어쓰기를 없앤 본문에서 키워드 글자 수만큼의 창을 옮겨 가며 조회하므로
+        "고향에 봄"처럼 띄어쓰기가 다른 경우도 찾습니다.
+        """
+        if max_distance is None:
+            max_distance = self.max_distance
+        # 본문을 한 번만 분해하고, 글자별 자모 시작 위치로 창을 잘라냄
+        normalized = normalize_term(text)
+        syllables = [decompose_jamo(ch) for ch in normalized]
+        offsets = [0]
+        for jamo in syllables:
+            offsets.append(offsets[-1] + len(jamo))
+        jamo_text = ''.join(syllables)
+        # 자모 수가 어떤 키워드와도 max_distance 넘게 다르면 조회하지 않음
+        reachable = {
+            length + delta
+            for length in self._jamo_lengths
+            for delta in range(-max_distance, max_distance + 1)
+        }
+
+        best = {}
+        for length in self._syllable_lengths:
+            anchors = None if length in self._unanchored_lengths else self._anchors[length]
+            for start in range(len(syllables) - length + 1):
+                if anchors is not None and not any(
+                    (position, normalized[start + position]) in anchors
+                    for position in range(length)
+                ):
+                    continue
+                window = jamo_text[offsets[start] : offsets[start + length]]
+                if len(window) not in reachable:
+                    continue
+                for match in self._lookup_jamo(window, max_distance):
+                    previous = best.get(match.term)
+                    if previous is None or match.distance < previous.distance:
+                        best[match.term] = match
+        return sorted(best.values(), key=lambda match: (match.distance, match.term))
+
+
+# 예시 사용법
+if __name__ == "__main__":
+    index = JamoFuzzyIndex(max_distance=1)
+    index.add_many([('고향의봄', '음악'), ('된장찌개', '음식'), ('추석', '명절'), ('숨바꼭질', '놀이')])
+
+    print("=== 자모 근사 매칭 테스트 ===")
+    for sample in ['고향에 봄 노래 틀어줘', '된장지개 끓여 먹었지', '숨박꼭질 하던 때', '추억이 많아요']:
+        print(f"{sample} -> {index.find_in_text(sample)}")
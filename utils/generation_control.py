@@ -0,0 +1,250 @@
+"""
+응답 생성 파라미터 적응 조절
+
+응답은 RESPONSE_MAX_SENTENCES 문장까지만 보여 주므로, 고정된 max_output_tokens(500)로 요청하면 보여 주지 않을
+뒷부분까지 생성하고 비용을 냅니다. 최근 응답의 문장당 토큰 수 분포(상위 분위수)와 문장 한도로
+max_output_tokens를 정하고, 업스트림 지연이나 할당량 사용률이 높으면 분위수를 중앙값 쪽으로, 여유 배율을 1 쪽으로
+옮겨 한도를 더 줄입니다 (압력이 한도에 닿으면 문장 한도도 하나 줄임). 표본이 모이기 전에는 고정 한도에
+압력 배율(min_factor까지)만 곱합니다.
+
+효과를 비교할 수 있도록 일부 요청(control_rate)은 고정 파라미터로 보내고 변형(adaptive/static)별로
+첫 문장 지연과 전체 스트림 시간을 기록하며, 줄인 예약 토큰과 문장 한도에서 스트림을 끊어 생성하지 않은
+토큰(추정)을 메트릭으로 내보냅니다.
+"""
+
+import math
+import random
+import threading
+from collections import deque
+from typing import Dict, Optional
+
+from .metrics import metrics
+
+VARIANTS = ('adaptive', 'static')
+
+
+def quantile(values, q: float) -> float:
+    """정렬하지 않은 값 목록의 분위수 (선형 보간)"""
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    position = (len(ordered) - 1) * q
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+class AdaptiveGenerationController:
+    """문장당 토큰 분포와 지연/할당량 압력으로 요청별 생성 한도를 정합니다"""
+
+    def __init__(
+        self,
+        max_output_tokens: int = 500,
+        max_sentences: int = 3,
+        sampling: Optional[Dict] = None,
+        percentile: float = 0.9,
+        headroom: float = 1.2,
+        min_output_tokens: int = 64,
+        min_samples: int = 20,
+        window: int = 500,
+        latency_target: float = 2.0,
+        tighten_start: float = 0.7,
+        min_factor: float = 0.6,
+        control_rate: float = 0.0,
+    ):
+        self.max_output_tokens = max_output_tokens
+        self.max_sentences = max_sentences
+        self.sampling = dict(sampling or {})
+        self.percentile = percentile
+        self.headroom = headroom
+        self.min_output_tokens = min_output_tokens
+        self.min_samples = min_samples
+        self.latency_target = latency_target
+        self.tighten_start = tighten_start
+        self.min_factor = min_factor
+        self.control_rate = control_rate
+        self._tokens_per_sentence = deque(maxlen=window)
+        self._first_chunk_latency = 0.0  # 첫 조각까지 걸린 시간의 지수 이동 평균
+        self._latency = {
+            variant: {'count': 0, 'first_sentence': 0.0, 'stream': 0.0} for variant in VARIANTS
+        }
+        self._lock = threading.Lock()
+
+    def latency_pressure(self) -> float:
+        """최근 첫 조각 지연이 목표 대비 얼마나 되는지 (1이면 목표와 같음)"""
+        if not self.latency_target:
+            return 0.0
+        return self._first_chunk_latency / self.latency_target
+
+    def _tighten_ratio(self, pressure: float) -> float:
+        """압력이 tighten_start에서 1까지 오르는 동안 0에서 1로 커지는 조임 정도"""
+        if pressure <= self.tighten_start:
+            return 0.0
+        return min((pressure - self.tighten_start) / max(1 - self.tighten_start, 1e-6), 1.0)
+
+    def plan(self, quota_pressure: float = 0.0) -> Dict:
+        """요청 하나에 쓸 생성 설정 (generation_config 인자, 문장 한도, 변형, 압력)을 반환합니다"""
+        if self.control_rate and random.random() < self.control_rate:
+            return {
+                'variant': 'static',
+                'max_sentences': self.max_sentences,
+                'pressure': 0.0,
+                'generation': dict(self.sampling, max_output_tokens=self.max_output_tokens),
+            }
+
+        pressure = max(self.latency_pressure(), quota_pressure)
+        ratio = self._tighten_ratio(pressure)
+        max_sentences = self.max_sentences
+        if pressure >= 1 and max_sentences > 1:
+            max_sentences -= 1
+
+        with self._lock:
+            samples = list(self._tokens_per_sentence)
+        if len(samples) >= self.min_samples:
+            # 조일수록 긴 문장 대비 여유를 줄임 (중앙값 길이 문장까지는 잘리지 않게)
+            percentile = self.percentile - (self.percentile - 0.5) * ratio
+            headroom = self.headroom - (self.headroom - 1) * ratio
+            limit = quantile(samples, percentile) * max_sentences * headroom
+        else:
+            limit = self.max_output_tokens * (1 - (1 - self.min_factor) * ratio)
+        limit = int(min(max(math.ceil(limit), self.min_output_tokens), self.max_output_tokens))
+        metrics.observe(
+            'avatar_generation_max_output_tokens',
+            limit,
+            labels={'variant': 'adaptive'},
+            help_text='요청한 max_output_tokens',
+        )
+        if limit < self.max_output_tokens:
+            metrics.inc(
+                'avatar_generation_tokens_saved_total',
+                self.max_output_tokens - limit,
+                labels={'source': 'limit'},
+                help_text='줄인 출력 토큰 (limit: 고정 한도 대비 덜 요청한 토큰, cancel: 문장 한도에서 끊어 '
+                '생성하지 않은 토큰 추정)',
+            )
+        return {
+            'variant': 'adaptive',
+            'max_sentences': max_sentences,
+            'pressure': round(pressure, 3),
+            'generation': dict(self.sampling, max_output_tokens=limit),
+        }
+
+    def observe_first_chunk(self, seconds: float) -> None:
+        """업스트림 첫 조각까지 걸린 시간을 반영합니다 (지연 압력 계산용)"""
+        with self._lock:
+            self._first_chunk_latency = (
+                seconds
+                if not self._first_chunk_latency
+                else self._first_chunk_latency * 0.8 + seconds * 0.2
+            )
+
+    def record(
+        self,
+        plan: Dict,
+        sentences: int,
+        output_tokens: int,
+        first_sentence_seconds: Optional[float],
+        stream_seconds: float,
+        cancelled: bool = False,
+    ) -> None:
+        """끝난 응답의 문장 수, 출력 토큰, 지연을 반영합니다"""
+        variant = plan['variant']
+        limit = plan['generation']['max_output_tokens']
+        # 한도에 걸려 잘린 응답은 문장당 토큰을 작게 보이게 하므로 (한도가 계속 줄어드는 것을 막으려고) 표본에서 뺌
+        if not cancelled and output_tokens >= limit * 0.95:
+            metrics.inc(
+                'avatar_generation_truncated_total',
+                labels={'variant': variant},
+                help_text='max_output_tokens에 걸려 잘린 응답 수',
+            )
+        elif sentences and output_tokens:
+            with self._lock:
+                self._tokens_per_sentence.append(output_tokens / sentences)
+        if cancelled:
+            saved = max(limit - output_tokens, 0)
+            metrics.inc('avatar_generation_tokens_saved_total', saved, labels={'source': 'cancel'})
+            metrics.inc(
+                'avatar_generation_cancelled_total',
+                labels={'variant': variant},
+                help_text='문장 한도에서 업스트림 스트림을 끊은 응답 수',
+            )
+        metrics.observe(
+            'avatar_generation_output_tokens',
+            output_tokens,
+            labels={'variant': variant},
+            help_text='응답별 출력 토큰',
+        )
+        metrics.observe(
+            'avatar_generation_stream_seconds',
+            stream_seconds,
+            labels={'variant': variant},
+            help_text='모델 호출부터 스트림 종료까지 걸린 시간',
+        )
+        with self._lock:
+            stats = self._latency[variant]
+            stats['count'] += 1
+            stats['stream'] += stream_seconds
+            if first_sentence_seconds is not None:
+                stats['first_sentence'] += first_sentence_seconds
+        if first_sentence_seconds is not None:
+            metrics.observe(
+                'avatar_generation_first_sentence_seconds',
+                first_sentence_seconds,
+                labels={'variant': variant},
+                help_text='모델 호출부터 첫 문장까지 걸린 시간',
+            )
+
+    def get_status(self) -> Dict:
+        """현재 분포, 압력, 변형별 평균 지연과 그 차이를 반환합니다"""
+        with self._lock:
+            samples = list(self._tokens_per_sentence)
+            latency = {variant: dict(stats) for variant, stats in self._latency.items()}
+        averages = {}
+        for variant, stats in latency.items():
+            count = stats['count']
+            averages[variant] = {
+                'count': count,
+                'first_sentence_seconds': round(stats['first_sentence'] / count, 3)
+                if count
+                else None,
+                'stream_seconds': round(stats['stream'] / count, 3) if count else None,
+            }
+        delta = None
+        if averages['adaptive']['count'] and averages['static']['count']:
+            delta = round(
+                averages['adaptive']['stream_seconds'] - averages['static']['stream_seconds'], 3
+            )
+        return {
+            'samples': len(samples),
+            'tokens_per_sentence_p50': round(quantile(samples, 0.5), 1),
+            'tokens_per_sentence_p90': round(quantile(samples, self.percentile), 1),
+            'first_chunk_latency': round(self._first_chunk_latency, 3),
+            'latency_pressure': round(self.latency_pressure(), 3),
+            'latency_by_variant': averages,
+            'stream_seconds_delta': delta,
+        }
+
+
+# 예시 사용법
+if __name__ == "__main__":
+    print("=== 생성 파라미터 적응 조절 테스트 ===")
+    random.seed(7)
+    controller = AdaptiveGenerationController(500, 3, {'temperature': 0.7}, control_rate=0.2)
+    print("표본 전:", controller.plan())
+    for _ in range(50):
+        plan = controller.plan()
+        tokens = random.randint(25, 45) * 3
+        controller.record(
+            plan,
+            3,
+            tokens,
+            0.8,
+            2.5 if plan['variant'] == 'static' else 1.9,
+            cancelled=plan['variant'] == 'adaptive',
+        )
+    controller.control_rate = 0.0
+    print("표본 후:", controller.plan())
+    print("할당량 압력:", controller.plan(quota_pressure=0.85))
+    controller.observe_first_chunk(2.4)
+    print("지연 압력:", controller.plan())
+    print(controller.get_status())
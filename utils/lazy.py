@@ -0,0 +1,67 @@
+"""
+지연 생성 전역 인스턴스
+
+security_manager, memory_manager처럼 모듈 전역으로 제공하던 인스턴스를 import할 때가 아니라
+처음 사용할 때 만들도록 합니다. 모듈을 불러오기만 해서는 디렉토리 생성, 로그 스레드 시작,
+카탈로그 구성 같은 부수 효과가 일어나지 않으므로 워커 시작과 도구 실행이 빨라집니다.
+
+기존 사용법(from utils.security import security_manager)은 모듈 __getattr__(PEP 562)로 그대로 동작하며,
+모듈 안의 편의 함수는 get_*() 함수로 인스턴스를 얻습니다.
+"""
+
+import sys
+import threading
+from typing import Any, Callable, Dict
+
+
+class LazyInstance:
+    """처음 get()을 호출할 때 factory로 만들어 두고 이후에는 같은 객체를 반환하는 전역 인스턴스"""
+
+    def __init__(self, factory: Callable[[], Any]):
+        self._factory = factory
+        self._instance = None
+        self._created = False
+        self._lock = threading.Lock()
+
+    def get(self) -> Any:
+        if not self._created:
+            with self._lock:
+                if not self._created:
+                    self._instance = self._factory()
+                    self._created = True
+        return self._instance
+
+    def is_created(self) -> bool:
+        return self._created
+
+
+def lazy_module_attributes(module_name: str, **instances: LazyInstance) -> Callable[[str], Any]:
+    """모듈 전역 이름을 지연 인스턴스로 제공하는 모듈 __getattr__ 함수를 만듭니다
+
+    처음 접근하면 만든 객체를 모듈 속성으로 저장하므로 그 뒤로는 일반 전역 변수처럼 바로 조회됩니다.
+    """
+
+    def __getattr__(name: str) -> Any:
+        instance = instances.get(name)
+        if instance is None:
+            raise AttributeError(f"module {module_name!r} has no attribute {name!r}")
+        value = instance.get()
+        setattr(sys.modules[module_name], name, value)
+        return value
+
+    return __getattr__
+
+
+def lazy_package_attributes(package_name: str, exports: Dict[str, str]) -> Callable[[str], Any]:
+    """이름 -> 하위 모듈 표를 보고 처음 접근할 때 해당 하위 모듈만 불러오는 패키지 __getattr__ 함수를 만듭니다"""
+
+    def __getattr__(name: str) -> Any:
+        module_name = exports.get(name)
+        if module_name is None:
+            raise AttributeError(f"module {package_name!r} has no attribute {name!r}")
+        module = __import__(f"{package_name}.{module_name}", fromlist=[name])
+        value = getattr(module, name)
+        setattr(sys.modules[package_name], name, value)
+        return value
+
+    return __getattr__
@@ -0,0 +1,327 @@
+"""
+대량 키워드/감정 점수 계산
+
+extract_memory_keywords와 extract_emotions를 문장마다 부르는 대신, 문장 목록 전체를
+(문장 수 x 사전 낱말 수) 희소 행렬 하나로 만들고 주제/세부 주제/감정별 개수를 행렬 곱으로 구합니다.
+문장들을 하나의 코드 포인트 배열로 이어 붙인 뒤, 낱말의 첫 글자가 나오는 위치를 한 번에 모으고
+다음 글자를 차례로 비교해 후보를 좁히는 방식으로 모든 낱말의 위치를 벡터 연산으로 찾습니다.
+결과는 낱말 단위 함수와 같으며(근사 매칭 포함), NumPy가 필요하고 SciPy가 있으면 희소 행렬을 씁니다.
+근사 매칭은 행렬 연산이 아니라 문장마다 자모 인덱스를 조회하므로(문장당 수백 µs, 정확히 일치는 수 µs)
+대량 점수 계산의 기본값은 정확히 일치만이며, 근사 매칭은 fuzzy=True로 직접 켭니다.
+"""
+
+from typing import Dict, List, Optional, Sequence
+
+from .lazy import LazyInstance, lazy_module_attributes
+from .text_processing import EMOTION_KEYWORDS, MEMORY_KEYWORDS, find_fuzzy_keywords
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - 선택적 의존성
+    np = None
+
+try:
+    from scipy import sparse
+except ImportError:  # pragma: no cover - 선택적 의존성
+    sparse = None
+
+# 문장 사이 구분자 (사전 낱말에 들어 있지 않아 문장 경계를 넘는 일치가 생기지 않음)
+_SEPARATOR = '\x00'
+
+
+def is_available() -> bool:
+    """NumPy가 설치되어 대량 점수 계산을 사용할 수 있는지 반환합니다"""
+    return np is not None
+
+
+def _build_matrix(rows, cols, shape, data=None):
+    """(행, 열) 목록으로 SciPy CSR 행렬(없으면 NumPy 밀집 행렬)을 만듭니다"""
+    rows = np.asarray(rows, dtype=np.int64)
+    cols = np.asarray(cols, dtype=np.int64)
+    values = (
+        np.ones(len(rows), dtype=np.int32) if data is None else np.asarray(data, dtype=np.int32)
+    )
+    if sparse is not None:
+        return sparse.csr_matrix((values, (rows, cols)), shape=shape, dtype=np.int32)
+    matrix = np.zeros(shape, dtype=np.int32)
+    np.add.at(matrix, (rows, cols), values)
+    return matrix
+
+
+def _to_dense(matrix):
+    """행렬 곱 결과를 NumPy 배열로 반환합니다"""
+    return (
+        matrix.toarray() if sparse is not None and sparse.issparse(matrix) else np.asarray(matrix)
+    )
+
+
+def _row_indices(matrix, row: int):
+    """행에서 0이 아닌 열 번호를 반환합니다"""
+    if sparse is not None and sparse.issparse(matrix):
+        return matrix.indices[matrix.indptr[row] : matrix.indptr[row + 1]]
+    return np.flatnonzero(matrix[row])
+
+
+class LexiconScores:
+    """문장 목록의 사전 낱말 일치 행렬과 집계 결과"""
+
+    def __init__(self, scorer: 'LexiconScorer', term_matrix, fuzzy_matrix, size: int):
+        self.scorer = scorer
+        self.term_matrix = term_matrix  # 문장 x 낱말: 정확히 포함되면 1
+        self.fuzzy_matrix = fuzzy_matrix  # 문장 x 키워드 항목: 근사 매칭만 된 경우 (자모 거리 + 1)
+        self.size = size
+        self.categories = scorer.categories
+        self.subcategories = scorer.subcategories
+        self.emotion_types = scorer.emotion_types
+        self._subcategory_counts = None
+
+    def __len__(self) -> int:
+        return self.size
+
+    def entry_matrix(self):
+        """문장 x 키워드 항목(주제, 세부 주제, 낱말) 일치 행렬 (정확히 일치 + 근사 매칭)"""
+        exact = self.term_matrix @ self.scorer.term_to_entry
+        if self.fuzzy_matrix is None:
+            return exact
+        fuzzy = (self.fuzzy_matrix > 0).astype(np.int32)
+        return exact + fuzzy
+
+    def subcategory_counts(self):
+        """문장 x 세부 주제별 일치 낱말 수 (extract_memory_keywords 목록 길이와 같음)"""
+        if self._subcategory_counts is None:
+            self._subcategory_counts = _to_dense(
+                self.entry_matrix() @ self.scorer.entry_to_subcategory
+            )
+        return self._subcategory_counts
+
+    def category_counts(self):
+        """문장 x 주제별 일치 낱말 수"""
+        return self.subcategory_counts() @ self.scorer.subcategory_to_category
+
+    def emotion_counts(self):
+        """문장 x 감정 종류별 일치 낱말 수"""
+        return _to_dense(self.term_matrix @ self.scorer.term_to_emotion)
+
+    def memory_keywords(self, index: int) -> Dict[str, Dict[str, List[str]]]:
+        """문장 하나의 키워드를 extract_memory_keywords와 같은 형식으로 반환합니다"""
+        scorer = self.scorer
+        found = {}
+        matched_terms = set(_row_indices(self.term_matrix, index).tolist())
+        # 정확히 일치한 낱말은 사전 순서대로
+        for entry_id, (category, subcategory, term) in enumerate(scorer.entries):
+            if scorer.term_ids[term] in matched_terms:
+                found.setdefault(category, {}).setdefault(subcategory, []).append(term)
+        # 근사 매칭된 낱말은 낱말 단위 함수처럼 (거리, 낱말) 순서로 뒤에 붙임
+        if self.fuzzy_matrix is not None:
+            fuzzy_entries = _row_indices(self.fuzzy_matrix, index).tolist()
+            distances = {
+                entry_id: int(self.fuzzy_matrix[index, entry_id]) for entry_id in fuzzy_entries
+            }
+            for entry_id in sorted(
+                fuzzy_entries,
+                key=lambda entry_id: (distances[entry_id], scorer.entries[entry_id][2]),
+            ):
+                category, subcategory, term = scorer.entries[entry_id]
+                found.setdefault(category, {}).setdefault(subcategory, []).append(term)
+        return found
+
+    def emotions(self, index: int) -> List[str]:
+        """문장 하나의 감정을 extract_emotions와 같은 형식으로 반환합니다"""
+        row = self.emotion_counts()[index]
+        return [emotion for emotion, count in zip(self.emotion_types, row) if count > 0]
+
+
+class LexiconScorer:
+    """키워드/감정 사전을 행렬로 바꾸어 두고 문장 목록을 한 번에 점수화하는 클래스"""
+
+    def __init__(
+        self, memory_keywords: Optional[Dict] = None, emotion_keywords: Optional[Dict] = None
+    ):
+        if np is None:
+            raise RuntimeError("대량 키워드 점수 계산에는 numpy 패키지가 필요합니다.")
+        memory_keywords = MEMORY_KEYWORDS if memory_keywords is None else memory_keywords
+        emotion_keywords = EMOTION_KEYWORDS if emotion_keywords is None else emotion_keywords
+
+        self.terms = []  # 중복 없는 사전 낱말 (행렬 열)
+        self.term_ids = {}
+        self.entries = []  # (주제, 세부 주제, 낱말)
+        self.entry_ids = {}
+        self.subcategories = []
+        self.categories = list(memory_keywords.keys())
+        self.emotion_types = list(emotion_keywords.keys())
+
+        entry_subcategories = []
+        for category, subcategories in memory_keywords.items():
+            for subcategory, keywords in subcategories.items():
+                subcategory_id = len(self.subcategories)
+                self.subcategories.append((category, subcategory))
+                for keyword in keywords:
+                    self._term_id(keyword)
+                    self.entry_ids.setdefault((category, subcategory, keyword), len(self.entries))
+                    self.entries.append((category, subcategory, keyword))
+                    entry_subcategories.append(subcategory_id)
+
+        emotion_pairs = []
+        for emotion_id, keywords in enumerate(emotion_keywords.values()):
+            for keyword in keywords:
+                emotion_pairs.append((self._term_id(keyword), emotion_id))
+
+        # 첫 글자별 낱말 묶음 (코드 포인트 -> 묶음 번호, 0은 어떤 낱말도 시작하지 않는 글자)
+        self._term_codes = [
+            np.array([ord(ch) for ch in term], dtype=np.uint32) for term in self.terms
+        ]
+        first_chars = sorted({term[0] for term in self.terms})
+        self._first_char_group = {ch: group for group, ch in enumerate(first_chars, 1)}
+        self._group_terms = [[] for _ in range(len(first_chars) + 1)]
+        for term_id, term in enumerate(self.terms):
+            self._group_terms[self._first_char_group[term[0]]].append(term_id)
+        self._group_table = np.zeros(0x110000, dtype=np.uint16)
+        for ch, group in self._first_char_group.items():
+            self._group_table[ord(ch)] = group
+        self._max_term_length = max((len(term) for term in self.terms), default=1)
+
+        # 사전 구조를 나타내는 변환 행렬
+        entry_count = len(self.entries)
+        self.term_to_entry = _build_matrix(
+            [self.term_ids[term] for _, _, term in self.entries],
+            list(range(entry_count)),
+            (len(self.terms), entry_count),
+        )
+        self.entry_to_subcategory = _build_matrix(
+            list(range(entry_count)), entry_subcategories, (entry_count, len(self.subcategories))
+        )
+        self.subcategory_to_category = np.zeros(
+            (len(self.subcategories), len(self.categories)), dtype=np.int32
+        )
+        for subcategory_id, (category, _) in enumerate(self.subcategories):
+            self.subcategory_to_category[subcategory_id, self.categories.index(category)] = 1
+        self.term_to_emotion = _build_matrix(
+            [term_id for term_id, _ in emotion_pairs],
+            [emotion_id for _, emotion_id in emotion_pairs],
+            (len(self.terms), len(self.emotion_types)),
+        )
+
+    def _term_id(self, term: str) -> int:
+        term_id = self.term_ids.get(term)
+        if term_id is None:
+            term_id = self.term_ids[term] = len(self.terms)
+            self.terms.append(term)
+        return term_id
+
+    def term_matrix(self, texts: Sequence[str]):
+        """문장 x 낱말 포함 여부 행렬을 만듭니다
+
+        문장들을 구분자로 이어 붙인 코드 포인트 배열에서 낱말마다 첫 글자 위치를 후보로 잡고
+        나머지 글자를 하나씩 비교해 후보를 좁힌 뒤, 남은 위치를 문장 번호로 바꿉니다.
+        """
+        if not texts:
+            return _build_matrix([], [], (0, len(self.terms)))
+        buffer = _SEPARATOR.join(texts)
+        codes = np.frombuffer(buffer.encode('utf-32-le'), dtype=np.uint32)
+        # 낱말 길이만큼 덧붙여 끝부분 비교에서 범위를 넘지 않도록 함
+        codes = np.concatenate([codes, np.zeros(self._max_term_length, dtype=np.uint32)])
+        lengths = np.fromiter((len(text) + 1 for text in texts), dtype=np.int64, count=len(texts))
+        starts = np.concatenate([[0], np.cumsum(lengths)[:-1]])
+
+        # 첫 글자 묶음별 위치 (한 번의 표 조회와 정렬)
+        groups = self._group_table[codes]
+        candidates = np.flatnonzero(groups)
+        candidate_groups = groups[candidates]
+        order = np.argsort(candidate_groups, kind='stable')
+        candidates = candidates[order]
+        bounds = np.searchsorted(candidate_groups[order], np.arange(len(self._group_terms) + 1))
+
+        rows, cols = [], []
+        for group, term_ids in enumerate(self._group_terms):
+            if not term_ids:
+                continue
+            group_positions = candidates[bounds[group] : bounds[group + 1]]
+            for term_id in term_ids:
+                positions = group_positions
+                for offset, code in enumerate(self._term_codes[term_id][1:], 1):
+                    if not len(positions):
+                        break
+                    positions = positions[codes[positions + offset] == code]
+                if len(positions):
+                    matched_rows = np.unique(np.searchsorted(starts, positions, side='right') - 1)
+                    rows.append(matched_rows)
+                    cols.append(np.full(len(matched_rows), term_id))
+
+        if not rows:
+            return _build_matrix([], [], (len(texts), len(self.terms)))
+        return _build_matrix(
+            np.concatenate(rows), np.concatenate(cols), (len(texts), len(self.terms))
+        )
+
+    def score(self, texts: Sequence[str], fuzzy: bool = False) -> LexiconScores:
+        """문장 목록을 점수화합니다 (fuzzy는 extract_memory_keywords의 근사 매칭과 같고, 문장마다 따로 조회함)"""
+        texts = list(texts)
+        term_matrix = self.term_matrix(texts)
+
+        fuzzy_matrix = None
+        if fuzzy:
+            rows, cols, data = [], [], []
+            for row, text in enumerate(texts):
+                matches = find_fuzzy_keywords(text, 'memory')
+                if not matches:
+                    continue
+                exact_terms = set(_row_indices(term_matrix, row).tolist())
+                for match in matches:
+                    category, subcategory = match.value
+                    entry_id = self.entry_ids.get((category, subcategory, match.term))
+                    # 같은 세부 주제에서 이미 정확히 찾은 낱말은 다시 넣지 않음
+                    if entry_id is None or self.term_ids[match.term] in exact_terms:
+                        continue
+                    rows.append(row)
+                    cols.append(entry_id)
+                    data.append(match.distance + 1)
+            fuzzy_matrix = _build_matrix(rows, cols, (len(texts), len(self.entries)), data)
+
+        return LexiconScores(self, term_matrix, fuzzy_matrix, len(texts))
+
+
+# 전역 점수 계산기 인스턴스 (처음 사용할 때 사전 행렬 구성, NumPy가 없으면 None)
+_lexicon_scorer = LazyInstance(lambda: LexiconScorer() if np is not None else None)
+__getattr__ = lazy_module_attributes(__name__, lexicon_scorer=_lexicon_scorer)
+
+
+def get_lexicon_scorer() -> Optional[LexiconScorer]:
+    """전역 점수 계산기를 반환합니다 (처음 호출할 때 생성, NumPy가 없으면 None)"""
+    return _lexicon_scorer.get()
+
+
+# 편의 함수들
+def batch_extract_memory_keywords(
+    texts: Sequence[str], fuzzy: bool = False
+) -> List[Dict[str, Dict[str, List[str]]]]:
+    """여러 문장의 키워드를 한 번에 추출하는 편의 함수"""
+    scores = get_lexicon_scorer().score(texts, fuzzy)
+    return [scores.memory_keywords(index) for index in range(len(scores))]
+
+
+def batch_extract_emotions(texts: Sequence[str]) -> List[List[str]]:
+    """여러 문장의 감정을 한 번에 추출하는 편의 함수"""
+    scores = get_lexicon_scorer().score(texts, fuzzy=False)
+    counts = scores.emotion_counts()
+    return [
+        [emotion for emotion, count in zip(scores.emotion_types, row) if count > 0]
+        for row in counts
+    ]
+
+
+# 예시 사용법
+if __name__ == "__main__":
+    samples = [
+        "어릴 때 고향에서 어머니와 함께 고향의 봄 노래를 들었어요. 정말 그리운 추억이에요.",
+        "숨박꼭질 하고 된장지개 먹던 기억이 나요",
+        "오늘은 날씨가 좋네요",
+    ]
+    lexicon_scorer = get_lexicon_scorer()
+    scores = lexicon_scorer.score(samples, fuzzy=True)
+    print("=== 대량 키워드 점수 테스트 ===")
+    backend = 'scipy.sparse' if sparse is not None else 'numpy'
+    print(f"행렬 형식: {backend}, 낱말 {len(lexicon_scorer.terms)}개")
+    for index, text in enumerate(samples):
+        print(f"{text}\n  키워드: {scores.memory_keywords(index)}\n  감정: {scores.emotions(index)}")
+    topic_counts = (scores.category_counts() > 0).sum(axis=0).tolist()
+    print(f"주제별 문장 수: {dict(zip(scores.categories, topic_counts))}")
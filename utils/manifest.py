@@ -0,0 +1,138 @@
+"""
+저장소 배치와 매니페스트 인덱스
+
+사용자 파일을 한 디렉토리에 모두 두지 않고 사용자 ID 해시 앞부분으로 2단계 하위 디렉토리
+(users/ab/cd/user_<id>.json)에 나누어 저장합니다.
+첫 단계 샤드마다 매니페스트(users/ab/manifest.json)에 사용자별 크기, 대화 수, 활동 시각을 기록해
+통계와 정리 대상 선정이 사용자 파일을 열지 않고 매니페스트만 읽도록 합니다.
+"""
+
+import hashlib
+import os
+from typing import Dict, Iterator, Optional, Tuple
+
+from .serialization import read_json_file, write_json_file
+
+MANIFEST_NAME = 'manifest.json'
+
+
+def user_shard(user_id: str) -> Tuple[str, str]:
+    """사용자 ID의 2단계 샤드 디렉토리 이름을 반환합니다"""
+    digest = hashlib.md5(user_id.encode()).hexdigest()
+    return digest[:2], digest[2:4]
+
+
+def is_shard_name(name: str) -> bool:
+    """디렉토리 이름이 샤드 이름(16진수 2자리)인지 확인합니다"""
+    return len(name) == 2 and all(ch in '0123456789abcdef' for ch in name)
+
+
+def iter_shard_dirs(root_dir: str) -> Iterator[str]:
+    """root_dir 아래의 2단계 샤드 디렉토리 경로를 차례로 반환합니다"""
+    if not os.path.isdir(root_dir):
+        return
+    with os.scandir(root_dir) as first_level:
+        for first in sorted(first_level, key=lambda entry: entry.name):
+            if not (first.is_dir() and is_shard_name(first.name)):
+                continue
+            with os.scandir(first.path) as second_level:
+                for second in sorted(second_level, key=lambda entry: entry.name):
+                    if second.is_dir() and is_shard_name(second.name):
+                        yield second.path
+
+
+class ManifestIndex:
+    """샤드별 매니페스트 파일을 관리하는 클래스
+
+    같은 샤드의 매니페스트 갱신은 locks(샤드 이름을 키로 하는 잠금 레지스트리)로 직렬화합니다.
+    """
+
+    def __init__(self, root_dir: str, locks):
+        self.root_dir = root_dir
+        self.locks = locks
+
+    def _path(self, shard: str) -> str:
+        return os.path.join(self.root_dir, shard, MANIFEST_NAME)
+
+    def _load(self, shard: str) -> Dict:
+        path = self._path(shard)
+        if not os.path.exists(path):
+            return {}
+        try:
+            return read_json_file(path).get('users', {})
+        except Exception as e:
+            print(f"매니페스트 로드 오류 ({path}): {e}")
+            return {}
+
+    def _save(self, shard: str, users: Dict) -> None:
+        os.makedirs(os.path.join(self.root_dir, shard), exist_ok=True)
+        write_json_file(self._path(shard), {'users': users})
+
+    def update(self, user_id: str, fields: Dict) -> None:
+        """사용자 항목의 값을 갱신합니다 (없으면 새로 만듦)"""
+        shard = user_shard(user_id)[0]
+        with self.locks.hold(shard):
+            users = self._load(shard)
+            users.setdefault(user_id, {}).update(fields)
+            self._save(shard, users)
+
+    def remove(self, user_id: str) -> None:
+        """사용자 항목을 삭제합니다"""
+        shard = user_shard(user_id)[0]
+        with self.locks.hold(shard):
+            users = self._load(shard)
+            if users.pop(user_id, None) is not None:
+                self._save(shard, users)
+
+    def replace_all(self, entries: Dict[str, Dict]) -> None:
+        """전체 매니페스트를 주어진 항목으로 다시 만듭니다 (재구축용)"""
+        by_shard = {}
+        for user_id, entry in entries.items():
+            by_shard.setdefault(user_shard(user_id)[0], {})[user_id] = entry
+
+        existing = set()
+        if os.path.isdir(self.root_dir):
+            existing = {name for name in os.listdir(self.root_dir) if is_shard_name(name)}
+
+        for shard in existing | set(by_shard):
+            with self.locks.hold(shard):
+                self._save(shard, by_shard.get(shard, {}))
+
+    def get(self, user_id: str) -> Optional[Dict]:
+        """사용자 항목을 반환합니다"""
+        return self._load(user_shard(user_id)[0]).get(user_id)
+
+    def iter_entries(self) -> Iterator[Tuple[str, Dict]]:
+        """모든 샤드의 (사용자 ID, 항목)을 차례로 반환합니다"""
+        if not os.path.isdir(self.root_dir):
+            return
+        for shard in sorted(name for name in os.listdir(self.root_dir) if is_shard_name(name)):
+            yield from self._load(shard).items()
+
+    def exists(self) -> bool:
+        """매니페스트 파일이 하나라도 있는지 확인합니다"""
+        if not os.path.isdir(self.root_dir):
+            return False
+        return any(
+            os.path.exists(self._path(name))
+            for name in os.listdir(self.root_dir)
+            if is_shard_name(name)
+        )
+
+
+# 평면 배치에서 샤드 배치로 이전 (명령줄 실행)
+if __name__ == "__main__":
+    import argparse
+
+    from .memory_manager import MemoryManager
+
+    parser = argparse.ArgumentParser(description='메모리 저장소 샤드 배치 이전 및 매니페스트 재구축')
+    parser.add_argument('--memory-dir', default=os.getenv('MEMORY_DIR', 'memory_data'))
+    parser.add_argument('--rebuild', action='store_true', help='이전 후 매니페스트를 처음부터 다시 만듦')
+    args = parser.parse_args()
+
+    manager = MemoryManager(args.memory_dir)
+    migrated = manager.migrate_flat_layout()
+    print(f"이전한 사용자 파일: {migrated['users']}개, 보관 디렉토리: {migrated['archives']}개")
+    if args.rebuild:
+        print(f"매니페스트 재구축: {manager.rebuild_manifest()}명")
@@ -0,0 +1,303 @@
+"""
+프로세스 내 상태 메모리 집계
+
+요청 빈도 기록, 차단 IP, 대화 기록, 콘텐츠 카탈로그처럼 프로세스 메모리에 오래 남는 자료구조를
+이름으로 등록해 두고, 주기적으로 항목 수와 대략적인 바이트 크기를 메트릭으로 내보냅니다.
+구조마다 항목 수/바이트 소프트 한도를 둘 수 있으며, 한도를 넘으면 등록할 때 넘긴 정리 함수로 줄이거나
+(정리 함수가 없으면) 경고를 남겨 RSS 증가가 어느 구성 요소 때문인지 바로 알 수 있게 합니다.
+
+크기는 sys.getsizeof를 따라 내려가며 더하되, 큰 컨테이너는 앞쪽 sample개 항목의 평균으로 추정하므로
+수십만 항목이어도 집계 비용이 일정합니다.
+"""
+
+import itertools
+import os
+import sys
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Tuple
+
+from .metrics import metrics
+
+try:
+    import resource
+except ImportError:  # pragma: no cover - Windows
+    resource = None
+
+_CONTAINERS = (list, tuple, set, frozenset, deque)
+
+
+def approximate_size(obj, sample: int = 64, max_depth: int = 6) -> int:
+    """객체와 그 안에 든 객체의 대략적인 바이트 크기를 반환합니다
+
+    같은 객체는 한 번만 세며, sample개보다 큰 컨테이너는 앞쪽 sample개 항목의 크기로 나머지를 추정합니다.
+    """
+    seen = set()
+
+    def size(value, depth):
+        if id(value) in seen:
+            return 0
+        seen.add(id(value))
+        total = sys.getsizeof(value)
+        if depth <= 0:
+            return total
+
+        if isinstance(value, dict):
+            count = len(value)
+            items = list(itertools.islice(value.items(), sample))
+            if items:
+                measured = sum(size(key, depth - 1) + size(item, depth - 1) for key, item in items)
+                total += measured * count / len(items)
+        elif isinstance(value, _CONTAINERS):
+            count = len(value)
+            items = list(itertools.islice(value, sample))
+            if items:
+                total += sum(size(item, depth - 1) for item in items) * count / len(items)
+        elif hasattr(value, '__dict__') and not isinstance(value, type):
+            total += size(vars(value), depth - 1)
+        return total
+
+    return int(size(obj, max_depth))
+
+
+def parse_limits(text: str, scale: float = 1.0) -> Dict[str, float]:
+    """ "이름=값,이름=값" 형식의 한도 설정을 사전으로 바꿉니다 (scale을 곱함, 잘못된 항목은 무시)"""
+    limits = {}
+    for part in (text or '').split(','):
+        name, _, value = part.partition('=')
+        try:
+            limits[name.strip()] = float(value) * scale
+        except ValueError:
+            continue
+    return {name: value for name, value in limits.items() if name and value > 0}
+
+
+def process_rss_bytes() -> Optional[int]:
+    """현재 RSS를 바이트로 반환합니다 (/proc를 읽을 수 없으면 None)"""
+    try:
+        with open('/proc/self/statm', 'r') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None
+
+
+def peak_rss_bytes() -> Optional[int]:
+    """프로세스 최대 RSS를 바이트로 반환합니다"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+class MemoryRegistry:
+    """오래 사는 프로세스 내 자료구조의 크기 집계와 소프트 한도 관리"""
+
+    def __init__(self, sample: int = 64):
+        self.sample = sample
+        self._structures = {}
+        self._over_limit = set()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._stop_event = threading.Event()
+
+    def register(
+        self,
+        name: str,
+        getter: Optional[Callable[[], object]] = None,
+        evict: Optional[Callable[[int], int]] = None,
+        max_entries: Optional[int] = None,
+        max_bytes: Optional[int] = None,
+        description: str = '',
+        usage: Optional[Callable[[int], Tuple[int, int]]] = None,
+    ) -> None:
+        """자료구조를 등록합니다
+
+        getter는 호출할 때마다 현재 객체를 반환합니다 (전역 변수가 새 객체로 바뀌어도 따라가도록).
+        내부 자료구조를 감춘 클래스는 getter 대신 usage(sample)로 (항목 수, 대략적인 바이트 크기)를 돌려줍니다.
+        evict(목표 항목 수)는 항목을 목표 수 이하로 줄이고 지운 항목 수를 반환해야 합니다.
+        """
+        if (getter is None) == (usage is None):
+            raise ValueError("getter와 usage 중 하나만 지정해야 합니다.")
+        with self._lock:
+            self._structures[name] = {
+                'getter': getter,
+                'usage': usage,
+                'evict': evict,
+                'max_entries': max_entries,
+                'max_bytes': max_bytes,
+                'description': description,
+            }
+
+    def unregister(self, name: str) -> None:
+        with self._lock:
+            self._structures.pop(name, None)
+            self._over_limit.discard(name)
+
+    def set_limits(
+        self,
+        max_entries: Optional[Dict[str, float]] = None,
+        max_bytes: Optional[Dict[str, float]] = None,
+    ) -> None:
+        """등록된 구조의 소프트 한도를 바꿉니다 (등록 전에 설정한 이름은 무시)"""
+        with self._lock:
+            for name, limit in (max_entries or {}).items():
+                if name in self._structures:
+                    self._structures[name]['max_entries'] = int(limit)
+            for name, limit in (max_bytes or {}).items():
+                if name in self._structures:
+                    self._structures[name]['max_bytes'] = int(limit)
+
+    def _measure(self, name: str, structure: Dict) -> Dict:
+        if structure['usage']:
+            entries, size = structure['usage'](self.sample)
+        else:
+            target = structure['getter']()
+            # 다른 스레드가 수정하는 중이면 한 번 더 시도
+            for attempt in range(2):
+                try:
+                    entries = len(target) if hasattr(target, '__len__') else None
+                    size = approximate_size(target, self.sample)
+                    break
+                except RuntimeError:
+                    if attempt:
+                        raise
+        return {
+            'name': name,
+            'entries': entries,
+            'bytes': size,
+            'max_entries': structure['max_entries'],
+            'max_bytes': structure['max_bytes'],
+            'description': structure['description'],
+        }
+
+    def _enforce(self, name: str, structure: Dict, result: Dict) -> None:
+        """소프트 한도를 넘었으면 정리하거나 경고합니다"""
+        entries, size = result['entries'], result['bytes']
+        over_entries = (
+            structure['max_entries'] and entries is not None and entries > structure['max_entries']
+        )
+        over_bytes = structure['max_bytes'] and size > structure['max_bytes']
+        result['over_limit'] = bool(over_entries or over_bytes)
+        if not result['over_limit']:
+            self._over_limit.discard(name)
+            return
+
+        if structure['evict'] and entries:
+            # 바이트 한도는 항목당 평균 크기로 목표 항목 수를 정하고 10% 여유를 둠
+            target = entries
+            if over_entries:
+                target = min(target, structure['max_entries'])
+            if over_bytes:
+                target = min(target, int(entries * structure['max_bytes'] / size * 0.9))
+            evicted = structure['evict'](max(target, 0))
+            result['evicted'] = evicted
+            metrics.inc(
+                'avatar_memory_soft_limit_events_total',
+                labels={'structure': name, 'action': 'evict'},
+                help_text='소프트 한도 초과 처리 횟수 (구조별, 정리/경고)',
+            )
+            metrics.inc(
+                'avatar_memory_evicted_entries_total',
+                evicted,
+                labels={'structure': name},
+                help_text='소프트 한도 때문에 정리한 항목 수',
+            )
+            return
+
+        if name not in self._over_limit:
+            print(f"⚠️  메모리 소프트 한도 초과: {name} (항목 {entries}, 약 {size / 1024 / 1024:.1f}MB)")
+            metrics.inc(
+                'avatar_memory_soft_limit_events_total',
+                labels={'structure': name, 'action': 'warn'},
+                help_text='소프트 한도 초과 처리 횟수 (구조별, 정리/경고)',
+            )
+        self._over_limit.add(name)
+
+    def collect(self, enforce: bool = True) -> List[Dict]:
+        """모든 구조의 크기를 재서 메트릭을 갱신하고 결과 목록을 반환합니다"""
+        with self._lock:
+            structures = list(self._structures.items())
+
+        results = []
+        for name, structure in structures:
+            try:
+                result = self._measure(name, structure)
+            except Exception as e:
+                results.append({'name': name, 'error': str(e)})
+                continue
+            if enforce:
+                self._enforce(name, structure, result)
+            if result['entries'] is not None:
+                metrics.set_gauge(
+                    'avatar_memory_structure_entries',
+                    result['entries'],
+                    labels={'structure': name},
+                    help_text='프로세스 내 자료구조 항목 수',
+                )
+            metrics.set_gauge(
+                'avatar_memory_structure_bytes',
+                result['bytes'],
+                labels={'structure': name},
+                help_text='프로세스 내 자료구조의 대략적인 크기 (바이트)',
+            )
+            results.append(result)
+
+        rss = process_rss_bytes()
+        if rss is not None:
+            metrics.set_gauge('avatar_process_rss_bytes', rss, help_text='워커 프로세스 RSS (바이트)')
+        return results
+
+    def get_report(self) -> Dict:
+        """구조별 크기와 프로세스 RSS를 함께 반환합니다 (관리자 엔드포인트용)"""
+        structures = self.collect(enforce=False)
+        tracked = sum(result.get('bytes', 0) for result in structures)
+        return {
+            'pid': os.getpid(),
+            'rss_bytes': process_rss_bytes(),
+            'peak_rss_bytes': peak_rss_bytes(),
+            'tracked_bytes': tracked,
+            'structures': structures,
+            'collected_at': datetime.now().isoformat(),
+        }
+
+    def start(self, interval: float = 60.0) -> None:
+        """interval초마다 집계하고 한도를 적용하는 백그라운드 스레드를 시작합니다"""
+        if interval <= 0 or (self._thread is not None and self._thread.is_alive()):
+            return
+        self._stop_event.clear()
+
+        def run():
+            while not self._stop_event.wait(interval):
+                self.collect()
+
+        self._thread = threading.Thread(target=run, name='memory-accounting', daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop_event.set()
+
+
+# 전역 메모리 집계 인스턴스
+memory_registry = MemoryRegistry()
+
+# 예시 사용법
+if __name__ == "__main__":
+    print("=== 메모리 집계 테스트 ===")
+    cache = {f"10.0.{i // 256}.{i % 256}": [time.time()] * 5 for i in range(20000)}
+    history = [{'user': '고향 이야기' * 10, 'assistant': '그리운 시절이네요' * 10} for _ in range(500)]
+
+    def trim_cache(target):
+        excess = len(cache) - target
+        for key in list(itertools.islice(cache, max(excess, 0))):
+            del cache[key]
+        return max(excess, 0)
+
+    memory_registry.register('rate_limit_cache', lambda: cache, trim_cache, max_entries=10000)
+    memory_registry.register('conversation_history', lambda: history, max_bytes=100 * 1024)
+    started = time.perf_counter()
+    for item in memory_registry.collect():
+        print(item)
+    print(f"집계 시간: {(time.perf_counter() - started) * 1000:.1f}ms, 정리 후 캐시 {len(cache)}개")
+    print(f"RSS: {process_rss_bytes()}, 최대 RSS: {peak_rss_bytes()}")
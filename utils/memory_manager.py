@@ -4,19 +4,219 @@
 회상치료 AI 아바타의 대화 기록과 사용자 프로필을 관리합니다.
 """
 
-import json
 import os
+import tarfile
+import threading
+import time
+from contextlib import contextmanager
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Any
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
 from collections import defaultdict
 import hashlib
 
+from .archive import (
+    INDEX_SUFFIX,
+    ConversationArchive,
+    iter_segment_turns,
+    iter_segment_turns_reversed,
+    remove_segment,
+)
+from .lazy import LazyInstance, lazy_module_attributes
+from .manifest import ManifestIndex, iter_shard_dirs, user_shard
+from .memory_accounting import approximate_size
+from .metrics import metrics
+from .scheduler import LeaderLock
+from .semantic_index import SemanticIndex, is_available as semantic_index_available
+from .serialization import read_json_file, write_json_file
+from .text_processing import create_conversation_summary
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows 등 fcntl이 없는 환경
+    fcntl = None
+
+# 샤드 배치의 사용자 파일 디렉토리 (memory_dir/users/ab/cd/user_<id>.json)
+USERS_DIR = 'users'
+
+
+def _scan_user_files(directory: str) -> Iterator[Tuple[str, str]]:
+    """한 디렉토리 안의 user_<id>.json 파일을 반환합니다"""
+    if not os.path.isdir(directory):
+        return
+
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            name = entry.name
+            if entry.is_file() and name.startswith('user_') and name.endswith('.json'):
+                yield name[len('user_') : -len('.json')], entry.path
+
+
+def iter_user_files(memory_dir: str) -> Iterator[Tuple[str, str]]:
+    """메모리 디렉토리의 (사용자 ID, 파일 경로)를 차례로 반환합니다
+
+    샤드 디렉토리의 파일과, 아직 이전되지 않은 평면 배치의 파일을 모두 포함합니다.
+    """
+    for shard_dir in iter_shard_dirs(os.path.join(memory_dir, USERS_DIR)):
+        yield from _scan_user_files(shard_dir)
+    yield from _scan_user_files(memory_dir)
+
+
+def classify_time_of_day(hour: int) -> str:
+    """시(hour)를 시간대 구분(morning/afternoon/evening/night)으로 변환합니다"""
+    if 6 <= hour < 12:
+        return 'morning'
+    elif 12 <= hour < 18:
+        return 'afternoon'
+    elif 18 <= hour < 22:
+        return 'evening'
+    return 'night'
+
+
+class UserLockRegistry:
+    """사용자별 쓰기 잠금을 관리하는 클래스
+
+    같은 프로세스의 스레드끼리는 사용자별 threading.Lock으로, 여러 워커 프로세스끼리는
+    사용자별 잠금 파일에 대한 fcntl 권고 잠금으로 직렬화합니다.
+    전역 잠금이 없으므로 서로 다른 사용자의 쓰기는 병렬로 진행됩니다.
+    name은 잠금 파일 이름 접두어와 메트릭 레이블로 쓰입니다 (예: user, manifest).
+    """
+
+    def __init__(self, lock_dir: str, name: str = 'user'):
+        self.lock_dir = lock_dir
+        self.name = name
+        self._thread_locks = {}
+        self._created_dirs = set()
+        self._guard = threading.Lock()
+        os.makedirs(lock_dir, exist_ok=True)
+
+    def _lock_path(self, key: str) -> str:
+        """잠금 파일 경로 (한 디렉토리에 파일이 몰리지 않도록 샤드로 나눔)"""
+        directory = os.path.join(self.lock_dir, user_shard(key)[0])
+        if directory not in self._created_dirs:
+            os.makedirs(directory, exist_ok=True)
+            self._created_dirs.add(directory)
+        return os.path.join(directory, f"{self.name}_{key}.lock")
+
+    def memory_usage(self, sample: int = 64) -> Tuple[int, int]:
+        """스레드 잠금 수와 대략적인 바이트 크기를 반환합니다 (메모리 집계용)"""
+        with self._guard:
+            return len(self._thread_locks), approximate_size(self._thread_locks, sample)
+
+    def _get_thread_lock(self, user_id: str) -> threading.Lock:
+        with self._guard:
+            lock = self._thread_locks.get(user_id)
+            if lock is None:
+                lock = self._thread_locks[user_id] = threading.Lock()
+            return lock
+
+    @contextmanager
+    def hold(self, user_id: str):
+        """사용자 잠금을 얻고, 대기 시간과 경합 여부를 메트릭으로 기록합니다"""
+        started = time.perf_counter()
+        thread_lock = self._get_thread_lock(user_id)
+        contended = not thread_lock.acquire(blocking=False)
+        if contended:
+            thread_lock.acquire()
+
+        lock_file = None
+        try:
+            if fcntl is not None:
+                lock_file = open(self._lock_path(user_id), 'a+')
+                try:
+                    fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except OSError:
+                    contended = True
+                    fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+
+            acquired = time.perf_counter()
+            metrics.observe(
+                'avatar_memory_lock_wait_seconds',
+                acquired - started,
+                labels={'lock': self.name},
+                help_text='저장소 잠금 대기 시간(초)',
+            )
+            metrics.inc(
+                'avatar_memory_lock_acquisitions_total',
+                labels={'lock': self.name, 'contended': 'true' if contended else 'false'},
+                help_text='저장소 잠금 획득 횟수 (경합 여부별)',
+            )
+            try:
+                yield
+            finally:
+                metrics.observe(
+                    'avatar_memory_lock_hold_seconds',
+                    time.perf_counter() - acquired,
+                    labels={'lock': self.name},
+                    help_text='저장소 잠금 보유 시간(초)',
+                )
+        finally:
+            if lock_file is not None:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+                lock_file.close()
+            thread_lock.release()
+
 class MemoryManager:
     """대화 기록과 사용자 메모리를 관리하는 클래스"""
-    
-    def __init__(self, memory_dir: str = "memory_data"):
+
+    def __init__(
+        self,
+        memory_dir: str = "memory_data",
+        pretty_json: Optional[bool] = None,
+        summary_interval: int = 10,
+        summary_keep_recent: int = 4,
+        archive_compression: Optional[str] = None,
+        semantic_index_dim: int = 512,
+    ):
         self.memory_dir = memory_dir
+        self.pretty_json = pretty_json  # None이면 MEMORY_PRETTY_JSON 환경 변수를 따름
+        self.summary_interval = summary_interval  # 요약되지 않은 대화가 이만큼 쌓이면 압축
+        self.summary_keep_recent = summary_keep_recent  # 요약하지 않고 원문으로 남길 최근 대화 수
+        # 요약 압축 후 호출되는 콜백 (user_id, summary, compacted_turns) - LLM 요약 등에 사용
+        self.on_summary_compacted: Optional[Callable[[str, Dict, List[Dict]], None]] = None
         self.ensure_memory_directory()
+        self.locks = UserLockRegistry(os.path.join(self.memory_dir, '.locks'))
+        # 오래된 대화를 압축해 보관하는 콜드 저장소 (None이면 zstd, 없으면 gzip)
+        self.archive = ConversationArchive(
+            os.path.join(self.memory_dir, 'archive'), archive_compression
+        )
+        # 사용자별 크기/대화 수/활동 시각 인덱스 (통계와 정리 대상 선정용)
+        self.users_dir = os.path.join(self.memory_dir, USERS_DIR)
+        self.manifest = ManifestIndex(
+            self.users_dir, UserLockRegistry(os.path.join(self.memory_dir, '.locks'), 'manifest')
+        )
+
+        # 대화 유사도 검색 인덱스 (numpy가 없거나 semantic_index_dim이 0이면 키워드 검색 사용)
+        self.semantic_index = None
+        if semantic_index_dim and semantic_index_available():
+            self.semantic_index = SemanticIndex(
+                os.path.join(self.memory_dir, 'index'), semantic_index_dim
+            )
+
+        self._migrate_if_needed()
+
+    def _migrate_if_needed(self) -> None:
+        """평면 배치 이전과 매니페스트 재구축을 워커 중 하나만 실행합니다
+
+        이전 잠금을 얻은 뒤에 확인하므로, 다른 워커가 이전하는 중이면 끝날 때까지 기다렸다가 건너뜁니다.
+        이전이 중간에 끊겨 평면 배치 파일이 남아 있으면 이어서 이전합니다.
+        """
+        lock = LeaderLock(os.path.join(self.memory_dir, '.locks', 'migration.lock'))
+        while not lock.acquire():
+            time.sleep(0.1)
+        try:
+            legacy = (
+                next(_scan_user_files(self.memory_dir), None) is not None
+                or next(iter(self.archive.iter_legacy_user_ids()), None) is not None
+            )
+            if not legacy and (
+                self.manifest.exists() or next(iter_user_files(self.memory_dir), None) is None
+            ):
+                return
+            print("📦 메모리 저장소를 샤드 배치로 이전하고 매니페스트를 만듭니다...")
+            self.migrate_flat_layout()
+            self.rebuild_manifest()
+        finally:
+            lock.release()
         
     def ensure_memory_directory(self):
         """메모리 디렉토리가 존재하는지 확인하고 생성"""
@@ -28,41 +228,364 @@ class MemoryManager:
         # 간단한 해시 기반 사용자 ID 생성
         return hashlib.md5(identifier.encode()).hexdigest()[:8]
     
+    def user_file_path(self, user_id: str) -> str:
+        """사용자 파일 경로 (users/ab/cd/user_<id>.json)"""
+        return os.path.join(self.users_dir, *user_shard(user_id), f"user_{user_id}.json")
+
+    def _legacy_user_file_path(self, user_id: str) -> str:
+        """샤드 배치 이전의 사용자 파일 경로 (memory_dir/user_<id>.json)"""
+        return os.path.join(self.memory_dir, f"user_{user_id}.json")
+
+    def _write_user_data(self, user_id: str, user_data: Dict, fsync: bool = False) -> None:
+        """사용자 데이터를 저장하고 매니페스트를 갱신합니다 (호출자가 사용자 잠금을 보유해야 함)
+
+        저장할 때마다 version을 1씩 올려, 읽는 쪽에서 변경 여부를 확인할 수 있도록 합니다.
+        """
+        user_data['version'] = user_data.get('version', 0) + 1
+        user_file = self.user_file_path(user_id)
+        os.makedirs(os.path.dirname(user_file), exist_ok=True)
+        size = write_json_file(user_file, user_data, self.pretty_json, fsync)
+
+        # 평면 배치에 남아 있던 이전 파일은 새 위치에 저장한 뒤 제거
+        legacy_file = self._legacy_user_file_path(user_id)
+        if os.path.exists(legacy_file):
+            os.remove(legacy_file)
+
+        # 사용자 파일은 이미 교체되었으므로 매니페스트 갱신 실패는 저장 실패로 보지 않음
+        # (실패로 돌려주면 호출자가 재시도하면서 같은 대화가 새 ID로 다시 추가됨)
+        try:
+            self.manifest.update(user_id, self._manifest_entry(user_id, user_data, size))
+        except Exception as e:
+            print(f"매니페스트 갱신 오류 ({user_id}): {e}")
+
+    def _manifest_entry(self, user_id: str, user_data: Dict, size: int) -> Dict:
+        """사용자 데이터로 매니페스트 항목을 만듭니다"""
+        conversations = user_data.get('conversations', [])
+        entry = {
+            'bytes': size,
+            'turns': len(conversations),
+            'oldest_turn': conversations[0].get('timestamp') if conversations else None,
+            'last_activity': conversations[-1].get('timestamp') if conversations else None,
+            'updated_at': user_data.get('last_updated'),
+        }
+        entry.update(self._archive_manifest_fields(user_id))
+        return entry
+
+    def _archive_manifest_fields(self, user_id: str) -> Dict:
+        """보관 세그먼트 관련 매니페스트 값을 계산합니다"""
+        segments = self.archive.list_segments(user_id)
+        return {
+            'archive_bytes': sum(segment['bytes'] for segment in segments),
+            'archive_oldest': min(segment['last_date'] for segment in segments).isoformat()
+            if segments
+            else None,
+        }
+
+    def _next_turn_id(self, user_data: Dict) -> int:
+        """다음 대화 ID를 발급합니다
+
+        오래된 대화가 정리되어도 ID가 재사용되지 않도록 마지막 발급 번호를 파일에 보관합니다.
+        """
+        next_id = user_data.get('next_turn_id')
+        if not next_id:
+            next_id = (
+                max((conv.get('id', 0) for conv in user_data.get('conversations', [])), default=0)
+                + 1
+            )
+        user_data['next_turn_id'] = next_id + 1
+        return next_id
+
     def save_conversation(self, user_id: str, conversation: Dict) -> bool:
         """대화를 저장합니다"""
+        return self.save_conversations(user_id, [conversation])
+
+    def save_conversations(
+        self, user_id: str, conversations: List[Dict], fsync: bool = False
+    ) -> bool:
+        """여러 대화를 한 번의 파일 쓰기로 저장합니다 (그룹 커밋)
+
+        대화에 timestamp가 이미 있으면 유지하므로, 나중에 모아서 저장해도 실제 대화 시각이 기록됩니다.
+        """
         try:
-            user_file = os.path.join(self.memory_dir, f"user_{user_id}.json")
-            
-            # 기존 데이터 로드
-            user_data = self.load_user_data(user_id)
-            
-            # 새 대화 추가
-            if 'conversations' not in user_data:
-                user_data['conversations'] = []
-            
-            conversation['timestamp'] = datetime.now().isoformat()
-            conversation['id'] = len(user_data['conversations']) + 1
-            
-            user_data['conversations'].append(conversation)
-            user_data['last_updated'] = datetime.now().isoformat()
-            
-            # 저장
-            with open(user_file, 'w', encoding='utf-8') as f:
-                json.dump(user_data, f, ensure_ascii=False, indent=2)
-            
-            return True
+            with self.locks.hold(user_id):
+                # 기존 데이터 로드
+                user_data = self.load_user_data(user_id)
+
+                # 새 대화 추가
+                if 'conversations' not in user_data:
+                    user_data['conversations'] = []
+
+                now = datetime.now().isoformat()
+                for conversation in conversations:
+                    conversation['timestamp'] = conversation.get('timestamp') or now
+                    conversation['id'] = self._next_turn_id(user_data)
+                    user_data['conversations'].append(conversation)
+
+                user_data['last_updated'] = now
+
+                # 오래된 대화를 누적 요약으로 압축
+                compacted_turns = self._compact_summary(user_data)
+
+                # 저장
+                self._write_user_data(user_id, user_data, fsync)
+                try:
+                    self._index_conversations(user_id, conversations)
+                except Exception as e:
+                    print(f"검색 인덱스 갱신 오류 ({user_id}): {e}")
         except Exception as e:
             print(f"대화 저장 오류: {e}")
             return False
+
+        # 여기부터는 파일이 이미 저장된 상태이므로 후처리 실패는 따로 기록하고 True를 돌려줌
+        if compacted_turns and self.on_summary_compacted:
+            try:
+                self.on_summary_compacted(user_id, user_data['summary'], compacted_turns)
+            except Exception as e:
+                print(f"요약 압축 후처리 오류 ({user_id}): {e}")
+
+        return True
     
+    def _index_conversations(self, user_id: str, conversations: List[Dict]) -> None:
+        """저장한 대화를 유사도 검색 인덱스에 추가합니다 (호출자가 사용자 잠금을 보유해야 함)
+
+        인덱스가 아직 없는 사용자는 다음 검색 때 전체 대화로 만들어지므로 여기서는 건너뜁니다.
+        """
+        if not self.semantic_index or not self.semantic_index.has_index(user_id):
+            return
+        try:
+            self.semantic_index.add(user_id, conversations)
+        except Exception as e:
+            print(f"유사도 인덱스 갱신 오류: {e}")
+
+    def _ensure_semantic_index(self, user_id: str) -> bool:
+        """사용자 인덱스가 없으면 보관된 대화까지 포함해 만듭니다"""
+        if not self.semantic_index:
+            return False
+        if self.semantic_index.has_index(user_id):
+            return True
+        with self.locks.hold(user_id):
+            if not self.semantic_index.has_index(user_id):
+                self.semantic_index.rebuild(user_id, self.iter_all_conversations(user_id))
+        return True
+
+    def _drop_semantic_index(self, user_id: str) -> None:
+        """대화가 삭제된 사용자의 인덱스를 지웁니다 (다음 검색 때 남은 대화로 다시 만듦)"""
+        if self.semantic_index:
+            self.semantic_index.delete(user_id)
+
+    def get_conversations_by_ids(
+        self, user_id: str, conversation_ids: List[int]
+    ) -> Dict[int, Dict]:
+        """대화 ID로 대화를 찾아 {ID: 대화}로 반환합니다 (필요한 보관 세그먼트만 읽음)"""
+        wanted = set(conversation_ids)
+        found = {}
+        for conv in self.load_user_data(user_id).get('conversations', []):
+            if conv.get('id') in wanted:
+                found[conv['id']] = conv
+
+        missing = wanted - set(found)
+        if missing:
+            for segment in self.archive.list_segments(user_id):
+                if not any(
+                    segment['first_id'] <= conv_id <= segment['last_id'] for conv_id in missing
+                ):
+                    continue
+                for conv in iter_segment_turns(segment['path']):
+                    if conv.get('id') in missing:
+                        found[conv['id']] = conv
+        return found
+
+    def search_related_conversations(
+        self,
+        user_id: str,
+        query: str,
+        limit: int = 3,
+        min_score: float = 0.05,
+        exclude_ids: Optional[List[int]] = None,
+    ) -> List[Dict]:
+        """질의와 비슷한 지난 대화를 유사도 인덱스로 찾아 점수순으로 반환합니다
+
+        반환하는 대화는 복사본이며 similarity_score가 추가되어 있습니다 (저장된 대화는 바꾸지 않음).
+        """
+        if not self._ensure_semantic_index(user_id):
+            return []
+
+        hits = self.semantic_index.search(user_id, query, limit, min_score, exclude_ids)
+        conversations = self.get_conversations_by_ids(user_id, [conv_id for conv_id, _ in hits])
+        # 정리되어 없어진 대화는 건너뜀
+        return [
+            dict(conversations[conv_id], similarity_score=round(score, 4))
+            for conv_id, score in hits
+            if conv_id in conversations
+        ]
+
+    def create_empty_summary(self) -> Dict:
+        """빈 누적 요약 구조를 생성합니다"""
+        return {
+            'topics': {},
+            'keywords': {},
+            'emotions': {},
+            'summarized_turns': 0,
+            'through_id': 0,
+            'text': '',
+            'updated_at': None,
+        }
+
+    def _compact_summary(self, user_data: Dict) -> List[Dict]:
+        """요약되지 않은 대화가 summary_interval개 이상 쌓이면 오래된 대화를 요약에 병합합니다
+
+        최근 summary_keep_recent개의 대화는 원문 그대로 남겨둡니다.
+        압축된 대화 목록을 반환하며, 압축하지 않았으면 빈 목록을 반환합니다.
+        """
+        summary = user_data.setdefault('summary', self.create_empty_summary())
+        through_id = summary.get('through_id', 0)
+
+        pending = [
+            conv for conv in user_data.get('conversations', []) if conv.get('id', 0) > through_id
+        ]
+        if len(pending) < self.summary_interval + self.summary_keep_recent:
+            return []
+
+        compacted_turns = pending[: len(pending) - self.summary_keep_recent]
+        self._merge_into_summary(summary, compacted_turns)
+        return compacted_turns
+
+    def _merge_into_summary(self, summary: Dict, turns: List[Dict]) -> None:
+        """대화 묶음의 주제, 키워드, 감정을 누적 요약에 더합니다"""
+        through_id = summary.get('through_id', 0)
+        digest = create_conversation_summary(turns)
+
+        for category, subcategories in digest.get('keywords', {}).items():
+            summary['topics'][category] = summary['topics'].get(category, 0) + 1
+            category_keywords = summary['keywords'].setdefault(category, {})
+            for subcategory, words in subcategories.items():
+                word_counts = category_keywords.setdefault(subcategory, {})
+                for word in words:
+                    word_counts[word] = word_counts.get(word, 0) + 1
+
+        for emotion in digest.get('emotions', []):
+            summary['emotions'][emotion] = summary['emotions'].get(emotion, 0) + 1
+
+        summary['summarized_turns'] = summary.get('summarized_turns', 0) + len(turns)
+        summary['through_id'] = turns[-1].get('id', through_id)
+        summary['updated_at'] = datetime.now().isoformat()
+
+    def update_summary_text(self, user_id: str, text: str, through_id: int) -> bool:
+        """LLM 등으로 압축한 요약문을 저장합니다 (더 최신 요약문이 있으면 무시)"""
+        try:
+            with self.locks.hold(user_id):
+                user_data = self.load_user_data(user_id)
+                summary = user_data.setdefault('summary', self.create_empty_summary())
+
+                if summary.get('text_through_id', 0) > through_id:
+                    return False
+
+                summary['text'] = text
+                summary['text_through_id'] = through_id
+                user_data['last_updated'] = datetime.now().isoformat()
+
+                self._write_user_data(user_id, user_data)
+            return True
+        except Exception as e:
+            print(f"요약문 저장 오류: {e}")
+            return False
+
+    def format_summary(self, summary: Dict, max_items: int = 5) -> str:
+        """누적 요약을 프롬프트에 넣을 짧은 문장으로 변환합니다
+
+        항목 수를 max_items로 제한하므로 대화가 아무리 쌓여도 길이가 일정합니다.
+        """
+        if not summary or not summary.get('summarized_turns'):
+            return ""
+
+        lines = []
+        if summary.get('text'):
+            lines.append(summary['text'])
+
+        word_counts = defaultdict(int)
+        for subcategories in summary.get('keywords', {}).values():
+            for words in subcategories.values():
+                for word, count in words.items():
+                    word_counts[word] += count
+
+        if word_counts:
+            top_words = sorted(word_counts.items(), key=lambda x: x[1], reverse=True)[:max_items]
+            lines.append(f"자주 나눈 이야기: {', '.join(word for word, _ in top_words)}")
+
+        emotions = summary.get('emotions', {})
+        if emotions:
+            top_emotions = sorted(emotions.items(), key=lambda x: x[1], reverse=True)[:max_items]
+            lines.append(f"주로 느끼신 감정: {', '.join(emotion for emotion, _ in top_emotions)}")
+
+        return "\n".join(lines)
+
+    def get_prompt_context(
+        self,
+        user_id: str,
+        recent_turns: int = 4,
+        since_id: int = 0,
+        pending_turns: Optional[List[Dict]] = None,
+        query: Optional[str] = None,
+        related_turns: int = 0,
+    ) -> str:
+        """누적 요약과 최근 대화 원문으로 구성된 프롬프트 컨텍스트를 반환합니다
+
+        since_id보다 id가 큰 대화만 원문으로 포함합니다 (대화 초기화 이후 구간 지정용).
+        pending_turns는 아직 저장되지 않은 최신 대화로, 저장된 대화 뒤에 이어 붙입니다.
+        query와 related_turns를 주면 최근 대화에 없는 지난 대화 중 질의와 비슷한 것을 함께 넣습니다.
+        """
+        user_data = self.load_user_data(user_id)
+
+        context_parts = []
+        summary_text = self.format_summary(user_data.get('summary', {}))
+        if summary_text:
+            context_parts.append(f"[지난 대화 기억]\n{summary_text}\n")
+
+        conversations = (
+            [
+                conv
+                for conv in user_data.get('conversations', [])[-recent_turns:]
+                if conv.get('id', 0) > since_id
+            ]
+            if recent_turns > 0
+            else []
+        )
+        conversations.extend(pending_turns or [])
+        recent = conversations[-recent_turns:] if recent_turns > 0 else []
+
+        if query and related_turns > 0:
+            recent_ids = [
+                conv['id']
+                for conv in user_data.get('conversations', [])[-recent_turns:]
+                if conv.get('id')
+            ]
+            related = self.search_related_conversations(
+                user_id, query, related_turns, exclude_ids=recent_ids
+            )
+            if related:
+                lines = [
+                    f"사용자: {conv.get('user', '')}\n아바타: {conv.get('assistant', '')}"
+                    for conv in related
+                ]
+                context_parts.append("[관련된 지난 대화]\n" + "\n".join(lines) + "\n")
+
+        for conv in recent:
+            user_msg = conv.get('user', '')
+            assistant_msg = conv.get('assistant', '')
+            if user_msg and assistant_msg:
+                context_parts.append(f"사용자: {user_msg}\n아바타: {assistant_msg}\n")
+
+        return "\n".join(context_parts)
+
     def load_user_data(self, user_id: str) -> Dict:
         """사용자 데이터를 로드합니다"""
-        user_file = os.path.join(self.memory_dir, f"user_{user_id}.json")
+        user_file = self.user_file_path(user_id)
+        if not os.path.exists(user_file):
+            user_file = self._legacy_user_file_path(user_id)
         
         if os.path.exists(user_file):
             try:
-                with open(user_file, 'r', encoding='utf-8') as f:
-                    return json.load(f)
+                return read_json_file(user_file)
             except Exception as e:
                 print(f"사용자 데이터 로드 오류: {e}")
                 return self.create_empty_user_data()
@@ -88,7 +611,81 @@ class MemoryManager:
             'created_at': datetime.now().isoformat(),
             'last_updated': datetime.now().isoformat()
         }
-    
+
+    def get_conversation_page(
+        self,
+        user_id: str,
+        before_id: Optional[int] = None,
+        limit: int = 20,
+        category: Optional[str] = None,
+        emotion: Optional[str] = None,
+        max_scan: int = 1000,
+    ) -> Dict:
+        """대화 기록을 최신순으로 한 페이지씩 반환합니다 (키셋 페이지네이션)
+
+        before_id보다 오래된 대화부터 읽으며, 대화 ID는 단조 증가하므로 시간 순서와 같습니다.
+        사용자 파일(보관 정책으로 크기가 제한됨)은 커서가 그 범위 안에 있을 때만 읽고, 보관 세그먼트는
+        프레임 색인으로 커서 아래의 프레임(frame_turns개 단위)만 최신 것부터 풉니다. 세그먼트 목록은
+        파일 이름만 읽으며, 더 읽을 대화가 있는지는 가장 오래된 대화 ID와 비교해 추가로 읽지 않고 판단합니다.
+        필터가 있으면 최대 max_scan개까지만 살펴보고, 페이지가 덜 찼더라도 이어서 읽을 수 있는 위치를
+        next_before_id로 돌려줍니다.
+        """
+
+        def matches(conv: Dict) -> bool:
+            if category and category not in (conv.get('memory_keywords') or {}):
+                return False
+            if emotion:
+                emotions = (
+                    conv.get('emotions') or (conv.get('metadata') or {}).get('emotions') or []
+                )
+                if emotion not in emotions:
+                    return False
+            return True
+
+        segments = self.archive.list_segments(user_id)
+        archived_last_id = segments[-1]['last_id'] if segments else 0
+        oldest = {'id': segments[0]['first_id'] if segments else None}
+
+        def candidates() -> Iterator[Dict]:
+            upper_id = before_id if before_id is not None else float('inf')
+            # 사용자 파일의 대화는 모두 보관된 대화보다 ID가 크므로, 커서가 보관 범위에 있으면 읽지 않음
+            if upper_id > archived_last_id + 1:
+                hot = self.load_user_data(user_id).get('conversations', [])
+                if hot:
+                    if oldest['id'] is None:
+                        oldest['id'] = hot[0].get('id', 0)
+                    # 사용자 파일에 있는 대화와 겹치지 않도록 그보다 오래된 대화만 세그먼트에서 읽음
+                    upper_id = min(upper_id, hot[0].get('id', 0))
+                for conv in reversed(hot):
+                    if before_id is None or conv.get('id', 0) < before_id:
+                        yield conv
+
+            for segment in reversed(segments):
+                if segment['first_id'] >= upper_id:
+                    continue
+                yield from iter_segment_turns_reversed(segment['path'], upper_id)
+
+        items = []
+        scanned = 0
+        last_scanned = None
+        for conv in candidates():
+            scanned += 1
+            last_scanned = conv
+            if matches(conv):
+                items.append(conv)
+                if len(items) >= limit:
+                    break
+            if scanned >= max_scan:
+                break
+
+        has_more = last_scanned is not None and last_scanned.get('id', 0) > (oldest['id'] or 0)
+        return {
+            'items': items,
+            'has_more': has_more,
+            'next_before_id': last_scanned.get('id') if has_more else None,
+            'scanned': scanned,
+        }
+
     def get_recent_conversations(self, user_id: str, limit: int = 10) -> List[Dict]:
         """최근 대화를 가져옵니다"""
         user_data = self.load_user_data(user_id)
@@ -99,9 +696,8 @@ class MemoryManager:
         return recent[:limit]
     
     def analyze_user_preferences(self, user_id: str) -> Dict:
-        """사용자의 선호도를 분석합니다"""
-        user_data = self.load_user_data(user_id)
-        conversations = user_data.get('conversations', [])
+        """사용자의 선호도를 분석합니다 (보관된 대화 포함)"""
+        conversations = list(self.iter_all_conversations(user_id))
         
         if not conversations:
             return {}
@@ -125,15 +721,7 @@ class MemoryManager:
             if timestamp:
                 try:
                     dt = datetime.fromisoformat(timestamp.replace('Z', '+00:00'))
-                    hour = dt.hour
-                    if 6 <= hour < 12:
-                        time_preferences['morning'] += 1
-                    elif 12 <= hour < 18:
-                        time_preferences['afternoon'] += 1
-                    elif 18 <= hour < 22:
-                        time_preferences['evening'] += 1
-                    else:
-                        time_preferences['night'] += 1
+                    time_preferences[classify_time_of_day(dt.hour)] += 1
                 except:
                     pass
         
@@ -147,19 +735,18 @@ class MemoryManager:
     def update_user_profile(self, user_id: str, profile_updates: Dict) -> bool:
         """사용자 프로필을 업데이트합니다"""
         try:
-            user_data = self.load_user_data(user_id)
-            
-            # 프로필 업데이트
-            if 'profile' not in user_data:
-                user_data['profile'] = {}
-            
-            user_data['profile'].update(profile_updates)
-            user_data['last_updated'] = datetime.now().isoformat()
-            
-            # 저장
-            user_file = os.path.join(self.memory_dir, f"user_{user_id}.json")
-            with open(user_file, 'w', encoding='utf-8') as f:
-                json.dump(user_data, f, ensure_ascii=False, indent=2)
+            with self.locks.hold(user_id):
+                user_data = self.load_user_data(user_id)
+
+                # 프로필 업데이트
+                if 'profile' not in user_data:
+                    user_data['profile'] = {}
+
+                user_data['profile'].update(profile_updates)
+                user_data['last_updated'] = datetime.now().isoformat()
+
+                # 저장
+                self._write_user_data(user_id, user_data)
             
             return True
         except Exception as e:
@@ -182,11 +769,21 @@ class MemoryManager:
         return "\n".join(context_parts)
     
     def find_similar_conversations(self, user_id: str, keywords: List[str], limit: int = 3) -> List[Dict]:
-        """유사한 대화를 찾습니다"""
+        """유사한 대화를 찾습니다
+
+        유사도 인덱스를 사용할 수 있으면 문자 n-gram 유사도로, 아니면 키워드 포함 여부로 찾습니다.
+        """
+        if not keywords:
+            return []
+        if self.semantic_index:
+            return self.search_related_conversations(
+                user_id, ' '.join(keywords), limit, min_score=0.0
+            )
+
         user_data = self.load_user_data(user_id)
         conversations = user_data.get('conversations', [])
         
-        if not conversations or not keywords:
+        if not conversations:
             return []
         
         # 키워드 매칭 점수 계산
@@ -200,57 +797,323 @@ class MemoryManager:
                     score += 1
             
             if score > 0:
-                conv['similarity_score'] = score
-                scored_conversations.append(conv)
+                scored_conversations.append(dict(conv, similarity_score=score))
         
         # 점수순으로 정렬하고 반환
         scored_conversations.sort(key=lambda x: x['similarity_score'], reverse=True)
         return scored_conversations[:limit]
     
-    def cleanup_old_data(self, days_to_keep: int = 30) -> int:
-        """오래된 데이터를 정리합니다"""
+    def cleanup_user_data(self, user_id: str, cutoff_date: datetime) -> int:
+        """한 사용자의 cutoff_date 이전 대화를 정리하고 삭제한 대화 수를 반환합니다"""
+        with self.locks.hold(user_id):
+            deleted_segments = self.archive.delete_segments_before(user_id, cutoff_date)
+            if deleted_segments:
+                self.manifest.update(user_id, self._archive_manifest_fields(user_id))
+            cleanup_count = self._cleanup_user_data_locked(user_id, cutoff_date)
+            if deleted_segments or cleanup_count:
+                self._drop_semantic_index(user_id)
+            return cleanup_count
+
+    def _cleanup_user_data_locked(self, user_id: str, cutoff_date: datetime) -> int:
+        """사용자 잠금을 보유한 상태에서 대화를 정리합니다"""
         cleanup_count = 0
+        user_data = self.load_user_data(user_id)
+        conversations = user_data.get('conversations', [])
+
+        # 오래된 대화 필터링
+        filtered_conversations = []
+        for conv in conversations:
+            timestamp_str = conv.get('timestamp', '')
+            if timestamp_str:
+                try:
+                    conv_date = datetime.fromisoformat(timestamp_str.replace('Z', '+00:00'))
+                    if conv_date > cutoff_date:
+                        filtered_conversations.append(conv)
+                    else:
+                        cleanup_count += 1
+                except Exception:
+                    # 파싱 실패 시 유지
+                    filtered_conversations.append(conv)
+            else:
+                # 타임스탬프 없는 경우 유지
+                filtered_conversations.append(conv)
+
+        # 변경사항이 있으면 저장
+        if len(filtered_conversations) != len(conversations):
+            if not user_data.get('next_turn_id'):
+                # 정리 후에도 ID가 재사용되지 않도록 다음 번호를 먼저 기록
+                user_data['next_turn_id'] = (
+                    max((conv.get('id', 0) for conv in conversations), default=0) + 1
+                )
+            user_data['conversations'] = filtered_conversations
+            user_data['last_updated'] = datetime.now().isoformat()
+
+            self._write_user_data(user_id, user_data)
+
+        return cleanup_count
+
+    def cleanup_old_data(
+        self,
+        days_to_keep: int = 30,
+        batch_size: Optional[int] = None,
+        pause_seconds: float = 0.0,
+        should_stop: Optional[Callable[[], bool]] = None,
+    ) -> int:
+        """오래된 데이터를 정리합니다
+
+        batch_size를 지정하면 사용자 파일을 batch_size개씩 처리하고 배치 사이에
+        pause_seconds만큼 쉬어, 요청 처리와 디스크 I/O를 나누어 쓰도록 합니다.
+        should_stop이 True를 반환하면 현재 배치까지만 처리하고 중단합니다.
+        """
         cutoff_date = datetime.now() - timedelta(days=days_to_keep)
         
+        def has_expired_data(entry: Dict) -> bool:
+            archive_oldest = entry.get('archive_oldest')
+            return (
+                self._is_before(entry.get('oldest_turn'), cutoff_date)
+                or bool(archive_oldest)
+                and datetime.fromisoformat(archive_oldest) + timedelta(days=1) <= cutoff_date
+            )
+
         try:
-            for filename in os.listdir(self.memory_dir):
-                if filename.startswith('user_') and filename.endswith('.json'):
-                    file_path = os.path.join(self.memory_dir, filename)
-                    user_id = filename.replace('user_', '').replace('.json', '')
-                    
-                    user_data = self.load_user_data(user_id)
-                    conversations = user_data.get('conversations', [])
-                    
-                    # 오래된 대화 필터링
-                    filtered_conversations = []
-                    for conv in conversations:
-                        timestamp_str = conv.get('timestamp', '')
-                        if timestamp_str:
-                            try:
-                                conv_date = datetime.fromisoformat(timestamp_str.replace('Z', '+00:00'))
-                                if conv_date > cutoff_date:
-                                    filtered_conversations.append(conv)
-                                else:
-                                    cleanup_count += 1
-                            except:
-                                # 파싱 실패 시 유지
-                                filtered_conversations.append(conv)
-                        else:
-                            # 타임스탬프 없는 경우 유지
-                            filtered_conversations.append(conv)
-                    
-                    # 변경사항이 있으면 저장
-                    if len(filtered_conversations) != len(conversations):
-                        user_data['conversations'] = filtered_conversations
-                        user_data['last_updated'] = datetime.now().isoformat()
-                        
-                        with open(file_path, 'w', encoding='utf-8') as f:
-                            json.dump(user_data, f, ensure_ascii=False, indent=2)
-        
+            # 매니페스트로 정리할 대화가 있는 사용자만 골라 파일을 엶
+            user_ids = self._select_users(has_expired_data)
+            return self._run_batched(
+                user_ids,
+                lambda user_id: self.cleanup_user_data(user_id, cutoff_date),
+                batch_size,
+                pause_seconds,
+                should_stop,
+            )
         except Exception as e:
             print(f"데이터 정리 오류: {e}")
+            return 0
+
+    @staticmethod
+    def _is_before(timestamp: Optional[str], cutoff_date: datetime) -> bool:
+        """ISO 형식 시각이 cutoff_date 이전인지 확인합니다 (없거나 잘못된 값은 False)"""
+        if not timestamp:
+            return False
+        try:
+            return (
+                datetime.fromisoformat(timestamp.replace('Z', '+00:00')).replace(tzinfo=None)
+                <= cutoff_date
+            )
+        except ValueError:
+            return False
+
+    def _select_users(self, predicate: Callable[[Dict], bool]) -> List[str]:
+        """매니페스트 항목이 조건을 만족하는 사용자 ID 목록을 반환합니다"""
+        return sorted(
+            user_id for user_id, entry in self.manifest.iter_entries() if predicate(entry)
+        )
+
+    def _run_batched(
+        self,
+        user_ids: List[str],
+        func: Callable[[str], int],
+        batch_size: Optional[int] = None,
+        pause_seconds: float = 0.0,
+        should_stop: Optional[Callable[[], bool]] = None,
+    ) -> int:
+        """사용자 목록에 대해 func를 배치 단위로 실행하고 반환값의 합을 돌려줍니다"""
+        total = 0
         
-        return cleanup_count
+        for index, user_id in enumerate(user_ids, 1):
+            total += func(user_id)
+
+            if batch_size and index % batch_size == 0 and index < len(user_ids):
+                if should_stop and should_stop():
+                    break
+                if pause_seconds:
+                    time.sleep(pause_seconds)
+
+        return total
+
+    @staticmethod
+    def _parse_timestamp(conv: Dict) -> Optional[datetime]:
+        """대화의 timestamp를 datetime으로 변환합니다 (없거나 잘못된 경우 None)"""
+        timestamp_str = conv.get('timestamp', '')
+        if not timestamp_str:
+            return None
+        try:
+            return datetime.fromisoformat(timestamp_str.replace('Z', '+00:00')).replace(tzinfo=None)
+        except ValueError:
+            return None
+
+    def archive_user_data(
+        self, user_id: str, cutoff_date: Optional[datetime] = None, keep_recent: int = 0
+    ) -> int:
+        """오래된 대화를 압축 보관 세그먼트로 옮기고 옮긴 대화 수를 반환합니다
+
+        cutoff_date 이전의 대화를 오래된 것부터 차례로 옮기며(None이면 날짜 제한 없음),
+        최근 keep_recent개의 대화는 항상 사용자 파일에 남깁니다.
+        아직 누적 요약에 반영되지 않은 대화는 보관하기 전에 요약에 병합합니다.
+        """
+        merged_turns = []
+        with self.locks.hold(user_id):
+            user_data = self.load_user_data(user_id)
+            conversations = user_data.get('conversations', [])
+
+            count = 0
+            for conv in conversations[: max(len(conversations) - keep_recent, 0)]:
+                if cutoff_date is not None:
+                    conv_date = self._parse_timestamp(conv)
+                    if conv_date is None or conv_date > cutoff_date:
+                        break
+                count += 1
+
+            if not count:
+                return 0
+
+            archived = conversations[:count]
+            self.archive.write_segments(user_id, archived)
+
+            summary = user_data.setdefault('summary', self.create_empty_summary())
+            merged_turns = [
+                conv for conv in archived if conv.get('id', 0) > summary.get('through_id', 0)
+            ]
+            if merged_turns:
+                self._merge_into_summary(summary, merged_turns)
+
+            if not user_data.get('next_turn_id'):
+                user_data['next_turn_id'] = (
+                    max((conv.get('id', 0) for conv in conversations), default=0) + 1
+                )
+            user_data['conversations'] = conversations[count:]
+            user_data['last_updated'] = datetime.now().isoformat()
+            self._write_user_data(user_id, user_data)
+
+        if merged_turns and self.on_summary_compacted:
+            self.on_summary_compacted(user_id, user_data['summary'], merged_turns)
+
+        metrics.inc('avatar_memory_archived_turns_total', count, help_text='압축 보관 세그먼트로 옮긴 대화 수')
+        return count
+
+    def archive_old_data(
+        self,
+        days_to_keep_hot: int = 30,
+        batch_size: Optional[int] = None,
+        pause_seconds: float = 0.0,
+        should_stop: Optional[Callable[[], bool]] = None,
+    ) -> int:
+        """days_to_keep_hot일보다 오래된 대화를 모든 사용자에 대해 압축 보관합니다"""
+        cutoff_date = datetime.now() - timedelta(days=days_to_keep_hot)
+
+        try:
+            user_ids = self._select_users(
+                lambda entry: entry.get('turns', 0) > self.summary_keep_recent
+                and self._is_before(entry.get('oldest_turn'), cutoff_date)
+            )
+            return self._run_batched(
+                user_ids,
+                lambda user_id: self.archive_user_data(
+                    user_id, cutoff_date, self.summary_keep_recent
+                ),
+                batch_size,
+                pause_seconds,
+                should_stop,
+            )
+        except Exception as e:
+            print(f"대화 보관 오류: {e}")
+            return 0
+
+    def iter_all_conversations(self, user_id: str) -> Iterator[Dict]:
+        """보관된 대화와 사용자 파일의 대화를 오래된 순서로 이어서 반환합니다"""
+        yield from self.archive.iter_turns(user_id)
+        yield from self.load_user_data(user_id).get('conversations', [])
+
+    def get_storage_usage(self) -> Dict:
+        """사용자별 사용자 파일 크기와 보관 세그먼트 크기를 매니페스트에서 집계합니다"""
+        users = {
+            user_id: {
+                'hot_bytes': entry.get('bytes', 0),
+                'archive_bytes': entry.get('archive_bytes', 0),
+                'last_activity': entry.get('last_activity') or entry.get('updated_at') or '',
+            }
+            for user_id, entry in self.manifest.iter_entries()
+        }
+
+        hot_bytes = sum(usage['hot_bytes'] for usage in users.values())
+        archive_bytes = sum(usage['archive_bytes'] for usage in users.values())
+        return {
+            'users': users,
+            'hot_bytes': hot_bytes,
+            'archive_bytes': archive_bytes,
+            'total_bytes': hot_bytes + archive_bytes,
+        }
+
+    def enforce_quota(self, max_bytes: int, keep_recent: Optional[int] = None) -> Dict:
+        """저장소 전체 크기가 max_bytes를 넘지 않도록 합니다
+
+        먼저 오래 활동하지 않은 사용자부터 최근 keep_recent개를 제외한 대화를 압축 보관하고,
+        그래도 넘으면 마지막 대화가 가장 오래된 보관 세그먼트부터 삭제합니다.
+        """
+        if keep_recent is None:
+            keep_recent = self.summary_keep_recent
+
+        usage = self.get_storage_usage()
+        total = usage['total_bytes']
+        result = {
+            'max_bytes': max_bytes,
+            'bytes_before': total,
+            'archived_turns': 0,
+            'deleted_segments': 0,
+        }
+
+        if total > max_bytes:
+            for user_id, user_usage in sorted(
+                usage['users'].items(), key=lambda item: item[1]['last_activity']
+            ):
+                if total <= max_bytes:
+                    break
+                if not user_usage['hot_bytes']:
+                    continue
+
+                archived = self.archive_user_data(user_id, None, keep_recent)
+                if archived:
+                    result['archived_turns'] += archived
+                    entry = self.manifest.get(user_id) or {}
+                    after = entry.get('bytes', 0) + entry.get('archive_bytes', 0)
+                    total += after - user_usage['hot_bytes'] - user_usage['archive_bytes']
+
+        if total > max_bytes:
+            segments = [
+                dict(segment, user_id=user_id)
+                for user_id, entry in self.manifest.iter_entries()
+                if entry.get('archive_bytes')
+                for segment in self.archive.list_segments(user_id)
+            ]
+            segments.sort(key=lambda segment: (segment['last_date'], segment['first_id']))
+            affected_users = set()
+            for segment in segments:
+                if total <= max_bytes:
+                    break
+                # 같은 사용자의 보관(세그먼트 쓰기)과 겹치지 않도록 사용자 잠금 안에서 삭제
+                with self.locks.hold(segment['user_id']):
+                    try:
+                        remove_segment(segment['path'])
+                    except FileNotFoundError:
+                        continue  # 그 사이 다른 작업이 정리함
+                total -= segment['bytes']
+                result['deleted_segments'] += 1
+                affected_users.add(segment['user_id'])
+
+            for user_id in affected_users:
+                with self.locks.hold(user_id):
+                    self.manifest.update(user_id, self._archive_manifest_fields(user_id))
+                    self._drop_semantic_index(user_id)
+            if result['deleted_segments']:
+                print(f"⚠️  저장 용량 한도를 넘어 보관 세그먼트 {result['deleted_segments']}개를 삭제했습니다.")
+
+        result['bytes_after'] = total
+        metrics.set_gauge('avatar_memory_storage_bytes', total, help_text='대화 저장소 전체 크기(바이트)')
+        metrics.inc(
+            'avatar_memory_quota_deleted_segments_total',
+            result['deleted_segments'],
+            help_text='저장 용량 한도 때문에 삭제한 보관 세그먼트 수',
+        )
+        return result
     
     def export_user_data(self, user_id: str, include_conversations: bool = True) -> Optional[Dict]:
         """사용자 데이터를 내보냅니다"""
@@ -266,7 +1129,7 @@ class MemoryManager:
             }
             
             if include_conversations:
-                export_data['conversations'] = user_data.get('conversations', [])
+                export_data['conversations'] = list(self.iter_all_conversations(user_id))
             
             return export_data
         except Exception as e:
@@ -274,27 +1137,25 @@ class MemoryManager:
             return None
     
     def get_memory_statistics(self) -> Dict:
-        """전체 메모리 통계를 반환합니다"""
+        """전체 메모리 통계를 반환합니다 (매니페스트만 읽음)"""
         try:
             total_users = 0
             total_conversations = 0
             total_size = 0
+            archive_size = 0
             
-            for filename in os.listdir(self.memory_dir):
-                if filename.startswith('user_') and filename.endswith('.json'):
-                    total_users += 1
-                    file_path = os.path.join(self.memory_dir, filename)
-                    total_size += os.path.getsize(file_path)
-                    
-                    user_id = filename.replace('user_', '').replace('.json', '')
-                    user_data = self.load_user_data(user_id)
-                    total_conversations += len(user_data.get('conversations', []))
+            for _, entry in self.manifest.iter_entries():
+                total_users += 1
+                total_conversations += entry.get('turns', 0)
+                total_size += entry.get('bytes', 0)
+                archive_size += entry.get('archive_bytes', 0)
             
             return {
                 'total_users': total_users,
                 'total_conversations': total_conversations,
                 'total_size_bytes': total_size,
                 'total_size_mb': round(total_size / 1024 / 1024, 2),
+                'archive_size_bytes': archive_size,
                 'average_conversations_per_user': round(total_conversations / max(total_users, 1), 2),
                 'statistics_date': datetime.now().isoformat()
             }
@@ -302,8 +1163,115 @@ class MemoryManager:
             print(f"통계 생성 오류: {e}")
             return {}
 
-# 전역 메모리 매니저 인스턴스
-memory_manager = MemoryManager()
+    def migrate_flat_layout(self) -> Dict:
+        """평면 배치의 사용자 파일과 보관 디렉토리를 샤드 디렉토리로 옮깁니다
+
+        여러 번 실행해도 안전하며, 이미 샤드 위치에 파일이 있으면 그쪽을 최신으로 보고 이전 파일을 지웁니다.
+        """
+        migrated = {'users': 0, 'archives': 0}
+
+        for user_id, legacy_file in list(_scan_user_files(self.memory_dir)):
+            with self.locks.hold(user_id):
+                if not os.path.exists(legacy_file):
+                    continue
+                user_file = self.user_file_path(user_id)
+                if os.path.exists(user_file):
+                    os.remove(legacy_file)
+                else:
+                    os.makedirs(os.path.dirname(user_file), exist_ok=True)
+                    os.replace(legacy_file, user_file)
+                    migrated['users'] += 1
+                self.manifest.update(
+                    user_id,
+                    self._manifest_entry(
+                        user_id, self.load_user_data(user_id), os.path.getsize(user_file)
+                    ),
+                )
+
+        for user_id in list(self.archive.iter_legacy_user_ids()):
+            with self.locks.hold(user_id):
+                legacy_dir = self.archive.legacy_user_dir(user_id)
+                target_dir = self.archive.user_dir(user_id)
+                os.makedirs(target_dir, exist_ok=True)
+                for name in os.listdir(legacy_dir):
+                    os.replace(os.path.join(legacy_dir, name), os.path.join(target_dir, name))
+                os.rmdir(legacy_dir)
+                self.manifest.update(user_id, self._archive_manifest_fields(user_id))
+                migrated['archives'] += 1
+
+        return migrated
+
+    def rebuild_manifest(self) -> int:
+        """사용자 파일과 보관 세그먼트를 모두 읽어 매니페스트를 다시 만들고 사용자 수를 반환합니다"""
+        entries = {}
+        for user_id, file_path in iter_user_files(self.memory_dir):
+            try:
+                user_data = read_json_file(file_path)
+            except Exception as e:
+                print(f"매니페스트 재구축 중 읽기 오류 ({file_path}): {e}")
+                continue
+            entries[user_id] = self._manifest_entry(user_id, user_data, os.path.getsize(file_path))
+
+        for user_id in self.archive.iter_user_ids():
+            if user_id not in entries:
+                entries[user_id] = {
+                    'bytes': 0,
+                    'turns': 0,
+                    'oldest_turn': None,
+                    'last_activity': None,
+                    'updated_at': None,
+                    **self._archive_manifest_fields(user_id),
+                }
+
+        self.manifest.replace_all(entries)
+        return len(entries)
+
+    def create_backup(self, backup_dir: str = "backups", keep: int = 7) -> Optional[str]:
+        """메모리 디렉토리를 tar.gz로 백업하고, 최근 keep개를 넘는 오래된 백업은 삭제합니다"""
+        try:
+            os.makedirs(backup_dir, exist_ok=True)
+            stamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+            backup_path = os.path.join(backup_dir, f"memory_backup_{stamp}.tar.gz")
+
+            # 파일을 하나씩 스트리밍으로 추가 (임시 파일 제외)
+            root_name = os.path.basename(os.path.normpath(self.memory_dir))
+            with tarfile.open(backup_path, 'w:gz') as tar:
+                for _, file_path in iter_user_files(self.memory_dir):
+                    arcname = os.path.join(root_name, os.path.relpath(file_path, self.memory_dir))
+                    tar.add(file_path, arcname=arcname)
+
+                # 보관 세그먼트는 이미 압축되어 있고 변경되지 않으므로 그대로 추가
+                for user_id in self.archive.iter_user_ids():
+                    for segment in self.archive.list_segments(user_id):
+                        arcname = os.path.join(
+                            root_name, os.path.relpath(segment['path'], self.memory_dir)
+                        )
+                        tar.add(segment['path'], arcname=arcname)
+                        if os.path.exists(segment['path'] + INDEX_SUFFIX):
+                            tar.add(segment['path'] + INDEX_SUFFIX, arcname=arcname + INDEX_SUFFIX)
+
+            backups = sorted(
+                name
+                for name in os.listdir(backup_dir)
+                if name.startswith('memory_backup_') and name.endswith('.tar.gz')
+            )
+            for name in backups[: max(len(backups) - keep, 0)]:
+                os.remove(os.path.join(backup_dir, name))
+
+            return backup_path
+        except Exception as e:
+            print(f"백업 오류: {e}")
+            return None
+
+
+# 전역 메모리 매니저 인스턴스 (처음 사용할 때 생성, 생성 시 저장소 디렉토리를 만듦)
+_memory_manager = LazyInstance(MemoryManager)
+__getattr__ = lazy_module_attributes(__name__, memory_manager=_memory_manager)
+
+
+def get_memory_manager() -> MemoryManager:
+    """전역 메모리 매니저를 반환합니다 (처음 호출할 때 생성)"""
+    return _memory_manager.get()
 
 # 편의 함수들
 def save_conversation(user_id: str, user_message: str, assistant_message: str, metadata: Dict = None) -> bool:
@@ -313,15 +1281,17 @@ def save_conversation(user_id: str, user_message: str, assistant_message: str, m
         'assistant': assistant_message,
         'metadata': metadata or {}
     }
-    return memory_manager.save_conversation(user_id, conversation)
+    return get_memory_manager().save_conversation(user_id, conversation)
+
 
 def get_user_context(user_id: str, context_length: int = 5) -> str:
     """사용자 컨텍스트 조회 편의 함수"""
-    return memory_manager.get_conversation_context(user_id, context_length)
+    return get_memory_manager().get_conversation_context(user_id, context_length)
 
 def analyze_preferences(user_id: str) -> Dict:
     """사용자 선호도 분석 편의 함수"""
-    return memory_manager.analyze_user_preferences(user_id)
+    return get_memory_manager().analyze_user_preferences(user_id)
+
 
 # 예시 사용법
 if __name__ == "__main__":
@@ -339,6 +1309,7 @@ if __name__ == "__main__":
     )
     
     # 사용자 데이터 조회
+    memory_manager = get_memory_manager()
     user_data = memory_manager.load_user_data(test_user_id)
     print(f"저장된 대화 수: {len(user_data.get('conversations', []))}")
     
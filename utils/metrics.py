@@ -0,0 +1,153 @@
+"""
+메트릭 유틸리티
+
+애플리케이션 내부 지표(카운터, 게이지, 관측값 요약)를 수집하고
+Prometheus 텍스트 형식으로 내보냅니다. 외부 의존성 없이 프로세스 단위로 동작합니다.
+"""
+
+import threading
+from typing import Dict, Optional, Tuple
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def _label_key(labels: Optional[Dict[str, str]]) -> LabelKey:
+    """레이블 딕셔너리를 정렬된 튜플 키로 변환합니다"""
+    if not labels:
+        return ()
+    return tuple(sorted((str(k), str(v)) for k, v in labels.items()))
+
+
+def _format_labels(key: LabelKey, extra: Optional[Dict[str, str]] = None) -> str:
+    """레이블 키를 Prometheus 레이블 문자열로 변환합니다"""
+    items = list(key) + sorted((extra or {}).items())
+    if not items:
+        return ''
+    escaped = []
+    for k, v in items:
+        value = str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        escaped.append(f'{k}="{value}"')
+    return '{' + ','.join(escaped) + '}'
+
+
+class MetricsRegistry:
+    """프로세스 내 메트릭 저장소"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._help = {}
+        self._types = {}
+        self._values = {}  # name -> {label_key: value}
+        self._summaries = {}  # name -> {label_key: [count, sum, max]}
+
+    def _register(self, name: str, metric_type: str, help_text: Optional[str]) -> None:
+        self._types.setdefault(name, metric_type)
+        if help_text:
+            self._help[name] = help_text
+
+    def inc(
+        self,
+        name: str,
+        value: float = 1,
+        labels: Optional[Dict[str, str]] = None,
+        help_text: Optional[str] = None,
+    ) -> None:
+        """카운터를 증가시킵니다"""
+        key = _label_key(labels)
+        with self._lock:
+            self._register(name, 'counter', help_text)
+            series = self._values.setdefault(name, {})
+            series[key] = series.get(key, 0) + value
+
+    def set_gauge(
+        self,
+        name: str,
+        value: float,
+        labels: Optional[Dict[str, str]] = None,
+        help_text: Optional[str] = None,
+    ) -> None:
+        """게이지 값을 설정합니다"""
+        key = _label_key(labels)
+        with self._lock:
+            self._register(name, 'gauge', help_text)
+            self._values.setdefault(name, {})[key] = value
+
+    def observe(
+        self,
+        name: str,
+        value: float,
+        labels: Optional[Dict[str, str]] = None,
+        help_text: Optional[str] = None,
+    ) -> None:
+        """관측값(소요 시간 등)을 기록합니다 (개수, 합계, 최댓값)"""
+        key = _label_key(labels)
+        with self._lock:
+            self._register(name, 'summary', help_text)
+            series = self._summaries.setdefault(name, {})
+            stats = series.get(key)
+            if stats is None:
+                series[key] = [1, value, value]
+            else:
+                stats[0] += 1
+                stats[1] += value
+                stats[2] = max(stats[2], value)
+
+    def get_value(self, name: str, labels: Optional[Dict[str, str]] = None) -> float:
+        """카운터 또는 게이지의 현재 값을 반환합니다"""
+        with self._lock:
+            return self._values.get(name, {}).get(_label_key(labels), 0)
+
+    def snapshot(self) -> Dict:
+        """모든 메트릭을 딕셔너리로 반환합니다"""
+        result = {}
+        with self._lock:
+            for name, series in self._values.items():
+                result[name] = {
+                    _format_labels(key) or 'value': value for key, value in series.items()
+                }
+            for name, series in self._summaries.items():
+                result[name] = {
+                    _format_labels(key)
+                    or 'value': {
+                        'count': stats[0],
+                        'sum': round(stats[1], 6),
+                        'max': round(stats[2], 6),
+                    }
+                    for key, stats in series.items()
+                }
+        return result
+
+    def render_prometheus(self) -> str:
+        """Prometheus 텍스트 노출 형식으로 변환합니다"""
+        lines = []
+        with self._lock:
+            for name in sorted(set(self._values) | set(self._summaries)):
+                if name in self._help:
+                    lines.append(f"# HELP {name} {self._help[name]}")
+                lines.append(f"# TYPE {name} {self._types.get(name, 'untyped')}")
+
+                for key, value in self._values.get(name, {}).items():
+                    lines.append(f"{name}{_format_labels(key)} {value}")
+
+                summaries = self._summaries.get(name, {})
+                for key, (count, total, _) in summaries.items():
+                    lines.append(f"{name}_count{_format_labels(key)} {count}")
+                    lines.append(f"{name}_sum{_format_labels(key)} {total}")
+                if summaries:
+                    lines.append(f"# TYPE {name}_max gauge")
+                    for key, (_, _, maximum) in summaries.items():
+                        lines.append(f"{name}_max{_format_labels(key)} {maximum}")
+        return "\n".join(lines) + "\n"
+
+
+# 전역 메트릭 저장소 인스턴스
+metrics = MetricsRegistry()
+
+
+# 예시 사용법
+if __name__ == "__main__":
+    print("=== 메트릭 테스트 ===")
+    metrics.inc('avatar_requests_total', labels={'route': '/chat'}, help_text='처리한 요청 수')
+    metrics.set_gauge('avatar_active_streams', 2)
+    metrics.observe('avatar_job_duration_seconds', 0.42, labels={'job': 'cleanup'})
+    print(metrics.render_prometheus())
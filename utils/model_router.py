@@ -0,0 +1,378 @@
+"""
+모델 라우팅과 폴백 계층
+
+모델을 가볍고 빠른 것부터 강한 것 순서(MODEL_TIERS)로 두고, 요청마다 간단한 특징으로 시작 계층을 고릅니다.
+- 그냥 나누는 이야기: 첫 계층
+- 콘텐츠 요청(노래, 영상 찾기)이나 긴 프롬프트: 한 계층씩 위로
+- 고른 계층의 최근 첫 조각 지연이 예산을 넘으면 한 계층 아래로
+
+고른 모델이 호출이나 첫 조각에서 실패하면 위 계층, 그다음 아래 계층 순서로 넘어갑니다 (첫 조각을 받은 뒤에는
+이미 사용자에게 보낸 내용이 있으므로 넘어가지 않음). 모델마다 연속 실패 수를 세어 한도를 넘으면
+cooldown 동안 건너뛰고, 그 뒤에는 요청 하나로 회복 여부를 확인합니다.
+
+모델별/경로별 요청 결과, 첫 조각 지연, 스트림 시간, 토큰, 비용(100만 토큰당 단가)을 메트릭으로 내보냅니다.
+백엔드는 generate_content(contents, stream, generation_config)만 있으면 되므로 가짜 모델로 시험할 수 있습니다.
+"""
+
+import threading
+import time
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from .metrics import metrics
+
+
+def parse_model_tiers(text: str) -> List[str]:
+    """ "모델,모델,..." 형식의 계층 목록 (앞쪽이 가볍고 빠른 모델)"""
+    return [name.strip() for name in (text or '').split(',') if name.strip()]
+
+
+def parse_model_costs(text: str) -> Dict[str, Tuple[float, float]]:
+    """ "모델=입력단가:출력단가,..." 형식 (100만 토큰당 USD)을 {모델: (입력, 출력)}으로 바꿉니다"""
+    costs = {}
+    for part in (text or '').split(','):
+        name, _, spec = part.partition('=')
+        prompt_cost, _, output_cost = spec.partition(':')
+        try:
+            costs[name.strip()] = (float(prompt_cost or 0), float(output_cost or 0))
+        except ValueError:
+            print(f"⚠️  모델 단가 설정을 무시합니다: {part.strip()}")
+    return {name: cost for name, cost in costs.items() if name}
+
+
+def close_stream(response) -> bool:
+    """스트리밍 응답을 닫아 모델이 더 생성하지 않게 합니다 (닫을 수 없으면 False)"""
+    for target in (response, getattr(response, '_iterator', None)):
+        for method in ('cancel', 'close'):
+            close = getattr(target, method, None)
+            if callable(close):
+                try:
+                    close()
+                    return True
+                except Exception:
+                    continue
+    return False
+
+
+class ModelHealth:
+    """모델 하나의 연속 실패 차단기와 첫 조각 지연 이동 평균"""
+
+    def __init__(self, failure_threshold: int = 3, cooldown: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.consecutive_failures = 0
+        self.opened_at = None
+        self.probing = False
+        self.latency = 0.0
+        self.last_error = None
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return 'healthy'
+        return 'half_open' if time.monotonic() - self.opened_at >= self.cooldown else 'open'
+
+    def allow(self) -> bool:
+        """지금 이 모델로 요청을 보내도 되는지 (차단 중이면 cooldown이 지난 뒤 한 요청만 허용)"""
+        with self._lock:
+            state = self.state
+            if state == 'healthy':
+                return True
+            if state == 'half_open' and not self.probing:
+                self.probing = True
+                return True
+            return False
+
+    def success(self, latency: float) -> None:
+        with self._lock:
+            self.consecutive_failures = 0
+            self.opened_at = None
+            self.probing = False
+            self.latency = latency if not self.latency else self.latency * 0.8 + latency * 0.2
+
+    def failure(self, error: str) -> None:
+        with self._lock:
+            self.consecutive_failures += 1
+            self.last_error = error
+            self.probing = False
+            if self.opened_at is not None or self.consecutive_failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+
+
+class RoutedStream:
+    """첫 조각을 받은 스트림 (응답한 모델, 경로, 사용량, 중간 끊기를 그대로 전달)"""
+
+    def __init__(
+        self,
+        router: 'ModelRouter',
+        model_name: str,
+        route: Dict,
+        response,
+        iterator: Iterator,
+        first_chunk,
+        started: float,
+    ):
+        self.router = router
+        self.model_name = model_name
+        self.route = route
+        self.response = response
+        self.started = started
+        self._iterator = iterator
+        self._first_chunk = first_chunk
+
+    @property
+    def usage_metadata(self):
+        return getattr(self.response, 'usage_metadata', None)
+
+    def __iter__(self):
+        if self._first_chunk is not None:
+            yield self._first_chunk
+        try:
+            for chunk in self._iterator:
+                yield chunk
+        except Exception as e:
+            # 이미 일부를 보냈으므로 다른 모델로 넘어가지 않고 실패만 기록
+            self.router._failure(self.model_name, self.route, e, stage='stream')
+            raise
+
+    def close(self) -> None:
+        close_stream(self.response)
+
+
+class ModelRouter:
+    """요청 특징으로 모델 계층을 고르고 실패하면 다른 계층으로 넘어가는 라우터"""
+
+    def __init__(
+        self,
+        backends: Dict[str, object],
+        costs: Optional[Dict[str, Tuple[float, float]]] = None,
+        long_prompt_tokens: int = 1500,
+        latency_budget: float = 3.0,
+        failure_threshold: int = 3,
+        cooldown: float = 30.0,
+    ):
+        if not backends:
+            raise ValueError("모델이 하나 이상 필요합니다.")
+        self.backends = dict(backends)
+        self.tiers = list(backends)
+        self.costs = costs or {}
+        self.long_prompt_tokens = long_prompt_tokens
+        self.latency_budget = latency_budget
+        self.health = {name: ModelHealth(failure_threshold, cooldown) for name in self.tiers}
+        self._totals = {
+            name: {
+                'requests': 0,
+                'failures': 0,
+                'prompt_tokens': 0,
+                'output_tokens': 0,
+                'cost_usd': 0.0,
+            }
+            for name in self.tiers
+        }
+        self._lock = threading.Lock()
+        for name in self.tiers:
+            self._update_health_gauge(name)
+
+    def route(
+        self, prompt_tokens: int = 0, content_request: bool = False, kind: str = 'chat'
+    ) -> Dict:
+        """경로 이름과 시도할 모델 순서를 반환합니다 (kind='summary'는 항상 첫 계층부터)"""
+        start = 0
+        name = kind
+        if kind == 'chat':
+            if content_request:
+                start += 1
+                name = 'content'
+            if prompt_tokens >= self.long_prompt_tokens:
+                start += 1
+                name = 'long' if name == 'chat' else 'content_long'
+        start = min(start, len(self.tiers) - 1)
+
+        # 고른 계층이 느리거나 차단 중이면 한 계층 아래(더 빠른 모델)에서 시작
+        preferred = self.health[self.tiers[start]]
+        if start > 0 and (
+            preferred.state == 'open'
+            or (self.latency_budget and preferred.latency > self.latency_budget)
+        ):
+            start -= 1
+        models = self.tiers[start:] + self.tiers[:start][::-1]
+        return {'name': name, 'models': models}
+
+    def generate_content(
+        self, contents, stream: bool = False, generation_config=None, route: Optional[Dict] = None
+    ):
+        """경로의 모델을 차례로 시도합니다 (스트림은 첫 조각을 받은 RoutedStream을 반환)"""
+        route = route or self.route()
+        errors = []
+        previous = None
+        for name in self._candidates(route):
+            if previous:
+                metrics.inc(
+                    'avatar_model_failovers_total',
+                    labels={'route': route['name'], 'from_model': previous},
+                    help_text='다른 모델로 넘어간 횟수 (경로별, 실패한 모델별)',
+                )
+            previous = name
+            started = time.perf_counter()
+            try:
+                response = self.backends[name].generate_content(
+                    contents, stream=stream, generation_config=generation_config
+                )
+                if not stream:
+                    response.text  # 차단/빈 응답이면 여기서 예외
+                    elapsed = time.perf_counter() - started
+                    self._success(name, route, elapsed)
+                    self._record_usage(name, route, *self._usage_counts(response), elapsed)
+                    return response
+                iterator = iter(response)
+                first_chunk = next(iterator, None)
+                self._success(name, route, time.perf_counter() - started)
+                return RoutedStream(self, name, route, response, iterator, first_chunk, started)
+            except Exception as e:
+                self._failure(name, route, e)
+                errors.append(f"{name}: {e}")
+        raise RuntimeError("모든 모델 호출이 실패했습니다 (" + '; '.join(errors) + ")")
+
+    def _candidates(self, route: Dict) -> Iterator[str]:
+        """경로의 모델 중 지금 시도할 수 있는 것을 차례로 반환합니다
+
+        allow()는 회복 확인 중인 모델의 확인 요청 자리를 차지하므로, 실제로 시도하기 직전에 하나씩 물어봄
+        (앞 모델이 성공했는데 뒤 모델의 자리만 차지하면 그 모델은 다시 확인받지 못함).
+        모두 차단 중이면 첫 모델이라도 시도합니다.
+        """
+        allowed = False
+        for name in route['models']:
+            if self.health[name].allow():
+                allowed = True
+                yield name
+        if not allowed:
+            yield route['models'][0]
+
+    @staticmethod
+    def _usage_counts(response) -> Tuple[int, int]:
+        usage = getattr(response, 'usage_metadata', None)
+        return (
+            getattr(usage, 'prompt_token_count', 0) or 0,
+            getattr(usage, 'candidates_token_count', 0) or 0,
+        )
+
+    def _success(self, name: str, route: Dict, latency: float) -> None:
+        self.health[name].success(latency)
+        with self._lock:
+            self._totals[name]['requests'] += 1
+        metrics.inc(
+            'avatar_model_requests_total',
+            labels={'model': name, 'route': route['name'], 'outcome': 'ok'},
+            help_text='모델별/경로별 호출 결과 (ok, error, stream_error)',
+        )
+        metrics.observe(
+            'avatar_model_first_chunk_seconds',
+            latency,
+            labels={'model': name, 'route': route['name']},
+            help_text='모델 호출부터 첫 조각까지 걸린 시간',
+        )
+        self._update_health_gauge(name)
+
+    def _failure(self, name: str, route: Dict, error: Exception, stage: str = 'call') -> None:
+        self.health[name].failure(f"{type(error).__name__}: {error}")
+        with self._lock:
+            self._totals[name]['failures'] += 1
+        outcome = 'error' if stage == 'call' else 'stream_error'
+        metrics.inc(
+            'avatar_model_requests_total',
+            labels={'model': name, 'route': route['name'], 'outcome': outcome},
+        )
+        self._update_health_gauge(name)
+
+    def _update_health_gauge(self, name: str) -> None:
+        metrics.set_gauge(
+            'avatar_model_healthy',
+            1 if self.health[name].state == 'healthy' else 0,
+            labels={'model': name},
+            help_text='모델 상태 (1: 정상, 0: 차단 또는 회복 확인 중)',
+        )
+
+    def record_usage(
+        self, stream: RoutedStream, prompt_tokens: int, output_tokens: int, seconds: float
+    ) -> float:
+        """끝난 스트림의 토큰과 시간을 기록하고 추정 비용(USD)을 반환합니다"""
+        return self._record_usage(
+            stream.model_name, stream.route, prompt_tokens, output_tokens, seconds
+        )
+
+    def _record_usage(
+        self, name: str, route: Dict, prompt_tokens: int, output_tokens: int, seconds: float
+    ) -> float:
+        prompt_cost, output_cost = self.costs.get(name, (0.0, 0.0))
+        cost = (prompt_tokens * prompt_cost + output_tokens * output_cost) / 1_000_000
+        with self._lock:
+            totals = self._totals[name]
+            totals['prompt_tokens'] += prompt_tokens
+            totals['output_tokens'] += output_tokens
+            totals['cost_usd'] += cost
+        labels = {'model': name, 'route': route['name']}
+        metrics.observe(
+            'avatar_model_stream_seconds', seconds, labels=labels, help_text='모델 호출부터 응답 종료까지 걸린 시간'
+        )
+        for kind, tokens in (('prompt', prompt_tokens), ('output', output_tokens)):
+            metrics.inc(
+                'avatar_model_tokens_total',
+                tokens,
+                labels=dict(labels, kind=kind),
+                help_text='모델별/경로별 토큰 (프롬프트/출력)',
+            )
+        if cost:
+            metrics.inc(
+                'avatar_model_cost_usd_total', cost, labels=labels, help_text='모델별/경로별 추정 비용 (USD)'
+            )
+        return cost
+
+    def get_status(self) -> Dict:
+        with self._lock:
+            totals = {name: dict(values) for name, values in self._totals.items()}
+        return {
+            'tiers': self.tiers,
+            'long_prompt_tokens': self.long_prompt_tokens,
+            'latency_budget': self.latency_budget,
+            'models': {
+                name: dict(
+                    totals[name],
+                    state=health.state,
+                    consecutive_failures=health.consecutive_failures,
+                    first_chunk_latency=round(health.latency, 3),
+                    last_error=health.last_error,
+                    cost_usd=round(totals[name]['cost_usd'], 6),
+                )
+                for name, health in self.health.items()
+            },
+        }
+
+
+# 예시 사용법
+if __name__ == "__main__":
+    from .traffic_capture import FakeStreamingModel
+
+    print("=== 모델 라우팅 테스트 ===")
+    router = ModelRouter(
+        {
+            'flash-8b': FakeStreamingModel(time_scale=0.01, failure_rate=1.0),
+            'flash': FakeStreamingModel(time_scale=0.01),
+            'pro': FakeStreamingModel(time_scale=0.02),
+        },
+        costs=parse_model_costs('flash-8b=0.0375:0.15,flash=0.075:0.3,pro=1.25:5'),
+        failure_threshold=2,
+        cooldown=5.0,
+    )
+    for prompt_tokens, content in (
+        (300, False),
+        (300, True),
+        (2000, True),
+        (300, False),
+        (300, False),
+    ):
+        route = router.route(prompt_tokens, content)
+        stream = router.generate_content('사용자: 안녕하세요', stream=True, route=route)
+        text = ''.join(chunk.text for chunk in stream)
+        router.record_usage(stream, prompt_tokens, len(text) // 2, 0.1)
+        print(f"{route['name']:<13} 순서 {route['models']} -> {stream.model_name}")
+    print(router.get_status())
@@ -0,0 +1,362 @@
+"""
+운영 중 프로파일링 도구
+
+느려진 워커에서 CPU와 메모리가 어디에 쓰이는지 확인하기 위한 세 가지 도구를 제공합니다.
+
+- SamplingProfiler: 지정한 시간 동안 백그라운드 스레드가 모든 스레드의 호출 스택을 주기적으로 표본 추출해
+  flamegraph.pl / speedscope에 바로 넣을 수 있는 collapsed stack 형식으로 모읍니다.
+- RequestProfileStore: 서명된 헤더가 붙은 요청 하나만 cProfile로 측정하고 최근 결과를 보관합니다.
+- MemoryTracker: tracemalloc 스냅샷을 찍어 이전 스냅샷 대비 늘어난 할당 위치를 보여 줍니다.
+
+세 도구 모두 요청받았을 때만 동작하며, 쉬고 있을 때는 스레드도 추적 훅도 없어 오버헤드가 없습니다.
+"""
+
+import cProfile
+import hashlib
+import hmac
+import io
+import itertools
+import marshal
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter, OrderedDict
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from .memory_accounting import approximate_size
+from .metrics import metrics
+
+# 요청별 프로파일링을 켜는 서명 헤더 ("<유닉스 시각>.<HMAC-SHA256>")
+PROFILE_HEADER = 'X-Profile-Request'
+
+
+def sign_profile_request(secret: str, path: str, timestamp: Optional[int] = None) -> str:
+    """요청별 프로파일링 헤더 값을 만듭니다 (운영자 도구에서 사용)"""
+    timestamp = str(int(timestamp if timestamp is not None else time.time()))
+    signature = hmac.new(
+        secret.encode('utf-8'), f"{timestamp}:{path}".encode('utf-8'), hashlib.sha256
+    ).hexdigest()
+    return f"{timestamp}.{signature}"
+
+
+def verify_profile_request(secret: str, header_value: str, path: str, max_age: int = 300) -> bool:
+    """헤더 서명이 맞고 max_age초 안에 만들어졌는지 확인합니다"""
+    if not secret or not header_value:
+        return False
+    try:
+        timestamp_str, _ = header_value.split('.', 1)
+        if abs(time.time() - int(timestamp_str)) > max_age:
+            return False
+    except (ValueError, TypeError):
+        return False
+    expected = sign_profile_request(secret, path, int(timestamp_str))
+    return hmac.compare_digest(header_value, expected)
+
+
+def _frame_label(code) -> str:
+    """collapsed stack에 쓸 함수 이름 (모듈 파일명:함수명)"""
+    filename = os.path.basename(code.co_filename)
+    return f"{filename}:{code.co_name}".replace(';', ':').replace(' ', '_')
+
+
+class SamplingProfiler:
+    """시간 제한이 있는 통계적 표본 추출 프로파일러
+
+    표본 추출 스레드는 start()부터 duration초 동안만 존재하며, 멈춘 뒤에도 마지막 결과는 남겨 둡니다.
+    """
+
+    def __init__(self, max_duration: float = 300.0, max_stack_depth: int = 128):
+        self.max_duration = max_duration
+        self.max_stack_depth = max_stack_depth
+        self._lock = threading.Lock()
+        self._thread = None
+        self._stop_event = threading.Event()
+        self._stacks = Counter()
+        self._info = {'state': 'idle'}
+
+    def start(self, duration: float = 30.0, interval: float = 0.01) -> bool:
+        """표본 추출을 시작합니다 (이미 실행 중이면 False)"""
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return False
+            duration = min(max(duration, 0.1), self.max_duration)
+            interval = max(interval, 0.001)
+            self._stacks = Counter()
+            self._stop_event.clear()
+            self._info = {
+                'state': 'running',
+                'started_at': datetime.now().isoformat(),
+                'duration': duration,
+                'interval': interval,
+                'samples': 0,
+            }
+            self._thread = threading.Thread(
+                target=self._run, args=(duration, interval), name='sampling-profiler', daemon=True
+            )
+            self._thread.start()
+        metrics.inc(
+            'avatar_profiler_runs_total', labels={'kind': 'sampling'}, help_text='프로파일러 실행 횟수 (종류별)'
+        )
+        return True
+
+    def stop(self) -> None:
+        """실행 중인 표본 추출을 멈추고 스레드가 끝날 때까지 기다립니다"""
+        self._stop_event.set()
+        thread = self._thread
+        if thread is not None:
+            thread.join(timeout=5)
+
+    def _run(self, duration: float, interval: float) -> None:
+        own_id = threading.get_ident()
+        deadline = time.monotonic() + duration
+        samples = 0
+        while not self._stop_event.is_set() and time.monotonic() < deadline:
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                stack = []
+                while frame is not None and len(stack) < self.max_stack_depth:
+                    stack.append(_frame_label(frame.f_code))
+                    frame = frame.f_back
+                stack.append(names.get(thread_id, 'thread').replace(';', ':').replace(' ', '_'))
+                self._stacks[';'.join(reversed(stack))] += 1
+            samples += 1
+            self._stop_event.wait(interval)
+
+        with self._lock:
+            self._info.update(
+                state='finished', samples=samples, finished_at=datetime.now().isoformat()
+            )
+
+    def collapsed(self) -> str:
+        """마지막 실행 결과를 collapsed stack 형식("스택 개수" 줄 목록)으로 반환합니다"""
+        with self._lock:
+            stacks = self._stacks.most_common()
+        return ''.join(f"{stack} {count}\n" for stack, count in stacks)
+
+    def get_status(self) -> Dict:
+        with self._lock:
+            status = dict(self._info)
+            status['distinct_stacks'] = len(self._stacks)
+        if status['state'] == 'running':
+            status['samples'] = sum(self._stacks.values())
+        return status
+
+
+class RequestProfileStore:
+    """요청별 cProfile 결과를 최근 max_entries개까지 보관하는 저장소"""
+
+    def __init__(self, max_entries: int = 20):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        # 한 번에 하나만 측정 (Python 3.12부터는 다른 프로파일러가 켜져 있으면 enable()이 ValueError를 냄)
+        self._active = threading.Lock()
+
+    def start(self) -> Optional[cProfile.Profile]:
+        """현재 스레드에서 프로파일링을 시작합니다 (다른 요청을 측정 중이면 None을 반환하고 건너뜀)"""
+        if not self._active.acquire(blocking=False):
+            self._count_skipped()
+            return None
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            self._active.release()
+            self._count_skipped()
+            return None
+        return profiler
+
+    def _count_skipped(self) -> None:
+        metrics.inc(
+            'avatar_profiler_skipped_total',
+            labels={'kind': 'request'},
+            help_text='이미 다른 측정이 진행 중이라 건너뛴 프로파일링 요청 수',
+        )
+
+    def finish(self, profiler: cProfile.Profile, path: str, duration: float) -> int:
+        """프로파일링을 멈추고 결과를 보관한 뒤 결과 번호를 반환합니다"""
+        try:
+            profiler.disable()
+        finally:
+            self._active.release()
+        profiler.create_stats()
+        entry = {
+            'path': path,
+            'duration_ms': round(duration * 1000, 1),
+            'created_at': datetime.now().isoformat(),
+            'stats': profiler.stats,
+        }
+        with self._lock:
+            profile_id = next(self._ids)
+            self._entries[profile_id] = entry
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        metrics.inc(
+            'avatar_profiler_runs_total', labels={'kind': 'request'}, help_text='프로파일러 실행 횟수 (종류별)'
+        )
+        return profile_id
+
+    def memory_usage(self, sample: int = 64) -> Tuple[int, int]:
+        """보관 중인 결과 수와 대략적인 바이트 크기를 반환합니다 (메모리 집계용)"""
+        with self._lock:
+            return len(self._entries), approximate_size(self._entries, sample)
+
+    def list_entries(self) -> List[Dict]:
+        with self._lock:
+            return [
+                {
+                    'id': profile_id,
+                    'path': entry['path'],
+                    'duration_ms': entry['duration_ms'],
+                    'created_at': entry['created_at'],
+                }
+                for profile_id, entry in reversed(self._entries.items())
+            ]
+
+    def report(self, profile_id: int, sort: str = 'cumulative', limit: int = 40) -> Optional[str]:
+        """보관된 결과를 pstats 텍스트 표로 반환합니다"""
+        with self._lock:
+            entry = self._entries.get(profile_id)
+        if entry is None:
+            return None
+        stream = io.StringIO()
+        stats = pstats.Stats(self._as_profile(entry['stats']), stream=stream)
+        stats.strip_dirs().sort_stats(sort).print_stats(limit)
+        return stream.getvalue()
+
+    def dump(self, profile_id: int) -> Optional[bytes]:
+        """보관된 결과를 pstats 파일(.prof) 내용으로 반환합니다 (snakeviz 등에서 열 수 있음)"""
+        with self._lock:
+            entry = self._entries.get(profile_id)
+        return marshal.dumps(entry['stats']) if entry else None
+
+    @staticmethod
+    def _as_profile(stats: Dict):
+        class _Loaded:
+            def create_stats(self):
+                pass
+
+        loaded = _Loaded()
+        loaded.stats = stats
+        return loaded
+
+
+class MemoryTracker:
+    """tracemalloc 스냅샷 비교로 늘어난 할당 위치를 찾는 도구"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._baseline = None
+        self._started_here = False
+
+    def start(self, frames: int = 1) -> bool:
+        """추적을 시작합니다 (이미 추적 중이면 False)"""
+        with self._lock:
+            if tracemalloc.is_tracing():
+                return False
+            tracemalloc.start(max(frames, 1))
+            self._started_here = True
+            self._baseline = None
+        metrics.inc(
+            'avatar_profiler_runs_total',
+            labels={'kind': 'tracemalloc'},
+            help_text='프로파일러 실행 횟수 (종류별)',
+        )
+        return True
+
+    def stop(self) -> None:
+        """여기서 시작한 추적을 멈추고 스냅샷을 버립니다"""
+        with self._lock:
+            if self._started_here and tracemalloc.is_tracing():
+                tracemalloc.stop()
+            self._started_here = False
+            self._baseline = None
+
+    def snapshot(self, limit: int = 25, group_by: str = 'lineno') -> Dict:
+        """스냅샷을 찍고 이전 스냅샷 대비 크기가 늘어난 위치를 반환합니다
+
+        첫 스냅샷은 비교 대상이 없으므로 현재 할당이 큰 위치를 반환합니다.
+        """
+        if not tracemalloc.is_tracing():
+            raise RuntimeError("tracemalloc 추적이 시작되지 않았습니다.")
+        current = tracemalloc.take_snapshot().filter_traces(
+            (
+                tracemalloc.Filter(False, tracemalloc.__file__),
+                tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+            )
+        )
+        with self._lock:
+            previous, self._baseline = self._baseline, current
+
+        traced, peak = tracemalloc.get_traced_memory()
+        if previous is None:
+            top = [
+                {'location': str(stat.traceback), 'size_bytes': stat.size, 'count': stat.count}
+                for stat in current.statistics(group_by)[:limit]
+            ]
+            return {'mode': 'top', 'traced_bytes': traced, 'peak_bytes': peak, 'items': top}
+
+        diff = [
+            {
+                'location': str(stat.traceback),
+                'size_bytes': stat.size,
+                'size_diff_bytes': stat.size_diff,
+                'count': stat.count,
+                'count_diff': stat.count_diff,
+            }
+            for stat in current.compare_to(previous, group_by)[:limit]
+        ]
+        return {'mode': 'diff', 'traced_bytes': traced, 'peak_bytes': peak, 'items': diff}
+
+    def get_status(self) -> Dict:
+        tracing = tracemalloc.is_tracing()
+        traced, peak = tracemalloc.get_traced_memory() if tracing else (0, 0)
+        return {
+            'tracing': tracing,
+            'has_baseline': self._baseline is not None,
+            'traced_bytes': traced,
+            'peak_bytes': peak,
+        }
+
+
+# 전역 프로파일링 도구 인스턴스
+sampling_profiler = SamplingProfiler()
+request_profiles = RequestProfileStore()
+memory_tracker = MemoryTracker()
+
+# 예시 사용법
+if __name__ == "__main__":
+    print("=== 프로파일링 도구 테스트 ===")
+
+    def busy(seconds):
+        deadline = time.monotonic() + seconds
+        while time.monotonic() < deadline:
+            sum(i * i for i in range(1000))
+
+    worker = threading.Thread(target=busy, args=(0.5,), name='busy-worker')
+    worker.start()
+    sampling_profiler.start(duration=0.4, interval=0.005)
+    worker.join()
+    sampling_profiler.stop()
+    print(sampling_profiler.get_status())
+    print(sampling_profiler.collapsed().splitlines()[:3])
+
+    header = sign_profile_request('secret', '/chat')
+    print(f"서명 헤더 검증: {verify_profile_request('secret', header, '/chat')}")
+    profiler = request_profiles.start()
+    busy(0.05)
+    profile_id = request_profiles.finish(profiler, '/chat', 0.05)
+    print(request_profiles.report(profile_id, limit=5))
+
+    memory_tracker.start()
+    memory_tracker.snapshot()
+    leak = [bytearray(1024) for _ in range(1000)]
+    print(memory_tracker.snapshot(limit=3))
+    memory_tracker.stop()
@@ -0,0 +1,67 @@
+"""
+응답 문장 처리 유틸리티
+
+스트리밍 응답을 문장 단위로 나누고, 문장에서 유튜브 검색어와 추억 키워드를 뽑는 함수들입니다.
+응답 조각마다 불리는 경로라 정규식은 모듈을 불러올 때 한 번만 컴파일합니다.
+"""
+
+import re
+from typing import Dict, List, Optional
+
+# 응답에 포함된 유튜브 검색어 패턴 (앞의 것부터 우선)
+YOUTUBE_SEARCH_PATTERNS = [
+    re.compile(pattern)
+    for pattern in (
+        r"유튜브에서\s*['\"]([^'\"]+)['\"].*?검색",
+        r"유튜브에서\s*['\"]([^'\"]+)['\"]",
+        r"'([^']+)'\s*(?:을|를)?\s*검색",
+        r"검색어:\s*['\"]([^'\"]+)['\"]",
+    )
+]
+
+# 응답 문장에서 찾는 추억 키워드
+RESPONSE_MEMORY_KEYWORDS = {
+    '음악': ['노래', '음악', '가요', '곡', '멜로디', '가사'],
+    '장소': ['고향', '집', '마을', '학교', '시장', '교회'],
+    '음식': ['음식', '요리', '반찬', '간식', '떡', '김치'],
+    '가족': ['어머니', '아버지', '자식', '형제', '가족', '부모'],
+    '시대': ['어릴때', '젊을때', '옛날', '그때', '시절'],
+}
+
+_SENTENCE_END = re.compile(r'[.!?]\s*$')
+
+
+def is_sentence_end(text: str) -> bool:
+    """버퍼가 문장 부호로 끝나는지 확인합니다"""
+    return bool(_SENTENCE_END.search(text.strip()))
+
+
+def extract_youtube_search(text: str) -> Optional[str]:
+    """응답에서 유튜브 검색어를 추출합니다"""
+    for pattern in YOUTUBE_SEARCH_PATTERNS:
+        matches = pattern.findall(text)
+        if matches:
+            return matches[0].strip()
+    return None
+
+
+def extract_response_keywords(text: str) -> Dict[str, List[str]]:
+    """대화에서 추억 관련 키워드를 추출합니다"""
+    found_keywords = {}
+    for category, keywords in RESPONSE_MEMORY_KEYWORDS.items():
+        for keyword in keywords:
+            if keyword in text:
+                if category not in found_keywords:
+                    found_keywords[category] = []
+                found_keywords[category].append(keyword)
+
+    return found_keywords
+
+
+# 예시 사용법
+if __name__ == "__main__":
+    sample = "그 시절 고향 마을 풍경이 떠오르시나요. 유튜브에서 '고향의 봄 노래'를 검색해보세요."
+    print("=== 응답 문장 처리 테스트 ===")
+    print(f"문장 끝: {is_sentence_end(sample)}")
+    print(f"유튜브 검색어: {extract_youtube_search(sample)}")
+    print(f"키워드: {extract_response_keywords(sample)}")
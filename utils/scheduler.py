@@ -0,0 +1,359 @@
+"""
+백그라운드 작업 스케줄러
+
+보관 기간이 지난 대화 정리, 보안 로그 정리, 메모리 백업 같은 유지보수 작업을
+프로세스 내부의 백그라운드 스레드에서 주기적으로 실행합니다.
+
+여러 워커 프로세스가 동시에 실행되더라도 파일 잠금(리더 잠금)을 얻은 하나의
+프로세스만 작업을 실행하며, 마지막 실행 시각은 상태 파일에 기록되어 재시작 후에도 유지됩니다.
+"""
+
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+from .metrics import metrics
+from .serialization import read_json_file, write_json_file
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows 등 fcntl이 없는 환경
+    fcntl = None
+
+
+class LeaderLock:
+    """파일 잠금으로 여러 프로세스 중 하나만 리더가 되도록 합니다"""
+
+    def __init__(self, path: str = "scheduler.lock"):
+        self.path = path
+        self._file = None
+
+    @property
+    def is_leader(self) -> bool:
+        return self._file is not None
+
+    def acquire(self) -> bool:
+        """잠금을 시도하고 리더가 되었는지 반환합니다 (대기하지 않음)"""
+        if self._file is not None:
+            return True
+
+        lock_file = open(self.path, 'a+')
+        if fcntl is not None:
+            try:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                lock_file.close()
+                return False
+
+        lock_file.seek(0)
+        lock_file.truncate()
+        lock_file.write(str(os.getpid()))
+        lock_file.flush()
+        self._file = lock_file
+        return True
+
+    def release(self) -> None:
+        """잠금을 해제합니다"""
+        if self._file is None:
+            return
+        if fcntl is not None:
+            fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+        self._file.close()
+        self._file = None
+
+
+class ScheduledJob:
+    """주기적으로 실행할 작업 정보"""
+
+    def __init__(
+        self, name: str, func: Callable[[Callable[[], bool]], object], interval_seconds: float
+    ):
+        self.name = name
+        self.func = func
+        self.interval_seconds = interval_seconds
+        self.last_run = None
+        self.last_duration = None
+        self.last_status = None
+        self.last_result = None
+
+    def is_due(self, now: float) -> bool:
+        return self.last_run is None or now - self.last_run >= self.interval_seconds
+
+    def to_dict(self) -> Dict:
+        return {
+            'name': self.name,
+            'interval_seconds': self.interval_seconds,
+            'last_run': datetime.fromtimestamp(self.last_run).isoformat()
+            if self.last_run
+            else None,
+            'last_duration_seconds': self.last_duration,
+            'last_status': self.last_status,
+            'last_result': self.last_result,
+        }
+
+
+class JobScheduler:
+    """리더 잠금을 가진 프로세스에서만 작업을 실행하는 스케줄러"""
+
+    def __init__(
+        self,
+        lock_path: str = "scheduler.lock",
+        state_path: str = "scheduler_state.json",
+        tick_seconds: float = 60,
+    ):
+        self.lock = LeaderLock(lock_path)
+        self.state_path = state_path
+        self.tick_seconds = tick_seconds
+        self.jobs = {}
+        self._stop_event = threading.Event()
+        self._thread = None
+        self._run_lock = threading.Lock()
+        self._state_loaded = False
+
+    def add_job(
+        self, name: str, func: Callable[[Callable[[], bool]], object], interval_seconds: float
+    ) -> None:
+        """작업을 등록합니다. func는 중단 여부를 확인하는 should_stop 함수를 인자로 받습니다"""
+        self.jobs[name] = ScheduledJob(name, func, interval_seconds)
+
+    def _load_state(self) -> None:
+        """상태 파일에서 마지막 실행 시각을 읽어옵니다"""
+        if not os.path.exists(self.state_path):
+            return
+        try:
+            state = read_json_file(self.state_path)
+        except Exception as e:
+            print(f"스케줄러 상태 로드 오류: {e}")
+            return
+        for name, last_run in state.get('last_run', {}).items():
+            if name in self.jobs:
+                self.jobs[name].last_run = last_run
+
+    def _save_state(self) -> None:
+        """마지막 실행 시각을 상태 파일에 기록합니다"""
+        try:
+            write_json_file(
+                self.state_path,
+                {
+                    'last_run': {
+                        name: job.last_run for name, job in self.jobs.items() if job.last_run
+                    }
+                },
+            )
+        except Exception as e:
+            print(f"스케줄러 상태 저장 오류: {e}")
+
+    def should_stop(self) -> bool:
+        """스케줄러 종료가 요청되었는지 반환합니다"""
+        return self._stop_event.is_set()
+
+    def run_job(self, name: str) -> Dict:
+        """작업을 즉시 실행하고 소요 시간을 메트릭으로 기록합니다"""
+        job = self.jobs[name]
+        with self._run_lock:
+            started = time.time()
+            try:
+                job.last_result = job.func(self.should_stop)
+                job.last_status = 'success'
+            except Exception as e:
+                job.last_result = str(e)
+                job.last_status = 'failed'
+                print(f"예약 작업 '{name}' 실행 오류: {e}")
+
+            job.last_run = started
+            job.last_duration = round(time.time() - started, 3)
+
+            metrics.observe(
+                'avatar_scheduler_job_duration_seconds',
+                job.last_duration,
+                labels={'job': name},
+                help_text='유지보수 작업 실행 시간(초)',
+            )
+            metrics.inc(
+                'avatar_scheduler_job_runs_total',
+                labels={'job': name, 'status': job.last_status},
+                help_text='유지보수 작업 실행 횟수',
+            )
+            if job.last_status == 'success':
+                metrics.set_gauge(
+                    'avatar_scheduler_job_last_success_timestamp',
+                    started,
+                    labels={'job': name},
+                    help_text='유지보수 작업의 마지막 성공 시각(Unix 시간)',
+                )
+
+            self._save_state()
+            return job.to_dict()
+
+    def run_pending(self) -> List[Dict]:
+        """실행 시각이 된 작업들을 실행합니다"""
+        results = []
+        now = time.time()
+        for name, job in self.jobs.items():
+            if self.should_stop():
+                break
+            if job.is_due(now):
+                results.append(self.run_job(name))
+        return results
+
+    def _loop(self) -> None:
+        """리더 잠금을 얻은 경우에만 작업을 실행하는 루프"""
+        while not self._stop_event.is_set():
+            if self.lock.is_leader or self.lock.acquire():
+                if not self._state_loaded:
+                    self._load_state()
+                    self._state_loaded = True
+                self.run_pending()
+            self._stop_event.wait(self.tick_seconds)
+
+    def start(self) -> None:
+        """백그라운드 스레드에서 스케줄러를 시작합니다"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._loop, name='job-scheduler', daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: Optional[float] = 5.0) -> None:
+        """스케줄러를 중지하고 리더 잠금을 해제합니다"""
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(timeout)
+        self.lock.release()
+
+    def get_status(self) -> Dict:
+        """스케줄러와 작업 상태를 반환합니다"""
+        return {
+            'running': bool(self._thread and self._thread.is_alive()),
+            'is_leader': self.lock.is_leader,
+            'jobs': [job.to_dict() for job in self.jobs.values()],
+        }
+
+
+def create_maintenance_scheduler(
+    memory_manager,
+    security_manager,
+    retention_days: int = 365,
+    cleanup_interval_days: int = 30,
+    log_retention_days: int = 30,
+    auto_backup: bool = True,
+    backup_dir: str = "backups",
+    backup_interval_hours: float = 24,
+    backup_keep: int = 7,
+    batch_size: int = 100,
+    batch_pause_seconds: float = 0.05,
+    archive_after_days: int = 30,
+    max_memory_size_mb: float = 0,
+    lock_path: str = "scheduler.lock",
+    state_path: str = "scheduler_state.json",
+    tick_seconds: float = 60,
+) -> JobScheduler:
+    """대화 정리, 로그 정리, 백업 작업이 등록된 스케줄러를 생성합니다
+
+    archive_after_days가 0보다 크면 오래된 대화를 매일 압축 보관하고,
+    max_memory_size_mb가 0보다 크면 보관 후 저장 용량 한도를 적용합니다.
+    """
+    scheduler = JobScheduler(lock_path, state_path, tick_seconds)
+    cleanup_interval = max(cleanup_interval_days, 1) * 86400
+
+    def cleanup_conversations(should_stop):
+        return memory_manager.cleanup_old_data(
+            retention_days,
+            batch_size=batch_size,
+            pause_seconds=batch_pause_seconds,
+            should_stop=should_stop,
+        )
+
+    def cleanup_security_logs(should_stop):
+        return security_manager.cleanup_old_logs(log_retention_days)
+
+    scheduler.add_job('cleanup_conversations', cleanup_conversations, cleanup_interval)
+    scheduler.add_job('cleanup_security_logs', cleanup_security_logs, cleanup_interval)
+
+    if archive_after_days > 0 or max_memory_size_mb > 0:
+
+        def archive_conversations(should_stop):
+            result = {'archived_turns': 0}
+            if archive_after_days > 0:
+                result['archived_turns'] = memory_manager.archive_old_data(
+                    archive_after_days,
+                    batch_size=batch_size,
+                    pause_seconds=batch_pause_seconds,
+                    should_stop=should_stop,
+                )
+            if max_memory_size_mb > 0 and not should_stop():
+                result['quota'] = memory_manager.enforce_quota(
+                    int(max_memory_size_mb * 1024 * 1024)
+                )
+            return result
+
+        scheduler.add_job('archive_conversations', archive_conversations, 86400)
+
+    if auto_backup:
+
+        def backup_memory(should_stop):
+            return memory_manager.create_backup(backup_dir, backup_keep)
+
+        scheduler.add_job('backup_memory', backup_memory, backup_interval_hours * 3600)
+
+    return scheduler
+
+
+# 사이드카 실행 (별도 프로세스에서 작업 실행)
+if __name__ == "__main__":
+    import argparse
+
+    from .memory_manager import MemoryManager
+    from .security import SecurityManager
+
+    parser = argparse.ArgumentParser(description='유지보수 작업 스케줄러')
+    parser.add_argument('--memory-dir', default=os.getenv('MEMORY_DIR', 'memory_data'))
+    parser.add_argument(
+        '--retention-days', type=int, default=int(os.getenv('MEMORY_RETENTION_DAYS', '365'))
+    )
+    parser.add_argument(
+        '--archive-after-days', type=int, default=int(os.getenv('ARCHIVE_AFTER_DAYS', '30'))
+    )
+    parser.add_argument(
+        '--max-memory-size-mb', type=float, default=float(os.getenv('MAX_MEMORY_SIZE_MB', '100'))
+    )
+    parser.add_argument('--run-once', metavar='JOB', help='지정한 작업을 한 번만 실행 (all: 전체)')
+    args = parser.parse_args()
+
+    maintenance = create_maintenance_scheduler(
+        MemoryManager(
+            args.memory_dir, archive_compression=os.getenv('ARCHIVE_COMPRESSION') or None
+        ),
+        SecurityManager(),
+        retention_days=args.retention_days,
+        archive_after_days=args.archive_after_days,
+        max_memory_size_mb=args.max_memory_size_mb,
+        cleanup_interval_days=int(os.getenv('CLEANUP_INTERVAL_DAYS', '30')),
+        auto_backup=os.getenv('AUTO_BACKUP', 'True').lower() == 'true',
+        backup_dir=os.getenv('BACKUP_DIR', 'backups'),
+        lock_path=os.getenv('SCHEDULER_LOCK_FILE', 'scheduler.lock'),
+        state_path=os.getenv('SCHEDULER_STATE_FILE', 'scheduler_state.json'),
+        tick_seconds=float(os.getenv('SCHEDULER_TICK_SECONDS', '60')),
+    )
+
+    if args.run_once:
+        # 앱 워커의 스케줄러가 같은 작업을 동시에 실행하지 않도록 리더 잠금을 얻은 경우에만 실행
+        if not maintenance.lock.acquire():
+            print("⚠️  다른 프로세스가 스케줄러 리더 잠금을 보유하고 있어 실행하지 않습니다.")
+            raise SystemExit(1)
+        try:
+            names = list(maintenance.jobs) if args.run_once == 'all' else [args.run_once]
+            for job_name in names:
+                print(maintenance.run_job(job_name))
+        finally:
+            maintenance.lock.release()
+    else:
+        print("🕒 유지보수 스케줄러를 시작합니다 (Ctrl+C로 종료)")
+        maintenance.start()
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            maintenance.stop()
@@ -4,7 +4,9 @@
 회상치료 AI 아바타의 보안 관련 기능들을 제공합니다.
 """
 
+import os
 import re
+import shutil
 import hashlib
 import hmac
 import secrets
@@ -14,10 +16,27 @@ from datetime import datetime, timedelta
 import ipaddress
 import urllib.parse
 
+from .event_logger import AsyncEventLogger
+from .lazy import LazyInstance, lazy_module_attributes
+from .serialization import loads
+
+
 class SecurityManager:
     """보안 관리 클래스"""
     
-    def __init__(self):
+    def __init__(self, log_file: Optional[str] = None, logging_config=None):
+        if logging_config is None:
+            # 설정 모듈은 dotenv를 불러오므로 인스턴스를 만들 때 불러옴
+            from config.settings import LoggingConfig
+
+            logging_config = LoggingConfig()
+        self.log_file = log_file or logging_config.security_log_file
+        # 요청 스레드를 막지 않도록 큐에 넣고 백그라운드 스레드에서 일괄 기록
+        self.event_logger = AsyncEventLogger(
+            self.log_file,
+            max_bytes=int(logging_config.max_log_size_mb * 1024 * 1024),
+            backup_count=logging_config.backup_count,
+        )
         self.blocked_ips = set()
         self.rate_limit_cache = {}
         self.suspicious_patterns = self._load_suspicious_patterns()
@@ -141,6 +160,28 @@ class SecurityManager:
             'remaining': max_requests - request_count
         }
     
+    def prune_rate_limit_cache(self, max_entries: int, window_minutes: int = 1) -> int:
+        """요청 빈도 기록을 max_entries개 이하로 줄이고 지운 IP 수를 반환합니다
+
+        제한 시간 창이 지난 IP부터 지우고, 그래도 많으면 마지막 요청이 오래된 IP부터 지웁니다.
+        """
+        window_start = time.time() - (window_minutes * 60)
+        removed = 0
+        for client_ip, times in list(self.rate_limit_cache.items()):
+            if not times or times[-1] <= window_start:
+                self.rate_limit_cache.pop(client_ip, None)
+                removed += 1
+
+        excess = len(self.rate_limit_cache) - max_entries
+        if excess > 0:
+            oldest = sorted(
+                self.rate_limit_cache.items(), key=lambda item: item[1][-1] if item[1] else 0
+            )
+            for client_ip, _ in oldest[:excess]:
+                self.rate_limit_cache.pop(client_ip, None)
+                removed += 1
+        return removed
+
     def is_blocked_ip(self, client_ip: str) -> bool:
         """IP가 차단되었는지 확인합니다"""
         try:
@@ -170,7 +211,7 @@ class SecurityManager:
             self.blocked_ips.add(client_ip)
             
             # 로그 기록
-            self._log_security_event(f"IP blocked: {client_ip}, Reason: {reason}")
+            self.log_security_event('ip_blocked', {'reason': reason}, client_ip, priority=True)
             return True
         except ValueError:
             return False
@@ -179,7 +220,7 @@ class SecurityManager:
         """IP 차단을 해제합니다"""
         if client_ip in self.blocked_ips:
             self.blocked_ips.remove(client_ip)
-            self._log_security_event(f"IP unblocked: {client_ip}")
+            self.log_security_event('ip_unblocked', {}, client_ip, priority=True)
             return True
         return False
     
@@ -273,26 +314,22 @@ class SecurityManager:
             
         except (ValueError, TypeError):
             return False
-    
-    def log_security_event(self, event_type: str, details: Dict, client_ip: str = None) -> None:
-        """보안 이벤트를 로깅합니다"""
-        log_entry = {
-            'timestamp': datetime.now().isoformat(),
-            'event_type': event_type,
-            'client_ip': client_ip,
-            'details': details
-        }
-        
-        self._log_security_event(str(log_entry))
-    
+
+    def log_security_event(
+        self, event_type: str, details: Dict, client_ip: str = None, priority: bool = False
+    ) -> None:
+        """보안 이벤트를 로깅합니다 (JSON Lines, 비동기)
+
+        priority가 True인 이벤트(IP 차단 등)는 과부하 시에도 표본 추출 대상에서 제외됩니다.
+        """
+        self.event_logger.log(
+            {'event_type': event_type, 'client_ip': client_ip, 'details': details},
+            priority=priority,
+        )
+
     def _log_security_event(self, message: str) -> None:
-        """보안 이벤트를 파일에 기록합니다"""
-        try:
-            log_file = "security.log"
-            with open(log_file, 'a', encoding='utf-8') as f:
-                f.write(f"{datetime.now().isoformat()} - {message}\n")
-        except Exception as e:
-            print(f"보안 로그 기록 실패: {e}")
+        """자유 형식 메시지를 보안 이벤트로 기록합니다"""
+        self.event_logger.log({'event_type': 'message', 'message': message})
     
     def get_security_headers(self) -> Dict[str, str]:
         """보안 헤더를 반환합니다"""
@@ -339,67 +376,91 @@ class SecurityManager:
         return False
     
     def cleanup_old_logs(self, days_to_keep: int = 30) -> int:
-        """오래된 로그를 정리합니다"""
+        """오래된 로그를 정리합니다
+
+        로그를 한 줄씩 읽어 임시 파일에 다시 쓰므로 로그 크기와 무관하게 메모리 사용량이 일정합니다.
+        로그는 시간순으로 기록되므로 보관 기간 안의 첫 줄 이후는 그대로 복사합니다.
+        다시 쓰는 동안에는 기록기의 파일 잠금을 잡아 그 사이에 추가되는 줄을 잃지 않습니다.
+        """
+        log_file = self.log_file
+        tmp_file = f"{log_file}.tmp.{os.getpid()}"
         try:
-            log_file = "security.log"
-            if not os.path.exists(log_file):
-                return 0
-            
-            cutoff_date = datetime.now() - timedelta(days=days_to_keep)
-            
-            with open(log_file, 'r', encoding='utf-8') as f:
-                lines = f.readlines()
-            
-            filtered_lines = []
-            removed_count = 0
-            
-            for line in lines:
-                try:
-                    # 로그 라인에서 타임스탬프 추출
-                    timestamp_str = line.split(' - ')[0]
-                    log_date = datetime.fromisoformat(timestamp_str)
-                    
-                    if log_date > cutoff_date:
-                        filtered_lines.append(line)
-                    else:
+            with self.event_logger.file_lock():
+                if not os.path.exists(log_file):
+                    return 0
+
+                cutoff_date = datetime.now() - timedelta(days=days_to_keep)
+                removed_count = 0
+
+                with open(log_file, 'r', encoding='utf-8') as src, open(
+                    tmp_file, 'w', encoding='utf-8'
+                ) as dst:
+                    for line in src:
+                        try:
+                            # 로그 라인에서 타임스탬프 추출 (JSON Lines 또는 이전 텍스트 형식)
+                            if line.startswith('{'):
+                                timestamp_str = loads(line)['timestamp']
+                            else:
+                                timestamp_str = line.split(' - ')[0]
+                            log_date = datetime.fromisoformat(timestamp_str)
+                        except Exception:
+                            # 파싱 실패 시 유지
+                            dst.write(line)
+                            continue
+
+                        if log_date > cutoff_date:
+                            if not removed_count:
+                                break  # 정리할 로그가 없으므로 다시 쓰지 않음
+                            dst.write(line)
+                            shutil.copyfileobj(src, dst)
+                            break
                         removed_count += 1
-                except:
-                    # 파싱 실패 시 유지
-                    filtered_lines.append(line)
-            
-            # 필터된 로그 다시 저장
-            with open(log_file, 'w', encoding='utf-8') as f:
-                f.writelines(filtered_lines)
-            
-            return removed_count
+
+                if removed_count:
+                    os.replace(tmp_file, log_file)
+                return removed_count
             
         except Exception as e:
             print(f"로그 정리 오류: {e}")
             return 0
+        finally:
+            # 교체하지 않았거나 도중에 실패한 임시 파일 정리
+            if os.path.exists(tmp_file):
+                os.remove(tmp_file)
+
+
+# 전역 보안 매니저 인스턴스 (처음 사용할 때 생성)
+_security_manager = LazyInstance(SecurityManager)
+__getattr__ = lazy_module_attributes(__name__, security_manager=_security_manager)
+
+
+def get_security_manager() -> SecurityManager:
+    """전역 보안 매니저를 반환합니다 (처음 호출할 때 생성)"""
+    return _security_manager.get()
 
-# 전역 보안 매니저 인스턴스
-security_manager = SecurityManager()
 
 # 편의 함수들
 def sanitize_user_input(text: str) -> str:
     """사용자 입력 정리 편의 함수"""
-    return security_manager.sanitize_input(text)
+    return get_security_manager().sanitize_input(text)
 
 def validate_user_input(text: str) -> Tuple[bool, str]:
     """사용자 입력 검증 편의 함수"""
-    return security_manager.validate_input(text)
+    return get_security_manager().validate_input(text)
+
 
 def check_rate_limit(client_ip: str) -> Tuple[bool, Dict]:
     """요청 빈도 확인 편의 함수"""
-    return security_manager.check_rate_limit(client_ip)
+    return get_security_manager().check_rate_limit(client_ip)
 
 def validate_youtube_url(url: str) -> Tuple[bool, str]:
     """YouTube URL 검증 편의 함수"""
-    return security_manager.validate_youtube_url(url)
+    return get_security_manager().validate_youtube_url(url)
+
 
 def get_security_headers() -> Dict[str, str]:
     """보안 헤더 조회 편의 함수"""
-    return security_manager.get_security_headers()
+    return get_security_manager().get_security_headers()
 
 # 예시 사용법
 if __name__ == "__main__":
@@ -0,0 +1,269 @@
+"""
+사용자별 대화 유사도 검색 인덱스
+
+대화 문장을 문자 n-gram 해시 벡터(float32)로 만들어 사용자별 파일에 이어 붙여 저장하고,
+검색할 때는 메모리 매핑한 행렬과 질의 벡터의 내적으로 상위 k개를 고릅니다.
+질의 쪽에 문서 빈도(df) 기반 IDF 가중치를 곱해, 새 대화를 추가해도 기존 벡터를 다시 계산하지 않습니다.
+NumPy가 설치되어 있어야 동작하며, 없으면 MemoryManager가 키워드 검색으로 대신합니다.
+"""
+
+import importlib.util
+import math
+import os
+import re
+import threading
+import zlib
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from .manifest import user_shard
+from .memory_accounting import approximate_size
+from .serialization import read_json_file, write_json_file
+
+# numpy는 처음 벡터를 만들거나 읽을 때 불러옴 (워커 시작 시간을 줄이기 위함, _load_numpy)
+np = None
+
+_WHITESPACE = re.compile(r'\s+')
+_NON_WORD = re.compile(r'[^\w\s]')
+
+
+def normalize_text(text: str) -> str:
+    """문장부호를 없애고 공백을 하나로 줄인 소문자 문자열을 반환합니다"""
+    return _WHITESPACE.sub(' ', _NON_WORD.sub(' ', text.lower())).strip()
+
+
+def is_available() -> bool:
+    """NumPy가 설치되어 인덱스를 사용할 수 있는지 반환합니다 (불러오지 않고 확인)"""
+    return np is not None or importlib.util.find_spec('numpy') is not None
+
+
+def _load_numpy():
+    """numpy를 불러와 모듈 전역 np에 둡니다"""
+    global np
+    if np is None:
+        import numpy
+
+        np = numpy
+    return np
+
+
+class HashedNgramVectorizer:
+    """문자 n-gram을 고정 차원으로 해싱하는 벡터화기"""
+
+    def __init__(self, dim: int = 512, ngram_range: Tuple[int, int] = (2, 3)):
+        self.dim = dim
+        self.ngram_range = ngram_range
+
+    def features(self, text: str) -> Dict[int, float]:
+        """해시 차원별 부호 있는 빈도를 반환합니다"""
+        padded = f" {normalize_text(text)} "
+        counts = {}
+        for n in range(self.ngram_range[0], self.ngram_range[1] + 1):
+            for start in range(len(padded) - n + 1):
+                gram = padded[start : start + n]
+                if gram.isspace():
+                    continue
+                hashed = zlib.crc32(gram.encode('utf-8'))
+                index = hashed % self.dim
+                # 해시 충돌이 한쪽으로 쌓이지 않도록 상위 비트로 부호를 정함
+                sign = 1.0 if hashed & 0x80000000 else -1.0
+                counts[index] = counts.get(index, 0.0) + sign
+        return counts
+
+    def transform(self, texts: Iterable[str]):
+        """문장 목록을 (문서 수 x dim) float32 행렬로 변환합니다 (로그 TF, L2 정규화)"""
+        _load_numpy()
+        texts = list(texts)
+        matrix = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for index, value in self.features(text).items():
+                if value:
+                    matrix[row, index] = math.copysign(1.0 + math.log(abs(value)), value)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        np.divide(matrix, norms, out=matrix, where=norms > 0)
+        return matrix
+
+
+class SemanticIndex:
+    """사용자별 벡터 파일을 관리하고 내적 검색을 수행하는 클래스
+
+    파일 구성 (index/ab/cd/<user_id>/):
+    - vectors.f32: 행 단위 float32 벡터 (이어 붙이기)
+    - ids.i64: 각 행의 대화 ID
+    - meta.json: 차원, 유효한 행 수, 문서 빈도(df)
+    meta.json의 행 수까지만 유효한 데이터로 보므로, 추가 도중 중단되어도 다음 추가 때 잘라냅니다.
+    """
+
+    def __init__(self, index_dir: str, dim: int = 512, cache_size: int = 256):
+        if not is_available():
+            raise RuntimeError("유사도 검색 인덱스에는 numpy 패키지가 필요합니다.")
+        self.index_dir = index_dir
+        self.vectorizer = HashedNgramVectorizer(dim)
+        self.dim = dim
+        self.cache_size = cache_size
+        self._cache = {}  # user_id -> (meta 수정 시각, vectors, ids, idf)
+        self._lock = threading.Lock()
+
+    def _user_dir(self, user_id: str) -> str:
+        return os.path.join(self.index_dir, *user_shard(user_id), user_id)
+
+    def _load_meta(self, user_id: str) -> Dict:
+        path = os.path.join(self._user_dir(user_id), 'meta.json')
+        if os.path.exists(path):
+            meta = read_json_file(path)
+            if meta.get('dim') == self.dim:
+                return meta
+        return {'dim': self.dim, 'count': 0, 'df': [0] * self.dim}
+
+    @staticmethod
+    def conversation_text(conv: Dict) -> str:
+        """벡터로 만들 대화 문장 (사용자 발화와 아바타 응답)"""
+        return f"{conv.get('user', '')} {conv.get('assistant', '')}"
+
+    def add(self, user_id: str, conversations: List[Dict]) -> int:
+        """대화를 인덱스에 이어 붙이고 추가한 행 수를 반환합니다 (호출자가 사용자 잠금을 보유해야 함)"""
+        conversations = [conv for conv in conversations if conv.get('id')]
+        if not conversations:
+            return 0
+
+        directory = self._user_dir(user_id)
+        os.makedirs(directory, exist_ok=True)
+        meta = self._load_meta(user_id)
+        count = meta['count']
+
+        vectors = self.vectorizer.transform(self.conversation_text(conv) for conv in conversations)
+        ids = np.array([conv['id'] for conv in conversations], dtype=np.int64)
+
+        for name, rows, row_bytes in (('vectors.f32', vectors, self.dim * 4), ('ids.i64', ids, 8)):
+            path = os.path.join(directory, name)
+            with open(path, 'ab') as f:
+                f.truncate(count * row_bytes)  # 이전에 중단된 추가분 제거
+                f.write(rows.tobytes())
+
+        df = np.array(meta['df'], dtype=np.int64) + (vectors != 0).sum(axis=0)
+        meta.update({'count': count + len(conversations), 'df': df.tolist()})
+        write_json_file(os.path.join(directory, 'meta.json'), meta)
+        with self._lock:
+            self._cache.pop(user_id, None)
+        return len(conversations)
+
+    def rebuild(self, user_id: str, conversations: Iterable[Dict], batch_size: int = 1000) -> int:
+        """인덱스를 지우고 주어진 대화로 다시 만듭니다 (호출자가 사용자 잠금을 보유해야 함)"""
+        self.delete(user_id)
+        total = 0
+        batch = []
+        for conv in conversations:
+            batch.append(conv)
+            if len(batch) >= batch_size:
+                total += self.add(user_id, batch)
+                batch = []
+        return total + self.add(user_id, batch)
+
+    def has_index(self, user_id: str) -> bool:
+        """사용자 인덱스가 만들어져 있는지 확인합니다"""
+        return os.path.exists(os.path.join(self._user_dir(user_id), 'meta.json'))
+
+    def delete(self, user_id: str) -> None:
+        """사용자 인덱스 파일을 삭제합니다"""
+        directory = self._user_dir(user_id)
+        for name in ('meta.json', 'vectors.f32', 'ids.i64'):
+            path = os.path.join(directory, name)
+            if os.path.exists(path):
+                os.remove(path)
+        with self._lock:
+            self._cache.pop(user_id, None)
+
+    def memory_usage(self, sample: int = 64) -> Tuple[int, int]:
+        """캐시한 사용자 수와 캐시의 대략적인 바이트 크기를 반환합니다 (메모리 집계용)"""
+        with self._lock:
+            return len(self._cache), approximate_size(self._cache, sample)
+
+    def _load(self, user_id: str):
+        """메모리 매핑한 벡터 행렬과 ID, IDF를 반환합니다 (meta.json이 바뀌면 다시 엶)"""
+        try:
+            version = os.stat(os.path.join(self._user_dir(user_id), 'meta.json')).st_mtime_ns
+        except FileNotFoundError:
+            return None, None, None
+        with self._lock:
+            cached = self._cache.get(user_id)
+            if cached and cached[0] == version:
+                return cached[1:]
+
+        meta = self._load_meta(user_id)
+        count = meta['count']
+        if count == 0:
+            return None, None, None
+
+        _load_numpy()
+        directory = self._user_dir(user_id)
+        vectors = np.memmap(
+            os.path.join(directory, 'vectors.f32'),
+            dtype=np.float32,
+            mode='r',
+            shape=(count, self.dim),
+        )
+        ids = np.fromfile(os.path.join(directory, 'ids.i64'), dtype=np.int64, count=count)
+        df = np.array(meta['df'], dtype=np.float32)
+        idf = np.log((1.0 + count) / (1.0 + df)).astype(np.float32) + 1.0
+
+        with self._lock:
+            if len(self._cache) >= self.cache_size:
+                self._cache.pop(next(iter(self._cache)))
+            self._cache[user_id] = (version, vectors, ids, idf)
+        return vectors, ids, idf
+
+    def search(
+        self,
+        user_id: str,
+        query: str,
+        k: int = 3,
+        min_score: float = 0.0,
+        exclude_ids: Optional[Iterable[int]] = None,
+    ) -> List[Tuple[int, float]]:
+        """질의와 가장 비슷한 대화의 (대화 ID, 점수)를 점수순으로 반환합니다"""
+        vectors, ids, idf = self._load(user_id)
+        if vectors is None or not query.strip():
+            return []
+
+        query_vector = self.vectorizer.transform([query])[0] * idf
+        norm = np.linalg.norm(query_vector)
+        if norm == 0:
+            return []
+        scores = vectors @ (query_vector / norm)
+
+        if exclude_ids:
+            scores = scores.copy()
+            scores[np.isin(ids, list(exclude_ids))] = -np.inf
+
+        k = min(k, len(scores))
+        top = np.argpartition(scores, len(scores) - k)[-k:]
+        top = top[np.argsort(scores[top])[::-1]]
+        return [(int(ids[i]), float(scores[i])) for i in top if scores[i] > min_score]
+
+
+# 예시 사용법
+if __name__ == "__main__":
+    import tempfile
+    import time
+
+    print("=== 유사도 검색 인덱스 테스트 ===")
+    index = SemanticIndex(tempfile.mkdtemp())
+    samples = [
+        '어릴 때 고향 마을에서 모내기를 했어요',
+        '어머니가 끓여주신 된장찌개가 그리워요',
+        '결혼식 날 비가 많이 왔었지요',
+        '군대에서 친구들과 축구를 했어요',
+        '추석에 가족들이 모여 송편을 빚었어요',
+    ]
+    index.add(
+        'test_user',
+        [{'id': i + 1, 'user': text, 'assistant': ''} for i, text in enumerate(samples * 200)],
+    )
+
+    query = '어머니 된장찌개 생각'
+    index.search('test_user', query)
+    started = time.perf_counter()
+    for _ in range(1000):
+        results = index.search('test_user', query)
+    elapsed = (time.perf_counter() - started) / 1000
+    print(f"질의: {query} -> {[(turn_id, round(score, 3)) for turn_id, score in results]}")
+    print(f"대화 {len(samples) * 200}개, 검색 1회 평균 {elapsed * 1e6:.1f}µs")
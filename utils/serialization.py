@@ -0,0 +1,115 @@
+"""
+직렬화 유틸리티
+
+스트리밍 프레임, API 응답, 메모리 파일 저장에 공통으로 사용하는 JSON 직렬화 계층입니다.
+orjson이 설치되어 있으면 이를 사용하고, 없으면 표준 json 모듈로 동작합니다.
+"""
+
+import json
+import os
+import threading
+from datetime import date, datetime
+from typing import Any, Optional
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - 선택적 의존성
+    orjson = None
+
+# 저장 파일을 사람이 읽기 좋게 들여쓰기할지 여부 (디버깅용)
+PRETTY_JSON_DEFAULT = os.getenv('MEMORY_PRETTY_JSON', 'False').lower() == 'true'
+
+# orjson 옵션: dict의 비문자열 키 허용
+_ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS if orjson else 0
+
+
+def backend_name() -> str:
+    """현재 사용 중인 직렬화 백엔드 이름을 반환합니다"""
+    return 'orjson' if orjson else 'json'
+
+
+def _default(obj: Any) -> Any:
+    """표준 json 모듈이 처리하지 못하는 타입을 변환합니다"""
+    if isinstance(obj, (datetime, date)):
+        return obj.isoformat()
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def dumps_bytes(obj: Any, pretty: bool = False, sort_keys: bool = False) -> bytes:
+    """객체를 UTF-8 JSON 바이트로 직렬화합니다"""
+    if orjson:
+        options = _ORJSON_OPTIONS | (orjson.OPT_INDENT_2 if pretty else 0)
+        options |= orjson.OPT_SORT_KEYS if sort_keys else 0
+        return orjson.dumps(obj, default=_default, option=options)
+
+    return _std_dumps(obj, pretty, sort_keys).encode('utf-8')
+
+
+def dumps(obj: Any, pretty: bool = False, sort_keys: bool = False) -> str:
+    """객체를 JSON 문자열로 직렬화합니다 (비ASCII 문자는 그대로 유지)"""
+    if orjson:
+        return dumps_bytes(obj, pretty, sort_keys).decode('utf-8')
+    return _std_dumps(obj, pretty, sort_keys)
+
+
+def _std_dumps(obj: Any, pretty: bool, sort_keys: bool) -> str:
+    """표준 json 모듈로 직렬화합니다 (pretty면 2칸 들여쓰기, 아니면 공백 없이)"""
+    if pretty:
+        return json.dumps(obj, ensure_ascii=False, indent=2, sort_keys=sort_keys, default=_default)
+    return json.dumps(
+        obj, ensure_ascii=False, separators=(',', ':'), sort_keys=sort_keys, default=_default
+    )
+
+
+def loads(data: Any) -> Any:
+    """JSON 문자열 또는 바이트를 역직렬화합니다"""
+    if orjson:
+        return orjson.loads(data)
+    if isinstance(data, (bytes, bytearray, memoryview)):
+        data = bytes(data).decode('utf-8')
+    return json.loads(data)
+
+
+def write_json_file(path: str, obj: Any, pretty: Optional[bool] = None, fsync: bool = False) -> int:
+    """객체를 JSON 파일로 원자적으로 저장하고 기록한 바이트 수를 반환합니다
+
+    임시 파일에 먼저 쓴 뒤 교체하므로, 저장 도중 중단되어도 기존 파일이 손상되지 않습니다.
+    fsync가 True이면 교체 전에 디스크까지 기록을 보장합니다.
+    """
+    if pretty is None:
+        pretty = PRETTY_JSON_DEFAULT
+
+    payload = dumps_bytes(obj, pretty)
+    tmp_path = f"{path}.tmp.{os.getpid()}.{threading.get_ident()}"
+    with open(tmp_path, 'wb') as f:
+        f.write(payload)
+        if fsync:
+            f.flush()
+            os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    return len(payload)
+
+
+def read_json_file(path: str) -> Any:
+    """JSON 파일을 읽어 역직렬화합니다 (압축/들여쓰기 형식 모두 지원)"""
+    with open(path, 'rb') as f:
+        return loads(f.read())
+
+
+# 예시 사용법
+if __name__ == "__main__":
+    print("=== 직렬화 테스트 ===")
+    print(f"백엔드: {backend_name()}")
+
+    frame = {
+        'type': 'sentence',
+        'content': '고향의 봄 노래를 들어보실래요.',
+        'memory_keywords': {'활동': {'음악': ['노래']}},
+        'timestamp': datetime.now(),
+    }
+    compact = dumps(frame)
+    print(f"압축 형식 ({len(compact.encode('utf-8'))} bytes): {compact}")
+    print(f"들여쓰기 형식 ({len(dumps_bytes(frame, pretty=True))} bytes)")
+    print(f"왕복 변환: {loads(compact)['content']}")
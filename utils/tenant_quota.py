@@ -0,0 +1,553 @@
+"""
+시설(테넌트)별 공정 스케줄링과 토큰 예산
+
+여러 요양 시설이 하나의 Gemini API 키를 함께 쓰므로, 한 시설의 그룹 세션이 분당 할당량을 다 써 버리면
+다른 시설의 대화까지 멈춥니다. 모델 호출 앞에서 시설별 예상 토큰(프롬프트 + 출력)을 집계해
+- 시설별 분당 토큰 예산(TPM)을 넘으면 바로 거절하고 (Retry-After는 창이 비워지는 시각까지)
+- API 키 전체 TPM이나 동시 호출 수가 모자라면 가중치 공정 대기열(WFQ)에서 순서를 정해 기다리게 합니다.
+
+분당 사용량은 워커끼리 공유해야 하므로 Redis(INCRBY + EXPIRE)에 두며, Redis가 없으면 상태 파일 경로를 지정했을 때만
+같은 호스트의 워커가 함께 쓰는 잠금 파일(JSON)로, 아니면 프로세스 안의 사전으로 대신합니다. 사용량은 두 분 창을
+겹쳐 보는 근사 이동 창으로 계산하고, 시설별 일간 사용량(프롬프트/출력 토큰, 요청 수)은 청구용으로 따로 누적합니다.
+시설 예산 확인과 예약은 저장소에서 한 번에(원자적으로) 처리하므로 여러 워커가 동시에 예산을 넘기지 않습니다.
+
+토큰 수는 호출 전에 글자 수로 추정해 예약하고, 응답이 끝나면 실제 값(usage_metadata, 없으면 추정값)으로 정산합니다.
+"""
+
+import heapq
+import itertools
+import math
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from .metrics import metrics
+from .serialization import read_json_file, write_json_file
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows 등 fcntl이 없는 환경
+    fcntl = None
+
+try:
+    import redis
+except ImportError:
+    redis = None
+
+# 모든 시설을 합친 (API 키 전체) 사용량 키 이름
+ALL_TENANTS = '_all'
+WINDOW_SECONDS = 60
+USAGE_TTL_SECONDS = 40 * 24 * 3600
+
+
+def estimate_tokens(text: str, chars_per_token: float = 2.0) -> int:
+    """글자 수로 토큰 수를 추정합니다 (한국어는 대략 토큰당 1.5~2.5자)"""
+    if not text:
+        return 0
+    return int(math.ceil(len(text) / chars_per_token))
+
+
+def parse_tenant_policies(text: str) -> Dict[str, Dict[str, float]]:
+    """ "시설=가중치:분당토큰,..." 형식을 {시설: {'weight', 'tpm'}}로 바꿉니다 (분당 토큰 0은 무제한)
+
+    예: "sunshine=2:20000,default=1:5000" (가중치만 쓰면 분당 토큰 무제한)
+    """
+    policies = {}
+    for part in (text or '').split(','):
+        name, _, spec = part.partition('=')
+        name = name.strip()
+        if not name:
+            continue
+        weight, _, tpm = spec.partition(':')
+        try:
+            policies[name] = {'weight': max(float(weight or 1), 0.01), 'tpm': max(int(tpm or 0), 0)}
+        except ValueError:
+            print(f"⚠️  시설 할당량 설정을 무시합니다: {part.strip()}")
+    return policies
+
+
+def parse_facility_keys(text: str) -> Dict[str, str]:
+    """ "API키=시설,..." 형식을 {API 키: 시설}로 바꿉니다 (시설 태블릿마다 발급한 키로 시설을 정함)"""
+    keys = {}
+    for part in (text or '').split(','):
+        key, _, facility = part.partition('=')
+        key, facility = key.strip(), facility.strip()
+        if key and facility:
+            keys[key] = facility
+        elif part.strip():
+            print("⚠️  형식이 잘못된 시설 API 키 설정을 무시합니다.")
+    return keys
+
+
+class LocalQuotaStore:
+    """같은 호스트의 워커가 공유하는 카운터 (fcntl 잠금 JSON 파일, 경로가 없으면 프로세스 내 사전)"""
+
+    def __init__(self, path: str = ''):
+        self.path = path
+        self._lock = threading.Lock()
+        self._memory = {}  # key -> [value, expires_at]
+
+    def _update(self, apply):
+        """잠금을 잡고 상태를 읽어 apply(state)를 실행한 뒤 바뀐 상태를 씁니다"""
+        with self._lock:
+            if not self.path:
+                return apply(self._memory)
+            with open(self.path + '.lock', 'a+') as lock_file:
+                if fcntl is not None:
+                    fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+                state = read_json_file(self.path) if os.path.exists(self.path) else {}
+                result = apply(state)
+                write_json_file(self.path, state)
+                return result
+
+    def _read(self):
+        with self._lock:
+            if not self.path:
+                return dict(self._memory)
+            if not os.path.exists(self.path):
+                return {}
+            with open(self.path + '.lock', 'a+') as lock_file:
+                if fcntl is not None:
+                    fcntl.flock(lock_file.fileno(), fcntl.LOCK_SH)
+                return read_json_file(self.path)
+
+    def incr_many(self, amounts: Dict[str, int], ttl: int) -> None:
+        now = time.time()
+
+        def apply(state):
+            for key in [key for key, (_, expires_at) in state.items() if expires_at <= now]:
+                del state[key]
+            for key, amount in amounts.items():
+                value = state.get(key, [0, 0])[0] + amount
+                state[key] = [value, now + ttl]
+
+        self._update(apply)
+
+    def reserve(
+        self, amounts: Dict[str, int], usage_weights: Dict[str, float], limit: float, ttl: int
+    ) -> bool:
+        """가중 사용량(키 값 × 가중치의 합)에 amounts를 더해도 limit 이하일 때만 amounts를 더하고 True를 반환합니다"""
+        now = time.time()
+
+        def apply(state):
+            usage = sum(
+                state[key][0] * weight
+                for key, weight in usage_weights.items()
+                if key in state and state[key][1] > now
+            )
+            if usage + sum(amounts.values()) > limit:
+                return False
+            for key, amount in amounts.items():
+                value = state[key][0] if key in state and state[key][1] > now else 0
+                state[key] = [value + amount, now + ttl]
+            return True
+
+        return self._update(apply)
+
+    def get_many(self, keys: List[str]) -> List[int]:
+        state = self._read()
+        now = time.time()
+        return [state[key][0] if key in state and state[key][1] > now else 0 for key in keys]
+
+    def scan(self, prefix: str) -> Dict[str, int]:
+        now = time.time()
+        return {
+            key: value
+            for key, (value, expires_at) in self._read().items()
+            if key.startswith(prefix) and expires_at > now
+        }
+
+
+class RedisQuotaStore:
+    """여러 호스트의 워커가 공유하는 Redis 카운터"""
+
+    # KEYS: 사용량 키들 + 더할 키들, ARGV: 사용량 키 수, 한도, TTL, 가중치들, 더할 양들
+    RESERVE_SCRIPT = """
+    local usage_count = tonumber(ARGV[1])
+    local usage = 0
+    for i = 1, usage_count do
+        usage = usage + (tonumber(redis.call('GET', KEYS[i])) or 0) * tonumber(ARGV[3 + i])
+    end
+    local total = 0
+    for i = usage_count + 1, #KEYS do
+        total = total + tonumber(ARGV[3 + i])
+    end
+    if usage + total > tonumber(ARGV[2]) then
+        return 0
+    end
+    for i = usage_count + 1, #KEYS do
+        redis.call('INCRBY', KEYS[i], ARGV[3 + i])
+        redis.call('EXPIRE', KEYS[i], ARGV[3])
+    end
+    return 1
+    """
+
+    def __init__(self, url: str, prefix: str = 'avatar:quota:'):
+        if redis is None:
+            raise RuntimeError("redis 패키지가 설치되지 않았습니다.")
+        self.prefix = prefix
+        self.client = redis.Redis.from_url(url, socket_timeout=0.5)
+        self.client.ping()
+        self._reserve = self.client.register_script(self.RESERVE_SCRIPT)
+
+    def incr_many(self, amounts: Dict[str, int], ttl: int) -> None:
+        pipeline = self.client.pipeline(transaction=False)
+        for key, amount in amounts.items():
+            pipeline.incrby(self.prefix + key, amount)
+            pipeline.expire(self.prefix + key, ttl)
+        pipeline.execute()
+
+    def reserve(
+        self, amounts: Dict[str, int], usage_weights: Dict[str, float], limit: float, ttl: int
+    ) -> bool:
+        """LocalQuotaStore.reserve와 같으며, Lua 스크립트로 확인과 증가를 한 번에 실행합니다"""
+        keys = [self.prefix + key for key in list(usage_weights) + list(amounts)]
+        args = [len(usage_weights), limit, ttl]
+        args += list(usage_weights.values()) + list(amounts.values())
+        return bool(self._reserve(keys=keys, args=args))
+
+    def get_many(self, keys: List[str]) -> List[int]:
+        values = self.client.mget([self.prefix + key for key in keys])
+        return [int(value) if value is not None else 0 for value in values]
+
+    def scan(self, prefix: str) -> Dict[str, int]:
+        keys = [
+            key.decode('utf-8')
+            for key in self.client.scan_iter(match=f"{self.prefix}{prefix}*", count=500)
+        ]
+        values = self.client.mget(keys) if keys else []
+        return {
+            key[len(self.prefix) :]: int(value)
+            for key, value in zip(keys, values)
+            if value is not None
+        }
+
+
+def create_quota_store(redis_url: str = '', local_path: str = ''):
+    """Redis에 연결할 수 있으면 RedisQuotaStore를, 아니면 LocalQuotaStore를 반환합니다
+
+    local_path가 비어 있으면 프로세스 안의 사전에 두므로, 매 요청마다 파일을 잠그고 다시 쓰지 않습니다.
+    """
+    if redis_url:
+        try:
+            return RedisQuotaStore(redis_url)
+        except Exception as e:
+            print(f"⚠️  할당량 저장소로 Redis를 쓸 수 없어 로컬 저장소를 사용합니다: {e}")
+    return LocalQuotaStore(local_path)
+
+
+class QuotaLease:
+    """모델 호출 한 번에 대한 토큰 예약 (settle로 실제 사용량을 정산하고 release로 호출 자리를 반납)"""
+
+    def __init__(
+        self,
+        scheduler: 'TenantScheduler',
+        tenant: str,
+        prompt_tokens: int,
+        output_tokens: int,
+        window: int,
+        waited: float,
+    ):
+        self.scheduler = scheduler
+        self.tenant = tenant
+        self.prompt_tokens = prompt_tokens
+        self.output_tokens = output_tokens
+        self.window = window
+        self.waited = waited
+        self.settled = False
+        self.released = False
+
+    def settle(self, prompt_tokens: int, output_tokens: int) -> None:
+        """예약한 토큰을 실제 사용량으로 바로잡고 청구용 사용량에 더합니다 (한 번만 반영)"""
+        if not self.settled:
+            self.settled = True
+            self.scheduler._settle(self, prompt_tokens, output_tokens)
+
+    def release(self) -> None:
+        """호출 자리를 반납합니다 (정산하지 않았으면 예약한 값으로 정산)"""
+        if self.released:
+            return
+        self.released = True
+        self.settle(self.prompt_tokens, self.output_tokens)
+        self.scheduler._release()
+
+
+class TenantScheduler:
+    """시설별 분당 토큰 예산과 가중치 공정 대기열로 모델 호출 순서를 정합니다"""
+
+    def __init__(
+        self,
+        store,
+        policies: Optional[Dict[str, Dict[str, float]]] = None,
+        global_tpm: int = 0,
+        max_inflight: int = 0,
+        queue_timeout: float = 5.0,
+        default_tenant: str = 'default',
+        chars_per_token: float = 2.0,
+    ):
+        self.store = store
+        self.policies = dict(policies or {})
+        self.policies.setdefault(default_tenant, {'weight': 1.0, 'tpm': 0})
+        self.default_tenant = default_tenant
+        self.global_tpm = global_tpm
+        self.max_inflight = max_inflight
+        self.queue_timeout = queue_timeout
+        self.chars_per_token = chars_per_token
+        self._cond = threading.Condition()
+        self._queue = []  # [종료 태그, 순번, 시설, 시작 태그] 힙
+        self._sequence = itertools.count()
+        self._virtual_time = 0.0
+        self._finish_tags = {}  # 시설 -> 대기 중이거나 처리한 마지막 요청의 종료 태그
+        self._admitted_tags = {}  # 시설 -> 처리한(대기열을 통과한) 마지막 요청의 종료 태그
+        self._inflight = 0
+        self._avg_prompt = 0.0  # 정산된 프롬프트 토큰의 이동 평균 (예약 추정 보정용)
+
+    def resolve_tenant(self, candidate: Optional[str]) -> str:
+        """설정에 있는 시설 이름이면 그대로, 아니면 기본 시설을 반환합니다 (메트릭 레이블 수 제한)"""
+        candidate = (candidate or '').strip()
+        return candidate if candidate in self.policies else self.default_tenant
+
+    def estimate_prompt_tokens(self, text: str) -> int:
+        """호출 전 프롬프트 토큰 예약값 (대화 맥락이 붙기 전이므로 최근 실제 평균보다 작게 잡지 않음)"""
+        return max(estimate_tokens(text, self.chars_per_token), int(self._avg_prompt))
+
+    def _window_keys(self, tenant: str, now: float) -> Tuple[List[str], float]:
+        window = int(now // WINDOW_SECONDS)
+        elapsed = (now % WINDOW_SECONDS) / WINDOW_SECONDS
+        return [f"tpm:{tenant}:{window}", f"tpm:{tenant}:{window - 1}"], elapsed
+
+    def window_usage(self, tenant: str = ALL_TENANTS, now: Optional[float] = None) -> float:
+        """최근 1분 사용 토큰 (현재 창 + 이전 창을 지난 비율만큼 뺀 근사 이동 창)"""
+        now = time.time() if now is None else now
+        keys, elapsed = self._window_keys(tenant, now)
+        current, previous = self.store.get_many(keys)
+        return current + previous * (1 - elapsed)
+
+    def pressure(self, tenant: Optional[str] = None) -> float:
+        """시설 예산과 API 키 전체 한도 중 더 많이 찬 쪽의 사용 비율 (한도가 없으면 0)"""
+        ratios = [0.0]
+        if self.global_tpm:
+            ratios.append(self.window_usage() / self.global_tpm)
+        tpm = self.policies.get(tenant or self.default_tenant, {}).get('tpm')
+        if tenant and tpm:
+            ratios.append(self.window_usage(tenant) / tpm)
+        return max(ratios)
+
+    def retry_after(self) -> int:
+        """현재 분 창이 끝날 때까지 남은 초"""
+        return int(WINDOW_SECONDS - time.time() % WINDOW_SECONDS) + 1
+
+    def _has_capacity(self, cost: int, usage: float) -> bool:
+        """호출 자리와 API 키 전체 한도가 남았는지 (usage는 잠금 밖에서 읽은 전체 사용량, _cond 안에서 호출)"""
+        if self.max_inflight and self._inflight >= self.max_inflight:
+            return False
+        return not self.global_tpm or usage + cost <= self.global_tpm
+
+    def _remove_entry(self, entry: list) -> None:
+        """기다리다 포기한 요청을 대기열에서 빼고 시설의 마지막 종료 태그를 되돌립니다 (_cond 안에서 호출)
+
+        빼지 않으면 처리되지 않은 비용만큼 그 시설의 다음 요청이 뒤로 밀립니다.
+        """
+        tenant = entry[2]
+        self._queue.remove(entry)
+        heapq.heapify(self._queue)
+        self._finish_tags[tenant] = max(
+            (queued[0] for queued in self._queue if queued[2] == tenant),
+            default=self._admitted_tags.get(tenant, 0.0),
+        )
+        self._update_queue_gauge()
+        self._cond.notify_all()
+
+    def _count(self, tenant: str, outcome: str) -> None:
+        metrics.inc(
+            'avatar_tenant_requests_total',
+            labels={'tenant': tenant, 'outcome': outcome},
+            help_text='시설별 모델 호출 요청 수 (admitted, over_budget, timeout)',
+        )
+
+    def acquire(
+        self, tenant: str, prompt_tokens: int, output_tokens: int, timeout: Optional[float] = None
+    ) -> Tuple[Optional[QuotaLease], str]:
+        """토큰을 예약하고 (QuotaLease, 'admitted')를, 거절하면 (None, 'over_budget' 또는 'timeout')을 반환합니다"""
+        tenant = self.resolve_tenant(tenant)
+        policy = self.policies[tenant]
+        cost = prompt_tokens + output_tokens
+        now = time.time()
+        window = int(now // WINDOW_SECONDS)
+        tenant_key = f"tpm:{tenant}:{window}"
+        if policy['tpm']:
+            # 예산 확인과 예약을 저장소에서 한 번에 처리해, 동시에 들어온 요청이 함께 예산을 넘기지 않도록 함
+            keys, elapsed = self._window_keys(tenant, now)
+            reserved = self.store.reserve(
+                {tenant_key: cost},
+                {keys[0]: 1.0, keys[1]: 1 - elapsed},
+                policy['tpm'],
+                WINDOW_SECONDS * 2,
+            )
+            if not reserved:
+                self._count(tenant, 'over_budget')
+                return None, 'over_budget'
+
+        deadline = time.monotonic() + (self.queue_timeout if timeout is None else timeout)
+        started = time.monotonic()
+        with self._cond:
+            # 시작 태그는 가상 시각과 이 시설의 마지막 종료 태그 중 늦은 쪽, 종료 태그는 비용/가중치만큼 뒤
+            start_tag = max(self._virtual_time, self._finish_tags.get(tenant, 0.0))
+            entry = [start_tag + cost / policy['weight'], next(self._sequence), tenant, start_tag]
+            self._finish_tags[tenant] = entry[0]
+            heapq.heappush(self._queue, entry)
+            self._update_queue_gauge()
+
+        # 전체 사용량 조회는 저장소를 거치므로 잠금 밖에서, 대기열 맨 앞의 요청만 함
+        usage = None
+        admitted = False
+        while True:
+            with self._cond:
+                at_head = self._queue[0] is entry
+                if at_head and usage is not None and self._has_capacity(cost, usage):
+                    heapq.heappop(self._queue)
+                    self._virtual_time = max(self._virtual_time, start_tag)
+                    self._admitted_tags[tenant] = max(
+                        self._admitted_tags.get(tenant, 0.0), entry[0]
+                    )
+                    self._inflight += 1
+                    self._update_queue_gauge()
+                    self._cond.notify_all()
+                    admitted = True
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._remove_entry(entry)
+                    break
+                if not at_head or usage is not None:
+                    # 분 창이 흘러 한도가 풀리는 것도 알아채도록 짧게 나눠 기다림
+                    self._cond.wait(min(remaining, 0.25))
+                    at_head = self._queue[0] is entry
+            usage = (self.window_usage() if self.global_tpm else 0.0) if at_head else None
+
+        if not admitted:
+            if policy['tpm']:
+                self.store.incr_many({tenant_key: -cost}, WINDOW_SECONDS * 2)  # 예약 취소
+            self._count(tenant, 'timeout')
+            return None, 'timeout'
+
+        waited = time.monotonic() - started
+        amounts = {f"tpm:{ALL_TENANTS}:{window}": cost}
+        if not policy['tpm']:
+            amounts[tenant_key] = cost
+        self.store.incr_many(amounts, WINDOW_SECONDS * 2)
+        self._count(tenant, 'admitted')
+        metrics.observe(
+            'avatar_tenant_wait_seconds',
+            waited,
+            labels={'tenant': tenant},
+            help_text='시설별 모델 호출 대기 시간',
+        )
+        return QuotaLease(self, tenant, prompt_tokens, output_tokens, window, waited), 'admitted'
+
+    def _settle(self, lease: QuotaLease, prompt_tokens: int, output_tokens: int) -> None:
+        delta = prompt_tokens + output_tokens - lease.prompt_tokens - lease.output_tokens
+        amounts = {}
+        if delta:
+            amounts[f"tpm:{lease.tenant}:{lease.window}"] = delta
+            amounts[f"tpm:{ALL_TENANTS}:{lease.window}"] = delta
+        if amounts:
+            self.store.incr_many(amounts, WINDOW_SECONDS * 2)
+
+        day = datetime.now().strftime('%Y-%m-%d')
+        self.store.incr_many(
+            {
+                f"usage:{day}:{lease.tenant}:prompt_tokens": prompt_tokens,
+                f"usage:{day}:{lease.tenant}:output_tokens": output_tokens,
+                f"usage:{day}:{lease.tenant}:requests": 1,
+            },
+            USAGE_TTL_SECONDS,
+        )
+        self._avg_prompt = (
+            prompt_tokens if not self._avg_prompt else self._avg_prompt * 0.9 + prompt_tokens * 0.1
+        )
+        for kind, tokens in (('prompt', prompt_tokens), ('output', output_tokens)):
+            metrics.inc(
+                'avatar_tenant_tokens_total',
+                tokens,
+                labels={'tenant': lease.tenant, 'kind': kind},
+                help_text='시설별 사용 토큰 (정산 후, 프롬프트/출력)',
+            )
+
+    def _release(self) -> None:
+        with self._cond:
+            self._inflight -= 1
+            self._cond.notify_all()
+
+    def _update_queue_gauge(self) -> None:
+        metrics.set_gauge(
+            'avatar_tenant_queue_depth', len(self._queue), help_text='모델 호출 순서를 기다리는 요청 수'
+        )
+
+    def get_usage(self, day: Optional[str] = None) -> Dict[str, Dict[str, int]]:
+        """시설별 일간 사용량 (청구용, 모든 워커 합계)"""
+        day = day or datetime.now().strftime('%Y-%m-%d')
+        usage = {}
+        for key, value in self.store.scan(f"usage:{day}:").items():
+            _, _, tenant, field = key.split(':', 3)
+            usage.setdefault(tenant, {'prompt_tokens': 0, 'output_tokens': 0, 'requests': 0})[
+                field
+            ] = value
+        return usage
+
+    def get_status(self) -> Dict:
+        with self._cond:
+            queued = [entry[2] for entry in sorted(self._queue)]
+            inflight = self._inflight
+        now = time.time()
+        return {
+            'store': type(self.store).__name__,
+            'global_tpm': self.global_tpm,
+            'global_window_tokens': round(self.window_usage(ALL_TENANTS, now)),
+            'max_inflight': self.max_inflight,
+            'inflight': inflight,
+            'queued': queued,
+            'tenants': {
+                tenant: dict(policy, window_tokens=round(self.window_usage(tenant, now)))
+                for tenant, policy in self.policies.items()
+            },
+        }
+
+
+# 예시 사용법
+if __name__ == "__main__":
+    print("=== 시설별 공정 스케줄링 테스트 ===")
+    scheduler = TenantScheduler(
+        LocalQuotaStore(),
+        parse_tenant_policies("sunshine=2:3000,maple=1:3000"),
+        max_inflight=1,
+        queue_timeout=2.0,
+    )
+    order = []
+
+    def call(tenant):
+        lease, outcome = scheduler.acquire(tenant, 200, 300)
+        if lease is None:
+            order.append((tenant, outcome))
+            return
+        try:
+            time.sleep(0.05)
+            order.append((tenant, f"대기 {lease.waited:.2f}초"))
+            lease.settle(180, 120)
+        finally:
+            lease.release()
+
+    # 한 시설이 요청을 몰아 보내도 다른 시설의 요청이 가중치에 따라 끼어듦
+    threads = [threading.Thread(target=call, args=('maple',)) for _ in range(6)]
+    threads += [threading.Thread(target=call, args=('sunshine',)) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+        time.sleep(0.005)
+    for thread in threads:
+        thread.join()
+    for tenant, outcome in order:
+        print(f"{tenant}: {outcome}")
+    print(scheduler.get_usage())
+    print(scheduler.get_status())
@@ -9,6 +9,8 @@ import json
 from typing import List, Dict, Optional, Tuple
 from datetime import datetime
 
+from .fuzzy_match import JamoFuzzyIndex, decompose_jamo, normalize_term
+
 # 한국어 회상치료 관련 키워드 사전
 MEMORY_KEYWORDS = {
     '시간대': {
@@ -65,8 +67,66 @@ YOUTUBE_SEARCH_MAPPING = {
     }
 }
 
-def extract_memory_keywords(text: str) -> Dict[str, List[str]]:
-    """텍스트에서 회상치료 관련 키워드를 추출합니다."""
+# 자모 근사 매칭 설정 (configure_fuzzy_matching으로 변경)
+FUZZY_MATCH_CONFIG = {'max_distance': 1, 'min_term_length': 6}
+_fuzzy_indexes = {}
+
+
+def configure_fuzzy_matching(max_distance: int = 1, min_term_length: int = 6) -> None:
+    """키워드 근사 매칭의 자모 편집 거리와 최소 키워드 길이(자모 수)를 설정합니다 (0이면 정확히 일치만)."""
+    FUZZY_MATCH_CONFIG.update({'max_distance': max_distance, 'min_term_length': min_term_length})
+    _fuzzy_indexes.clear()
+
+
+def _build_fuzzy_index(items) -> JamoFuzzyIndex:
+    """(키워드, 값) 목록 중 근사 매칭 대상인 긴 키워드로 인덱스를 만듭니다.
+
+    짧은 키워드는 기존의 부분 문자열 검사로 충분하므로 인덱스에 넣지 않습니다.
+    """
+    index = JamoFuzzyIndex(
+        FUZZY_MATCH_CONFIG['max_distance'], FUZZY_MATCH_CONFIG['min_term_length']
+    )
+    for keyword, value in items:
+        if len(decompose_jamo(normalize_term(keyword))) >= index.min_term_length:
+            index.add(keyword, value)
+    return index
+
+
+def _get_fuzzy_index(name: str) -> JamoFuzzyIndex:
+    """키워드 사전별 근사 매칭 인덱스를 반환합니다 (처음 사용할 때 한 번만 만듦)."""
+    index = _fuzzy_indexes.get(name)
+    if index is None:
+        if name == 'memory':
+            items = [
+                (keyword, (category, subcategory))
+                for category, subcategories in MEMORY_KEYWORDS.items()
+                for subcategory, keywords in subcategories.items()
+                for keyword in keywords
+            ]
+        else:
+            items = [
+                (key, search_term)
+                for mapping in YOUTUBE_SEARCH_MAPPING.values()
+                for key, search_term in mapping.items()
+            ]
+        index = _fuzzy_indexes[name] = _build_fuzzy_index(items)
+    return index
+
+
+def find_fuzzy_keywords(text: str, name: str = 'memory'):
+    """띄어쓰기나 자모가 조금 다른 키워드를 찾습니다 (name: 'memory' 또는 'youtube')."""
+    if FUZZY_MATCH_CONFIG['max_distance'] <= 0:
+        return []
+    return _get_fuzzy_index(name).find_in_text(text)
+
+
+def extract_memory_keywords(text: str, fuzzy: bool = False) -> Dict[str, List[str]]:
+    """텍스트에서 회상치료 관련 키워드를 추출합니다.
+
+    fuzzy가 True이면 음성 인식 오류처럼 띄어쓰기나 자모가 조금 다른 표현도 원래 키워드로 찾습니다.
+    근사 매칭은 정확히 일치만 찾는 것보다 수십 배 느리므로, 어르신이 말한 입력을 바로 해석할 때만 켭니다
+    (요약, 통계처럼 저장된 대화를 여러 번 훑는 곳은 기본값을 씀).
+    """
     found_keywords = {}
     
     for category, subcategories in MEMORY_KEYWORDS.items():
@@ -80,6 +140,13 @@ def extract_memory_keywords(text: str) -> Dict[str, List[str]]:
                 if category not in found_keywords:
                     found_keywords[category] = {}
                 found_keywords[category][subcategory] = found_words
+
+    if fuzzy:
+        for match in find_fuzzy_keywords(text, 'memory'):
+            category, subcategory = match.value
+            found_words = found_keywords.setdefault(category, {}).setdefault(subcategory, [])
+            if match.term not in found_words:
+                found_words.append(match.term)
     
     return found_keywords
 
@@ -95,8 +162,12 @@ def extract_emotions(text: str) -> List[str]:
     
     return emotions
 
-def extract_youtube_search_terms(text: str) -> List[str]:
-    """텍스트에서 유튜브 검색어를 추출합니다."""
+
+def extract_youtube_search_terms(text: str, fuzzy: bool = False) -> List[str]:
+    """텍스트에서 유튜브 검색어를 추출합니다.
+
+    fuzzy가 True이면 띄어쓰기나 자모가 조금 다른 노래 제목도 찾습니다 (extract_memory_keywords와 같은 기준으로 켬).
+    """
     search_terms = []
     
     # 직접적인 노래 제목 언급
@@ -109,6 +180,11 @@ def extract_youtube_search_terms(text: str) -> List[str]:
         if era_key in text:
             search_terms.append(search_term)
     
+    # 띄어쓰기나 자모가 조금 다른 노래 제목 ("고향에 봄")
+    if fuzzy:
+        for match in find_fuzzy_keywords(text, 'youtube'):
+            search_terms.append(match.value)
+
     # 패턴 기반 추출
     patterns = [
         r'(?:노래|음악|곡).*?[\'\"](.*?)[\'\"]*?(?:들려|틀어|찾아)',
@@ -124,6 +200,17 @@ def extract_youtube_search_terms(text: str) -> List[str]:
     
     return list(set(search_terms))  # 중복 제거
 
+
+# 노래, 영상, 사진을 보여 달라거나 찾아 달라는 요청 표현
+CONTENT_REQUEST_PATTERN = re.compile(r'(노래|음악|가요|영상|동영상|사진|유튜브).{0,10}(들려|틀어|보여|찾아|검색|추천)')
+
+
+def is_content_request(text: str, fuzzy: bool = False) -> bool:
+    """노래나 영상 같은 콘텐츠를 찾아 달라는 요청인지 확인합니다 (그냥 나누는 이야기는 False)"""
+    return bool(
+        CONTENT_REQUEST_PATTERN.search(text) or extract_youtube_search_terms(text, fuzzy)
+    )
+
 def clean_text(text: str) -> str:
     """텍스트를 정리합니다."""
     # 특수문자 제거 (일부 유지)
@@ -0,0 +1,249 @@
+"""
+/chat 트래픽 기록과 재현용 가짜 모델
+
+운영 중 /chat 요청의 도착 시각, 메시지/컨텍스트 길이, 업스트림 모델의 토큰 조각 타이밍을
+익명화해 JSON Lines로 기록합니다. 메시지와 응답 원문은 남기지 않고 길이만 남기며,
+사용자 ID는 배포별 비밀값으로 HMAC한 앞부분만 기록합니다.
+
+FakeStreamingModel은 기록된 조각 크기와 간격을 그대로 재현하는 모델 대역으로,
+benchmarks/replay_traffic.py로 실제 트래픽 모양을 재현할 때 서버의 Gemini 대신 사용합니다.
+
+기록 한 줄의 필드:
+    t      요청 도착 시각 (유닉스 초, 밀리초 단위)
+    u      익명화한 사용자 ID
+    m, x   메시지 글자 수, 모델에 보낸 전체 컨텍스트 글자 수
+    g      업스트림 조각 간격(ms) 목록 (첫 값은 첫 조각까지의 시간)
+    c      조각 글자 수 목록 (음수는 그 조각에서 문장이 끝났다는 뜻)
+    d      전체 처리 시간(ms)
+    s      결과 (ok / error / cut: 문장 수 제한으로 중간에 끊음)
+"""
+
+import hashlib
+import hmac
+import itertools
+import os
+import random
+import re
+import secrets
+import threading
+import time
+from typing import Dict, Iterator, List, Optional
+
+from .event_logger import AsyncEventLogger
+from .response_text import is_sentence_end
+from .serialization import loads
+
+CAPTURE_VERSION = 1
+
+# 재현 요청 메시지에 넣는 기록 번호 표시 ("[#12] ...")
+REPLAY_MARKER = re.compile(r'\[#(\d+)\]')
+
+# 기록이 없을 때 쓰는 기본 응답 모양 (첫 조각 0.4초, 세 문장)
+DEFAULT_RECORD = {
+    'g': [400, 60, 60, 60, 80, 60, 60, 80, 60, 60],
+    'c': [12, 10, 14, -9, 11, 13, -12, 10, 12, -8],
+}
+
+# 가짜 모델이 max_output_tokens를 지킬 때 토큰 하나로 보는 글자 수
+FAKE_CHARS_PER_TOKEN = 2.0
+
+_FILLER = '그 시절 이야기를 들으니 저도 마음이 따뜻해지네요 어떤 기억이 제일 먼저 떠오르세요 '
+
+
+def anonymize_user(user_id: str, salt: str) -> str:
+    """사용자 ID를 비밀값으로 HMAC한 12자리 식별자를 반환합니다"""
+    return hmac.new(salt.encode('utf-8'), str(user_id).encode('utf-8'), hashlib.sha256).hexdigest()[
+        :12
+    ]
+
+
+def filler_text(length: int, sentence_end: bool = False) -> str:
+    """문장부호 없는 한국어 채움 문자열을 length자만큼 만듭니다 (sentence_end면 마침표로 끝남)"""
+    length = max(length, 1)
+    repeated = _FILLER * (length // len(_FILLER) + 1)
+    if sentence_end:
+        return repeated[: length - 1] + '.'
+    return repeated[:length]
+
+
+class CaptureSession:
+    """요청 하나의 업스트림 조각 타이밍을 모으는 객체"""
+
+    __slots__ = ('recorder', 'record', '_started', '_last')
+
+    def __init__(
+        self, recorder: 'TrafficRecorder', user_hash: str, message_chars: int, context_chars: int
+    ):
+        self.recorder = recorder
+        self._started = self._last = time.perf_counter()
+        self.record = {
+            't': round(time.time(), 3),
+            'u': user_hash,
+            'm': message_chars,
+            'x': context_chars,
+            'g': [],
+            'c': [],
+        }
+
+    def chunk(self, text: str) -> None:
+        """업스트림 조각 하나를 받았을 때 호출합니다"""
+        now = time.perf_counter()
+        self.record['g'].append(int((now - self._last) * 1000))
+        self.record['c'].append(-len(text) if is_sentence_end(text) else len(text))
+        self._last = now
+
+    def finish(self, status: str = 'ok') -> None:
+        """응답이 끝났을 때 기록을 남깁니다"""
+        self.record['d'] = int((time.perf_counter() - self._started) * 1000)
+        self.record['s'] = status
+        self.recorder.write(self.record)
+
+
+class TrafficRecorder:
+    """익명화한 /chat 트래픽 기록기 (AsyncEventLogger로 요청 스레드를 막지 않고 기록)"""
+
+    def __init__(
+        self,
+        path: str,
+        sample_rate: float = 1.0,
+        salt: Optional[str] = None,
+        max_bytes: int = 50 * 1024 * 1024,
+        backup_count: int = 5,
+    ):
+        self.path = path
+        self.sample_rate = sample_rate
+        # 비밀값이 없으면 프로세스마다 새로 만듦 (재시작 후에는 같은 사용자를 이어서 식별하지 못함)
+        self._salt = salt or secrets.token_hex(16)
+        self._random = random.Random()
+        self.logger = AsyncEventLogger(
+            path, max_bytes=max_bytes, backup_count=backup_count, name='traffic_capture'
+        )
+
+    def start(self, user_id: str, message: str, context_chars: int) -> Optional[CaptureSession]:
+        """요청 기록을 시작합니다 (표본에서 빠지면 None)"""
+        if self.sample_rate < 1.0 and self._random.random() >= self.sample_rate:
+            return None
+        return CaptureSession(
+            self, anonymize_user(user_id, self._salt), len(message), context_chars
+        )
+
+    def write(self, record: Dict) -> None:
+        self.logger.log(dict(record, v=CAPTURE_VERSION))
+
+    def get_stats(self) -> Dict:
+        return dict(self.logger.get_stats(), path=self.path, sample_rate=self.sample_rate)
+
+
+def load_capture(path: str) -> List[Dict]:
+    """기록 파일을 읽어 도착 시각순 목록으로 반환합니다 (깨진 줄은 건너뜀)"""
+    records = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                record = loads(line)
+            except ValueError:
+                continue
+            if isinstance(record, dict) and record.get('g') and 't' in record:
+                records.append(record)
+    records.sort(key=lambda record: record['t'])
+    return records
+
+
+class FakeChunk:
+    """스트리밍 응답 조각 (google.generativeai 응답 조각의 text 속성만 흉내 냄)"""
+
+    __slots__ = ('text',)
+
+    def __init__(self, text: str):
+        self.text = text
+
+
+class FakeStreamingModel:
+    """기록된 토큰 타이밍을 재현하는 GenerativeModel 대역
+
+    generate_content(prompt, stream=True)는 기록 하나의 조각 간격만큼 쉬면서 같은 크기의 채움 문자열을 내보냅니다.
+    프롬프트의 마지막 사용자 발화에 "[#번호]"가 있으면 그 번호의 기록을, 없으면 기록을 차례로 씁니다.
+    time_scale을 0.5로 주면 모델이 두 배 빠른 것처럼 재현합니다.
+    failure_rate만큼의 요청은 첫 조각 전에 예외를 내므로 모델 폴백을 시험할 수 있습니다.
+    """
+
+    def __init__(
+        self,
+        records: Optional[List[Dict]] = None,
+        time_scale: float = 1.0,
+        failure_rate: float = 0.0,
+    ):
+        self.records = records or [DEFAULT_RECORD]
+        self.time_scale = time_scale
+        self.failure_rate = failure_rate
+        self._random = random.Random()
+        self._next = itertools.count()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_capture(
+        cls, path: Optional[str] = None, time_scale: float = 1.0, failure_rate: float = 0.0
+    ) -> 'FakeStreamingModel':
+        """기록 파일로 가짜 모델을 만듭니다 (파일이 없으면 기본 응답 모양 사용)"""
+        records = load_capture(path) if path and os.path.exists(path) else None
+        return cls(records, time_scale, failure_rate)
+
+    def _pick(self, prompt: str) -> Dict:
+        last_turn = prompt.rsplit('사용자:', 1)[-1]
+        match = REPLAY_MARKER.search(last_turn)
+        if match:
+            return self.records[int(match.group(1)) % len(self.records)]
+        with self._lock:
+            index = next(self._next)
+        return self.records[index % len(self.records)]
+
+    def _stream(
+        self, record: Dict, max_chars: Optional[int] = None, fail: bool = False
+    ) -> Iterator[FakeChunk]:
+        if fail:
+            raise RuntimeError("가짜 모델 호출 실패 (failure_rate)")
+        sent = 0
+        for gap, size in zip(record['g'], record['c']):
+            if max_chars is not None and sent >= max_chars:
+                return
+            if gap:
+                time.sleep(gap / 1000 * self.time_scale)
+            sent += abs(size)
+            yield FakeChunk(filler_text(abs(size), size < 0))
+
+    def generate_content(self, prompt: str, stream: bool = False, generation_config=None):
+        """기록된 응답 모양대로 응답합니다 (stream=False면 전체 시간만큼 기다린 뒤 한 번에 반환)
+
+        generation_config의 max_output_tokens는 글자 FAKE_CHARS_PER_TOKEN개를 토큰 하나로 보고 지킵니다.
+        스트림 응답은 생성기이므로 close()로 중간에 끊을 수 있습니다.
+        """
+        record = self._pick(prompt)
+        if isinstance(generation_config, dict):
+            max_tokens = generation_config.get('max_output_tokens')
+        else:
+            max_tokens = getattr(generation_config, 'max_output_tokens', None)
+        max_chars = int(max_tokens * FAKE_CHARS_PER_TOKEN) if max_tokens else None
+        fail = bool(self.failure_rate) and self._random.random() < self.failure_rate
+        if stream:
+            return self._stream(record, max_chars, fail)
+        return FakeChunk(''.join(chunk.text for chunk in self._stream(record, max_chars, fail)))
+
+
+# 예시 사용법
+if __name__ == "__main__":
+    import tempfile
+
+    print("=== 트래픽 기록/재현 테스트 ===")
+    capture_path = os.path.join(tempfile.mkdtemp(), 'chat_capture.ndjson')
+    recorder = TrafficRecorder(capture_path, salt='demo')
+    source = FakeStreamingModel(time_scale=0.1)
+    for i in range(3):
+        session = recorder.start(f'user{i}', '고향의 봄 노래 들려줘', 1200)
+        for piece in source.generate_content('사용자: 안녕하세요', stream=True):
+            session.chunk(piece.text)
+        session.finish()
+    recorder.logger.close()
+
+    replay = FakeStreamingModel.from_capture(capture_path, time_scale=0.1)
+    print(f"기록 {len(replay.records)}건: {replay.records[0]}")
+    print(''.join(chunk.text for chunk in replay.generate_content('사용자: [#1] 안녕', stream=True)))
@@ -0,0 +1,385 @@
+"""
+지연 쓰기(write-behind) 저장 유틸리티
+
+응답 스트림이 디스크 쓰기를 기다리지 않도록, 완료된 대화를 큐에 넣고
+백그라운드 스레드가 사용자별로 모아 한 번의 파일 쓰기로 저장(그룹 커밋)합니다.
+
+저장에 실패한 묶음은 버리지 않고 점점 긴 간격으로 다시 시도하며, 그동안 같은 사용자의 새 대화는 그 묶음 뒤에
+붙여 순서를 지킵니다. max_attempts번 모두 실패하거나 종료할 때까지 저장하지 못하면 복구 파일(JSON Lines)에
+남기고, 다음 시작 때 복구 파일의 대화를 다시 저장합니다. 대기 목록에서는 디스크에 남긴 뒤에만 지웁니다.
+"""
+
+import atexit
+import os
+import queue
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from .memory_accounting import approximate_size
+from .metrics import metrics
+from .serialization import dumps, loads
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows 등 fcntl이 없는 환경
+    fcntl = None
+
+# fsync 정책
+FSYNC_POLICIES = ('never', 'commit', 'periodic')
+
+
+class WriteBehindQueue:
+    """대화 저장을 위한 지연 쓰기 큐"""
+
+    def __init__(
+        self,
+        memory_manager,
+        max_queue_size: int = 1000,
+        flush_interval: float = 0.2,
+        fsync_policy: str = 'never',
+        fsync_interval: float = 1.0,
+        enqueue_timeout: float = 0.0,
+        recovery_path: Optional[str] = None,
+        max_attempts: int = 5,
+        retry_base: float = 0.5,
+        retry_max: float = 30.0,
+        max_overflow: Optional[int] = None,
+    ):
+        if fsync_policy not in FSYNC_POLICIES:
+            raise ValueError(f"지원하지 않는 fsync 정책입니다: {fsync_policy}")
+
+        self.memory_manager = memory_manager
+        self.flush_interval = flush_interval
+        self.fsync_policy = fsync_policy
+        self.fsync_interval = fsync_interval
+        self.enqueue_timeout = enqueue_timeout
+        self.recovery_path = recovery_path
+        self.max_attempts = max(max_attempts, 1)
+        self.retry_base = retry_base
+        self.retry_max = retry_max
+        self._queue = queue.Queue(maxsize=max_queue_size)
+        self._pending = {}  # user_id -> 아직 저장되지 않은 대화 목록
+        self.max_overflow = max_queue_size if max_overflow is None else max_overflow
+        self._overflow = []  # 큐가 가득 찼을 때 기록 스레드에 넘길 (user_id, 대화) 목록 (_lock으로 보호)
+        self._retry = OrderedDict()  # user_id -> [다음 시도 시각, 실패 횟수, 대화 목록] (기록 스레드만 사용)
+        self._recovery_guard = threading.Lock()
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread = None
+        self._last_fsync = 0.0
+        self._atexit_registered = False
+
+    def start(self) -> None:
+        """이전에 복구 파일로 남긴 대화를 저장하고 백그라운드 기록 스레드를 시작합니다"""
+        if self._thread and self._thread.is_alive():
+            return
+        self.recover()
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name='write-behind', daemon=True)
+        self._thread.start()
+        if not self._atexit_registered:
+            atexit.register(self.close)
+            self._atexit_registered = True
+
+    def submit(self, user_id: str, conversation: Dict) -> bool:
+        """대화를 저장 대기열에 넣습니다
+
+        큐가 가득 차 있으면 enqueue_timeout만큼만 기다린 뒤 넘침 목록에 붙여 기록 스레드에 넘깁니다.
+        요청 스레드에서는 디스크에 쓰지 않으며, 넘침 목록에 대화가 남아 있는 동안 들어온 대화도 그 뒤에 붙여
+        같은 사용자의 저장 순서를 지킵니다. 넘침 목록까지 가득 차 대화를 버렸을 때만 False를 반환합니다.
+        """
+        if not self._thread or not self._thread.is_alive():
+            self.start()
+
+        item = (user_id, conversation)
+        with self._lock:
+            self._pending.setdefault(user_id, []).append(conversation)
+            queued = False
+            if not self._overflow:
+                try:
+                    self._queue.put_nowait(item)
+                    queued = True
+                except queue.Full:
+                    pass
+
+        if not queued and self.enqueue_timeout > 0 and not self._overflow:
+            try:
+                self._queue.put(item, timeout=self.enqueue_timeout)
+                queued = True
+            except queue.Full:
+                pass
+
+        if not queued:
+            with self._lock:
+                if len(self._overflow) < self.max_overflow:
+                    self._overflow.append(item)
+                    queued = True
+            if not queued:
+                self._discard_pending(user_id, [conversation])
+                metrics.inc(
+                    'avatar_write_behind_dropped_total',
+                    help_text='대기열과 넘침 목록이 모두 가득 차 버린 대화 수',
+                )
+                print(f"⚠️  저장 대기열이 가득 차 대화를 저장하지 못했습니다 (사용자 {user_id})")
+                return False
+            metrics.inc(
+                'avatar_write_behind_overflow_total',
+                help_text='저장 대기열이 가득 차 넘침 목록으로 기록 스레드에 넘긴 대화 수',
+            )
+
+        metrics.set_gauge(
+            'avatar_write_behind_queue_depth', self.pending_count(), help_text='저장 대기 중인 대화 수'
+        )
+        return True
+
+    def pending_count(self) -> int:
+        """아직 디스크에 저장되지 않은 대화 수를 반환합니다"""
+        with self._lock:
+            return sum(len(conversations) for conversations in self._pending.values())
+
+    def memory_usage(self, sample: int = 64) -> Tuple[int, int]:
+        """저장 대기 중인 대화 수와 대기 목록의 대략적인 바이트 크기를 반환합니다 (메모리 집계용)"""
+        with self._lock:
+            return (
+                sum(len(conversations) for conversations in self._pending.values()),
+                approximate_size(self._pending, sample),
+            )
+
+    def get_pending(self, user_id: str) -> List[Dict]:
+        """아직 디스크에 저장되지 않은 사용자의 대화를 반환합니다 (프롬프트 구성용)"""
+        with self._lock:
+            return list(self._pending.get(user_id, []))
+
+    def _discard_pending(self, user_id: str, conversations: List[Dict]) -> None:
+        """저장이 끝났거나 포기한 대화를 대기 목록에서 제거합니다"""
+        done_ids = {id(conv) for conv in conversations}
+        with self._lock:
+            pending = self._pending.get(user_id, [])
+            remaining = [conv for conv in pending if id(conv) not in done_ids]
+            if remaining:
+                self._pending[user_id] = remaining
+            else:
+                self._pending.pop(user_id, None)
+
+    def _should_fsync(self) -> bool:
+        """현재 커밋에서 fsync를 수행할지 결정합니다"""
+        if self.fsync_policy == 'commit':
+            return True
+        if self.fsync_policy == 'periodic':
+            now = time.monotonic()
+            if now - self._last_fsync >= self.fsync_interval:
+                self._last_fsync = now
+                return True
+        return False
+
+    def _commit(self, batch: List) -> None:
+        """대기열에서 꺼낸 대화를 사용자별로 묶어 저장합니다"""
+        groups = OrderedDict()
+        for user_id, conversation in batch:
+            groups.setdefault(user_id, []).append(conversation)
+
+        fsync = self._should_fsync()
+        for user_id, conversations in groups.items():
+            retry = self._retry.get(user_id)
+            if retry is not None:
+                # 먼저 실패한 대화보다 앞서 저장되지 않도록 재시도 묶음 뒤에 붙임
+                retry[2].extend(conversations)
+                continue
+            self._save_group(user_id, conversations, 0, fsync)
+
+    def _save_group(
+        self, user_id: str, conversations: List[Dict], attempt: int, fsync: bool
+    ) -> None:
+        """묶음 하나를 저장하고, 실패하면 재시도를 예약하거나 복구 파일에 남깁니다"""
+        started = time.perf_counter()
+        saved = self.memory_manager.save_conversations(user_id, conversations, fsync=fsync)
+        elapsed = time.perf_counter() - started
+
+        metrics.observe(
+            'avatar_write_behind_commit_seconds', elapsed, help_text='사용자별 그룹 커밋 소요 시간(초)'
+        )
+        metrics.observe(
+            'avatar_write_behind_commit_turns', len(conversations), help_text='그룹 커밋 1회에 저장한 대화 수'
+        )
+        metrics.inc(
+            'avatar_write_behind_commits_total',
+            labels={'status': 'success' if saved else 'failed'},
+            help_text='그룹 커밋 횟수',
+        )
+        if saved:
+            self._discard_pending(user_id, conversations)
+            return
+
+        attempt += 1
+        if attempt < self.max_attempts and not self._stop_event.is_set():
+            delay = min(self.retry_base * 2 ** (attempt - 1), self.retry_max)
+            self._retry[user_id] = [time.monotonic() + delay, attempt, conversations]
+            metrics.inc('avatar_write_behind_retries_total', help_text='저장 실패 후 다시 시도하도록 예약한 횟수')
+            return
+
+        if self._spill(user_id, conversations):
+            self._discard_pending(user_id, conversations)
+        elif not self._stop_event.is_set():
+            # 복구 파일에도 못 남기면 버리지 않고 가장 긴 간격으로 계속 시도
+            self._retry[user_id] = [time.monotonic() + self.retry_max, attempt, conversations]
+        else:
+            print(f"❌ 종료 중 대화 {len(conversations)}개를 저장하지 못했습니다 (사용자 {user_id})")
+
+    def _retry_due(self, force: bool = False) -> None:
+        """재시도 시각이 된 묶음을 다시 저장합니다 (force면 시각과 관계없이 모두)"""
+        now = time.monotonic()
+        for user_id in [
+            user_id for user_id, retry in self._retry.items() if force or retry[0] <= now
+        ]:
+            _, attempt, conversations = self._retry.pop(user_id)
+            self._save_group(user_id, conversations, attempt, self._should_fsync())
+
+    @contextmanager
+    def _recovery_lock(self):
+        """복구 파일 추가/재생을 스레드와 워커 프로세스 사이에서 직렬화합니다"""
+        with self._recovery_guard:
+            if fcntl is None:
+                yield
+                return
+            with open(f"{self.recovery_path}.lock", 'a+') as lock_file:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+    def _spill(self, user_id: str, conversations: List[Dict]) -> bool:
+        """저장하지 못한 대화를 복구 파일에 남깁니다 (fsync까지 끝나면 True)"""
+        if not self.recovery_path:
+            return False
+        record = {
+            'user_id': user_id,
+            'conversations': conversations,
+            'failed_at': datetime.now().isoformat(),
+        }
+        try:
+            with self._recovery_lock():
+                with open(self.recovery_path, 'a', encoding='utf-8') as f:
+                    f.write(dumps(record) + '\n')
+                    f.flush()
+                    os.fsync(f.fileno())
+        except Exception as e:
+            print(f"❌ 복구 파일 기록 실패: {e}")
+            return False
+        metrics.inc(
+            'avatar_write_behind_spilled_total',
+            len(conversations),
+            help_text='저장하지 못해 복구 파일에 남긴 대화 수',
+        )
+        print(f"⚠️  저장하지 못한 대화 {len(conversations)}개를 복구 파일에 남겼습니다 (사용자 {user_id})")
+        return True
+
+    def recover(self) -> int:
+        """복구 파일의 대화를 다시 저장하고 저장한 대화 수를 반환합니다 (실패한 줄은 파일에 남김)"""
+        if not self.recovery_path or not os.path.exists(self.recovery_path):
+            return 0
+        recovered = 0
+        with self._recovery_lock():
+            if not os.path.exists(self.recovery_path):
+                return 0  # 다른 워커가 먼저 처리함
+            remaining = []
+            with open(self.recovery_path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        record = loads(line)
+                    except ValueError:
+                        remaining.append(line)
+                        continue
+                    if self.memory_manager.save_conversations(
+                        record['user_id'], record['conversations']
+                    ):
+                        recovered += len(record['conversations'])
+                    else:
+                        remaining.append(line)
+            if remaining:
+                tmp_path = f"{self.recovery_path}.tmp"
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    f.writelines(remaining)
+                os.replace(tmp_path, self.recovery_path)
+            else:
+                os.remove(self.recovery_path)
+        if recovered:
+            metrics.inc(
+                'avatar_write_behind_recovered_total', recovered, help_text='복구 파일에서 다시 저장한 대화 수'
+            )
+            print(f"✅ 복구 파일의 대화 {recovered}개를 저장했습니다.")
+        return recovered
+
+    def _drain(self, first=None) -> List:
+        """대기열에 쌓인 항목을 모두 꺼내고, 그 뒤에 넘침 목록의 항목을 붙입니다
+
+        넘침 목록이 비어 있지 않은 동안에는 새 대화가 큐에 들어가지 않으므로, 큐의 항목이 항상 넘침 목록의
+        항목보다 먼저 들어온 것입니다.
+        """
+        batch = [first] if first is not None else []
+        while True:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        with self._lock:
+            batch.extend(self._overflow)
+            self._overflow = []
+        return batch
+
+    def _run(self) -> None:
+        """대기열을 주기적으로 비우며 그룹 커밋하고, 실패한 묶음을 다시 시도하는 루프"""
+        while not self._stop_event.is_set():
+            try:
+                first = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                first = None
+
+            if first is not None:
+                # 잠시 기다려 같은 사용자의 대화가 더 모이도록 함
+                self._stop_event.wait(self.flush_interval)
+            batch = self._drain(first)
+            if batch:
+                self._commit(batch)
+                metrics.set_gauge('avatar_write_behind_queue_depth', self.pending_count())
+            self._retry_due()
+
+        # 종료 시 남은 대화를 모두 저장 (재시도 중인 묶음은 한 번 더 시도하고, 실패하면 복구 파일로)
+        remaining = self._drain()
+        if remaining:
+            self._commit(remaining)
+        self._retry_due(force=True)
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """대기 중인 대화가 모두 저장될 때까지 기다립니다"""
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            with self._lock:
+                if not self._pending:
+                    return True
+            time.sleep(0.01)
+        return False
+
+    def close(self, timeout: float = 10.0) -> None:
+        """남은 대화를 저장하고 기록 스레드를 종료합니다"""
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(timeout)
+
+    def get_stats(self) -> Dict:
+        """대기열 상태를 반환합니다"""
+        pending_turns = self.pending_count()
+        with self._lock:
+            overflow = len(self._overflow)
+        return {
+            'queue_depth': self._queue.qsize(),
+            'overflow_depth': overflow,
+            'pending_users': len(self._pending),
+            'pending_turns': pending_turns,
+            'retrying_users': len(self._retry),
+            'fsync_policy': self.fsync_policy,
+        }